@@ -8,12 +8,26 @@ import time
 import json
 import os
 import sys
+from dataclasses import asdict
 from pathlib import Path
 from datetime import datetime
 import click
 from google import genai
 from google.genai import types
 
+from observation import FrameStreamParser, NDJSONFrameWriter
+from observation.backends import FakeBehaviour, RecordingClient, ReplayClient
+from observation.ledger import RunLedger, StepUsage, summarize_usage
+from observation.motion import estimate_frames, plan_video_fps
+from observation.preprocess import PreprocessOptions, preprocess_video
+from observation.salvage import (
+    SalvageResult,
+    continuation_prompt,
+    last_timestamp,
+    merge_continuation,
+    salvage_frames,
+)
+
 # --- Configuration ---
 CACHE_TTL_SECONDS = 3600  # 1 hour
 MODEL_NAME = "gemini-3-pro-preview"
@@ -209,12 +223,33 @@ ANALYSIS_TASKS = {
 }
 
 
+def frames_duration(frames):
+    """Last reported timestamp of a frame list, or None."""
+    if not isinstance(frames, list):
+        return None
+    times = []
+    for f in frames:
+        try:
+            times.append(float(f.get("timestamp", 0)))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return max(times) if times else None
+
+
 class GeminiCacheAnalyzer:
-    def __init__(self, api_key, model="gemini-3-pro-preview", verbose=False):
+    def __init__(self, api_key, model="gemini-3-pro-preview", verbose=False, stream=False,
+                 adaptive_fps=False, ledger_path=None, client=None, preprocess=None,
+                 continue_truncated=False):
         self.api_key = api_key
         self.model_name = model
         self.verbose = verbose
-        self.client = genai.Client(api_key=api_key)
+        self.stream = stream
+        self.adaptive_fps = adaptive_fps
+        self.ledger = RunLedger(Path(ledger_path)) if ledger_path else None
+        self.preprocess = preprocess  # PreprocessOptions or None
+        self.continue_truncated = continue_truncated
+        # Any object with the genai.Client surface (see observation.backends)
+        self.client = client if client is not None else genai.Client(api_key=api_key)
 
     def upload_video(self, video_path: Path):
         """Upload to Gemini File API."""
@@ -237,37 +272,159 @@ class GeminiCacheAnalyzer:
             
         return video_file
 
+    def build_video_parts(self, video_file, fps_plan=None):
+        """Build the cached video part(s).
+
+        Without a plan the whole clip is sampled at FPS.  With an adaptive plan
+        each segment becomes its own clipped part with its own sampling rate.
+        """
+        if not fps_plan:
+            part = types.Part.from_uri(
+                file_uri=video_file.uri,
+                mime_type=video_file.mime_type
+            )
+            part.video_metadata = types.VideoMetadata(fps=FPS)
+            return [part]
+
+        parts = []
+        for seg in fps_plan:
+            part = types.Part.from_uri(
+                file_uri=video_file.uri,
+                mime_type=video_file.mime_type
+            )
+            part.video_metadata = types.VideoMetadata(
+                start_offset=f"{seg.start:.2f}s",
+                end_offset=f"{seg.end:.2f}s",
+                fps=seg.fps,
+            )
+            parts.append(part)
+        return parts
+
+    def stream_json_step(self, chat, step_prompt, step_config, video_path: Path, output_dir: Path):
+        """Stream the JSON step, appending each frame to NDJSON as soon as it completes.
+
+        Returns (full_response_text, SalvageResult, usage_metadata).  Frames
+        parsed before a truncation are kept both in the NDJSON file and in the
+        returned result.  Usage is taken from the last chunk that reports it.
+        """
+        output_dir.mkdir(parents=True, exist_ok=True)
+        ndjson_path = output_dir / f"{video_path.stem}_physics.ndjson"
+        metadata = {
+            "video": video_path.name,
+            "model": self.model_name,
+            "fps": FPS,
+            "streaming": True,
+        }
+
+        parser = FrameStreamParser()
+        frames = []
+        chunks = []
+        usage = None
+        step_start = time.time()
+
+        with NDJSONFrameWriter(ndjson_path, metadata) as writer:
+            for chunk in chat.send_message_stream(step_prompt, config=step_config):
+                if getattr(chunk, "usage_metadata", None) is not None:
+                    usage = chunk.usage_metadata
+                text = chunk.text or ""
+                chunks.append(text)
+                for frame in parser.feed(text):
+                    writer.write_frame(frame)
+                    frames.append(frame)
+                    if self.verbose and len(frames) == 1:
+                        elapsed = time.time() - step_start
+                        print(f" first frame after {elapsed:.1f}s ...", end="", flush=True)
+            for frame in parser.close():
+                writer.write_frame(frame)
+                frames.append(frame)
+
+        if parser.truncated:
+            print(f"    ⚠️ JSON stream ended before the array closed; kept {len(frames)} complete frames")
+        if parser.parse_errors:
+            print(f"    ⚠️ Skipped {parser.parse_errors} unparseable frame objects")
+        if self.verbose:
+            print(f" {len(frames)} frames → {ndjson_path.name} ...", end="", flush=True)
+
+        return "".join(chunks), SalvageResult.from_parser(frames, parser), usage
+
+    def continue_json_step(self, chat, salvage, step_config, step_usages):
+        """Ask once for the frames after a truncated array and merge them in."""
+        after = last_timestamp(salvage.frames)
+        if self.verbose:
+            print(f"  👉 Requesting continuation after t={after} ...", end="", flush=True)
+        call_start = time.time()
+        try:
+            response = chat.send_message(continuation_prompt(after), config=step_config)
+        except Exception as e:
+            print(f"    ⚠️ Continuation request failed: {e}")
+            return salvage, ""
+        step_usages.append(StepUsage.from_usage_metadata(
+            "5_json_continuation", self.model_name,
+            getattr(response, "usage_metadata", None), time.time() - call_start,
+        ))
+
+        more = salvage_frames(response.text or "")
+        merged = merge_continuation(salvage.frames, more.frames)
+        added = len(merged) - len(salvage.frames)
+        if self.verbose:
+            print(f" Done. (+{added} frames)")
+        return SalvageResult(
+            frames=merged,
+            truncated=more.truncated,
+            repaired_frames=salvage.repaired_frames + more.repaired_frames,
+            dropped_objects=salvage.dropped_objects + more.dropped_objects,
+            continued=True,
+        ), response.text or ""
+
     def analyze_video(self, video_path: Path, output_dir: Path):
         """Run the Physics Analysis Pipeline."""
         start_time = time.time()
         print(f"\n🎬 Processing: {video_path.name}")
         
+        # 0a. Optional local crop / downscale / re-encode before upload
+        upload_path = video_path
+        if self.preprocess:
+            try:
+                upload_path = preprocess_video(video_path, self.preprocess, verbose=self.verbose)
+            except Exception as e:
+                print(f"    ⚠️ Pre-processing failed, uploading original: {e}")
+                upload_path = video_path
+
+        # 0b. Optional local motion pass → per-segment sampling rates
+        fps_plan = None
+        if self.adaptive_fps:
+            try:
+                fps_plan = plan_video_fps(upload_path)
+                if self.verbose:
+                    uniform = fps_plan[-1].end * FPS if fps_plan else 0
+                    print(f"  Adaptive FPS: {len(fps_plan)} segments, "
+                          f"~{estimate_frames(fps_plan):.0f} frames (uniform: {uniform:.0f})")
+            except Exception as e:
+                print(f"    ⚠️ Motion analysis failed, using uniform {FPS} FPS: {e}")
+                fps_plan = None
+
         # 1. Upload
         try:
-            video_file = self.upload_video(video_path)
+            video_file = self.upload_video(upload_path)
         except Exception as e:
             print(f"❌ Upload Error: {e}")
             return
 
         # 2. Create Cache with Physics Prompt
         cache_name = f"handball_physics_{int(time.time())}"
+        step_usages = []
         try:
             system_instruction = load_physics_prompt()
             
             if self.verbose:
                 print(f"  Creating Physics Cache (FPS={FPS}, Resolution=HIGH, Model={self.model_name})...")
             
-            part = types.Part.from_uri(
-                file_uri=video_file.uri,
-                mime_type=video_file.mime_type
-            )
-            part.video_metadata = types.VideoMetadata(fps=FPS)
-
             content = types.Content(
                 role="user",
-                parts=[part]
+                parts=self.build_video_parts(video_file, fps_plan)
             )
 
+            call_start = time.time()
             handball_cache = self.client.caches.create(
                 model=self.model_name,
                 config=types.CreateCachedContentConfig(
@@ -277,6 +434,11 @@ class GeminiCacheAnalyzer:
                     ttl=f"{CACHE_TTL_SECONDS}s"
                 )
             )
+            step_usages.append(StepUsage.from_usage_metadata(
+                "cache", self.model_name,
+                getattr(handball_cache, "usage_metadata", None),
+                time.time() - call_start,
+            ))
         except Exception as e:
             print(f"❌ Cache Creation Error: {e}")
             return
@@ -286,6 +448,10 @@ class GeminiCacheAnalyzer:
         config_verification += f"- **Target FPS:** {FPS}\n"
         config_verification += f"- **Spatial Resolution:** HIGH (1120 tokens/frame)\n"
         config_verification += f"- **Cache Name:** {handball_cache.name}\n"
+        if fps_plan:
+            config_verification += f"- **Adaptive FPS Plan:** {len(fps_plan)} segments\n"
+            for seg in fps_plan:
+                config_verification += f"  - {seg.start:.2f}s–{seg.end:.2f}s @ {seg.fps} FPS\n"
         
         if hasattr(handball_cache, 'usage_metadata'):
             usage = handball_cache.usage_metadata
@@ -299,6 +465,7 @@ class GeminiCacheAnalyzer:
         full_report_text += config_verification + "\n---\n\n"
         
         final_json = None
+        json_salvage = None
         
         chat = self.client.chats.create(
             model=self.model_name,
@@ -320,16 +487,34 @@ class GeminiCacheAnalyzer:
                     temperature=0.1  # Very strict for JSON
                 )
             
-            response = chat.send_message(step_prompt, config=step_config)
+            call_start = time.time()
+            if "json" in step_key and self.stream:
+                response_text, json_salvage, usage = self.stream_json_step(
+                    chat, step_prompt, step_config, video_path, output_dir
+                )
+            else:
+                response = chat.send_message(step_prompt, config=step_config)
+                response_text = response.text
+                usage = getattr(response, "usage_metadata", None)
+            step_usage = StepUsage.from_usage_metadata(
+                step_key, self.model_name, usage, time.time() - call_start
+            )
+            step_usages.append(step_usage)
             
             if self.verbose:
-                print(" Done.")
+                print(f" Done. ({step_usage.latency_seconds:.1f}s, "
+                      f"{step_usage.output_tokens + step_usage.thinking_tokens} out tokens)")
             
-            full_report_text += f"\n## [{step_key.upper()}]\n{response.text}\n"
+            full_report_text += f"\n## [{step_key.upper()}]\n{response_text}\n"
             
-            if "json" in step_key:
+            if "json" in step_key and self.stream and json_salvage.frames:
+                final_json = json_salvage.frames
+            elif "json" in step_key:
+                # Streamed parse found no frames (unknown wrapper, bare frame object):
+                # fall back to parsing the full response
+                json_salvage = None
                 try:
-                    text = response.text.replace("```json", "").replace("```", "").strip()
+                    text = response_text.replace("```json", "").replace("```", "").strip()
                     parsed_json = json.loads(text)
                     
                     # Robust Extraction: Handle wrapped responses
@@ -354,9 +539,37 @@ class GeminiCacheAnalyzer:
 
                 except Exception as e:
                     print(f"    ⚠️ JSON Parse Error: {e}")
+                    json_salvage = salvage_frames(response_text)
+                    final_json = json_salvage.frames
+                    print(f"    🩹 Salvaged {len(json_salvage.frames)} complete frames "
+                          f"({json_salvage.repaired_frames} repaired, "
+                          f"{json_salvage.dropped_objects} dropped"
+                          f"{', array truncated' if json_salvage.truncated else ''})")
+
+            if (
+                "json" in step_key
+                and self.continue_truncated
+                and json_salvage is not None
+                and json_salvage.truncated
+                and json_salvage.frames
+            ):
+                json_salvage, continuation_text = self.continue_json_step(
+                    chat, json_salvage, step_config, step_usages
+                )
+                final_json = json_salvage.frames
+                full_report_text += f"\n## [{step_key.upper()}_CONTINUATION]\n{continuation_text}\n"
 
         # 4. Save Outputs
         output_dir.mkdir(parents=True, exist_ok=True)
+        usage_summary = summarize_usage(step_usages)
+        
+        full_report_text += "\n---\n\n**Usage:**\n"
+        for u in step_usages:
+            full_report_text += (
+                f"- {u.step}: prompt={u.prompt_tokens} cached={u.cached_tokens} "
+                f"output={u.output_tokens} thinking={u.thinking_tokens} "
+                f"latency={u.latency_seconds:.1f}s cost=${u.cost_usd:.4f}\n"
+            )
         
         # Save Report
         report_path = output_dir / f"{video_path.stem}_report.md"
@@ -383,12 +596,31 @@ class GeminiCacheAnalyzer:
                 "frames": frames_list
             }
             
+            if fps_plan:
+                wrapper["metadata"]["fps_plan"] = [seg.to_dict() for seg in fps_plan]
+            wrapper["metadata"]["usage"] = usage_summary
+            if upload_path != video_path:
+                wrapper["metadata"]["preprocess"] = asdict(self.preprocess)
+            if json_salvage is not None:
+                wrapper["metadata"]["partial"] = json_salvage.partial
+                wrapper["metadata"]["salvage"] = json_salvage.to_dict()
+            
             with open(json_path, "w") as f:
                 json.dump(wrapper, f, indent=2)
-            print(f"  ✅ Physics JSON saved: {json_path.name}")
+            flag = " (partial)" if json_salvage is not None and json_salvage.partial else ""
+            print(f"  ✅ Physics JSON saved: {json_path.name}{flag}")
         else:
             print("  ❌ No JSON produced.")
 
+        if self.ledger:
+            video_duration = fps_plan[-1].end if fps_plan else frames_duration(final_json)
+            self.ledger.append(step_usages, video=video_path.name, video_duration=video_duration)
+
+        totals = usage_summary["totals"]
+        out_tokens = totals['output_tokens'] + totals['thinking_tokens']
+        print(f"  💰 Tokens: {totals['prompt_tokens']} prompt ({totals['cached_tokens']} cached), "
+              f"{out_tokens} output — ~${totals['cost_usd']:.3f}")
+
         elapsed = time.time() - start_time
         print(f"  ⏱️ Completed in {elapsed:.1f}s")
 
@@ -398,15 +630,52 @@ class GeminiCacheAnalyzer:
 @click.option("--output", "-o", default="data/analyses", help="Output directory")
 @click.option("--model", "-m", default="gemini-3-pro-preview", help="Model to use")
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose output")
+@click.option("--stream", is_flag=True,
+              help="Stream the JSON step and write frames to *_physics.ndjson as they complete")
+@click.option("--adaptive-fps", is_flag=True,
+              help="Plan per-segment FPS from local motion analysis (dense only during fast play)")
+@click.option("--continue-truncated", is_flag=True,
+              help="If the JSON array is cut off, request the missing frames once and merge them")
+@click.option("--ledger", "ledger_path", default=None,
+              help="Run ledger JSONL (default: <output>/stage1_ledger.jsonl)")
+@click.option("--preprocess", is_flag=True,
+              help="Crop/downscale/re-encode locally before upload (cached by content hash)")
+@click.option("--crop", default=None, help="Pre-process ROI: 'auto' or x,y,w,h (pixels or 0-1)")
+@click.option("--target-height", default=720, help="Pre-process: downscale to this height")
+@click.option("--video-bitrate", default="2M", help="Pre-process: H.264 bitrate")
+@click.option("--record", "record_dir", default=None,
+              help="Record every API response into fixture files in this directory")
+@click.option("--replay", "replay_dir", default=None,
+              help="Serve responses from recorded fixtures (no API key or network)")
+@click.option("--fake-latency", default=0.0, help="Replay: simulated seconds per step call")
+@click.option("--fake-failure-rate", default=0.0, help="Replay: probability a call fails")
 @click.option("--api-key", envvar="GEMINI_API_KEY")
-def main(input_path, output, model, verbose, api_key):
-    if not api_key:
+def main(input_path, output, model, verbose, stream, adaptive_fps, continue_truncated,
+         ledger_path,
+         preprocess, crop, target_height, video_bitrate,
+         record_dir, replay_dir, fake_latency, fake_failure_rate, api_key):
+    client = None
+    if replay_dir:
+        client = ReplayClient(Path(replay_dir), FakeBehaviour(
+            step_latency=fake_latency, failure_rate=fake_failure_rate,
+        ))
+    elif not api_key:
         print("Set GEMINI_API_KEY env var.")
         return
+    elif record_dir:
+        client = RecordingClient(genai.Client(api_key=api_key), Path(record_dir))
         
-    analyzer = GeminiCacheAnalyzer(api_key, model=model, verbose=verbose)
     input_path = Path(input_path)
     output = Path(output)
+    ledger_path = ledger_path or output / "stage1_ledger.jsonl"
+
+    analyzer = GeminiCacheAnalyzer(
+        api_key, model=model, verbose=verbose, stream=stream, adaptive_fps=adaptive_fps,
+        continue_truncated=continue_truncated, ledger_path=ledger_path, client=client,
+        preprocess=PreprocessOptions(
+            crop=crop, target_height=target_height, video_bitrate=video_bitrate,
+        ) if preprocess else None,
+    )
     
     if input_path.is_file():
         analyzer.analyze_video(input_path, output)
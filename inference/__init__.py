@@ -8,6 +8,20 @@ from .role_assigner import (
 )
 from .event_detector import EventDetector, Event, EventType
 from .team_classifier import determine_attacking_team, TeamClassification
+from .court_geometry import (
+    assign_zones_from_coordinates,
+    zone_physics,
+    zones_for_points,
+    ZONE_CENTROIDS,
+)
+from .formations import formation_segments, frame_formations, FormationSegment
+from .occupancy import build_occupancy, OccupancyIndex
+from .plausibility import check_plausibility, zone_matrices, PlausibilityFlag
+from .team_windows import TeamWindowClassifier, TeamWindow, classify_possession_phases
+from .teleport_repair import repair_teleports, repair_physics, TeleportRepair
+from .timeline import build_timeline, resample_physics, Timeline
+from .track_stitching import stitch_tracks, stitch_physics, TrackMerge
+from .zone_intervals import build_zone_intervals, ZoneIntervals
 from .zone_validator import validate_zone_transitions, ZoneWarning, are_adjacent, ZONE_ADJACENCY
 
 __all__ = [
@@ -20,8 +34,34 @@ __all__ = [
     "EventType",
     "determine_attacking_team",
     "TeamClassification",
+    "TeamWindowClassifier",
+    "TeamWindow",
+    "classify_possession_phases",
     "validate_zone_transitions",
     "ZoneWarning",
     "are_adjacent",
     "ZONE_ADJACENCY",
+    "build_zone_intervals",
+    "stitch_tracks",
+    "stitch_physics",
+    "TrackMerge",
+    "ZoneIntervals",
+    "build_timeline",
+    "resample_physics",
+    "Timeline",
+    "assign_zones_from_coordinates",
+    "zone_physics",
+    "zones_for_points",
+    "ZONE_CENTROIDS",
+    "check_plausibility",
+    "zone_matrices",
+    "PlausibilityFlag",
+    "build_occupancy",
+    "formation_segments",
+    "frame_formations",
+    "FormationSegment",
+    "OccupancyIndex",
+    "repair_teleports",
+    "repair_physics",
+    "TeleportRepair",
 ]
@@ -0,0 +1,269 @@
+"""
+Metre-coordinate geometry of the 14-zone half-court.
+
+Python mirror of ``HandballCourtRenderer._buildZonePolygons`` in
+``physics_visualizer/static/court-renderer.js``: the same polygons, built from
+the same 6 m / 8 m D-line arcs (same arc sampling) and the x = 3.5 / 7 / 13 /
+16.5 and y = 3 / 10 splits.  Keep the two in sync.
+
+Court frame: 20 m wide × 20 m deep, origin at the bottom-left corner, goal
+line at y = 0, goal posts at (8.5, 0) and (11.5, 0).
+
+The polygons are rasterized once into a lookup grid (5 cm cells by default),
+so mapping any number of (x, y) samples to zones is one vectorized index:
+
+    zones = zones_for_points(xs, ys)      # int array, 0..13
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from math import sqrt
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+COURT_WIDTH = 20.0
+COURT_DEPTH = 20.0
+LEFT_POST_X = 8.5
+RIGHT_POST_X = 11.5
+NUM_ZONES = 14
+DEFAULT_RESOLUTION = 0.05
+
+# Renderer's player-placement centroids (getZoneCoordinates), in metres
+ZONE_CENTROIDS: Dict[int, Tuple[float, float]] = {
+    0: (10.0, 3.0),
+    1: (18.5, 1.5),
+    2: (15.5, 5.5),
+    3: (10.0, 7.0),
+    4: (4.5, 5.5),
+    5: (1.5, 1.5),
+    6: (1.5, 6.5),
+    7: (5.0, 9.0),
+    8: (10.0, 9.0),
+    9: (15.0, 9.0),
+    10: (18.5, 6.5),
+    11: (16.5, 15.0),
+    12: (10.0, 15.0),
+    13: (3.5, 15.0),
+}
+
+Point = Tuple[float, float]
+
+
+def _arc_left(r: float, y_from: float, y_to: float, steps: int = 20) -> List[Point]:
+    """Points on the left-post D-line arc (centre (8.5, 0)) from y_from to y_to."""
+    pts = []
+    for i in range(steps + 1):
+        y = y_from + (y_to - y_from) * i / steps
+        sq = r * r - y * y
+        if sq < 0:
+            continue
+        pts.append((LEFT_POST_X - sqrt(sq), y))
+    return pts
+
+
+def _arc_right(r: float, y_from: float, y_to: float, steps: int = 20) -> List[Point]:
+    """Points on the right-post D-line arc (centre (11.5, 0)) from y_from to y_to."""
+    pts = []
+    for i in range(steps + 1):
+        y = y_from + (y_to - y_from) * i / steps
+        sq = r * r - y * y
+        if sq < 0:
+            continue
+        pts.append((RIGHT_POST_X + sqrt(sq), y))
+    return pts
+
+
+def build_zone_polygons() -> List[np.ndarray]:
+    """The 14 zone polygons (z0-z13) as (N, 2) arrays of metre coordinates."""
+    arc6_x7 = sqrt(36 - (8.5 - 7) ** 2)        # 6m arc at x=7  ≈ 5.81
+    arc6_x13 = sqrt(36 - (13 - 11.5) ** 2)     # 6m arc at x=13 ≈ 5.81
+    arc8_x7 = sqrt(64 - (8.5 - 7) ** 2)        # 8m arc at x=7  ≈ 7.86
+    arc8_x13 = sqrt(64 - (13 - 11.5) ** 2)     # 8m arc at x=13 ≈ 7.86
+    arc8_x3_5 = sqrt(64 - (8.5 - 3.5) ** 2)    # 8m arc at x=3.5 ≈ 6.24
+    arc8_x16_5 = sqrt(64 - (16.5 - 11.5) ** 2)  # 8m arc at x=16.5 ≈ 6.24
+
+    zones: List[List[Point]] = [
+        # z0: goal area (inside 6m D-line)
+        [*_arc_left(6, 0, 6, 30), (11.5, 6), *_arc_right(6, 6, 0, 30)],
+        # z1: right wing corner — sideline, goal line, 6m arc, y=3
+        [(20, 0), (20, 3), *_arc_right(6, 3, 0, 15)],
+        # z2: right-centre 6m-8m, x > 13, y > 3
+        [(13, arc6_x13), *_arc_right(6, arc6_x13, 3, 15), *_arc_right(8, 3, arc8_x13, 15)],
+        # z3: centre 6m-8m, x = 7..13
+        [
+            *_arc_left(6, arc6_x7, 6, 10), (11.5, 6), *_arc_right(6, 6, arc6_x13, 10),
+            (13, arc8_x13), *_arc_right(8, arc8_x13, 8, 8), (8.5, 8),
+            *_arc_left(8, 8, arc8_x7, 8),
+        ],
+        # z4: left-centre 6m-8m (mirror of z2)
+        [
+            *_arc_left(6, 3, arc6_x7, 15), (7, arc8_x7), *_arc_left(8, arc8_x7, 3, 15),
+            (8.5 - sqrt(36 - 9), 3),
+        ],
+        # z5: left wing corner (mirror of z1)
+        [(0, 0), *_arc_left(6, 0, 3, 15), (0, 3)],
+        # z6: far left back, x < 3.5, outside 8m, y = 3..10
+        [(0, 3), (0, 10), (3.5, 10), (3.5, arc8_x3_5), *_arc_left(8, arc8_x3_5, 3, 12)],
+        # z7: left-centre back, x = 3.5..7
+        [
+            (3.5, arc8_x3_5), (3.5, 10), (7, 10), (7, arc8_x7),
+            *_arc_left(8, arc8_x7, arc8_x3_5, 10),
+        ],
+        # z8: centre back, x = 7..13
+        [
+            (7, arc8_x7), (7, 10), (13, 10), (13, arc8_x13),
+            *_arc_right(8, arc8_x13, 8, 8), (8.5, 8), *_arc_left(8, 8, arc8_x7, 8),
+        ],
+        # z9: right-centre back (mirror of z7)
+        [
+            (13, arc8_x13), (13, 10), (16.5, 10), (16.5, arc8_x16_5),
+            *_arc_right(8, arc8_x16_5, arc8_x13, 10),
+        ],
+        # z10: far right back (mirror of z6)
+        [(20, 3), *_arc_right(8, 3, arc8_x16_5, 12), (16.5, 10), (20, 10)],
+        # z11-z13: deep court, y > 10
+        [(13, 10), (13, 20), (20, 20), (20, 10)],
+        [(7, 10), (7, 20), (13, 20), (13, 10)],
+        [(0, 10), (0, 20), (7, 20), (7, 10)],
+    ]
+    return [np.asarray(poly, dtype=float) for poly in zones]
+
+
+def points_in_polygon(x: np.ndarray, y: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd ray-casting test for many points against one polygon."""
+    inside = np.zeros(np.broadcast(x, y).shape, dtype=bool)
+    x0, y0 = polygon[:, 0], polygon[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    for ax, ay, bx, by in zip(x0, y0, x1, y1):
+        if ay == by:
+            continue
+        crosses = (ay > y) != (by > y)
+        x_cross = ax + (y - ay) * (bx - ax) / (by - ay)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+@dataclass
+class ZoneGrid:
+    """Zone of every ``resolution``-metre cell; row = y cell, column = x cell."""
+
+    resolution: float
+    labels: np.ndarray      # (rows, cols) int8
+
+    def lookup(self, x: Any, y: Any) -> np.ndarray:
+        """Zones for metre coordinates; points off the court clamp to the nearest cell."""
+        rows, cols = self.labels.shape
+        col = np.clip(np.floor(np.asarray(x, dtype=float) / self.resolution), 0, cols - 1)
+        row = np.clip(np.floor(np.asarray(y, dtype=float) / self.resolution), 0, rows - 1)
+        return self.labels[row.astype(np.intp), col.astype(np.intp)]
+
+    def zone_at(self, x: float, y: float) -> int:
+        return int(self.lookup(x, y))
+
+
+def _fill_gaps(labels: np.ndarray) -> None:
+    """Give cells in slivers between neighbouring polygons a neighbour's zone."""
+    while (labels < 0).any():
+        for dst, src in (
+            (np.s_[1:, :], np.s_[:-1, :]), (np.s_[:-1, :], np.s_[1:, :]),
+            (np.s_[:, 1:], np.s_[:, :-1]), (np.s_[:, :-1], np.s_[:, 1:]),
+        ):
+            target, neighbour = labels[dst], labels[src]
+            take = (target < 0) & (neighbour >= 0)
+            target[take] = neighbour[take]
+
+
+def build_zone_grid(resolution: float = DEFAULT_RESOLUTION) -> ZoneGrid:
+    """Rasterize the zone polygons at cell centres (first polygon wins on overlap)."""
+    cols = int(round(COURT_WIDTH / resolution))
+    rows = int(round(COURT_DEPTH / resolution))
+    xs = (np.arange(cols) + 0.5) * resolution
+    ys = (np.arange(rows) + 0.5) * resolution
+    grid_x, grid_y = np.meshgrid(xs, ys)
+
+    labels = np.full((rows, cols), -1, dtype=np.int8)
+    for zone, polygon in enumerate(build_zone_polygons()):
+        lo, hi = polygon.min(axis=0), polygon.max(axis=0)
+        box = (grid_x >= lo[0]) & (grid_x <= hi[0]) & (grid_y >= lo[1]) & (grid_y <= hi[1])
+        box &= labels < 0
+        hit = np.zeros_like(box)
+        hit[box] = points_in_polygon(grid_x[box], grid_y[box], polygon)
+        labels[hit] = zone
+    _fill_gaps(labels)
+    return ZoneGrid(resolution=resolution, labels=labels)
+
+
+@lru_cache(maxsize=4)
+def get_zone_grid(resolution: float = DEFAULT_RESOLUTION) -> ZoneGrid:
+    return build_zone_grid(resolution)
+
+
+def zones_for_points(x: Any, y: Any, resolution: float = DEFAULT_RESOLUTION) -> np.ndarray:
+    """Zone number (0-13) for each metre coordinate."""
+    return get_zone_grid(resolution).lookup(x, y)
+
+
+def _has_position(obj: Any) -> bool:
+    return (
+        isinstance(obj, dict)
+        and isinstance(obj.get("x"), (int, float))
+        and isinstance(obj.get("y"), (int, float))
+    )
+
+
+def assign_zones_from_coordinates(frames: Sequence[Dict[str, Any]],
+                                  overwrite: bool = False) -> int:
+    """Fill ``zone`` ("zN") for players/balls that carry metre ``x``/``y``.
+
+    Frames without coordinates are untouched; VLM-reported zones are kept
+    unless ``overwrite``.  All positions go through one grid lookup.
+    Returns the number of zones assigned.
+    """
+    targets = []
+    for frame in frames:
+        for obj in [*frame.get("players", []), frame.get("ball")]:
+            if _has_position(obj) and (overwrite or not obj.get("zone")):
+                targets.append(obj)
+    if not targets:
+        return 0
+
+    zones = zones_for_points([t["x"] for t in targets], [t["y"] for t in targets])
+    for obj, zone in zip(targets, zones.tolist()):
+        obj["zone"] = f"z{zone}"
+    return len(targets)
+
+
+def _needs_zone(obj: Any) -> bool:
+    return _has_position(obj) and not obj.get("zone")
+
+
+def zone_physics(physics_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Physics dict with coordinate zones filled and ``zones_from_coordinates`` counted
+    in the metadata.
+
+    Frames that need zoning are copied first, so the input is not modified;
+    without positions to zone the input is returned as is (the pass is
+    idempotent).
+    """
+    frames = physics_data.get("frames", [])
+    touched = [
+        i for i, frame in enumerate(frames)
+        if any(_needs_zone(obj) for obj in [*frame.get("players", []), frame.get("ball")])
+    ]
+    if not touched:
+        return physics_data
+
+    frames = list(frames)
+    for i in touched:
+        frame = frames[i]
+        ball = frame.get("ball")
+        frames[i] = {
+            **frame,
+            "players": [dict(p) if _needs_zone(p) else p for p in frame.get("players", [])],
+            "ball": dict(ball) if _needs_zone(ball) else ball,
+        }
+    n_located = assign_zones_from_coordinates([frames[i] for i in touched])
+    metadata = dict(physics_data.get("metadata", {}))
+    metadata["zones_from_coordinates"] = n_located
+    return {**physics_data, "metadata": metadata, "frames": frames}
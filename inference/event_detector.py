@@ -99,14 +99,18 @@ class EventDetector:
         roles: Dict[str, str],
         attacker_ids: Set[str] = None,
         defender_ids: Set[str] = None,
+        include_moves: bool = True,
     ):
         """
         Args:
             roles: Dictionary mapping track_id to role
             attacker_ids: Set of track_ids that are attackers
             defender_ids: Set of track_ids that are defenders
+            include_moves: Emit a MOVE event per zone change (off when the
+                zone history is stored as intervals instead)
         """
         self.roles = roles
+        self.include_moves = include_moves
         self.attacker_ids = attacker_ids or set()
         self.defender_ids = defender_ids or set()
         self.event_counter = 0
@@ -318,7 +322,7 @@ class EventDetector:
             self._last_holder_time = frame_n1.get("timestamp", 0)
 
         # --- 5. Player movement ---
-        move_events = self.detect_moves(frame_n, frame_n1)
-        events.extend(move_events)
+        if self.include_moves:
+            events.extend(self.detect_moves(frame_n, frame_n1))
 
         return events
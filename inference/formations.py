@@ -0,0 +1,166 @@
+"""
+Defensive formation recognition from per-frame zone occupancy.
+
+``_signal_formation`` only measures how much of a team sits in z1-z5.  Here
+the defending team's players in each frame become a 14-zone count vector,
+packed into one integer key — two bits per zone, so the low bit of each pair
+is the zone's occupancy mask bit and the high bit marks a second (or third)
+player in it:
+
+    key = Σ min(count[z], 3) << 2z
+
+A frame's formation is a function of its key alone, so the classifier is
+memoised on the key and the whole match is classified with ``np.unique``:
+one classification per distinct key, then one gather per frame.
+
+Formations are read from the three depth bands (the GK zone z0 is ignored):
+
+  line      z1-z5    6-8 m
+  mid       z6-z10   8-10 m
+  deep      z11-z13  10 m+
+
+  6-0          nobody off the line
+  5-1          one advanced defender
+  4-2          two advanced defenders
+  3-3          three advanced, none deep
+  3-2-1        three advanced: two mid, one deep
+  man-marking  more defenders off the line than on it, or two or more deep
+  unknown      fewer than MIN_DEFENDERS field defenders visible
+
+Consecutive frames with the same formation form one segment.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .court_geometry import NUM_ZONES
+from .timeline import monotonic_times, zone_number
+
+LINE_ZONES = (1, 2, 3, 4, 5)
+MID_ZONES = (6, 7, 8, 9, 10)
+DEEP_ZONES = (11, 12, 13)
+MIN_DEFENDERS = 4
+MAX_COUNT = 3  # two bits per zone
+UNKNOWN = "unknown"
+
+
+@dataclass
+class FormationSegment:
+    """A run of frames [start_frame, end_frame) with one defensive formation."""
+
+    formation: str
+    team: str
+    start_frame: int
+    end_frame: int
+    start_time: float
+    end_time: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "formation": self.formation,
+            "team": self.team,
+            "start_frame": self.start_frame,
+            "end_frame": self.end_frame,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+        }
+
+
+def pack_counts(counts: np.ndarray) -> np.ndarray:
+    """(..., 14) zone counts → occupancy keys (2 bits per zone, counts capped at 3)."""
+    capped = np.minimum(counts, MAX_COUNT).astype(np.int64)
+    return (capped << (2 * np.arange(NUM_ZONES))).sum(axis=-1)
+
+
+def unpack_key(key: int) -> List[int]:
+    return [(key >> (2 * z)) & MAX_COUNT for z in range(NUM_ZONES)]
+
+
+def occupancy_mask(key: int) -> int:
+    """14-bit mask of the zones with at least one defender."""
+    return sum(1 << z for z, c in enumerate(unpack_key(key)) if c)
+
+
+@lru_cache(maxsize=None)
+def classify_key(key: int) -> str:
+    """Formation for one packed occupancy key."""
+    counts = unpack_key(key)
+    line = sum(counts[z] for z in LINE_ZONES)
+    mid = sum(counts[z] for z in MID_ZONES)
+    deep = sum(counts[z] for z in DEEP_ZONES)
+    advanced = mid + deep
+
+    if line + advanced < MIN_DEFENDERS:
+        return UNKNOWN
+    if deep >= 2 or advanced > line:
+        return "man-marking"
+    if advanced == 0:
+        return "6-0"
+    if advanced == 1:
+        return "5-1"
+    if advanced == 2:
+        return "4-2"
+    return "3-2-1" if deep == 1 else "3-3"
+
+
+def team_zone_counts(frames: Sequence[Dict[str, Any]],
+                     teams: Sequence[Optional[str]]) -> np.ndarray:
+    """(frames, 14) zone counts of ``teams[i]``'s players in frame i."""
+    frame_col, zone_col = [], []
+    for i, (frame, team) in enumerate(zip(frames, teams)):
+        if team is None:
+            continue
+        for p in frame.get("players", []):
+            zone = zone_number(p.get("zone"))
+            if p.get("team") == team and 0 <= zone < NUM_ZONES:
+                frame_col.append(i)
+                zone_col.append(zone)
+    cell = np.asarray(frame_col, dtype=np.intp) * NUM_ZONES + np.asarray(zone_col, dtype=np.intp)
+    counts = np.bincount(cell, minlength=len(frames) * NUM_ZONES)
+    return counts.reshape(len(frames), NUM_ZONES)
+
+
+def frame_formations(frames: Sequence[Dict[str, Any]],
+                     defending: Union[str, Sequence[Optional[str]]]) -> List[str]:
+    """Formation of the defending team in every frame.
+
+    ``defending`` is one team colour for the whole clip, or one per frame
+    (e.g. from possession phases); frames with ``None`` are ``unknown``.
+    """
+    teams = [defending] * len(frames) if isinstance(defending, str) else list(defending)
+    if not frames:
+        return []
+    keys, inverse = np.unique(pack_counts(team_zone_counts(frames, teams)), return_inverse=True)
+    labels = np.array([classify_key(int(k)) for k in keys], dtype=object)
+    return labels[inverse.reshape(-1)].tolist()
+
+
+def formation_segments(frames: Sequence[Dict[str, Any]],
+                       defending: Union[str, Sequence[Optional[str]]],
+                       include_unknown: bool = False) -> List[FormationSegment]:
+    """Run-length segments of ``frame_formations`` (per defending team)."""
+    formations = frame_formations(frames, defending)
+    if not formations:
+        return []
+    teams = [defending] * len(frames) if isinstance(defending, str) else list(defending)
+    times = monotonic_times(list(frames))
+
+    runs = list(zip(formations, teams))
+    bounds = [i for i in range(1, len(runs)) if runs[i] != runs[i - 1]]
+    segments = []
+    for a, b in zip([0, *bounds], [*bounds, len(runs)]):
+        formation, team = runs[a]
+        if formation == UNKNOWN and not include_unknown:
+            continue
+        segments.append(FormationSegment(
+            formation=formation,
+            team=team or UNKNOWN,
+            start_frame=a,
+            end_frame=b,
+            start_time=float(times[a]),
+            end_time=float(times[b - 1]),
+        ))
+    return segments
@@ -0,0 +1,143 @@
+"""
+Zone occupancy index: heatmaps over any time range by prefix-sum subtraction.
+
+One pass over the frames counts player observations per (frame, group,
+zone) and takes the cumulative sum along the frame axis, once per grouping:
+
+  tracks   (frames + 1, tracks, 14)   one row per track_id
+  roles    (frames + 1, roles, 14)    role at the time of the observation
+  teams    (frames + 1, teams, 14)    team at the time of the observation
+  all      (frames + 1, 14)           every player observation
+
+Row i of a cube counts frames [0, i), so the heatmap of frames [lo, hi) is
+
+    cube[hi, g] - cube[lo, g]
+
+— 14 subtractions, whatever the range length.  Counts are player-frames: for
+one track they are the number of frames it was seen in each zone.  Roles are
+only present in Stage 2 (events) frames; built from raw physics frames the
+role cube is empty.
+
+    index = build_occupancy(frames)
+    index.heatmap(start=12.0, end=30.0, role="LB")
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .court_geometry import NUM_ZONES
+from .timeline import monotonic_times, zone_number
+
+GROUPINGS = ("track", "role", "team")
+
+
+@dataclass
+class OccupancyIndex:
+    times: np.ndarray               # (frames,) non-decreasing
+    labels: Dict[str, List[str]]    # grouping -> group names (cube row order)
+    cubes: Dict[str, np.ndarray]    # grouping -> (frames + 1, groups, 14) int32
+    total: np.ndarray               # (frames + 1, 14) int32
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.times.nbytes + self.total.nbytes
+                + sum(cube.nbytes for cube in self.cubes.values()))
+
+    def frame_range(self, start: Optional[float] = None,
+                    end: Optional[float] = None) -> Tuple[int, int]:
+        """Frames with ``start <= time < end`` (open ends cover the whole match)."""
+        lo = 0 if start is None else int(np.searchsorted(self.times, start, side="left"))
+        hi = len(self.times) if end is None else int(np.searchsorted(self.times, end, side="left"))
+        return lo, max(lo, hi)
+
+    def counts(self, lo: int, hi: int, grouping: Optional[str] = None,
+               label: Optional[str] = None) -> np.ndarray:
+        """(14,) observations per zone in frames [lo, hi), for one group or all players."""
+        if grouping is None:
+            return self.total[hi] - self.total[lo]
+        if grouping not in self.cubes:
+            raise ValueError(f"Unknown grouping {grouping!r} (expected one of {GROUPINGS})")
+        names = self.labels[grouping]
+        if label not in names:
+            return np.zeros(NUM_ZONES, dtype=np.int32)
+        g = names.index(label)
+        return self.cubes[grouping][hi, g] - self.cubes[grouping][lo, g]
+
+    def heatmap(self, start: Optional[float] = None, end: Optional[float] = None,
+                track_id: Optional[str] = None, role: Optional[str] = None,
+                team: Optional[str] = None) -> Dict[str, Any]:
+        """Per-zone counts and shares over ``[start, end)`` for at most one filter."""
+        filters = {k: v for k, v in (("track", track_id), ("role", role), ("team", team))
+                   if v is not None}
+        if len(filters) > 1:
+            raise ValueError("Filter by at most one of track_id, role, team")
+        grouping, label = next(iter(filters.items()), (None, None))
+
+        lo, hi = self.frame_range(start, end)
+        counts = self.counts(lo, hi, grouping, label)
+        total = int(counts.sum())
+        return {
+            "start": start,
+            "end": end,
+            "frames": hi - lo,
+            "filter": {grouping: label} if grouping else {},
+            "total": total,
+            "counts": counts.tolist(),
+            "share": (counts / total).round(4).tolist() if total else [0.0] * NUM_ZONES,
+        }
+
+
+def _cumulative(frame_col: np.ndarray, group_col: np.ndarray, zone_col: np.ndarray,
+                n_frames: int, n_groups: int) -> np.ndarray:
+    # Scatter the (sparse) observation counts straight into the int32 cube and
+    # prefix-sum it in place: peak memory is the cube itself, not a dense
+    # int64 bincount of the same shape next to it
+    cube = np.zeros((n_frames + 1, n_groups, NUM_ZONES), dtype=np.int32)
+    cell = (frame_col * n_groups + group_col) * NUM_ZONES + zone_col
+    cells, counts = np.unique(cell, return_counts=True)
+    cube.reshape(-1)[cells] = counts
+    np.cumsum(cube, axis=0, out=cube)
+    return cube
+
+
+def build_occupancy(frames: Sequence[Dict[str, Any]]) -> OccupancyIndex:
+    """Occupancy cubes for every track, role and team in the frames."""
+    frame_col: List[int] = []
+    zone_col: List[int] = []
+    group_cols: Dict[str, List[int]] = {g: [] for g in GROUPINGS}
+    groups: Dict[str, Dict[str, int]] = {g: {} for g in GROUPINGS}
+
+    for i, frame in enumerate(frames):
+        for p in frame.get("players", []):
+            zone = zone_number(p.get("zone"))
+            if not 0 <= zone < NUM_ZONES:
+                continue
+            frame_col.append(i + 1)
+            zone_col.append(zone)
+            for grouping, key in zip(GROUPINGS, ("track_id", "role", "team")):
+                value = p.get(key)
+                names = groups[grouping]
+                # Unlabelled observations still count in "all" but not in the cube
+                group_cols[grouping].append(
+                    -1 if value is None else names.setdefault(str(value), len(names))
+                )
+
+    frames_arr = np.asarray(frame_col, dtype=np.intp)
+    zones_arr = np.asarray(zone_col, dtype=np.intp)
+    n = len(frames)
+    cubes, labels = {}, {}
+    for grouping in GROUPINGS:
+        col = np.asarray(group_cols[grouping], dtype=np.intp)
+        keep = col >= 0
+        labels[grouping] = list(groups[grouping])
+        cubes[grouping] = _cumulative(frames_arr[keep], col[keep], zones_arr[keep],
+                                      n, len(labels[grouping]))
+    total = _cumulative(frames_arr, np.zeros_like(frames_arr), zones_arr, n, 1)[:, 0]
+
+    return OccupancyIndex(times=monotonic_times(list(frames)), labels=labels, cubes=cubes,
+                          total=total)
@@ -0,0 +1,313 @@
+"""
+Physical plausibility of zone transitions.
+
+``validate_zone_transitions`` only knows adjacency: z1→z9 passes (the zones
+are listed as adjacent) even in 1/16 s, and z8→z12 over two seconds fails.
+This module turns every transition into an implied speed using the court
+geometry and flags the ones no player (or ball) could achieve.
+
+Zone matrices (14 × 14, built once from ``court_geometry`` and
+``ZONE_ADJACENCY``):
+  centroid_distance  metres between the renderer's zone centroids
+  separation         shortest metre gap between the two zone polygons
+                     (0 for touching zones) — a lower bound on travel;
+                     precomputed in ``ZONE_SEPARATION`` (``compute_separation``
+                     rebuilds it from the polygons, which takes a fraction of a
+                     second — too slow for every Stage 2 run)
+  path_distance      shortest path through adjacent zones, centroid to centroid
+  hops / next_hop    adjacency-graph hop counts and route successors
+
+Every player observation in the match is flattened to columns once, sorted
+by (track, time), and each consecutive pair of a track's observations is a
+transition; speeds for all of them are a single gather and divide.
+
+    min_speed = separation[z_a, z_b] / dt    (flagged above the speed limit)
+    speed     = centroid_distance[z_a, z_b] / dt
+
+``severity`` is ``min_speed / max_speed``: above 1 the move is implausible,
+and the further above, the more certainly the zone labels are wrong.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .court_geometry import NUM_ZONES, ZONE_CENTROIDS, build_zone_polygons
+from .timeline import DEFAULT_FPS, parse_timestamp, zone_number
+from .zone_validator import ZONE_ADJACENCY
+
+PLAYER_MAX_SPEED = 9.0     # m/s, elite handball sprint
+BALL_MAX_SPEED = 35.0      # m/s, hardest shots
+MIN_DT = 1.0 / DEFAULT_FPS  # duplicate/out-of-order timestamps count as one frame
+EDGE_SAMPLE_SPACING = 0.1  # metres between points when densifying polygon edges
+
+# compute_separation() in centimetres; tests check it against the polygons
+ZONE_SEPARATION = np.array([
+    [   0,    0,    0,    0,    0,    0,  200,  199,  200,  199,  200,  416,  400,  416],
+    [   0,    0,    0,  464, 1009, 1339, 1359, 1085,  610,  325,    0,  700,  792, 1196],
+    [   0,    0,    0,    0,  600, 1009,  950,  600,    0,    0,    0,  214,  214,  637],
+    [   0,  464,    0,    0,    0,  464,  350,    0,    0,    0,  350,  211,  200,  211],
+    [   0, 1009,  600,    0,    0,    0,    0,    0,    0,  600,  950,  637,  214,  214],
+    [   0, 1339, 1009,  464,    0,    0,    0,  325,  610, 1085, 1359, 1196,  792,  700],
+    [ 200, 1359,  950,  350,    0,    0,    0,    0,  350,  950, 1300,  950,  350,    0],
+    [ 199, 1085,  600,    0,    0,  325,    0,    0,    0,  600,  950,  600,    0,    0],
+    [ 200,  610,    0,    0,    0,  610,  350,    0,    0,    0,  350,    0,    0,    0],
+    [ 199,  325,    0,    0,  600, 1085,  950,  600,    0,    0,    0,    0,    0,  600],
+    [ 200,    0,    0,  350,  950, 1359, 1300,  950,  350,    0,    0,    0,  350,  950],
+    [ 416,  700,  214,  211,  637, 1196,  950,  600,    0,    0,    0,    0,    0,  600],
+    [ 400,  792,  214,  200,  214,  792,  350,    0,    0,    0,  350,    0,    0,    0],
+    [ 416, 1196,  637,  211,  214,  700,    0,    0,    0,  600,  950,  600,    0,    0],
+]) / 100.0
+
+
+@dataclass(frozen=True)
+class ZoneMatrices:
+    centroid_distance: np.ndarray   # (14, 14) float
+    separation: np.ndarray          # (14, 14) float
+    path_distance: np.ndarray       # (14, 14) float
+    hops: np.ndarray                # (14, 14) int
+    next_hop: np.ndarray            # (14, 14) int, next zone on the shortest path a→b
+
+    def route(self, zone_from: int, zone_to: int) -> List[int]:
+        """Zones on the shortest adjacency path, both ends included."""
+        route = [zone_from]
+        while route[-1] != zone_to:
+            route.append(int(self.next_hop[route[-1], zone_to]))
+        return route
+
+
+def _densify(polygon: np.ndarray, spacing: float) -> np.ndarray:
+    points = []
+    for a, b in zip(polygon, np.roll(polygon, -1, axis=0)):
+        n = max(int(np.ceil(np.hypot(*(b - a)) / spacing)), 1)
+        points.append(a + (b - a) * (np.arange(n)[:, None] / n))
+    return np.concatenate(points)
+
+
+def _floyd_warshall(weights: np.ndarray):
+    n = len(weights)
+    dist = weights.copy()
+    next_hop = np.where(np.isfinite(weights), np.arange(n)[None, :], -1)
+    np.fill_diagonal(next_hop, np.arange(n))
+    for k in range(n):
+        via = dist[:, k, None] + dist[None, k, :]
+        better = via < dist
+        dist = np.where(better, via, dist)
+        next_hop = np.where(better, next_hop[:, k, None], next_hop)
+    return dist, next_hop
+
+
+def compute_separation() -> np.ndarray:
+    """Shortest metre gap between every pair of zone polygons (sampled outlines)."""
+    outlines = [_densify(p, EDGE_SAMPLE_SPACING) for p in build_zone_polygons()]
+    separation = np.zeros((NUM_ZONES, NUM_ZONES))
+    for a in range(NUM_ZONES):
+        for b in range(a + 1, NUM_ZONES):
+            gap = np.linalg.norm(outlines[a][:, None, :] - outlines[b][None, :, :], axis=2).min()
+            # Touching polygons come out at about the sampling spacing
+            separation[a, b] = separation[b, a] = gap if gap > EDGE_SAMPLE_SPACING else 0.0
+    return separation
+
+
+@lru_cache(maxsize=1)
+def zone_matrices() -> ZoneMatrices:
+    centroids = np.array([ZONE_CENTROIDS[z] for z in range(NUM_ZONES)])
+    centroid_distance = np.linalg.norm(centroids[:, None, :] - centroids[None, :, :], axis=2)
+    separation = ZONE_SEPARATION.copy()
+
+    edges = np.full((NUM_ZONES, NUM_ZONES), np.inf)
+    hop_edges = np.full((NUM_ZONES, NUM_ZONES), np.inf)
+    np.fill_diagonal(edges, 0.0)
+    np.fill_diagonal(hop_edges, 0.0)
+    for a, neighbours in ZONE_ADJACENCY.items():
+        for b in neighbours:
+            edges[a, b] = edges[b, a] = centroid_distance[a, b]
+            hop_edges[a, b] = hop_edges[b, a] = 1.0
+    path_distance, next_hop = _floyd_warshall(edges)
+    hops, _ = _floyd_warshall(hop_edges)
+
+    return ZoneMatrices(
+        centroid_distance=centroid_distance,
+        separation=separation,
+        path_distance=path_distance,
+        hops=hops.astype(int),
+        next_hop=next_hop,
+    )
+
+
+@dataclass
+class Transitions:
+    """Columnar zone transitions: row k is observation k → its successor."""
+
+    kind: str                   # "player" or "ball"
+    track_ids: List[str]        # per row ("ball" for the ball)
+    frame_from: np.ndarray      # frame indices
+    frame_to: np.ndarray
+    zone_from: np.ndarray
+    zone_to: np.ndarray
+    dt: np.ndarray
+    distance: np.ndarray        # centroid distance, metres
+    min_distance: np.ndarray    # polygon separation, metres
+    hops: np.ndarray
+
+    @property
+    def speed(self) -> np.ndarray:
+        return self.distance / self.dt
+
+    @property
+    def min_speed(self) -> np.ndarray:
+        return self.min_distance / self.dt
+
+    def __len__(self) -> int:
+        return len(self.dt)
+
+
+def _observations(frames: Sequence[Dict[str, Any]], observed_only: bool = False):
+    """(frame index, track, zone) columns for every player observation."""
+    frame_idx, track_idx, zones = [], [], []
+    tracks: Dict[str, int] = {}
+    for i, frame in enumerate(frames):
+        if observed_only and frame.get("interpolated"):
+            continue
+        for p in frame.get("players", []):
+            tid = p.get("track_id")
+            if tid is None:
+                continue
+            frame_idx.append(i)
+            track_idx.append(tracks.setdefault(tid, len(tracks)))
+            zones.append(zone_number(p.get("zone")))
+    return (np.asarray(frame_idx, dtype=np.intp), np.asarray(track_idx, dtype=np.intp),
+            np.asarray(zones, dtype=int), list(tracks))
+
+
+def _transitions(kind, names, frame_idx, group, zones, times) -> Transitions:
+    matrices = zone_matrices()
+    valid = (zones >= 0) & (zones < NUM_ZONES) & ~np.isnan(times[frame_idx])
+    frame_idx, group, zones = frame_idx[valid], group[valid], zones[valid]
+
+    order = np.lexsort((times[frame_idx], group))
+    frame_idx, group, zones = frame_idx[order], group[order], zones[order]
+    pair = np.flatnonzero(group[1:] == group[:-1])
+    a, b = pair, pair + 1
+
+    za, zb = zones[a], zones[b]
+    dt = np.maximum(times[frame_idx[b]] - times[frame_idx[a]], MIN_DT)
+    return Transitions(
+        kind=kind,
+        track_ids=[names[g] for g in group[a].tolist()],
+        frame_from=frame_idx[a],
+        frame_to=frame_idx[b],
+        zone_from=za,
+        zone_to=zb,
+        dt=dt,
+        distance=matrices.centroid_distance[za, zb],
+        min_distance=matrices.separation[za, zb],
+        hops=matrices.hops[za, zb],
+    )
+
+
+def frame_times(frames: Sequence[Dict[str, Any]]) -> np.ndarray:
+    times = [parse_timestamp(f.get("timestamp")) for f in frames]
+    return np.array([np.nan if t is None else t for t in times], dtype=float)
+
+
+def player_transitions(frames: Sequence[Dict[str, Any]],
+                       observed_only: bool = False) -> Transitions:
+    """Transitions between consecutive observations of each track (gaps allowed).
+
+    ``observed_only`` skips resampled slots flagged ``interpolated``, so a
+    transition spans the forward-filled copies between two real observations.
+    """
+    times = frame_times(frames)
+    frame_idx, track_idx, zones, names = _observations(frames, observed_only)
+    return _transitions("player", names, frame_idx, track_idx, zones, times)
+
+
+def ball_transitions(frames: Sequence[Dict[str, Any]]) -> Transitions:
+    times = frame_times(frames)
+    zones = np.array([zone_number((f.get("ball") or {}).get("zone")) for f in frames], dtype=int)
+    frame_idx = np.arange(len(frames), dtype=np.intp)
+    return _transitions("ball", ["ball"], frame_idx, np.zeros(len(frames), dtype=np.intp),
+                        zones, times)
+
+
+@dataclass
+class PlausibilityFlag:
+    kind: str
+    track_id: str
+    timestamp_from: str
+    timestamp_to: str
+    zone_from: int
+    zone_to: int
+    dt: float
+    distance_m: float
+    min_distance_m: float
+    speed: float
+    min_speed: float
+    hops: int
+    severity: float
+
+    def __str__(self) -> str:
+        return (
+            f"Implausible {self.kind} move: {self.track_id} z{self.zone_from}→z{self.zone_to} "
+            f"({self.timestamp_from}s→{self.timestamp_to}s, ≥{self.min_speed:.1f} m/s, "
+            f"severity {self.severity:.1f})"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "implausible_speed",
+            "kind": self.kind,
+            "track_id": self.track_id,
+            "zone_from": self.zone_from,
+            "zone_to": self.zone_to,
+            "timestamp_from": self.timestamp_from,
+            "timestamp_to": self.timestamp_to,
+            "dt": round(self.dt, 4),
+            "distance_m": round(self.distance_m, 2),
+            "min_distance_m": round(self.min_distance_m, 2),
+            "speed": round(self.speed, 2),
+            "min_speed": round(self.min_speed, 2),
+            "hops": self.hops,
+            "severity": round(self.severity, 2),
+        }
+
+
+def flag_transitions(transitions: Transitions, frames: Sequence[Dict[str, Any]],
+                     max_speed: float) -> List[PlausibilityFlag]:
+    """Flags for transitions whose lower-bound speed exceeds ``max_speed``."""
+    speed, min_speed = transitions.speed, transitions.min_speed
+    severity = min_speed / max_speed
+    flags = []
+    for k in np.flatnonzero(severity > 1.0).tolist():
+        flags.append(PlausibilityFlag(
+            kind=transitions.kind,
+            track_id=transitions.track_ids[k],
+            timestamp_from=str(frames[transitions.frame_from[k]].get("timestamp", "")),
+            timestamp_to=str(frames[transitions.frame_to[k]].get("timestamp", "")),
+            zone_from=int(transitions.zone_from[k]),
+            zone_to=int(transitions.zone_to[k]),
+            dt=float(transitions.dt[k]),
+            distance_m=float(transitions.distance[k]),
+            min_distance_m=float(transitions.min_distance[k]),
+            speed=float(speed[k]),
+            min_speed=float(min_speed[k]),
+            hops=int(transitions.hops[k]),
+            severity=float(severity[k]),
+        ))
+    return flags
+
+
+def check_plausibility(
+    frames: Sequence[Dict[str, Any]],
+    player_max_speed: float = PLAYER_MAX_SPEED,
+    ball_max_speed: Optional[float] = BALL_MAX_SPEED,
+) -> List[PlausibilityFlag]:
+    """Implausible player (and ball) moves across the match, in time order."""
+    flags = flag_transitions(player_transitions(frames), frames, player_max_speed)
+    if ball_max_speed is not None:
+        flags += flag_transitions(ball_transitions(frames), frames, ball_max_speed)
+    flags.sort(key=lambda f: parse_timestamp(f.timestamp_from) or 0.0)
+    return flags
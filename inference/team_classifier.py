@@ -337,11 +337,25 @@ def determine_attacking_team(frames: List[Dict]) -> TeamClassification:
         )
 
     # --- Compute signals ---
-    sig_possession = _signal_possession(frames, field_teams)
-    sig_gk = _signal_gk_spatial(frames, field_teams, gk_team)
-    sig_depth = _signal_zone_depth(frames, field_teams)
-    sig_formation = _signal_formation(frames, field_teams)
+    return score_signals(
+        field_teams,
+        gk_team,
+        _signal_possession(frames, field_teams),
+        _signal_gk_spatial(frames, field_teams, gk_team),
+        _signal_zone_depth(frames, field_teams),
+        _signal_formation(frames, field_teams),
+    )
+
 
+def score_signals(
+    field_teams: Set[str],
+    gk_team: Optional[str],
+    sig_possession: Dict[str, float],
+    sig_gk: Dict[str, float],
+    sig_depth: Dict[str, float],
+    sig_formation: Dict[str, float],
+) -> TeamClassification:
+    """Weighted vote over the four signal dicts (shared with windowed classification)."""
     # --- Weighted scoring ---
     # When GK is detected, use all 4 signals.
     # When no GK, redistribute Signal 2 weight to the others.
@@ -0,0 +1,242 @@
+"""
+Windowed team classification for whole-match physics files.
+
+``determine_attacking_team`` answers once for a clip, but over a match the
+attacking side flips with every possession, and re-running it per window
+re-scans every frame of every window.  ``TeamWindowClassifier`` makes one
+pass over the frames and keeps per-team prefix sums of the counts the four
+signals need:
+
+  held        frames in which the team holds the ball
+  present     player appearances (any zone)
+  field       appearances outside z0
+  depth       summed ZONE_DEPTH_METRES of the field appearances
+  near_goal   appearances in z1-z5 (GK-spatial and formation signals)
+
+so the signals for any frame range [lo, hi) are ``cum[:, hi] - cum[:, lo]``
+— O(teams) per window, independent of its length — and go through the same
+``score_signals`` vote as the whole-clip classifier.
+
+Field teams and the goalkeeper colour are identified once over the whole
+match (the GK does not change between possessions); a window only votes
+between the field teams that appear in it.
+
+    clf = TeamWindowClassifier(frames)
+    clf.classify(120, 480)                 # frames [120, 480)
+    clf.windows(seconds=10.0)              # fixed time windows
+    clf.possession_phases(min_frames=8)    # one window per possession run
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .team_classifier import (
+    ZONE_DEPTH_METRES,
+    TeamClassification,
+    _get_field_teams_and_gk,
+    _normalize_zone,
+    score_signals,
+)
+from .timeline import monotonic_times
+
+# Row order of the prefix-sum cube
+HELD, PRESENT, FIELD, DEPTH, NEAR_GOAL = range(5)
+PHASE_MIN_FRAMES = 8  # half a second at 16 FPS: shorter possession runs are misreads
+
+
+@dataclass
+class TeamWindow:
+    """Classification of the frames [start_frame, end_frame)."""
+
+    start_frame: int
+    end_frame: int
+    start_time: float
+    end_time: float
+    classification: TeamClassification
+
+    def to_dict(self) -> Dict[str, Any]:
+        c = self.classification
+        return {
+            "start_frame": self.start_frame,
+            "end_frame": self.end_frame,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "attacking_team": c.attacking_team,
+            "defending_team": c.defending_team,
+            "goalkeeper_team": c.goalkeeper_team,
+            "confidence": round(c.confidence, 4),
+        }
+
+
+def _spread(values: Dict[str, float], teams: List[str], default: float,
+            invert: bool = False) -> Dict[str, float]:
+    """Min-max normalise per-team ratios to attack scores, as the clip signals do."""
+    lo, hi = min(values.values()), max(values.values())
+    if hi == lo:
+        return {t: default for t in teams}
+    scaled = {t: (values[t] - lo) / (hi - lo) for t in teams}
+    return {t: 1.0 - v for t, v in scaled.items()} if invert else scaled
+
+
+class TeamWindowClassifier:
+    """Attacking/defending classification for arbitrary frame ranges of one match."""
+
+    def __init__(self, frames: List[Dict]):
+        self.frames = frames
+        self.times = monotonic_times(frames)
+
+        labels = {p.get("team") for f in frames for p in f.get("players", [])}
+        self.explicit = "attack" in labels and "defense" in labels
+        field_teams, self.gk_team = _get_field_teams_and_gk(frames)
+        self.teams = sorted(field_teams)
+        self.holder_team = np.full(len(frames), -1, dtype=int)
+        self.cum = self._prefix_sums()
+
+    def _prefix_sums(self) -> np.ndarray:
+        """(5, teams, frames + 1) cumulative counts; column i covers frames [0, i)."""
+        index = {t: k for k, t in enumerate(self.teams)}
+        team_idx, frame_idx, zones = [], [], []
+        for i, frame in enumerate(self.frames):
+            holder_id = (frame.get("ball") or {}).get("holder_track_id")
+            for p in frame.get("players", []):
+                k = index.get(p.get("team"))
+                if k is None:
+                    continue
+                if holder_id and p.get("track_id") == holder_id and self.holder_team[i] < 0:
+                    self.holder_team[i] = k
+                team_idx.append(k)
+                frame_idx.append(i + 1)
+                zones.append(_normalize_zone(p.get("zone", 0)))
+
+        team_idx = np.asarray(team_idx, dtype=np.intp)
+        zones = np.asarray(zones, dtype=int)
+        top = max(int(zones.max(initial=0)), max(ZONE_DEPTH_METRES))
+        depth_lut = np.array([ZONE_DEPTH_METRES.get(z, 7.0) for z in range(top + 1)])
+        field = zones > 0
+        cell = team_idx * (len(self.frames) + 1) + np.asarray(frame_idx, dtype=np.intp)
+        size = len(self.teams) * (len(self.frames) + 1)
+
+        counts = np.zeros((5, len(self.teams), len(self.frames) + 1))
+        held = np.flatnonzero(self.holder_team >= 0)
+        counts[HELD, self.holder_team[held], held + 1] = 1
+        for row, weights in (
+            (PRESENT, None),
+            (FIELD, field.astype(float)),
+            (DEPTH, np.where(field, depth_lut[np.clip(zones, 0, None)], 0.0)),
+            (NEAR_GOAL, ((zones >= 1) & (zones <= 5)).astype(float)),
+        ):
+            counts[row] = np.bincount(cell, weights, minlength=size).reshape(counts[row].shape)
+        return np.cumsum(counts, axis=2)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def classify(self, start: int, end: int) -> TeamClassification:
+        """Classification of frames [start, end) from the prefix sums."""
+        start, end = max(start, 0), min(end, len(self.frames))
+        if end <= start:
+            return TeamClassification(
+                attacking_team="unknown",
+                defending_team="unknown",
+                confidence=0.0,
+                signals={"error": "no frames"},
+            )
+        if self.explicit:
+            return TeamClassification(
+                attacking_team="attack",
+                defending_team="defense",
+                confidence=1.0,
+                signals={"explicit_labels": True},
+            )
+
+        totals = self.cum[:, :, end] - self.cum[:, :, start]
+        teams = [t for k, t in enumerate(self.teams) if totals[PRESENT, k] > 0]
+        if len(teams) < 2:
+            return TeamClassification(
+                attacking_team=teams[0] if teams else "unknown",
+                defending_team="unknown",
+                goalkeeper_team=self.gk_team,
+                confidence=0.0,
+                signals={"error": "fewer than 2 field teams", "field_teams": teams},
+            )
+
+        row = {t: totals[:, self.teams.index(t)] for t in teams}
+        held = sum(r[HELD] for r in row.values())
+        possession = {t: (row[t][HELD] / held if held else 0.0) for t in teams}
+
+        near_ratio = {t: (r[NEAR_GOAL] / r[FIELD] if r[FIELD] else 0.0) for t, r in row.items()}
+        gk_spatial = _spread(near_ratio, teams, 0.5, invert=True) if self.gk_team else {}
+
+        depths = {t: (r[DEPTH] / r[FIELD] if r[FIELD] else 7.0) for t, r in row.items()}
+        depth = _spread(depths, teams, 0.5)
+
+        wall = {t: (r[NEAR_GOAL] / r[FIELD] if r[FIELD] else 0.5) for t, r in row.items()}
+        formation = _spread(wall, teams, 0.5, invert=True)
+
+        return score_signals(set(teams), self.gk_team, possession, gk_spatial, depth, formation)
+
+    def window(self, start: int, end: int) -> TeamWindow:
+        last = min(max(end, start + 1), len(self.frames)) - 1
+        return TeamWindow(
+            start_frame=start,
+            end_frame=end,
+            start_time=float(self.times[start]) if len(self.frames) else 0.0,
+            end_time=float(self.times[last]) if len(self.frames) else 0.0,
+            classification=self.classify(start, end),
+        )
+
+    def classify_time(self, start: float, end: float) -> TeamClassification:
+        """Classification of the frames with start <= time < end."""
+        lo, hi = np.searchsorted(self.times, [start, end], side="left")
+        return self.classify(int(lo), int(hi))
+
+    def windows(self, seconds: float, step: Optional[float] = None) -> List[TeamWindow]:
+        """Fixed-length time windows (``step`` defaults to ``seconds``: no overlap)."""
+        if not len(self.frames):
+            return []
+        step = step or seconds
+        starts = np.arange(self.times[0], self.times[-1] + step / 2, step)
+        lo = np.searchsorted(self.times, starts, side="left")
+        hi = np.searchsorted(self.times, starts + seconds, side="left")
+        return [self.window(int(a), int(b)) for a, b in zip(lo, hi) if b > a]
+
+    def possession_phases(self, min_frames: int = 1) -> List[TeamWindow]:
+        """One window per run of frames with the same possessing team.
+
+        Frames without a holder belong to the last team that held the ball
+        (the first holder for frames before any possession).  Runs shorter
+        than ``min_frames`` — a fumble, a one-frame misread — are merged into
+        the phase before them.
+        """
+        if not len(self.frames):
+            return []
+        held = np.flatnonzero(self.holder_team >= 0)
+        if not len(held):
+            return [self.window(0, len(self.frames))]
+
+        # Forward-fill the holding team, back-filling the leading frames
+        last_held = np.maximum.accumulate(np.where(self.holder_team >= 0,
+                                                   np.arange(len(self.frames)), -1))
+        team = self.holder_team[np.where(last_held >= 0, last_held, held[0])]
+        bounds = np.flatnonzero(np.diff(team)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(self.frames)]))
+
+        runs: List[List[int]] = []
+        for a, b in zip(starts.tolist(), ends.tolist()):
+            if runs and (b - a < min_frames or team[a] == team[runs[-1][0]]):
+                runs[-1][1] = b
+            else:
+                runs.append([a, b])
+        return [self.window(a, b) for a, b in runs]
+
+
+def classify_possession_phases(frames: List[Dict], min_frames: int = 1) -> List[TeamWindow]:
+    """Per-possession-phase classifications for a match."""
+    return TeamWindowClassifier(frames).possession_phases(min_frames)
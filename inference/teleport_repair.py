@@ -0,0 +1,164 @@
+"""
+Teleport repair: fill non-adjacent zone jumps along the shortest zone path.
+
+A z10→z5 jump in a second (13.6 m at least) between two observations of a
+track is VLM noise, but MOVE events and role logic take it at face value.
+Only jumps that are both non-adjacent and physically impossible are repaired
+— the ``check_plausibility`` test, polygon separation above ``dt`` times
+sprint speed — so a track that reappears elsewhere after a long absence is
+left alone (no move is impossible after ~1.5 s).  Repair routes the track
+through the intermediate zones of the shortest adjacency path
+(``zone_matrices().route``) and spreads them over the time gap: every frame
+strictly between the two observations gets the route zone at that fraction
+of the elapsed time.
+
+    z10 @ 0.0s … z5 @ 1.0s    route z10 → z2 → z0 → z5
+    frames at 0.25 / 0.5 / 0.75 s  →  z2 / z0 / z0
+
+The gap is whatever frames lie between the two observations: frames the
+track is missing from get a synthesized entry (a copy of the earlier
+observation), and after ``--resample-fps`` the forward-filled copies in
+``interpolated`` slots are overwritten.  Observed zones are never changed.
+With too few frames in the gap to hold every intermediate zone, the repair
+is partial and recorded as incomplete — resample first to make room.
+
+Pairs, fill rows and route lookups are computed for all tracks at once; only
+writing the fills back into frame dicts is a Python loop.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .court_geometry import NUM_ZONES
+from .plausibility import PLAYER_MAX_SPEED, frame_times, player_transitions, zone_matrices
+
+
+@dataclass
+class TeleportRepair:
+    track_id: str
+    timestamp_from: str
+    timestamp_to: str
+    zone_from: int
+    zone_to: int
+    route: List[int]
+    filled_frames: int
+    complete: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "track_id": self.track_id,
+            "zone_from": self.zone_from,
+            "zone_to": self.zone_to,
+            "timestamp_from": self.timestamp_from,
+            "timestamp_to": self.timestamp_to,
+            "route": self.route,
+            "filled_frames": self.filled_frames,
+            "complete": self.complete,
+        }
+
+
+@lru_cache(maxsize=1)
+def route_table() -> np.ndarray:
+    """(14, 14, max_hops + 1) zone at each step of the shortest path a→b (padded with b)."""
+    matrices = zone_matrices()
+    length = int(matrices.hops.max()) + 1
+    table = np.empty((NUM_ZONES, NUM_ZONES, length), dtype=int)
+    for a in range(NUM_ZONES):
+        for b in range(NUM_ZONES):
+            route = matrices.route(a, b)
+            table[a, b] = route + [b] * (length - len(route))
+    return table
+
+
+def repair_teleports(
+    frames: Sequence[Dict[str, Any]],
+    max_speed: float = PLAYER_MAX_SPEED,
+) -> Tuple[List[Dict[str, Any]], List[TeleportRepair]]:
+    """Frames with impossible non-adjacent jumps routed through intermediate zones,
+    plus the repairs.
+
+    The input frames are not modified; touched frames get new player lists.
+    Jumps across unparseable timestamps are not repaired (their speed is unknown).
+    """
+    transitions = player_transitions(frames, observed_only=True)
+    jumps = np.flatnonzero(
+        (transitions.hops >= 2) & (transitions.min_distance > transitions.dt * max_speed)
+    )
+    if len(jumps) == 0:
+        return list(frames), []
+
+    fa = transitions.frame_from[jumps]
+    fb = transitions.frame_to[jumps]
+    za = transitions.zone_from[jumps]
+    zb = transitions.zone_to[jumps]
+    hops = transitions.hops[jumps]
+    gap = fb - fa - 1
+
+    # One fill row per frame strictly inside each jump's gap
+    pair = np.repeat(np.arange(len(jumps)), gap)
+    offset = np.arange(len(pair)) - np.repeat(np.cumsum(gap) - gap, gap) + 1
+    frame = fa[pair] + offset
+    times = frame_times(frames)
+    t_a, t_b, t = times[fa[pair]], times[fb[pair]], times[frame]
+    timed = (t_b > t_a) & ~np.isnan(t)
+    fraction = np.where(timed, (t - t_a) / np.where(timed, t_b - t_a, 1.0),
+                        offset / (gap[pair] + 1))
+    step = np.clip(np.rint(fraction * hops[pair]).astype(int), 0, hops[pair])
+    zone = route_table()[za[pair], zb[pair], step]
+
+    # A repair is complete when every intermediate zone landed in some frame
+    reached = np.zeros((len(jumps), route_table().shape[2]), dtype=bool)
+    reached[pair, step] = True
+    complete = [bool(reached[k, 1:hops[k]].all()) for k in range(len(jumps))]
+
+    track_ids = [transitions.track_ids[j] for j in jumps.tolist()]
+    # Synthesized entries copy the track's observation at the start of the jump
+    templates = [
+        next(p for p in frames[f].get("players", []) if p.get("track_id") == tid)
+        for f, tid in zip(fa.tolist(), track_ids)
+    ]
+
+    out = list(frames)
+    copied = set()
+    for k, f, z in zip(pair.tolist(), frame.tolist(), zone.tolist()):
+        tid = track_ids[k]
+        if f not in copied:
+            out[f] = dict(out[f], players=list(out[f].get("players", [])))
+            copied.add(f)
+        players = out[f]["players"]
+        for i, p in enumerate(players):
+            if p.get("track_id") == tid:
+                players[i] = dict(p, zone=f"z{z}", repaired=True)
+                break
+        else:
+            players.append(dict(templates[k], zone=f"z{z}", repaired=True))
+
+    repairs = [
+        TeleportRepair(
+            track_id=track_ids[k],
+            timestamp_from=str(frames[int(fa[k])].get("timestamp", "")),
+            timestamp_to=str(frames[int(fb[k])].get("timestamp", "")),
+            zone_from=int(za[k]),
+            zone_to=int(zb[k]),
+            route=zone_matrices().route(int(za[k]), int(zb[k])),
+            filled_frames=int(gap[k]),
+            complete=complete[k],
+        )
+        for k in range(len(jumps))
+    ]
+    return out, repairs
+
+
+def repair_physics(physics_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Physics dict with teleports repaired and a ``teleport_repairs`` metadata block."""
+    frames, repairs = repair_teleports(physics_data.get("frames", []))
+    metadata = dict(physics_data.get("metadata", {}))
+    metadata["teleport_repairs"] = {
+        "repaired": sum(r.complete for r in repairs),
+        "incomplete": sum(not r.complete for r in repairs),
+        "repairs": [r.to_dict() for r in repairs],
+    }
+    return {**physics_data, "metadata": metadata, "frames": frames}
@@ -0,0 +1,215 @@
+"""
+Uniform-timeline resampling of sparse Stage 1 physics frames.
+
+The Stage 1 prompt lets the model skip frames, so physics timestamps are
+irregular strings ("0.0625", "0.5", "0.8125", ...) and every consumer has to
+search by timestamp.  ``Timeline`` snaps the source frames onto a fixed grid
+(16 fps by default) and forward-fills the gaps, so the frame at time ``t`` is
+a single index computation:
+
+    i = timeline.index_at(t)          # floor(t * fps) - start_slot, clipped
+
+Each grid slot is either *observed* (a source frame snapped to it) or
+*interpolated* (state carried forward from the latest observed slot).  The
+per-slot columns — source frame index, player zones, ball zone/state/holder —
+are NumPy arrays, built once from a columnar flattening of the frames.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_FPS = 16.0
+
+BALL_STATES = ("Holding", "Dribbling", "In-Air", "Loose")
+
+NO_ZONE = -1
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_timestamp(t: float) -> str:
+    """Grid time as a physics timestamp string ("0.0", "0.0625", ...)."""
+    return str(round(float(t), 6))
+
+
+def monotonic_times(frames: List[Dict[str, Any]]) -> np.ndarray:
+    """Frame times made non-decreasing for ``searchsorted`` (bad stamps take the previous time)."""
+    times = np.array([parse_timestamp(f.get("timestamp")) for f in frames], dtype=float)
+    times = np.fmax.accumulate(times) if len(times) else times
+    return np.nan_to_num(times, nan=0.0)
+
+
+def zone_number(zone: Any) -> int:
+    """Zone index from "z7" / 7; NO_ZONE for anything else."""
+    if isinstance(zone, int):
+        return zone
+    if isinstance(zone, str) and zone.lstrip("z").isdigit():
+        return int(zone.lstrip("z"))
+    return NO_ZONE
+
+
+@dataclass
+class Timeline:
+    """Physics frames on a uniform grid; slot ``i`` is time ``(start_slot + i) / fps``."""
+
+    fps: float
+    start_slot: int
+    source_frames: List[Dict[str, Any]]
+    source_index: np.ndarray      # (T,) source frame shown in each slot
+    observed: np.ndarray          # (T,) bool: a source frame snapped to this slot
+    track_ids: List[str]
+    player_zones: np.ndarray      # (T, P) int, NO_ZONE if absent from the source frame
+    ball_zone: np.ndarray         # (T,) int, NO_ZONE if unknown
+    ball_state: np.ndarray        # (T,) int index into BALL_STATES, -1 if unknown
+    ball_holder: np.ndarray       # (T,) int index into track_ids, -1 if none
+
+    def __len__(self) -> int:
+        return len(self.source_index)
+
+    @property
+    def times(self) -> np.ndarray:
+        return (self.start_slot + np.arange(len(self))) / self.fps
+
+    @property
+    def interpolated(self) -> np.ndarray:
+        return ~self.observed
+
+    def index_at(self, t: float) -> int:
+        """Index of the slot showing time ``t`` (latest slot at or before it)."""
+        slot = int(np.floor(t * self.fps + 1e-9)) - self.start_slot
+        return min(max(slot, 0), len(self) - 1)
+
+    def frame(self, i: int) -> Dict[str, Any]:
+        """Physics-shaped frame for slot ``i`` with observed/interpolated flags."""
+        source = self.source_frames[int(self.source_index[i])]
+        observed = bool(self.observed[i])
+        frame = dict(source)
+        frame["timestamp"] = format_timestamp((self.start_slot + i) / self.fps)
+        frame["observed"] = observed
+        frame["interpolated"] = not observed
+        if not observed:
+            frame["source_timestamp"] = source.get("timestamp")
+        return frame
+
+    def frame_at(self, t: float) -> Dict[str, Any]:
+        return self.frame(self.index_at(t))
+
+    def to_frames(self) -> List[Dict[str, Any]]:
+        return [self.frame(i) for i in range(len(self))]
+
+    def metadata(self) -> Dict[str, Any]:
+        n_observed = int(self.observed.sum())
+        return {
+            "fps": self.fps,
+            "start_slot": self.start_slot,
+            "start_seconds": self.start_slot / self.fps,
+            "total_frames": len(self),
+            "observed_frames": n_observed,
+            "interpolated_frames": len(self) - n_observed,
+            "source_frames": len(self.source_frames),
+        }
+
+
+def build_timeline(
+    frames: List[Dict[str, Any]],
+    fps: float = DEFAULT_FPS,
+    end: Optional[float] = None,
+) -> Timeline:
+    """Snap frames to a ``fps`` grid and forward-fill the slots in between.
+
+    Frames with unparseable timestamps are dropped.  When several frames snap
+    to the same slot, the later one wins.  The grid runs from the first
+    frame's slot to the last frame's slot, or to ``end`` seconds if given.
+    """
+    if not fps > 0:
+        raise ValueError(f"fps must be positive, got {fps}")
+    stamps = np.array(
+        [parse_timestamp(f.get("timestamp")) for f in frames], dtype=float
+    ) if frames else np.empty(0)
+    keep = np.flatnonzero(~np.isnan(stamps))
+    if keep.size == 0:
+        raise ValueError("No frames with a valid timestamp")
+
+    order = keep[np.argsort(stamps[keep], kind="stable")]
+    source = [frames[i] for i in order]
+    slots = np.rint(stamps[order] * fps).astype(np.int64)
+
+    start_slot = int(slots[0])
+    last_slot = int(slots[-1])
+    if end is not None:
+        last_slot = max(last_slot, int(np.floor(end * fps + 1e-9)))
+    n_slots = last_slot - start_slot + 1
+    rel = slots - start_slot
+
+    # Last source frame per slot: scatter in order, so later frames overwrite
+    slot_source = np.full(n_slots, -1, dtype=np.int64)
+    slot_source[rel] = np.arange(len(source))
+    observed = slot_source >= 0
+
+    # Forward-fill: each slot shows the latest observed slot at or before it
+    last_observed = np.maximum.accumulate(np.where(observed, np.arange(n_slots), -1))
+    source_index = slot_source[last_observed]
+
+    # Columnar flattening of the source frames (one Python pass over the JSON)
+    track_ids = sorted({
+        str(p.get("track_id"))
+        for f in source for p in f.get("players", []) or []
+        if p.get("track_id") is not None
+    })
+    track_col = {tid: j for j, tid in enumerate(track_ids)}
+    state_col = {s: j for j, s in enumerate(BALL_STATES)}
+
+    rows, cols, zones = [], [], []
+    ball_zone = np.full(len(source), NO_ZONE, dtype=np.int16)
+    ball_state = np.full(len(source), -1, dtype=np.int8)
+    ball_holder = np.full(len(source), -1, dtype=np.int32)
+    for i, f in enumerate(source):
+        for p in f.get("players", []) or []:
+            tid = p.get("track_id")
+            if tid is None:
+                continue
+            rows.append(i)
+            cols.append(track_col[str(tid)])
+            zones.append(zone_number(p.get("zone")))
+        ball = f.get("ball") or {}
+        ball_zone[i] = zone_number(ball.get("zone"))
+        ball_state[i] = state_col.get(ball.get("state"), -1)
+        holder = ball.get("holder_track_id")
+        ball_holder[i] = track_col.get(str(holder), -1) if holder is not None else -1
+
+    source_zones = np.full((len(source), len(track_ids)), NO_ZONE, dtype=np.int16)
+    source_zones[np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)] = zones
+
+    return Timeline(
+        fps=float(fps),
+        start_slot=start_slot,
+        source_frames=source,
+        source_index=source_index,
+        observed=observed,
+        track_ids=track_ids,
+        player_zones=source_zones[source_index],
+        ball_zone=ball_zone[source_index],
+        ball_state=ball_state[source_index],
+        ball_holder=ball_holder[source_index],
+    )
+
+
+def resample_physics(
+    physics_data: Dict[str, Any],
+    fps: float = DEFAULT_FPS,
+    end: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Physics dict with frames on a uniform grid and a ``timeline`` metadata block."""
+    timeline = build_timeline(physics_data.get("frames", []), fps=fps, end=end)
+    metadata = dict(physics_data.get("metadata", {}))
+    metadata["fps"] = timeline.fps
+    metadata["total_frames"] = len(timeline)
+    metadata["timeline"] = timeline.metadata()
+    return {"metadata": metadata, "frames": timeline.to_frames()}
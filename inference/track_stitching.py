@@ -0,0 +1,264 @@
+"""
+Track stitching: merge track IDs the VLM split across an occlusion.
+
+After a player disappears behind others the model often gives them a new
+``track_id``, so one player becomes several short tracks — the roster,
+roles and zone history fragment.  Stitching links a track that ends to one
+that starts shortly after, when nothing contradicts them being the same
+player:
+
+  - the later track starts after the earlier one's last frame, within
+    ``max_gap`` seconds (tracks never seen together)
+  - same team colour
+  - jersey numbers equal, or at least one of them unknown
+  - the end zone and start zone are the same or adjacent, or the gap is long
+    enough to cover the distance at sprint speed
+
+Lifetimes are one row per track sorted by start time, so the candidates for
+an ending track are a ``searchsorted`` window over the start times.  The
+candidates are taken cheapest first (shortest gap, known jersey match, fewest
+hops) into a union-find: a link is accepted when the earlier track is still
+the tail of its chain and the later one the head of its own, and the two
+chains' team/jersey do not conflict — so every chain is a sequence of
+non-overlapping lifetimes.  Each chain is renamed to its first track's ID.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .court_geometry import NUM_ZONES
+from .plausibility import PLAYER_MAX_SPEED, zone_matrices
+from .timeline import parse_timestamp, zone_number
+
+DEFAULT_MAX_GAP = 2.0       # seconds between a track's end and its successor's start
+UNKNOWN_JERSEY_COST = 0.5   # added to the gap when the jersey cannot confirm a link
+HOP_COST = 0.25             # per zone hop between end and start zone
+
+
+@dataclass
+class TrackLifetime:
+    track_id: str
+    start_time: float
+    end_time: float
+    start_zone: int
+    end_zone: int
+    team: Optional[str]
+    jersey_number: Optional[str]
+    observations: int
+
+
+@dataclass
+class TrackMerge:
+    kept: str           # chain's canonical ID (its first track)
+    merged: str         # track renamed to ``kept``
+    previous: str       # track this one continues
+    gap: float
+    zone_from: int
+    zone_to: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kept": self.kept,
+            "merged": self.merged,
+            "previous": self.previous,
+            "gap": round(self.gap, 4),
+            "zone_from": self.zone_from,
+            "zone_to": self.zone_to,
+        }
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> int:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return ra
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return ra
+
+
+def track_lifetimes(frames: Sequence[Dict[str, Any]]) -> List[TrackLifetime]:
+    """First/last observation, zones, team and jersey of every track."""
+    first: Dict[str, Tuple[float, int]] = {}
+    last: Dict[str, Tuple[float, int]] = {}
+    teams: Dict[str, Counter] = {}
+    jerseys: Dict[str, Counter] = {}
+    counts: Counter = Counter()
+    for frame in frames:
+        t = parse_timestamp(frame.get("timestamp"))
+        if t is None:
+            continue
+        for p in frame.get("players", []):
+            tid = p.get("track_id")
+            if tid is None:
+                continue
+            zone = zone_number(p.get("zone"))
+            counts[tid] += 1
+            if zone >= 0:
+                if tid not in first or t < first[tid][0]:
+                    first[tid] = (t, zone)
+                if tid not in last or t >= last[tid][0]:
+                    last[tid] = (t, zone)
+            teams.setdefault(tid, Counter())[p.get("team")] += 1
+            if p.get("jersey_number") is not None:
+                jerseys.setdefault(tid, Counter())[str(p["jersey_number"])] += 1
+
+    return [
+        TrackLifetime(
+            track_id=tid,
+            start_time=first[tid][0],
+            end_time=last[tid][0],
+            start_zone=first[tid][1],
+            end_zone=last[tid][1],
+            team=teams[tid].most_common(1)[0][0],
+            jersey_number=jerseys[tid].most_common(1)[0][0] if tid in jerseys else None,
+            observations=counts[tid],
+        )
+        for tid in first
+    ]
+
+
+def _candidates(lifetimes: List[TrackLifetime], max_gap: float,
+                max_speed: float) -> List[Tuple[float, int, int]]:
+    """(cost, earlier, later) for every compatible end→start pair within ``max_gap``."""
+    matrices = zone_matrices()
+    starts = np.array([lt.start_time for lt in lifetimes])
+    by_start = np.argsort(starts, kind="stable")
+    sorted_starts = starts[by_start]
+
+    out = []
+    for a, lt in enumerate(lifetimes):
+        lo = np.searchsorted(sorted_starts, lt.end_time, side="right")
+        hi = np.searchsorted(sorted_starts, lt.end_time + max_gap, side="right")
+        for b in by_start[lo:hi].tolist():
+            nxt = lifetimes[b]
+            if nxt.team != lt.team:
+                continue
+            if lt.jersey_number and nxt.jersey_number and lt.jersey_number != nxt.jersey_number:
+                continue
+            if not (0 <= lt.end_zone < NUM_ZONES and 0 <= nxt.start_zone < NUM_ZONES):
+                continue
+            gap = nxt.start_time - lt.end_time
+            hops = int(matrices.hops[lt.end_zone, nxt.start_zone])
+            if hops > 1 and matrices.separation[lt.end_zone, nxt.start_zone] > gap * max_speed:
+                continue
+            known = lt.jersey_number is not None and nxt.jersey_number is not None
+            cost = gap + HOP_COST * hops + (0.0 if known else UNKNOWN_JERSEY_COST)
+            out.append((cost, a, b))
+    out.sort()
+    return out
+
+
+def stitch_tracks(
+    frames: Sequence[Dict[str, Any]],
+    max_gap: float = DEFAULT_MAX_GAP,
+    max_speed: float = PLAYER_MAX_SPEED,
+) -> Tuple[List[Dict[str, Any]], List[TrackMerge]]:
+    """Frames with fragmented tracks renamed to one ID per player, plus the merges.
+
+    Renamed player entries keep their old ID as ``stitched_from``; ball
+    ``holder_track_id`` is renamed too.  The input frames are not modified.
+    """
+    lifetimes = track_lifetimes(frames)
+    n = len(lifetimes)
+    uf = UnionFind(n)
+    has_next = [False] * n
+    has_prev = [False] * n
+    # Per chain root: its known jersey and earliest member
+    chain_jersey = {i: lt.jersey_number for i, lt in enumerate(lifetimes)}
+    chain_head = list(range(n))
+    links: List[Tuple[int, int]] = []
+
+    for _, a, b in _candidates(lifetimes, max_gap, max_speed):
+        if has_next[a] or has_prev[b]:
+            continue
+        ra, rb = uf.find(a), uf.find(b)
+        if ra == rb:
+            continue
+        ja, jb = chain_jersey[ra], chain_jersey[rb]
+        if ja and jb and ja != jb:
+            continue
+        root = uf.union(a, b)
+        chain_jersey[root] = ja or jb
+        chain_head[root] = chain_head[ra]
+        has_next[a] = has_prev[b] = True
+        links.append((a, b))
+
+    rename = {}
+    for i, lt in enumerate(lifetimes):
+        head = lifetimes[chain_head[uf.find(i)]].track_id
+        if head != lt.track_id:
+            rename[lt.track_id] = head
+
+    merges = [
+        TrackMerge(
+            kept=lifetimes[chain_head[uf.find(b)]].track_id,
+            merged=lifetimes[b].track_id,
+            previous=lifetimes[a].track_id,
+            gap=lifetimes[b].start_time - lifetimes[a].end_time,
+            zone_from=lifetimes[a].end_zone,
+            zone_to=lifetimes[b].start_zone,
+        )
+        for a, b in links
+    ]
+    start = {lt.track_id: lt.start_time for lt in lifetimes}
+    merges.sort(key=lambda m: start[m.merged])
+    return apply_renames(frames, rename), merges
+
+
+def apply_renames(frames: Sequence[Dict[str, Any]],
+                  rename: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Copies of the frames touched by ``rename`` with track IDs replaced."""
+    if not rename:
+        return list(frames)
+    out = []
+    for frame in frames:
+        players = frame.get("players", [])
+        ball = frame.get("ball") or {}
+        holder = ball.get("holder_track_id")
+        if holder not in rename and not any(p.get("track_id") in rename for p in players):
+            out.append(frame)
+            continue
+        new = dict(frame)
+        new["players"] = [
+            dict(p, track_id=rename[p["track_id"]], stitched_from=p["track_id"])
+            if p.get("track_id") in rename else p
+            for p in players
+        ]
+        if holder in rename:
+            new["ball"] = dict(ball, holder_track_id=rename[holder])
+        out.append(new)
+    return out
+
+
+def stitch_physics(physics_data: Dict[str, Any],
+                   max_gap: float = DEFAULT_MAX_GAP) -> Dict[str, Any]:
+    """Physics dict with tracks stitched and a ``track_stitching`` metadata block."""
+    frames = physics_data.get("frames", [])
+    stitched, merges = stitch_tracks(frames, max_gap=max_gap)
+    n_tracks = len(track_lifetimes(frames))
+    metadata = dict(physics_data.get("metadata", {}))
+    metadata["track_stitching"] = {
+        "tracks_before": n_tracks,
+        "tracks_after": n_tracks - len(merges),
+        "merges": [m.to_dict() for m in merges],
+    }
+    return {**physics_data, "metadata": metadata, "frames": stitched}
@@ -0,0 +1,133 @@
+"""
+Per-track zone history as run-length intervals.
+
+``EventDetector.detect_moves`` emits one MOVE event per zone change per
+player, which on a full match is most of ``events_list``.  ``ZoneIntervals``
+stores the same information as one row per (track, zone) run:
+
+    track  zone  start_time  end_time  frames
+    t5     7     0.0         1.25      21      ← seen in z7 from 0.0 s to 1.25 s
+    t5     8     1.3125      4.0       45
+
+Rows are sorted by (track, start_time) and ``offsets`` is the interval
+index: track k's rows are ``offsets[k]:offsets[k + 1]``, so "where was t5
+at time t" is one binary search over that slice.  A track is in an
+interval's zone from its ``start_time`` until the next interval starts (the
+last known zone); before its first and after its last observation it is
+nowhere.
+
+A MOVE event corresponds to a pair of consecutive intervals of a track:
+``from_zone``/``start_time`` are the first row's zone/end_time,
+``to_zone``/``end_time`` the second's zone/start_time.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .timeline import parse_timestamp, zone_number
+
+
+@dataclass
+class ZoneIntervals:
+    track_ids: List[str]        # track index -> track_id
+    track: np.ndarray           # (R,) track index per row
+    zone: np.ndarray            # (R,)
+    start_time: np.ndarray      # (R,) first observation in the run
+    end_time: np.ndarray        # (R,) last observation in the run
+    frames: np.ndarray          # (R,) observations in the run
+    offsets: np.ndarray         # (tracks + 1,) row range of each track
+
+    def __len__(self) -> int:
+        return len(self.zone)
+
+    def rows(self, track_id: str) -> slice:
+        try:
+            k = self.track_ids.index(track_id)
+        except ValueError:
+            return slice(0, 0)
+        return slice(int(self.offsets[k]), int(self.offsets[k + 1]))
+
+    def zone_at(self, track_id: str, t: float) -> Optional[int]:
+        """Last known zone of ``track_id`` at time ``t`` (None outside its observations)."""
+        rows = self.rows(track_id)
+        starts = self.start_time[rows]
+        i = int(np.searchsorted(starts, t, side="right")) - 1
+        if i < 0 or t > self.end_time[rows.stop - 1]:
+            return None
+        return int(self.zone[rows.start + i])
+
+    def zones_at(self, t: float) -> Dict[str, int]:
+        """Last known zone of every track observed around time ``t``."""
+        return {tid: z for tid in self.track_ids
+                if (z := self.zone_at(tid, t)) is not None}
+
+    def move_count(self) -> int:
+        """Number of zone changes (MOVE events) the intervals replace."""
+        return len(self) - len(self.track_ids)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact columnar table: row r is track ``track_ids[track[r]]`` in ``zone[r]``."""
+        return {
+            "track_ids": self.track_ids,
+            "offsets": self.offsets.tolist(),
+            "track": self.track.tolist(),
+            "zone": self.zone.tolist(),
+            "start_time": self.start_time.tolist(),
+            "end_time": self.end_time.tolist(),
+            "frames": self.frames.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ZoneIntervals":
+        return cls(
+            track_ids=list(data["track_ids"]),
+            track=np.asarray(data["track"], dtype=np.intp),
+            zone=np.asarray(data["zone"], dtype=int),
+            start_time=np.asarray(data["start_time"], dtype=float),
+            end_time=np.asarray(data["end_time"], dtype=float),
+            frames=np.asarray(data["frames"], dtype=int),
+            offsets=np.asarray(data["offsets"], dtype=np.intp),
+        )
+
+
+def build_zone_intervals(frames: Sequence[Dict[str, Any]]) -> ZoneIntervals:
+    """Run-length zone intervals for every track across the frames."""
+    tracks: Dict[str, int] = {}
+    track_col, zone_col, time_col = [], [], []
+    for frame in frames:
+        t = parse_timestamp(frame.get("timestamp"))
+        if t is None:
+            continue
+        for p in frame.get("players", []):
+            tid = p.get("track_id")
+            zone = zone_number(p.get("zone"))
+            if tid is None or zone < 0:
+                continue
+            track_col.append(tracks.setdefault(tid, len(tracks)))
+            zone_col.append(zone)
+            time_col.append(t)
+
+    track = np.asarray(track_col, dtype=np.intp)
+    zone = np.asarray(zone_col, dtype=int)
+    times = np.asarray(time_col, dtype=float)
+    order = np.lexsort((times, track))
+    track, zone, times = track[order], zone[order], times[order]
+
+    # A run starts at each track's first observation and at every zone change
+    starts = np.flatnonzero(np.concatenate((
+        [True], (track[1:] != track[:-1]) | (zone[1:] != zone[:-1]),
+    ))) if len(track) else np.empty(0, dtype=np.intp)
+    ends = np.concatenate((starts[1:], [len(track)])) - 1 if len(starts) else starts
+
+    run_track = track[starts]
+    return ZoneIntervals(
+        track_ids=list(tracks),
+        track=run_track,
+        zone=zone[starts],
+        start_time=times[starts],
+        end_time=times[ends],
+        frames=ends - starts + 1,
+        offsets=np.searchsorted(run_track, np.arange(len(tracks) + 1), side="left"),
+    )
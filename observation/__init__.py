@@ -0,0 +1,9 @@
+"""Helpers for Stage 1 physics observation (Gemini VLM)."""
+
+from .json_stream import FrameStreamParser, NDJSONFrameWriter, read_ndjson_physics
+
+__all__ = [
+    "FrameStreamParser",
+    "NDJSONFrameWriter",
+    "read_ndjson_physics",
+]
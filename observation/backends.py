@@ -0,0 +1,388 @@
+"""
+Pluggable Gemini client layer for Stage 1: record real responses, replay them offline.
+
+``GeminiCacheAnalyzer`` only touches a small surface of ``genai.Client``:
+
+    client.files.upload(file=...) / client.files.get(name=...)
+    client.caches.create(model=..., config=...)
+    client.chats.create(model=..., config=...)
+        chat.send_message(prompt, config=...)
+        chat.send_message_stream(prompt, config=...)
+
+``RecordingClient`` wraps a real client and writes every upload, cache and chat
+response into one fixture file per video.  ``ReplayClient`` implements the same
+surface from those fixtures with no API key or network, adding configurable
+latency and injected failures, so the whole upload → cache → chat → parse path
+can be load-tested and benchmarked locally (see ``observation.bench``).
+
+Fixture layout (``<fixture_dir>/<video_stem>.json``):
+  {"video", "model", "file": {name, uri, mime_type, state},
+   "cache": {"usage": {...}},
+   "responses": {<prompt_key>: {"prompt_preview", "text", "chunks", "usage"}}}
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+USAGE_FIELDS = (
+    "prompt_token_count",
+    "cached_content_token_count",
+    "candidates_token_count",
+    "thoughts_token_count",
+    "total_token_count",
+)
+
+
+class FakeAPIError(RuntimeError):
+    """Injected failure raised by ``ReplayClient``."""
+
+
+def prompt_key(prompt: str) -> str:
+    """Stable fixture key for a step prompt (whitespace-insensitive)."""
+    normalized = " ".join(str(prompt).split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def usage_to_dict(usage: Any) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return None
+    return {
+        name: getattr(usage, name)
+        for name in USAGE_FIELDS
+        if getattr(usage, name, None) is not None
+    }
+
+
+def _usage_from_dict(data: Optional[Dict[str, int]]) -> Optional[SimpleNamespace]:
+    if data is None:
+        return None
+    return SimpleNamespace(**{name: data.get(name) for name in USAGE_FIELDS})
+
+
+def _file_uri_from_config(config: Any) -> Optional[str]:
+    """Dig the video file URI out of a CreateCachedContentConfig, if present."""
+    for content in getattr(config, "contents", None) or []:
+        for part in getattr(content, "parts", None) or []:
+            file_data = getattr(part, "file_data", None)
+            uri = getattr(file_data, "file_uri", None)
+            if uri:
+                return uri
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+
+class _Fixture:
+    """One video's recorded interactions, saved after every change."""
+
+    def __init__(self, path: Path, video: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path.exists():
+            with open(path) as f:
+                self.data = json.load(f)
+        else:
+            self.data = {"video": video, "responses": {}}
+
+    def update(self, **fields) -> None:
+        with self._lock:
+            self.data.update(fields)
+            self._save()
+
+    def add_response(self, prompt: str, text: str, usage: Any, chunks=None) -> None:
+        with self._lock:
+            self.data["responses"][prompt_key(prompt)] = {
+                "prompt_preview": " ".join(str(prompt).split())[:80],
+                "text": text,
+                "chunks": chunks,
+                "usage": usage_to_dict(usage),
+            }
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.data, f, indent=2)
+        tmp.replace(self.path)
+
+
+class RecordingClient:
+    """Wrap a real ``genai.Client`` and capture its responses as fixtures."""
+
+    def __init__(self, client: Any, fixture_dir: Path):
+        self._client = client
+        self.fixture_dir = Path(fixture_dir)
+        self._by_uri: Dict[str, _Fixture] = {}
+        self._by_file_name: Dict[str, _Fixture] = {}
+        self._by_cache: Dict[str, _Fixture] = {}
+        self._last: Optional[_Fixture] = None
+        self.files = _RecordingFiles(self)
+        self.caches = _RecordingCaches(self)
+        self.chats = _RecordingChats(self)
+
+
+class _RecordingFiles:
+    def __init__(self, owner: RecordingClient):
+        self._owner = owner
+
+    def upload(self, file, **kwargs):
+        path = Path(str(file))
+        fixture = _Fixture(self._owner.fixture_dir / f"{path.stem}.json", path.name)
+        result = self._owner._client.files.upload(file=file, **kwargs)
+        self._owner._by_file_name[result.name] = fixture
+        self._owner._last = fixture
+        self._record(fixture, result)
+        return result
+
+    def get(self, name, **kwargs):
+        result = self._owner._client.files.get(name=name, **kwargs)
+        fixture = self._owner._by_file_name.get(name)
+        if fixture:
+            self._record(fixture, result)
+        return result
+
+    def _record(self, fixture: _Fixture, result: Any) -> None:
+        fixture.update(file={
+            "name": result.name,
+            "uri": getattr(result, "uri", None),
+            "mime_type": getattr(result, "mime_type", None),
+            "state": result.state.name,
+        })
+        if getattr(result, "uri", None):
+            self._owner._by_uri[result.uri] = fixture
+
+
+class _RecordingCaches:
+    def __init__(self, owner: RecordingClient):
+        self._owner = owner
+
+    def create(self, model, config, **kwargs):
+        result = self._owner._client.caches.create(model=model, config=config, **kwargs)
+        fixture = self._owner._by_uri.get(_file_uri_from_config(config)) or self._owner._last
+        if fixture:
+            self._owner._by_cache[result.name] = fixture
+            fixture.update(
+                model=model,
+                cache={"usage": usage_to_dict(getattr(result, "usage_metadata", None))},
+            )
+        return result
+
+
+class _RecordingChats:
+    def __init__(self, owner: RecordingClient):
+        self._owner = owner
+
+    def create(self, model, config=None, **kwargs):
+        chat = self._owner._client.chats.create(model=model, config=config, **kwargs)
+        cache_name = getattr(config, "cached_content", None)
+        fixture = self._owner._by_cache.get(cache_name) or self._owner._last
+        return _RecordingChat(chat, fixture)
+
+
+class _RecordingChat:
+    def __init__(self, chat: Any, fixture: Optional[_Fixture]):
+        self._chat = chat
+        self._fixture = fixture
+
+    def send_message(self, message, config=None):
+        response = self._chat.send_message(message, config=config)
+        if self._fixture:
+            self._fixture.add_response(
+                message, response.text, getattr(response, "usage_metadata", None)
+            )
+        return response
+
+    def send_message_stream(self, message, config=None):
+        chunks: List[str] = []
+        usage = None
+        for chunk in self._chat.send_message_stream(message, config=config):
+            chunks.append(chunk.text or "")
+            if getattr(chunk, "usage_metadata", None) is not None:
+                usage = chunk.usage_metadata
+            yield chunk
+        if self._fixture:
+            self._fixture.add_response(message, "".join(chunks), usage, chunks=chunks)
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class FakeBehaviour:
+    """Simulated API characteristics for ``ReplayClient``.
+
+    Latencies are per call in seconds; each call draws uniformly from
+    ``latency * (1 ± jitter)``.  ``failure_rate`` is the probability that a
+    call raises ``FakeAPIError`` instead of answering.
+    """
+
+    upload_latency: float = 0.0
+    cache_latency: float = 0.0
+    step_latency: float = 0.0
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    stream_chunk_chars: int = 2048
+    seed: Optional[int] = None
+
+
+class ReplayClient:
+    """Serve recorded fixtures through the ``genai.Client`` surface used by Stage 1."""
+
+    def __init__(self, fixture_dir: Path, behaviour: Optional[FakeBehaviour] = None):
+        self.fixture_dir = Path(fixture_dir)
+        self.behaviour = behaviour or FakeBehaviour()
+        self._rng = random.Random(self.behaviour.seed)
+        self._lock = threading.Lock()
+        self._fixtures: Dict[str, Dict[str, Any]] = {}
+        self._by_uri: Dict[str, Dict[str, Any]] = {}
+        self._by_cache: Dict[str, Dict[str, Any]] = {}
+        self._counter = 0
+        self.calls = 0
+        self.failures = 0
+        self.files = _ReplayFiles(self)
+        self.caches = _ReplayCaches(self)
+        self.chats = _ReplayChats(self)
+
+    def load(self, stem: str) -> Dict[str, Any]:
+        with self._lock:
+            if stem not in self._fixtures:
+                path = self.fixture_dir / f"{stem}.json"
+                if not path.exists():
+                    raise FileNotFoundError(f"No replay fixture for {stem}: {path}")
+                with open(path) as f:
+                    self._fixtures[stem] = json.load(f)
+            return self._fixtures[stem]
+
+    def _simulate(self, latency: float, new_call: bool = True) -> None:
+        """Sleep for the simulated latency; a new call may also inject a failure."""
+        b = self.behaviour
+        with self._lock:
+            if new_call:
+                self.calls += 1
+            jitter = self._rng.uniform(-b.jitter, b.jitter) if b.jitter else 0.0
+            fail = new_call and b.failure_rate > 0 and self._rng.random() < b.failure_rate
+            if fail:
+                self.failures += 1
+        delay = max(latency * (1.0 + jitter), 0.0)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise FakeAPIError("503 UNAVAILABLE (injected by ReplayClient)")
+
+    def _next_id(self, prefix: str) -> str:
+        with self._lock:
+            self._counter += 1
+            return f"{prefix}/fake-{self._counter}"
+
+
+class _ReplayFiles:
+    def __init__(self, owner: ReplayClient):
+        self._owner = owner
+
+    def upload(self, file, **kwargs):
+        owner = self._owner
+        owner._simulate(owner.behaviour.upload_latency)
+        fixture = owner.load(Path(str(file)).stem)
+        recorded = fixture.get("file", {})
+        name = owner._next_id("files")
+        uri = f"fake://{name}"
+        with owner._lock:
+            owner._by_uri[uri] = fixture
+        return SimpleNamespace(
+            name=name,
+            uri=uri,
+            mime_type=recorded.get("mime_type", "video/mp4"),
+            state=SimpleNamespace(name=recorded.get("state", "ACTIVE")),
+        )
+
+    def get(self, name, **kwargs):
+        owner = self._owner
+        with owner._lock:
+            fixture = owner._by_uri.get(f"fake://{name}")
+        recorded = (fixture or {}).get("file", {})
+        return SimpleNamespace(
+            name=name,
+            uri=f"fake://{name}",
+            mime_type=recorded.get("mime_type", "video/mp4"),
+            state=SimpleNamespace(name=recorded.get("state", "ACTIVE")),
+        )
+
+
+class _ReplayCaches:
+    def __init__(self, owner: ReplayClient):
+        self._owner = owner
+
+    def create(self, model, config, **kwargs):
+        owner = self._owner
+        owner._simulate(owner.behaviour.cache_latency)
+        with owner._lock:
+            fixture = owner._by_uri.get(_file_uri_from_config(config))
+        if fixture is None:
+            raise KeyError("ReplayClient: cache references a file that was not uploaded")
+        name = owner._next_id("cachedContents")
+        with owner._lock:
+            owner._by_cache[name] = fixture
+        usage = (fixture.get("cache") or {}).get("usage")
+        return SimpleNamespace(name=name, model=model, usage_metadata=_usage_from_dict(usage))
+
+
+class _ReplayChats:
+    def __init__(self, owner: ReplayClient):
+        self._owner = owner
+
+    def create(self, model, config=None, **kwargs):
+        owner = self._owner
+        with owner._lock:
+            fixture = owner._by_cache.get(getattr(config, "cached_content", None))
+        if fixture is None:
+            raise KeyError("ReplayClient: chat references an unknown cache")
+        return _ReplayChat(owner, fixture)
+
+
+class _ReplayChat:
+    def __init__(self, owner: ReplayClient, fixture: Dict[str, Any]):
+        self._owner = owner
+        self._fixture = fixture
+
+    def _lookup(self, message) -> Dict[str, Any]:
+        entry = self._fixture.get("responses", {}).get(prompt_key(message))
+        if entry is None:
+            preview = " ".join(str(message).split())[:60]
+            raise KeyError(f"ReplayClient: no recorded response for prompt '{preview}...'")
+        return entry
+
+    def send_message(self, message, config=None):
+        entry = self._lookup(message)
+        self._owner._simulate(self._owner.behaviour.step_latency)
+        return SimpleNamespace(text=entry["text"], usage_metadata=_usage_from_dict(entry["usage"]))
+
+    def send_message_stream(self, message, config=None) -> Iterator[SimpleNamespace]:
+        entry = self._lookup(message)
+        chunks = entry.get("chunks")
+        if not chunks:
+            size = max(self._owner.behaviour.stream_chunk_chars, 1)
+            text = entry["text"] or ""
+            chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+        # Latency is spread across chunks; an injected failure hits the first chunk
+        per_chunk = self._owner.behaviour.step_latency / len(chunks)
+        for i, chunk in enumerate(chunks):
+            self._owner._simulate(per_chunk, new_call=(i == 0))
+            last = i == len(chunks) - 1
+            yield SimpleNamespace(
+                text=chunk,
+                usage_metadata=_usage_from_dict(entry["usage"]) if last else None,
+            )
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Offline Stage 1 benchmark: run ``GeminiCacheAnalyzer`` against recorded fixtures.
+
+Every fixture in the directory (see ``observation.backends``) is analysed
+``--repeat`` times on a pool of ``--workers`` threads through the full
+upload → cache → chat → parse path, with simulated API latency and injected
+failures.  Reports throughput and per-video wall-time percentiles.
+
+Usage:
+    python -m observation.bench tests/fixtures/stage1 --workers 4 --latency 2.0 --repeat 5
+"""
+
+import contextlib
+import io
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import click
+import numpy as np
+
+from observation.backends import FakeBehaviour, ReplayClient
+
+
+def run_benchmark(
+    fixture_dir: Path,
+    behaviour: FakeBehaviour,
+    workers: int = 1,
+    repeat: int = 1,
+    stream: bool = False,
+) -> Dict[str, float]:
+    """Analyse every fixture ``repeat`` times and return timing statistics."""
+    from gemini_cache_analyzer_v2 import GeminiCacheAnalyzer
+
+    fixtures = sorted(Path(fixture_dir).glob("*.json"))
+    if not fixtures:
+        raise click.ClickException(f"No fixtures in {fixture_dir}")
+
+    client = ReplayClient(fixture_dir, behaviour)
+    analyzer = GeminiCacheAnalyzer(api_key=None, stream=stream, client=client)
+    jobs = [Path(f"{f.stem}.mp4") for f in fixtures] * repeat
+    errors: List[str] = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def run_one(video_path: Path) -> float:
+            start = time.perf_counter()
+            try:
+                analyzer.analyze_video(video_path, Path(tmp) / video_path.stem)
+            except Exception as e:  # injected mid-chat failures propagate
+                errors.append(f"{video_path.name}: {e}")
+            return time.perf_counter() - start
+
+        wall_start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                durations = np.array(list(pool.map(run_one, jobs)))
+        wall = time.perf_counter() - wall_start
+
+    return {
+        "videos": len(jobs),
+        "workers": workers,
+        "wall_seconds": wall,
+        "videos_per_minute": len(jobs) / wall * 60 if wall > 0 else float("inf"),
+        "p50_seconds": float(np.percentile(durations, 50)),
+        "p95_seconds": float(np.percentile(durations, 95)),
+        "api_calls": client.calls,
+        "injected_failures": client.failures,
+        "failed_videos": len(errors),
+    }
+
+
+@click.command()
+@click.argument("fixture_dir", type=click.Path(exists=True, file_okay=False))
+@click.option("--workers", "-w", default=1, help="Concurrent videos")
+@click.option("--repeat", "-r", default=1, help="Times each fixture is analysed")
+@click.option("--latency", default=0.0, help="Simulated seconds per chat step")
+@click.option("--cache-latency", default=0.0, help="Simulated seconds per cache creation")
+@click.option("--upload-latency", default=0.0, help="Simulated seconds per upload")
+@click.option("--jitter", default=0.0, help="Latency jitter as a fraction (0.2 = ±20%)")
+@click.option("--failure-rate", default=0.0, help="Probability each call fails")
+@click.option("--stream", is_flag=True, help="Use the streaming JSON step")
+@click.option("--seed", default=0, help="Random seed for jitter and failures")
+def main(fixture_dir, workers, repeat, latency, cache_latency, upload_latency, jitter,
+         failure_rate, stream, seed):
+    """Benchmark Stage 1 offline against recorded Gemini responses."""
+    behaviour = FakeBehaviour(
+        upload_latency=upload_latency,
+        cache_latency=cache_latency,
+        step_latency=latency,
+        jitter=jitter,
+        failure_rate=failure_rate,
+        seed=seed,
+    )
+    stats = run_benchmark(Path(fixture_dir), behaviour, workers, repeat, stream)
+
+    click.echo(f"🏁 {stats['videos']} videos on {stats['workers']} workers "
+               f"in {stats['wall_seconds']:.2f}s")
+    click.echo(f"   Throughput: {stats['videos_per_minute']:.1f} videos/min")
+    click.echo(f"   Per video: p50={stats['p50_seconds']:.2f}s p95={stats['p95_seconds']:.2f}s")
+    click.echo(f"   API calls: {stats['api_calls']} "
+               f"({stats['injected_failures']} injected failures, "
+               f"{stats['failed_videos']} videos aborted mid-chat)")
+
+
+if __name__ == "__main__":
+    main()
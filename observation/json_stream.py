@@ -0,0 +1,255 @@
+"""
+Incremental JSON parsing for the Stage 1 ``5_json`` step.
+
+The model returns one large JSON array of frame objects.  Instead of waiting
+for the whole response, ``FrameStreamParser`` is fed text chunks as they
+arrive from the streaming API and hands back every frame object as soon as
+its closing brace is seen.  Frames are then appended to an NDJSON physics
+file by ``NDJSONFrameWriter`` so that Stage 2 and the visualizer can start on
+partial output, and a truncated response still keeps every complete frame.
+
+Accepted response shapes (same as the non-streaming extraction):
+  - ``[{frame}, {frame}, ...]``
+  - ``{"frames": [...]}`` / ``{"analysis": [...]}``
+  - a single ``{frame}`` object with a ``timestamp`` key
+Markdown fences and prose before the first bracket are skipped, and a frame
+object that fails to parse only because of trailing commas is repaired.
+
+NDJSON physics layout (``*_physics.ndjson``):
+  line 1:  {"metadata": {...}}
+  line 2+: one frame object per line
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Keys under which a wrapped response may carry the frame array.
+FRAME_ARRAY_KEYS = ("frames", "analysis")
+
+_KEY_BEFORE_ARRAY = re.compile(r'"([A-Za-z_]+)"\s*:\s*$')
+_STRING_OR_TRAILING_COMMA = re.compile(r'"(?:\\.|[^"\\])*"|,(?=\s*[}\]])')
+
+
+def strip_trailing_commas(raw: str) -> str:
+    """Remove commas directly before a closing brace/bracket (outside strings)."""
+    return _STRING_OR_TRAILING_COMMA.sub(
+        lambda m: m.group(0) if m.group(0).startswith('"') else "", raw
+    )
+
+
+class FrameStreamParser:
+    """Extract frame objects from a JSON array that arrives in chunks.
+
+    Call ``feed()`` with each text chunk; it returns the frames completed by
+    that chunk.  Call ``close()`` once the stream ends to pick up a bare
+    single-frame response and to learn whether the array was truncated.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._frame_level: Optional[int] = None
+        self._obj_start: Optional[int] = None
+        self._root_start = 0
+        self._root_end = 0
+        self.frames_emitted = 0
+        self.frames_repaired = 0
+        self.parse_errors = 0
+        self.complete = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of response text and return newly completed frames."""
+        if self.complete or not chunk:
+            return []
+
+        self._text += chunk
+        frames: List[Dict[str, Any]] = []
+        text = self._text
+        i = self._pos
+
+        while i < len(text):
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                i += 1
+                continue
+
+            if not self._stack and ch not in "[{":
+                # Fences, prose or whitespace before the root container
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._open(ch, i)
+            elif ch in "]}":
+                frame = self._close(i)
+                if frame is not None:
+                    frames.append(frame)
+                if self.complete:
+                    i += 1
+                    break
+            i += 1
+
+        self._pos = i
+        self._compact()
+        return frames
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Finish the stream; returns a bare single frame if that was the response."""
+        if self._frame_level is None and self.complete:
+            try:
+                parsed = json.loads(self._text[self._root_start:self._root_end])
+            except ValueError:
+                return []
+            if isinstance(parsed, dict) and "timestamp" in parsed:
+                self.frames_emitted += 1
+                return [parsed]
+        return []
+
+    @property
+    def truncated(self) -> bool:
+        """True if the stream ended before the root container was closed."""
+        return not self.complete
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _open(self, ch: str, i: int) -> None:
+        depth = len(self._stack)
+        if depth == 0:
+            self._root_start = i
+            if ch == "[":
+                self._frame_level = 0
+        elif (
+            depth == 1
+            and ch == "["
+            and self._frame_level is None
+            and self._stack[0] == "{"
+        ):
+            match = _KEY_BEFORE_ARRAY.search(self._text[max(0, i - 64):i])
+            if match and match.group(1) in FRAME_ARRAY_KEYS:
+                self._frame_level = 1
+        elif (
+            ch == "{"
+            and self._frame_level is not None
+            and depth == self._frame_level + 1
+        ):
+            self._obj_start = i
+        self._stack.append(ch)
+
+    def _close(self, i: int) -> Optional[Dict[str, Any]]:
+        if not self._stack:
+            return None
+        self._stack.pop()
+        depth = len(self._stack)
+
+        if depth == 0:
+            self._root_end = i + 1
+            self.complete = True
+            return None
+
+        if self._frame_level is not None and depth == self._frame_level:
+            # Closing the frame array itself ends the useful part of the stream
+            self.complete = True
+            return None
+
+        if (
+            self._obj_start is not None
+            and self._frame_level is not None
+            and depth == self._frame_level + 1
+        ):
+            raw = self._text[self._obj_start:i + 1]
+            self._obj_start = None
+            try:
+                frame = json.loads(raw)
+            except ValueError:
+                try:
+                    frame = json.loads(strip_trailing_commas(raw))
+                except ValueError:
+                    self.parse_errors += 1
+                    return None
+                self.frames_repaired += 1
+            if isinstance(frame, dict):
+                self.frames_emitted += 1
+                return frame
+        return None
+
+    def _compact(self) -> None:
+        """Drop text that can no longer be part of a pending frame."""
+        if self._frame_level is None:
+            return  # May still need the whole root for a single-frame response
+        cut = self._obj_start if self._obj_start is not None else self._pos
+        if cut > 0:
+            self._text = self._text[cut:]
+            self._pos -= cut
+            if self._obj_start is not None:
+                self._obj_start -= cut
+
+
+class NDJSONFrameWriter:
+    """Append frames to an NDJSON physics file, one flushed line per frame."""
+
+    def __init__(self, path: Path, metadata: Dict[str, Any]):
+        self.path = Path(path)
+        self.frame_count = 0
+        self._fh = open(self.path, "w")
+        self._write({"metadata": metadata})
+
+    def write_frame(self, frame: Dict[str, Any]) -> None:
+        self._write(frame)
+        self.frame_count += 1
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+    def _write(self, obj: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(obj, separators=(",", ":")) + "\n")
+        self._fh.flush()
+
+    def __enter__(self) -> "NDJSONFrameWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_ndjson_physics(path: Path) -> Dict[str, Any]:
+    """Load an NDJSON physics file into the regular ``{metadata, frames}`` shape.
+
+    A trailing partial line (file still being written) is ignored.
+    """
+    metadata: Dict[str, Any] = {}
+    frames: List[Dict[str, Any]] = []
+
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                break
+            if "metadata" in obj and not frames and not metadata:
+                metadata = obj["metadata"]
+            else:
+                frames.append(obj)
+
+    metadata = dict(metadata)
+    metadata["total_frames"] = len(frames)
+    return {"metadata": metadata, "frames": frames}
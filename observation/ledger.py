@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Token, latency and cost ledger for Stage 1 API calls.
+
+Every Gemini call made by ``GeminiCacheAnalyzer`` (cache creation and each
+analysis step) is captured as a ``StepUsage`` record: prompt, cached, output
+and thinking tokens, wall-clock latency and an estimated USD cost.  Records
+go into the physics JSON metadata and are appended to a JSONL run ledger so
+that batches can be sized and prompt regressions spotted across runs.
+
+Report:
+    python -m observation.ledger data/analyses/stage1_ledger.jsonl --by model --by step
+"""
+
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import click
+import numpy as np
+
+# USD per 1M tokens: (input, cached input, output incl. thinking).
+# Standard-context list prices; update when pricing changes.
+MODEL_PRICING: Dict[str, tuple] = {
+    "gemini-3-pro-preview": (2.00, 0.20, 12.00),
+    "gemini-2.5-pro": (1.25, 0.31, 10.00),
+    "gemini-2.5-flash": (0.30, 0.075, 2.50),
+}
+
+# Video length buckets (seconds) for the report
+LENGTH_BUCKETS = [
+    (0, 10, "<10s"),
+    (10, 30, "10-30s"),
+    (30, 120, "30s-2m"),
+    (120, float("inf"), "2m+"),
+]
+
+
+@dataclass
+class StepUsage:
+    """Token usage and latency of a single API call."""
+
+    step: str
+    model: str
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    total_tokens: int = 0
+    latency_seconds: float = 0.0
+    cost_usd: float = 0.0
+
+    @classmethod
+    def from_usage_metadata(
+        cls, step: str, model: str, usage: Any, latency_seconds: float
+    ) -> "StepUsage":
+        """Build from a ``usage_metadata`` object (response or cache); missing counts are 0."""
+        def count(name: str) -> int:
+            return int(getattr(usage, name, None) or 0) if usage is not None else 0
+
+        record = cls(
+            step=step,
+            model=model,
+            prompt_tokens=count("prompt_token_count"),
+            cached_tokens=count("cached_content_token_count"),
+            output_tokens=count("candidates_token_count"),
+            thinking_tokens=count("thoughts_token_count"),
+            total_tokens=count("total_token_count"),
+            latency_seconds=round(latency_seconds, 3),
+        )
+        if not record.prompt_tokens and not record.output_tokens:
+            # Cache creation only reports total_token_count, all billed as input
+            record.prompt_tokens = record.total_tokens
+        record.cost_usd = estimate_cost(record)
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def estimate_cost(usage: StepUsage) -> float:
+    """Estimated USD cost of a call; 0 for models without a price entry."""
+    pricing = MODEL_PRICING.get(usage.model)
+    if pricing is None:
+        return 0.0
+    price_in, price_cached, price_out = pricing
+    uncached = max(usage.prompt_tokens - usage.cached_tokens, 0)
+    cost = (
+        uncached * price_in
+        + usage.cached_tokens * price_cached
+        + (usage.output_tokens + usage.thinking_tokens) * price_out
+    ) / 1_000_000
+    return round(cost, 6)
+
+
+def summarize_usage(steps: Sequence[StepUsage]) -> Dict[str, Any]:
+    """Totals for one video, stored in the physics JSON metadata."""
+    return {
+        "steps": [s.to_dict() for s in steps],
+        "totals": {
+            "prompt_tokens": sum(s.prompt_tokens for s in steps),
+            "cached_tokens": sum(s.cached_tokens for s in steps),
+            "output_tokens": sum(s.output_tokens for s in steps),
+            "thinking_tokens": sum(s.thinking_tokens for s in steps),
+            "latency_seconds": round(sum(s.latency_seconds for s in steps), 3),
+            "cost_usd": round(sum(s.cost_usd for s in steps), 6),
+        },
+    }
+
+
+class RunLedger:
+    """Append-only JSONL ledger of Stage 1 calls."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def append(
+        self,
+        steps: Iterable[StepUsage],
+        video: str,
+        video_duration: Optional[float] = None,
+        run_id: Optional[str] = None,
+    ) -> int:
+        """Append one line per call; returns the number of lines written."""
+        run_id = run_id or uuid.uuid4().hex[:12]
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        n = 0
+        with open(self.path, "a") as f:
+            for s in steps:
+                record = {
+                    "run_id": run_id,
+                    "recorded_at": now,
+                    "video": video,
+                    "video_duration": video_duration,
+                    **s.to_dict(),
+                }
+                f.write(json.dumps(record) + "\n")
+                n += 1
+        return n
+
+    def read(self) -> List[Dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+        return records
+
+
+def length_bucket(duration: Optional[float]) -> str:
+    if duration is None:
+        return "unknown"
+    for lo, hi, label in LENGTH_BUCKETS:
+        if lo <= duration < hi:
+            return label
+    return "unknown"
+
+
+def aggregate(records: List[Dict[str, Any]], by: Sequence[str]) -> List[Dict[str, Any]]:
+    """Group ledger records and compute token/cost totals and latency percentiles.
+
+    ``by`` may contain any record field plus ``"length"`` (video length bucket).
+    """
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for r in records:
+        key = tuple(
+            length_bucket(r.get("video_duration")) if k == "length" else r.get(k)
+            for k in by
+        )
+        groups.setdefault(key, []).append(r)
+
+    rows = []
+    for key, rs in sorted(groups.items(), key=lambda kv: tuple(str(k) for k in kv[0])):
+        latency = np.array([r.get("latency_seconds", 0.0) for r in rs], dtype=float)
+        rows.append({
+            **dict(zip(by, key)),
+            "calls": len(rs),
+            "runs": len({r.get("run_id") for r in rs}),
+            "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in rs),
+            "cached_tokens": sum(r.get("cached_tokens", 0) for r in rs),
+            "output_tokens": sum(r.get("output_tokens", 0) for r in rs),
+            "thinking_tokens": sum(r.get("thinking_tokens", 0) for r in rs),
+            "cost_usd": round(sum(r.get("cost_usd", 0.0) for r in rs), 4),
+            "p50_latency": round(float(np.percentile(latency, 50)), 2),
+            "p95_latency": round(float(np.percentile(latency, 95)), 2),
+        })
+    return rows
+
+
+@click.command()
+@click.argument("ledger_path", type=click.Path(exists=True))
+@click.option("--by", "group_by", multiple=True, default=("model", "step"),
+              help="Group by field: model, step, length, video, run_id (repeatable)")
+@click.option("--json", "as_json", is_flag=True, help="Print rows as JSON")
+def main(ledger_path: str, group_by: tuple, as_json: bool):
+    """Aggregate cost and p50/p95 latency from a Stage 1 run ledger."""
+    records = RunLedger(Path(ledger_path)).read()
+    rows = aggregate(records, list(group_by))
+
+    if as_json:
+        click.echo(json.dumps(rows, indent=2))
+        return
+
+    click.echo(f"📒 {len(records)} calls in {ledger_path}\n")
+    header = list(group_by) + [
+        "calls", "prompt", "cached", "output", "think", "cost $", "p50 s", "p95 s",
+    ]
+    click.echo("  ".join(f"{h:>14}" for h in header))
+    for row in rows:
+        values = [str(row[k]) for k in group_by] + [
+            row["calls"], row["prompt_tokens"], row["cached_tokens"], row["output_tokens"],
+            row["thinking_tokens"], f"{row['cost_usd']:.4f}",
+            row["p50_latency"], row["p95_latency"],
+        ]
+        click.echo("  ".join(f"{str(v):>14}" for v in values))
+    total = sum(r["cost_usd"] for r in rows)
+    click.echo(f"\n   Total estimated cost: ${total:.4f}")
+
+
+if __name__ == "__main__":
+    main()
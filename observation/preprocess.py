@@ -0,0 +1,237 @@
+"""
+Local video pre-processing before the File API upload.
+
+Broadcast clips are usually full-HD with scoreboard overlays, crowd shots and
+an audio track, while the model only needs the half-court.  This stage crops
+to a court region of interest, downscales to a target height, drops audio and
+re-encodes at a tuned bitrate with ffmpeg, shrinking both upload bytes and
+Gemini's processing wait.
+
+The ROI is either fixed (``"x,y,w,h"`` in pixels, or fractions of the frame
+when all values are ≤ 1) or ``"auto"``: estimated from where motion happens
+across sampled frames, which excludes static overlays and most of the stands.
+
+Results are cached by content hash + settings under ``cache_dir/<key>/`` with
+the original file name, so re-running the same video never re-encodes and
+downstream naming (report/physics files, replay fixtures) is unchanged.
+"""
+
+import hashlib
+import json
+import shutil
+import subprocess
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "videos" / ".preprocessed"
+
+Roi = Tuple[int, int, int, int]  # x, y, w, h in pixels
+
+
+@dataclass
+class PreprocessOptions:
+    """Settings for ``preprocess_video``; part of the cache key."""
+
+    crop: Optional[str] = None        # None, "auto" or "x,y,w,h"
+    target_height: Optional[int] = 720
+    video_bitrate: str = "2M"
+    drop_audio: bool = True
+
+    def key(self) -> str:
+        blob = json.dumps(asdict(self), sort_keys=True).encode("utf-8")
+        return hashlib.sha1(blob).hexdigest()[:8]
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content, read in 1 MiB chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def parse_roi(spec: str, width: int, height: int) -> Roi:
+    """Parse a fixed ``"x,y,w,h"`` ROI (pixels, or fractions when all ≤ 1)."""
+    try:
+        values = [float(v) for v in spec.split(",")]
+    except ValueError:
+        raise ValueError(f"Invalid crop '{spec}': expected x,y,w,h")
+    if len(values) != 4:
+        raise ValueError(f"Invalid crop '{spec}': expected x,y,w,h")
+    if all(0 <= v <= 1 for v in values):
+        values = [values[0] * width, values[1] * height, values[2] * width, values[3] * height]
+    return clamp_roi(tuple(int(round(v)) for v in values), width, height)
+
+
+def clamp_roi(roi: Roi, width: int, height: int) -> Roi:
+    """Clip an ROI to the frame and make its size even (required by H.264)."""
+    x, y, w, h = roi
+    x = min(max(x, 0), width - 2)
+    y = min(max(y, 0), height - 2)
+    w = min(max(w, 2), width - x)
+    h = min(max(h, 2), height - y)
+    return x, y, w - (w % 2), h - (h % 2)
+
+
+def roi_from_motion_energy(
+    energy: np.ndarray,
+    coverage: float = 0.96,
+    margin: float = 0.05,
+) -> Roi:
+    """Bounding box holding ``coverage`` of the motion energy, plus a margin.
+
+    ``energy`` is a 2-D per-pixel accumulation of frame differences.  Row and
+    column marginals are trimmed symmetrically at ``(1 - coverage) / 2`` of the
+    cumulative energy, which drops static overlays and sparse crowd motion.
+    """
+    height, width = energy.shape
+    total = float(energy.sum())
+    if total <= 0:
+        return 0, 0, width - (width % 2), height - (height % 2)
+
+    tail = (1.0 - coverage) / 2.0
+
+    def bounds(marginal: np.ndarray) -> Tuple[int, int]:
+        cdf = np.cumsum(marginal) / total
+        lo = int(np.searchsorted(cdf, tail, side="right"))
+        hi = int(np.searchsorted(cdf, 1.0 - tail - 1e-9)) + 1
+        return lo, min(hi, marginal.size)
+
+    x0, x1 = bounds(energy.sum(axis=0))
+    y0, y1 = bounds(energy.sum(axis=1))
+    mx = int((x1 - x0) * margin)
+    my = int((y1 - y0) * margin)
+    return clamp_roi((x0 - mx, y0 - my, x1 - x0 + 2 * mx, y1 - y0 + 2 * my), width, height)
+
+
+def estimate_court_roi(video_path: Path, samples: int = 40, width: int = 320) -> Roi:
+    """Auto-estimate the court ROI (full-resolution pixels) from motion energy."""
+    import cv2
+
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    full_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    full_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    scale = width / full_w if full_w else 1.0
+
+    energy = None
+    prev = None
+    try:
+        for idx in np.linspace(0, max(n_frames - 1, 0), samples).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+            ok, frame = cap.read()
+            if not ok:
+                continue
+            small = cv2.resize(frame, (width, max(1, int(full_h * scale))),
+                               interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+            if prev is not None:
+                diff = np.abs(gray - prev)
+                energy = diff if energy is None else energy + diff
+            prev = gray
+    finally:
+        cap.release()
+
+    if energy is None:
+        return clamp_roi((0, 0, full_w, full_h), full_w, full_h)
+
+    x, y, w, h = roi_from_motion_energy(energy)
+    return clamp_roi(
+        (int(x / scale), int(y / scale), int(w / scale), int(h / scale)), full_w, full_h
+    )
+
+
+def probe_size(video_path: Path) -> Tuple[int, int]:
+    import cv2
+
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        cap.release()
+
+
+def build_ffmpeg_command(
+    src: Path,
+    dst: Path,
+    crop: Optional[Roi],
+    out_height: Optional[int],
+    video_bitrate: str,
+    drop_audio: bool,
+) -> List[str]:
+    """ffmpeg argv for crop → scale → H.264 at a capped bitrate."""
+    filters = []
+    if crop:
+        x, y, w, h = crop
+        filters.append(f"crop={w}:{h}:{x}:{y}")
+    if out_height:
+        filters.append(f"scale=-2:{out_height}")
+
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(src)]
+    if filters:
+        cmd += ["-vf", ",".join(filters)]
+    cmd += [
+        "-c:v", "libx264", "-preset", "veryfast",
+        "-b:v", video_bitrate, "-maxrate", video_bitrate, "-bufsize", video_bitrate,
+        "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+    ]
+    cmd += ["-an"] if drop_audio else ["-c:a", "aac", "-b:a", "96k"]
+    cmd.append(str(dst))
+    return cmd
+
+
+def preprocess_video(
+    video_path: Path,
+    options: PreprocessOptions,
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+    verbose: bool = False,
+) -> Path:
+    """Return the path of the pre-processed video, encoding it only on a cache miss."""
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found on PATH")
+
+    key = f"{file_digest(video_path)[:16]}-{options.key()}"
+    out_dir = Path(cache_dir) / key
+    out_path = out_dir / f"{video_path.stem}.mp4"
+    if out_path.exists():
+        if verbose:
+            print(f"  Pre-processed cache hit: {key}")
+        return out_path
+
+    width, height = probe_size(video_path)
+    crop = None
+    if options.crop == "auto":
+        crop = estimate_court_roi(video_path)
+    elif options.crop:
+        crop = parse_roi(options.crop, width, height)
+
+    src_height = crop[3] if crop else height
+    out_height = None
+    if options.target_height and src_height > options.target_height:
+        out_height = options.target_height - (options.target_height % 2)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_dir / f"{video_path.stem}.part.mp4"
+    cmd = build_ffmpeg_command(
+        video_path, tmp_path, crop, out_height, options.video_bitrate, options.drop_audio
+    )
+    if verbose:
+        print(f"  Pre-processing: crop={crop} height={out_height or src_height} "
+              f"bitrate={options.video_bitrate}")
+    subprocess.run(cmd, check=True)
+    tmp_path.replace(out_path)
+
+    if verbose:
+        before = video_path.stat().st_size / 1e6
+        after = out_path.stat().st_size / 1e6
+        print(f"  Pre-processed: {before:.1f} MB → {after:.1f} MB")
+    return out_path
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Salvage frames from a truncated or malformed ``5_json`` response.
+
+Long clips regularly hit the output-token limit mid-array, and the model
+occasionally leaves a trailing comma or a broken object behind.  A strict
+``json.loads`` then throws away minutes of paid inference.  ``salvage_frames``
+runs the response through ``FrameStreamParser`` instead, which keeps every
+complete frame object (repairing trailing commas) and reports whether the
+array was cut off and how many objects had to be dropped.
+
+When the array was cut off the analyzer can ask for the missing tail with a
+single continuation request (``continuation_prompt``) and merge the answer
+with ``merge_continuation``.
+
+Failed runs can be salvaged after the fact from the saved report, whose
+``## [5_JSON]`` section holds the raw response:
+
+    python -m observation.salvage data/analyses/clip_report.md
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import click
+
+from observation.json_stream import FrameStreamParser
+
+_REPORT_SECTION = re.compile(r"^## \[([A-Z0-9_]+)\]\s*$", re.MULTILINE)
+
+
+@dataclass
+class SalvageResult:
+    """Frames recovered from a response plus what had to be given up."""
+
+    frames: List[Dict[str, Any]] = field(default_factory=list)
+    truncated: bool = False
+    repaired_frames: int = 0
+    dropped_objects: int = 0
+    continued: bool = False
+
+    @property
+    def partial(self) -> bool:
+        """True if frames are known to be missing from the output."""
+        return self.truncated or self.dropped_objects > 0
+
+    @classmethod
+    def from_parser(cls, frames: List[Dict[str, Any]], parser: FrameStreamParser):
+        return cls(
+            frames=frames,
+            truncated=parser.truncated,
+            repaired_frames=parser.frames_repaired,
+            dropped_objects=parser.parse_errors,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "recovered_frames": len(self.frames),
+            "truncated": self.truncated,
+            "repaired_frames": self.repaired_frames,
+            "dropped_objects": self.dropped_objects,
+            "continued": self.continued,
+        }
+
+
+def salvage_frames(text: str) -> SalvageResult:
+    """Recover every complete frame object from a (possibly broken) response."""
+    parser = FrameStreamParser()
+    frames = parser.feed(text or "")
+    frames += parser.close()
+    return SalvageResult.from_parser(frames, parser)
+
+
+def _timestamp(frame: Dict[str, Any]) -> Optional[float]:
+    try:
+        return float(frame.get("timestamp"))
+    except (TypeError, ValueError):
+        return None
+
+
+def last_timestamp(frames: List[Dict[str, Any]]) -> Optional[float]:
+    """Latest parseable timestamp among the frames, or None."""
+    stamps = [t for t in (_timestamp(f) for f in frames) if t is not None]
+    return max(stamps) if stamps else None
+
+
+def continuation_prompt(after: Optional[float]) -> str:
+    """Prompt asking the model for the frames its cut-off answer did not reach."""
+    start = f"{after:g}" if after is not None else "0.0"
+    return f"""
+    TASK: PHYSICS JSON CONTINUATION
+    Your previous JSON output was cut off after the frame at timestamp {start}.
+    Continue the SAME analysis: output the remaining frames with timestamp
+    greater than {start}, up to the end of the video.
+
+    Requirements:
+    - Output ONLY a valid JSON array of frame objects (same schema as before)
+    - Do NOT repeat frames at or before timestamp {start}
+    - Keep track_id values consistent with the frames already produced
+    """
+
+
+def merge_continuation(
+    frames: List[Dict[str, Any]], more: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Append continuation frames that come strictly after the recovered ones."""
+    after = last_timestamp(frames)
+    if after is None:
+        return frames + more
+    return frames + [f for f in more if (_timestamp(f) or -1.0) > after]
+
+
+def extract_report_section(report_text: str, step: str = "5_JSON") -> Optional[str]:
+    """Raw response text of one ``## [STEP]`` section of a Stage 1 report."""
+    matches = list(_REPORT_SECTION.finditer(report_text))
+    for i, match in enumerate(matches):
+        if match.group(1) != step.upper():
+            continue
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(report_text)
+        body = report_text[match.end():end]
+        # The report footer starts with a horizontal rule after the last step
+        footer = body.find("\n---\n")
+        return body[:footer] if footer >= 0 else body
+    return None
+
+
+def salvage_report(report_path: Path, output_path: Optional[Path] = None, fps: float = 16.0):
+    """Write ``*_physics.json`` from the 5_JSON section of a saved report.
+
+    Returns (output_path, SalvageResult); output_path is None if no frame
+    could be recovered.
+    """
+    report_path = Path(report_path)
+    section = extract_report_section(report_path.read_text())
+    result = salvage_frames(section or "")
+    if not result.frames:
+        return None, result
+
+    stem = report_path.stem
+    if stem.endswith("_report"):
+        stem = stem[: -len("_report")]
+    output_path = output_path or report_path.parent / f"{stem}_physics.json"
+
+    wrapper = {
+        "metadata": {
+            "video": f"{stem}.mp4",
+            "fps": fps,
+            "total_frames": len(result.frames),
+            "duration_seconds": len(result.frames) * (1.0 / fps),
+            "partial": result.partial,
+            "salvage": result.to_dict(),
+        },
+        "frames": result.frames,
+    }
+    with open(output_path, "w") as f:
+        json.dump(wrapper, f, indent=2)
+    return output_path, result
+
+
+@click.command()
+@click.argument("reports", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--force", is_flag=True, help="Overwrite an existing *_physics.json")
+def main(reports, force):
+    """Recover physics JSON from saved Stage 1 reports without re-running videos."""
+    for report in map(Path, reports):
+        stem = report.stem[: -len("_report")] if report.stem.endswith("_report") else report.stem
+        target = report.parent / f"{stem}_physics.json"
+        if target.exists() and not force:
+            click.echo(f"⏭️  {report.name}: {target.name} exists (use --force)")
+            continue
+        path, result = salvage_report(report, target)
+        if path is None:
+            click.echo(f"❌ {report.name}: no complete frames found")
+            continue
+        flag = " (partial)" if result.partial else ""
+        click.echo(f"✅ {report.name}: {len(result.frames)} frames → {path.name}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,11 @@ Usage:
 """
 
 import json
+import threading
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 import click
 
@@ -22,12 +24,29 @@ from inference import (
     PlayerPosition,
     EventDetector,
     determine_attacking_team,
+    TeamClassification,
     validate_zone_transitions,
 )
+from inference.court_geometry import zone_physics
+from inference.formations import formation_segments
+from inference.plausibility import check_plausibility
+from inference.team_windows import PHASE_MIN_FRAMES, classify_possession_phases
+from inference.teleport_repair import repair_physics
+from inference.timeline import resample_physics
+from inference.track_stitching import stitch_physics
+from inference.zone_intervals import build_zone_intervals
+from observation import read_ndjson_physics
 
 
 def parse_physics_json(path: Path) -> Dict[str, Any]:
-    """Load and validate physics JSON file."""
+    """Load and validate physics JSON file.
+
+    Also accepts a streamed ``*_physics.ndjson`` file, which may still be
+    growing while Stage 1 runs.
+    """
+    if Path(path).suffix == ".ndjson":
+        return read_ndjson_physics(path)
+
     with open(path, 'r') as f:
         data = json.load(f)
     
@@ -46,7 +65,8 @@ def normalize_zone(zone: Any) -> int:
     return 0
 
 
-def build_roster(frames: List[Dict]) -> Dict[str, List[Dict]]:
+def build_roster(frames: List[Dict],
+                 classification: Optional[TeamClassification] = None) -> Dict[str, List[Dict]]:
     """Build roster from first frame by assigning roles.
 
     Uses multi-signal inference (ball possession, goalkeeper proximity,
@@ -62,7 +82,8 @@ def build_roster(frames: List[Dict]) -> Dict[str, List[Dict]]:
         return {"attack": [], "defense": [], "_classification": None}
 
     # --- Determine attacking / defending team from ALL frames ---
-    classification = determine_attacking_team(frames)
+    if classification is None:
+        classification = determine_attacking_team(frames)
 
     first_frame = frames[0]
     players = first_frame.get("players", [])
@@ -154,100 +175,349 @@ def create_original_event(events: List[Dict], timestamp: float) -> Optional[Dict
     return None
 
 
-def transform_physics_to_events(physics_data: Dict, source_path: Path) -> Dict:
-    """Main transformation: physics -> events."""
-    
-    frames = physics_data.get("frames", [])
-    metadata = physics_data.get("metadata", {})
-    
-    # Build roster (includes multi-signal team classification)
-    roster = build_roster(frames)
-    classification_meta = roster.pop("_classification", None)
-    all_roles = get_all_roles(roster)
-    
-    # Collect attacker/defender IDs for turnover detection
-    attacker_ids = {p["track_id"] for p in roster.get("attack", [])}
-    defender_ids = {p["track_id"] for p in roster.get("defense", [])}
-    
-    # Detect events across all frames
-    detector = EventDetector(all_roles, attacker_ids=attacker_ids, defender_ids=defender_ids)
-    all_events = []
-    
-    for i in range(len(frames) - 1):
-        is_last = (i == len(frames) - 2)
-        frame_events = detector.detect_all_events(frames[i], frames[i + 1], is_last_frame=is_last)
-        all_events.extend(frame_events)
-    
-    events_list = [e.to_dict() for e in all_events]
-    
-    # Build event index for active_event_ids
-    def get_active_events(timestamp: float) -> List[int]:
-        return [
-            e["event_id"] for e in events_list
-            if e["start_time"] <= timestamp <= e["end_time"]
-        ]
-    
-    # Enrich frames
-    enriched_frames = []
-    for frame in frames:
-        enriched = enrich_frame_with_roles(frame, all_roles)
-        ts = frame.get("timestamp", 0)
-        enriched["active_event_ids"] = get_active_events(ts)
-        
-        original = create_original_event(events_list, ts)
-        if original:
-            enriched["original_event"] = original
-        
-        enriched_frames.append(enriched)
-    
-    # Validate zone transitions (detect teleports)
-    zone_warnings = validate_zone_transitions(frames)
-
-    result_metadata = {
-        "video": metadata.get("video", physics_data.get("video", "")),
-        "source_physics": str(source_path),
-        "derived_at": datetime.now().isoformat(),
-        "model": metadata.get("model", ""),
-        "fps": metadata.get("fps"),
-        "total_frames": len(frames),
-        "duration_seconds": metadata.get("duration_seconds"),
-    }
-    if classification_meta:
-        result_metadata["team_classification"] = classification_meta
-    if zone_warnings:
-        result_metadata["zone_warnings"] = [w.to_dict() for w in zone_warnings]
-        result_metadata["zone_warning_count"] = len(zone_warnings)
-
-    return {
-        "metadata": result_metadata,
-        "roster": roster,
-        "events": events_list,
-        "frames": enriched_frames,
-    }
+def defending_teams(frames: List[Dict], team_phases: List,
+                    classification_meta: Optional[Dict]) -> List[Optional[str]]:
+    """Defending team colour per frame: per possession phase, else the clip-wide one."""
+    def known(team):
+        return team if team and team != "unknown" else None
+
+    if len(team_phases) > 1:
+        teams: List[Optional[str]] = [None] * len(frames)
+        for phase in team_phases:
+            team = known(phase.classification.defending_team)
+            span = phase.end_frame - phase.start_frame
+            teams[phase.start_frame:phase.end_frame] = [team] * span
+        return teams
+    return [known((classification_meta or {}).get("defending_team"))] * len(frames)
+
+
+class Match:
+    """Lazy Stage 2 view of one physics file (or dict).
+
+    Each derived artifact — ``classification``, ``roster``, ``events``,
+    ``zone_warnings``, ``possession_timeline``, ``enriched_frame(i)``, … — is
+    computed on first access and memoised, so a caller that only needs the
+    roster never runs event detection.  ``to_events()`` assembles the full
+    events JSON (what ``transform_physics_to_events`` returns).
+
+    A file-backed match checks the file's (mtime, size) on every access and
+    drops everything it derived when the file changed (e.g. a growing NDJSON
+    stream); a dict-backed one is fixed until ``invalidate()``.
+    """
+
+    def __init__(self, physics_path: Path, resample_fps: Optional[float] = None,
+                 stitch_tracks: bool = False, repair_teleports: bool = False,
+                 move_intervals: bool = False, keep_moves: bool = False):
+        self.source_path = Path(physics_path)
+        self.prepare_options = {"resample_fps": resample_fps, "stitch_tracks": stitch_tracks,
+                                "repair_teleports": repair_teleports}
+        self.move_intervals = move_intervals
+        self.keep_moves = keep_moves
+        self._physics: Optional[Dict] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._cache: Dict[str, Any] = {}
+        self._frames: Dict[int, Dict] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_physics(cls, physics_data: Dict, source_path: Path,
+                     move_intervals: bool = False, keep_moves: bool = False) -> "Match":
+        """Match over an already loaded (and prepared) physics dict.
+
+        Coordinate zoning runs here too (it is idempotent), so a raw dict gives
+        the same zones as the file-backed path through ``prepare_physics``.
+        """
+        match = cls(source_path, move_intervals=move_intervals, keep_moves=keep_moves)
+        match._physics = zone_physics(physics_data)
+        return match
+
+    # -- source --------------------------------------------------------------
+
+    def _file_signature(self) -> Tuple[int, int]:
+        st = self.source_path.stat()
+        return (st.st_mtime_ns, st.st_size)
+
+    def invalidate(self) -> None:
+        """Forget every derived artifact (and, for a file, the loaded physics)."""
+        with self._lock:
+            self._cache.clear()
+            self._frames.clear()
+            if self._signature is not None:
+                self._physics = None
+                self._signature = None
+
+    def _check_source(self) -> None:
+        if self._physics is not None and self._signature is None:
+            return  # dict-backed
+        signature = self._file_signature()
+        if signature != self._signature:
+            self.invalidate()
+            physics = prepare_physics(parse_physics_json(self.source_path),
+                                      **self.prepare_options)
+            self._physics, self._signature = physics, signature
+
+    def _get(self, name: str, derive):
+        with self._lock:
+            self._check_source()
+            if name not in self._cache:
+                self._cache[name] = derive()
+            return self._cache[name]
+
+    @property
+    def physics(self) -> Dict:
+        with self._lock:
+            self._check_source()
+            return self._physics
+
+    @property
+    def frames(self) -> List[Dict]:
+        return self.physics.get("frames", [])
+
+    # -- derived artifacts ---------------------------------------------------
+
+    @property
+    def classification(self) -> Optional[TeamClassification]:
+        """Attacking/defending team from all frames (None without frames)."""
+        return self._get("classification",
+                         lambda: determine_attacking_team(self.frames) if self.frames else None)
+
+    @property
+    def roster(self) -> Dict[str, List[Dict]]:
+        """``{"attack": [...], "defense": [...]}`` with roles from the first frame."""
+        def derive():
+            roster = build_roster(self.frames, self.classification)
+            roster.pop("_classification", None)
+            return roster
+        return self._get("roster", derive)
+
+    @property
+    def classification_meta(self) -> Optional[Dict[str, Any]]:
+        c = self.classification
+        if c is None:
+            return None
+        return {
+            "attacking_team": c.attacking_team,
+            "defending_team": c.defending_team,
+            "goalkeeper_team": c.goalkeeper_team,
+            "confidence": c.confidence,
+        }
+
+    @property
+    def roles(self) -> Dict[str, str]:
+        return self._get("roles", lambda: get_all_roles(self.roster))
+
+    @property
+    def events(self) -> List[Dict]:
+        """Detected events (dicts), MOVE events dropped with ``move_intervals``."""
+        def derive():
+            roster = self.roster
+            detector = EventDetector(
+                self.roles,
+                attacker_ids={p["track_id"] for p in roster.get("attack", [])},
+                defender_ids={p["track_id"] for p in roster.get("defense", [])},
+                include_moves=self.keep_moves or not self.move_intervals,
+            )
+            frames = self.frames
+            events = []
+            for i in range(len(frames) - 1):
+                is_last = (i == len(frames) - 2)
+                events.extend(detector.detect_all_events(frames[i], frames[i + 1],
+                                                         is_last_frame=is_last))
+            return [e.to_dict() for e in events]
+        return self._get("events", derive)
+
+    @property
+    def zone_warnings(self) -> List:
+        """Non-adjacent zone transitions (``ZoneWarning``)."""
+        return self._get("zone_warnings", lambda: validate_zone_transitions(self.frames))
+
+    @property
+    def plausibility_flags(self) -> List:
+        return self._get("plausibility_flags", lambda: check_plausibility(self.frames))
+
+    @property
+    def possession_timeline(self) -> List:
+        """Possession phases (``TeamWindow``) with attack/defence per phase."""
+        return self._get("possession_timeline", lambda: classify_possession_phases(
+            self.frames, min_frames=PHASE_MIN_FRAMES))
+
+    @property
+    def formations(self) -> List:
+        return self._get("formations", lambda: formation_segments(
+            self.frames,
+            defending_teams(self.frames, self.possession_timeline, self.classification_meta),
+        ))
+
+    @property
+    def zone_intervals(self):
+        return self._get("zone_intervals", lambda: build_zone_intervals(self.frames))
+
+    def enriched_frame(self, i: int) -> Dict:
+        """Frame ``i`` with roles, ``active_event_ids`` and ``original_event``."""
+        with self._lock:
+            self._check_source()
+            if i not in self._frames:
+                if not 0 <= i < len(self.frames):
+                    raise IndexError(f"Frame {i} out of range ({len(self.frames)} frames)")
+                frame = self.frames[i]
+                events = self.events
+                enriched = enrich_frame_with_roles(frame, self.roles)
+                ts = frame.get("timestamp", 0)
+                enriched["active_event_ids"] = [
+                    e["event_id"] for e in events if e["start_time"] <= ts <= e["end_time"]
+                ]
+                original = create_original_event(events, ts)
+                if original:
+                    enriched["original_event"] = original
+                self._frames[i] = enriched
+            return self._frames[i]
+
+    # -- full output ---------------------------------------------------------
+
+    def to_events(self) -> Dict:
+        """The complete events JSON (derives every artifact)."""
+        with self._lock:
+            self._check_source()
+            physics_data = self.physics
+            frames = self.frames
+            metadata = physics_data.get("metadata", {})
+            classification_meta = self.classification_meta
+            team_phases = self.possession_timeline
+            zone_warnings = self.zone_warnings
+            plausibility_flags = self.plausibility_flags
+
+            result_metadata = {
+                "video": metadata.get("video", physics_data.get("video", "")),
+                "source_physics": str(self.source_path),
+                "derived_at": datetime.now().isoformat(),
+                "model": metadata.get("model", ""),
+                "fps": metadata.get("fps"),
+                "total_frames": len(frames),
+                "duration_seconds": metadata.get("duration_seconds"),
+            }
+            if metadata.get("partial"):
+                result_metadata["partial"] = True
+            if "timeline" in metadata:
+                result_metadata["timeline"] = metadata["timeline"]
+            if "teleport_repairs" in metadata:
+                result_metadata["teleport_repairs"] = metadata["teleport_repairs"]
+            if "track_stitching" in metadata:
+                result_metadata["track_stitching"] = metadata["track_stitching"]
+            if classification_meta:
+                result_metadata["team_classification"] = classification_meta
+            if len(team_phases) > 1:
+                result_metadata["team_phases"] = [p.to_dict() for p in team_phases]
+            if zone_warnings:
+                result_metadata["zone_warnings"] = [w.to_dict() for w in zone_warnings]
+                result_metadata["zone_warning_count"] = len(zone_warnings)
+            if plausibility_flags:
+                result_metadata["plausibility_flags"] = [f.to_dict() for f in plausibility_flags]
+                result_metadata["plausibility_flag_count"] = len(plausibility_flags)
+
+            result = {
+                "metadata": result_metadata,
+                "roster": self.roster,
+                "events": self.events,
+                "formations": [s.to_dict() for s in self.formations],
+                "frames": [self.enriched_frame(i) for i in range(len(frames))],
+            }
+            if self.move_intervals:
+                result["zone_intervals"] = self.zone_intervals.to_dict()
+            return result
+
+
+def transform_physics_to_events(physics_data: Dict, source_path: Path,
+                                move_intervals: bool = False,
+                                keep_moves: bool = False) -> Dict:
+    """Main transformation: physics -> events.
+
+    With ``move_intervals`` each track's zone history is stored as a
+    ``zone_intervals`` table and per-change MOVE events are dropped (unless
+    ``keep_moves``).  Use ``Match`` directly when only some artifacts are needed.
+    """
+    return Match.from_physics(physics_data, source_path, move_intervals=move_intervals,
+                              keep_moves=keep_moves).to_events()
+
+
+def default_events_path(physics_path: Path) -> Path:
+    """``clip_physics.json`` / ``clip_physics.ndjson`` → ``clip_events.json``."""
+    output = str(physics_path).replace("_physics.json", "_events.json")
+    return Path(output.replace("_physics.ndjson", "_events.json"))
+
+
+def prepare_physics(physics_data: Dict, resample_fps: Optional[float] = None,
+                    stitch_tracks: bool = False, repair_teleports: bool = False) -> Dict:
+    """Optional passes before event derivation, in order: coordinate zoning, track
+    stitching, resampling, teleport repair.  Each records itself in the metadata
+    and none modifies the input."""
+    # Frames carrying metre coordinates get their zones from the court geometry
+    physics_data = zone_physics(physics_data)
+    if stitch_tracks:
+        physics_data = stitch_physics(physics_data)
+    if resample_fps:
+        physics_data = resample_physics(physics_data, fps=resample_fps)
+    if repair_teleports:
+        physics_data = repair_physics(physics_data)
+    return physics_data
 
 
 @click.command()
 @click.argument("physics_json_path", type=click.Path(exists=True))
 @click.option("-o", "--output", help="Output events JSON file")
 @click.option("--verbose", "-v", is_flag=True, help="Verbose output")
-def main(physics_json_path: str, output: str, verbose: bool):
+@click.option("--resample-fps", type=float, default=None,
+              help="Snap frames to a uniform grid at this FPS (forward-filled) before transforming")
+@click.option("--stitch-tracks", is_flag=True,
+              help="Merge track IDs the VLM split across occlusions before detecting events")
+@click.option("--repair-teleports", is_flag=True,
+              help="Route non-adjacent zone jumps through the shortest zone path")
+@click.option("--move-intervals", is_flag=True,
+              help="Store zone history as per-track intervals instead of MOVE events")
+@click.option("--keep-moves", is_flag=True,
+              help="With --move-intervals, still emit the individual MOVE events")
+def main(physics_json_path: str, output: str, verbose: bool, resample_fps: Optional[float],
+         stitch_tracks: bool, repair_teleports: bool, move_intervals: bool,
+         keep_moves: bool):
     """Transform physics JSON to events JSON with role inference."""
     
     input_path = Path(physics_json_path)
-    
-    if not output:
-        output = str(input_path).replace("_physics.json", "_events.json")
-    output_path = Path(output)
+    output_path = Path(output) if output else default_events_path(input_path)
     
     if verbose:
         click.echo(f"📖 Reading: {input_path}")
     
-    physics_data = parse_physics_json(input_path)
+    physics_data = prepare_physics(
+        parse_physics_json(input_path),
+        resample_fps=resample_fps,
+        stitch_tracks=stitch_tracks,
+        repair_teleports=repair_teleports,
+    )
+    prepared = physics_data.get("metadata", {})
+
+    n_located = prepared.get("zones_from_coordinates", 0)
+    if verbose and n_located:
+        click.echo(f"📐 Zoned {n_located} positions from x/y coordinates")
+
+    if stitch_tracks:
+        ts = prepared["track_stitching"]
+        click.echo(f"🧵 Stitched {ts['tracks_before']} tracks into {ts['tracks_after']}")
+
+    if resample_fps and verbose:
+        tl = prepared["timeline"]
+        click.echo(f"⏱️  Resampled to {resample_fps:g} FPS: {tl['observed_frames']} observed, "
+                   f"{tl['interpolated_frames']} interpolated")
+
+    if repair_teleports:
+        tr = prepared["teleport_repairs"]
+        click.echo(f"🩹 Repaired {tr['repaired'] + tr['incomplete']} teleports "
+                   f"({tr['incomplete']} incomplete)")
     
     if verbose:
         click.echo(f"🔄 Transforming {len(physics_data.get('frames', []))} frames...")
     
-    events_data = transform_physics_to_events(physics_data, input_path)
+    events_data = transform_physics_to_events(physics_data, input_path,
+                                              move_intervals=move_intervals,
+                                              keep_moves=keep_moves)
     
     with open(output_path, 'w') as f:
         json.dump(events_data, f, indent=2)
@@ -265,10 +535,27 @@ def main(physics_json_path: str, output: str, verbose: bool):
             f"{tc.get('defending_team', '?')}=defense"
             f" (confidence={tc.get('confidence', 0):.2f})"
         )
+    phases = events_data['metadata'].get('team_phases', [])
+    if phases:
+        click.echo(f"   Possession phases: {len(phases)}")
+        if verbose:
+            for ph in phases:
+                click.echo(
+                    f"      {ph['start_time']:.1f}s–{ph['end_time']:.1f}s: "
+                    f"{ph['attacking_team']}=attack (confidence={ph['confidence']:.2f})"
+                )
     click.echo(f"   Roster: {n_attack} attackers, {n_defense} defenders")
     click.echo(f"   Events: {n_events} detected")
+    if "zone_intervals" in events_data:
+        zi = events_data["zone_intervals"]
+        click.echo(f"   Zone intervals: {len(zi['zone'])} across {len(zi['track_ids'])} tracks")
+    if events_data['formations']:
+        counts = Counter(s['formation'] for s in events_data['formations'])
+        click.echo("   Formations: " + ", ".join(f"{f} ×{n}" for f, n in counts.most_common()))
     
     # Zone warnings
+    if events_data['metadata'].get('partial'):
+        click.echo("   ⚠️  Partial physics input (salvaged from a truncated response)")
     zone_warns = events_data['metadata'].get('zone_warnings', [])
     if zone_warns:
         click.echo(f"   ⚠️  Zone teleports: {len(zone_warns)} detected")
@@ -279,6 +566,17 @@ def main(physics_json_path: str, output: str, verbose: bool):
                     f"({w['timestamp_from']}s→{w['timestamp_to']}s)"
                 )
 
+    implausible = events_data['metadata'].get('plausibility_flags', [])
+    if implausible:
+        worst = max(f['severity'] for f in implausible)
+        click.echo(f"   ⚠️  Implausible moves: {len(implausible)} (max severity {worst:.1f})")
+        if verbose:
+            for f in sorted(implausible, key=lambda f: -f['severity'])[:10]:
+                click.echo(
+                    f"      {f['track_id']}: z{f['zone_from']}→z{f['zone_to']} "
+                    f"in {f['dt']}s (≥{f['min_speed']} m/s, severity {f['severity']})"
+                )
+
     if verbose and events_data['events']:
         click.echo("\n📋 Events:")
         for e in events_data['events'][:10]:
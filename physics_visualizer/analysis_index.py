@@ -0,0 +1,237 @@
+"""
+Persistent metadata index behind ``GET /api/analyses``.
+
+Listing used to ``json.load`` every physics file and walk every frame on each
+request.  The index keeps one summary per analysis (frame count, duration,
+unique players, events-file presence) in a sidecar JSON file next to the
+results, keyed by file name and invalidated by (mtime, size).  A refresh only
+re-reads files whose signature changed, so after the first build it costs a
+``stat`` per file; it runs on a background thread and requests are answered
+from memory.
+
+Sidecar layout (``<results_dir>/.analysis_index.json``):
+  {"version": 1, "entries": {"<name>": {..., "physics_sig": [mtime_ns, size]}}}
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from observation import read_ndjson_physics
+
+INDEX_VERSION = 1
+INDEX_FILENAME = ".analysis_index.json"
+DEFAULT_FRAME_SECONDS = 0.0625
+
+Signature = Tuple[int, int]
+
+
+def file_signature(path: Path) -> Optional[Signature]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def physics_files(results_dir: Path) -> Dict[str, Path]:
+    """Analysis name → physics file (finished JSON, else a still-streaming NDJSON)."""
+    files = {p.name[: -len("_physics.json")]: p for p in results_dir.glob("*_physics.json")}
+    for p in results_dir.glob("*_physics.ndjson"):
+        files.setdefault(p.name[: -len("_physics.ndjson")], p)
+    return files
+
+
+def summarize_physics(path: Path) -> Dict[str, Any]:
+    """Listing fields for one physics file (the only place frames are walked)."""
+    if path.suffix == ".ndjson":
+        data = read_ndjson_physics(path)
+    else:
+        with open(path) as f:
+            data = json.load(f)
+
+    metadata = data.get("metadata", {})
+    frames = data.get("frames", [])
+    unique_players = {
+        player["track_id"]
+        for frame in frames
+        for player in frame.get("players", [])
+        if player.get("track_id")
+    }
+    return {
+        "s3_uri": metadata.get("video") or data.get("video", ""),
+        "total_frames": metadata.get("total_frames", len(frames)),
+        "duration": metadata.get("duration_seconds", len(frames) * DEFAULT_FRAME_SECONDS),
+        "unique_players": len(unique_players),
+        "partial": bool(metadata.get("partial")),
+    }
+
+
+class AnalysisIndex:
+    """In-memory analysis summaries, persisted to a sidecar and refreshed incrementally."""
+
+    def __init__(self, results_dir: Path, index_path: Optional[Path] = None):
+        self.results_dir = Path(results_dir)
+        self.index_path = Path(index_path) if index_path else self.results_dir / INDEX_FILENAME
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_refresh: Optional[float] = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self._entries = data.get("entries", {})
+
+    def _save(self) -> None:
+        if not self.results_dir.exists():
+            return
+        tmp = self.index_path.with_suffix(f".tmp{os.getpid()}")
+        with self._lock:
+            payload = {"version": INDEX_VERSION, "entries": self._entries}
+            with open(tmp, "w") as f:
+                json.dump(payload, f)
+        os.replace(tmp, self.index_path)
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-summarize new/changed physics files, drop deleted ones, persist if changed."""
+        with self._refresh_lock:
+            stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "errors": 0}
+            files = physics_files(self.results_dir) if self.results_dir.exists() else {}
+
+            with self._lock:
+                current = dict(self._entries)
+
+            fresh: Dict[str, Dict[str, Any]] = {}
+            for name, path in files.items():
+                sig = file_signature(path)
+                if sig is None:
+                    continue
+                events = self.results_dir / f"{name}_events.json"
+                entry = current.get(name)
+                if (
+                    entry
+                    and entry.get("physics_file") == str(path)
+                    and tuple(entry.get("physics_sig", ())) == sig
+                ):
+                    entry = dict(entry)
+                    stats["unchanged"] += 1
+                else:
+                    try:
+                        summary = summarize_physics(path)
+                    except Exception as e:
+                        print(f"Error indexing {path.name}: {e}")
+                        stats["errors"] += 1
+                        continue
+                    stats["updated" if entry else "added"] += 1
+                    entry = {"name": name, "physics_file": str(path),
+                             "physics_sig": list(sig), **summary}
+                entry["events_file"] = str(events) if events.exists() else None
+                fresh[name] = entry
+
+            stats["removed"] = len(set(current) - set(fresh))
+            changed = stats["added"] or stats["updated"] or stats["removed"] or any(
+                current[n].get("events_file") != e["events_file"]
+                for n, e in fresh.items() if n in current
+            )
+            with self._lock:
+                self._entries = fresh
+            self.last_refresh = time.time()
+            if changed:
+                self._save()
+            return stats
+
+    def refresh_in_background(self) -> bool:
+        """Start a one-off refresh unless one is already running."""
+        if self._refresh_lock.locked():
+            return False
+        threading.Thread(target=self.refresh, daemon=True).start()
+        return True
+
+    def start(self, interval: float = 10.0) -> None:
+        """Refresh now, then every ``interval`` seconds on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error refreshing analysis index: {e}")
+                if self._stop.wait(interval):
+                    return
+
+        self._thread = threading.Thread(target=loop, daemon=True, name="analysis-index")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Summary for one analysis, or None if it is not indexed."""
+        if self.last_refresh is None:
+            self.refresh()
+        with self._lock:
+            entry = self._entries.get(name)
+        return dict(entry) if entry else None
+
+    def query(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        q: Optional[str] = None,
+        has_events: Optional[bool] = None,
+        min_frames: int = 0,
+        min_duration: float = 0.0,
+    ) -> Dict[str, Any]:
+        """Filtered, name-sorted page of analyses plus the total match count."""
+        if self.last_refresh is None:
+            self.refresh()
+        with self._lock:
+            entries = list(self._entries.values())
+
+        needle = q.lower() if q else None
+        matches: List[Dict[str, Any]] = []
+        for entry in sorted(entries, key=lambda e: e["name"]):
+            if needle and needle not in entry["name"].lower():
+                continue
+            if has_events is not None and (entry["events_file"] is not None) != has_events:
+                continue
+            if entry["total_frames"] < min_frames or entry["duration"] < min_duration:
+                continue
+            matches.append(entry)
+
+        offset = max(offset, 0)
+        page = matches[offset: offset + limit] if limit is not None else matches[offset:]
+        return {
+            "analyses": [
+                {k: v for k, v in e.items() if k != "physics_sig"} for e in page
+            ],
+            "total": len(matches),
+            "offset": offset,
+            "limit": limit,
+        }
@@ -0,0 +1,383 @@
+"""
+Time-range windows over stored physics/events files.
+
+``/api/physics/{name}`` hands the browser the whole document, so a full match
+is tens of megabytes before the first court frame renders.  A window request
+(``/api/physics/{name}/frames?start=&end=``) instead reads only the bytes of
+the frames in ``[start, end)``.
+
+The first request for a file builds an ``ArrayIndex``: the byte span and time
+key of every element of its ``frames`` (or ``events``) array, found with one
+pass of the C JSON decoder (``raw_decode`` element by element).  Windows are
+then a ``searchsorted`` over the time keys and a single ranged read of the
+file; elements are copied out verbatim, never re-serialized.  Indexes are kept
+per path and rebuilt when the file's (mtime, size) changes.
+
+With a ``store_dir``, ``IndexCache`` also persists each finished-file index as
+one ``.npy`` table named by the file's signature and loads it memory-mapped,
+so every server worker process shares one copy through the page cache and
+only the first process to see a file pays for the scan:
+
+  <store_dir>/<file name>.<key>.<mtime_ns hex>-<size hex>.npy    (INDEX_DTYPE)
+  <store_dir>/<file name>.<key>.<mtime_ns hex>-<size hex>.meta   (raw metadata JSON)
+
+NDJSON physics (still being written by Stage 1) is indexed by line; a trailing
+partial line is ignored, as in ``read_ndjson_physics``.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from inference.timeline import parse_timestamp
+from physics_visualizer.payload_cache import file_etag
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+DEFAULT_MAX_ENTRIES = 64
+
+INDEX_DTYPE = np.dtype([
+    ("start", "<i8"), ("end", "<i8"), ("t_start", "<f8"), ("t_end", "<f8"),
+    ("order", "<i8"), ("sorted_start", "<f8"), ("max_end", "<f8"),
+])
+
+
+def _time_key(value: Any) -> float:
+    t = parse_timestamp(value)
+    return np.nan if t is None else t
+
+
+def _skip(text: str, i: int) -> int:
+    return _WHITESPACE.match(text, i).end()
+
+
+def _expect(text: str, i: int, char: str) -> int:
+    if text[i:i + 1] != char:
+        raise ValueError(f"Expected {char!r} at offset {i}")
+    return i + 1
+
+
+def scan_array(text: str, key: str) -> Tuple[List[Tuple[int, int]], List[Any], Optional[str]]:
+    """Spans and values of the elements of top-level array ``key``, plus raw ``metadata``.
+
+    Offsets index into ``text``; decode the file as latin-1 so they are byte offsets.
+    """
+    spans: List[Tuple[int, int]] = []
+    values: List[Any] = []
+    metadata = None
+
+    i = _expect(text, _skip(text, 0), "{")
+    i = _skip(text, i)
+    if text[i:i + 1] == "}":
+        return spans, values, metadata
+    while True:
+        name, i = _decoder.raw_decode(text, i)
+        i = _skip(text, _expect(text, _skip(text, i), ":"))
+        if name == key and text[i:i + 1] == "[":
+            i = _skip(text, i + 1)
+            if text[i:i + 1] == "]":
+                i += 1
+            else:
+                while True:
+                    value, end = _decoder.raw_decode(text, i)
+                    spans.append((i, end))
+                    values.append(value)
+                    i = _skip(text, end)
+                    if text[i:i + 1] == "]":
+                        i += 1
+                        break
+                    i = _skip(text, _expect(text, i, ","))
+        else:
+            _, end = _decoder.raw_decode(text, i)
+            if name == "metadata":
+                metadata = text[i:end]
+            i = end
+
+        i = _skip(text, i)
+        if text[i:i + 1] == "}":
+            return spans, values, metadata
+        i = _skip(text, _expect(text, i, ","))
+
+
+@dataclass
+class ArrayIndex:
+    """Byte spans and time keys of one stored JSON array's elements."""
+
+    path: Path
+    signature: Tuple[int, int]
+    starts: np.ndarray      # (N,) int64 byte offset of each element
+    ends: np.ndarray        # (N,) int64 byte offset one past each element
+    t_start: np.ndarray     # (N,) float, NaN if the element has no usable time
+    t_end: np.ndarray       # (N,) float; equals t_start for frames
+    metadata: bytes         # raw JSON of the file's metadata object
+    # Time-sorted view, derived unless loaded from a stored table
+    order: Optional[np.ndarray] = field(default=None, repr=False)
+    sorted_start: Optional[np.ndarray] = field(default=None, repr=False)
+    max_end: Optional[np.ndarray] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.order is not None:
+            return
+        # NaN keys sort last and are never selected
+        keyed = np.where(np.isnan(self.t_start), np.inf, self.t_start)
+        self.order = np.argsort(keyed, kind="stable")
+        self.sorted_start = keyed[self.order]
+        ends = np.where(np.isnan(self.t_end), -np.inf, self.t_end)[self.order]
+        # Running max of end times: everything before the first slot whose
+        # running max reaches ``start`` ends before the window
+        self.max_end = np.maximum.accumulate(ends) if len(ends) else ends
+
+    def to_table(self) -> np.ndarray:
+        table = np.empty(len(self), dtype=INDEX_DTYPE)
+        for name, column in (("start", self.starts), ("end", self.ends),
+                             ("t_start", self.t_start), ("t_end", self.t_end),
+                             ("order", self.order), ("sorted_start", self.sorted_start),
+                             ("max_end", self.max_end)):
+            table[name] = column
+        return table
+
+    @classmethod
+    def from_table(cls, path: Path, signature: Tuple[int, int], table: np.ndarray,
+                   metadata: bytes) -> "ArrayIndex":
+        return cls(
+            path=path, signature=signature,
+            starts=table["start"], ends=table["end"],
+            t_start=table["t_start"], t_end=table["t_end"], metadata=metadata,
+            order=table["order"], sorted_start=table["sorted_start"],
+            max_end=table["max_end"],
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def etag(self) -> str:
+        return file_etag(*self.signature)
+
+    @property
+    def span(self) -> Tuple[Optional[float], Optional[float]]:
+        """(earliest start, latest end) over elements with a usable time."""
+        valid = ~np.isnan(self.t_start)
+        if not valid.any():
+            return None, None
+        ends = np.where(np.isnan(self.t_end), self.t_start, self.t_end)[valid]
+        return float(self.t_start[valid].min()), float(ends.max())
+
+    def select(self, start: float = 0.0, end: Optional[float] = None) -> np.ndarray:
+        """Element indices overlapping ``[start, end)``, in time order.
+
+        A frame overlaps when its timestamp is in the window; an event when
+        ``start_time < end`` and ``end_time >= start``.
+        """
+        end = np.inf if end is None else end
+        lo = int(np.searchsorted(self.max_end, start, side="left"))
+        hi = int(np.searchsorted(self.sorted_start, end, side="left"))
+        if hi <= lo:
+            return np.zeros(0, dtype=np.int64)
+        chosen = np.asarray(self.order[lo:hi])
+        t_end = np.where(np.isnan(self.t_end), self.t_start, self.t_end)[chosen]
+        return chosen[t_end >= start]
+
+    def read(self, indices: np.ndarray) -> bytes:
+        """Elements ``indices`` as the body of a JSON array, in one ranged read."""
+        if len(indices) == 0:
+            return b""
+        lo = int(self.starts[indices].min())
+        hi = int(self.ends[indices].max())
+        with open(self.path, "rb") as f:
+            f.seek(lo)
+            block = memoryview(f.read(hi - lo))
+        return b",".join(
+            block[s - lo:e - lo] for s, e in zip(self.starts[indices], self.ends[indices])
+        )
+
+    def window(self, key: str, start: float = 0.0, end: Optional[float] = None) -> bytes:
+        """JSON document for one window: metadata, totals and the raw elements."""
+        indices = self.select(start, end)
+        first, last = self.span
+        head = {
+            "start": start,
+            "end": end,
+            "total": len(self),
+            "count": int(len(indices)),
+            "first_time": first,
+            "last_time": last,
+        }
+        return b"".join([
+            json.dumps(head)[:-1].encode(),
+            b', "metadata": ', self.metadata,
+            f', "{key}": ['.encode(), self.read(indices), b"]}",
+        ])
+
+
+def _build(path: Path, signature, spans, t_start, t_end, metadata: bytes) -> ArrayIndex:
+    spans_arr = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+    return ArrayIndex(
+        path=path,
+        signature=signature,
+        starts=spans_arr[:, 0],
+        ends=spans_arr[:, 1],
+        t_start=np.asarray(t_start, dtype=float),
+        t_end=np.asarray(t_end, dtype=float),
+        metadata=metadata,
+    )
+
+
+def build_json_index(path: Path, key: str = "frames", start_field: str = "timestamp",
+                     end_field: Optional[str] = None) -> ArrayIndex:
+    """Index array ``key`` of a JSON file by ``start_field`` (and ``end_field``)."""
+    path = Path(path)
+    st = path.stat()
+    data = path.read_bytes()
+    # latin-1 maps bytes 1:1 to code points, so string offsets are byte offsets;
+    # only the ASCII time fields are read from the decoded values
+    spans, values, metadata = scan_array(data.decode("latin-1"), key)
+
+    t_start = [_time_key(v.get(start_field)) if isinstance(v, dict) else np.nan
+               for v in values]
+    if end_field is None:
+        t_end = t_start
+    else:
+        t_end = [_time_key(v.get(end_field)) if isinstance(v, dict) else np.nan
+                 for v in values]
+    raw_meta = metadata.encode("latin-1") if metadata is not None else b"{}"
+    return _build(path, (st.st_mtime_ns, st.st_size), spans, t_start, t_end, raw_meta)
+
+
+def build_ndjson_index(path: Path) -> ArrayIndex:
+    """Index a streaming ``*_physics.ndjson`` file by line (metadata line first)."""
+    path = Path(path)
+    st = path.stat()
+    data = path.read_bytes()
+
+    spans: List[Tuple[int, int]] = []
+    times: List[float] = []
+    metadata = b"{}"
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        start, offset = offset, offset + len(line)
+        if not line.endswith(b"\n"):
+            break  # partial line still being written
+        body = line.strip()
+        if not body:
+            continue
+        try:
+            obj = json.loads(body)
+        except ValueError:
+            break
+        if "metadata" in obj and not spans and metadata == b"{}":
+            metadata = json.dumps(obj["metadata"]).encode()
+            continue
+        lead = len(line) - len(line.lstrip())
+        spans.append((start + lead, start + lead + len(body)))
+        times.append(_time_key(obj.get("timestamp")))
+    return _build(path, (st.st_mtime_ns, st.st_size), spans, times, times, metadata)
+
+
+def _stored_stem(store_dir: Path, path: Path, key: str, signature: Tuple[int, int]) -> Path:
+    return store_dir / f"{path.name}.{key}.{signature[0]:x}-{signature[1]:x}"
+
+
+def save_index(index: ArrayIndex, store_dir: Path, key: str) -> Path:
+    """Persist ``index`` under ``store_dir``; older tables for the same file are removed."""
+    store_dir.mkdir(parents=True, exist_ok=True)
+    stem = _stored_stem(store_dir, index.path, key, index.signature)
+    table_path = stem.with_name(stem.name + ".npy")
+    tmp = stem.with_name(f".{stem.name}.tmp{os.getpid()}")
+    # Metadata first: the table's appearance marks the pair complete
+    tmp.write_bytes(index.metadata)
+    os.replace(tmp, stem.with_name(stem.name + ".meta"))
+    with open(tmp, "wb") as f:
+        np.save(f, index.to_table())
+    os.replace(tmp, table_path)
+
+    for old in store_dir.glob(f"{index.path.name}.{key}.*"):
+        if not old.name.startswith(stem.name + "."):
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass
+    return table_path
+
+
+def load_index(store_dir: Path, path: Path, key: str,
+               signature: Tuple[int, int]) -> Optional[ArrayIndex]:
+    """Memory-mapped stored index for ``path`` at ``signature``, or None."""
+    stem = _stored_stem(store_dir, path, key, signature)
+    try:
+        table = np.load(stem.with_name(stem.name + ".npy"), mmap_mode="r")
+        metadata = stem.with_name(stem.name + ".meta").read_bytes()
+    except (FileNotFoundError, ValueError):
+        return None
+    if table.dtype != INDEX_DTYPE:
+        return None
+    return ArrayIndex.from_table(path, signature, table, metadata)
+
+
+class IndexCache:
+    """Per-path ``ArrayIndex`` objects, rebuilt when the file's signature changes.
+
+    With ``store_dir``, finished JSON files' indexes are shared across
+    processes as memory-mapped tables (NDJSON files are still growing and are
+    only indexed in memory).
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 store_dir: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.store_dir = Path(store_dir) if store_dir else None
+        self._items: "OrderedDict[Tuple[str, str], ArrayIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.loads = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def _build(path: Path, key: str, start_field: str, end_field: Optional[str]) -> ArrayIndex:
+        if path.suffix == ".ndjson":
+            return build_ndjson_index(path)
+        return build_json_index(path, key, start_field, end_field)
+
+    def get(self, path: Path, key: str = "frames", start_field: str = "timestamp",
+            end_field: Optional[str] = None) -> ArrayIndex:
+        path = Path(path)
+        st = path.stat()
+        cache_key = (str(path), key)
+        with self._lock:
+            index = self._items.get(cache_key)
+            if index is not None and index.signature == (st.st_mtime_ns, st.st_size):
+                self._items.move_to_end(cache_key)
+                return index
+
+        signature = (st.st_mtime_ns, st.st_size)
+        shared = self.store_dir is not None and path.suffix != ".ndjson"
+        index = load_index(self.store_dir, path, key, signature) if shared else None
+        built = index is None
+        if built:
+            index = self._build(path, key, start_field, end_field)
+            if shared and index.signature == signature:
+                try:
+                    save_index(index, self.store_dir, key)
+                except OSError as e:  # read-only results dir: keep it in memory
+                    print(f"Could not persist window index for {path.name}: {e}")
+
+        with self._lock:
+            if built:
+                self.builds += 1
+            else:
+                self.loads += 1
+            self._items[cache_key] = index
+            self._items.move_to_end(cache_key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return index
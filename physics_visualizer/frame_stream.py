@@ -0,0 +1,168 @@
+"""
+Playback-synchronized frame streaming for the visualizer WebSocket.
+
+Instead of loading every frame up front, the browser opens
+``/ws/physics/{name}`` and the server pushes frames and active events for a
+moving time cursor, a short lookahead ahead of the playhead.  The client keeps
+only a small buffer around the playhead, so memory stays bounded however long
+the analysis is.
+
+Client → server messages (JSON):
+  {"type": "seek", "time": 12.5}      jump; the stream restarts at ``time``
+  {"type": "rate", "rate": 2.0}       playback rate (scales the lookahead)
+  {"type": "play"} / {"type": "pause"}
+  {"type": "sync", "time": 12.7}      periodic video.currentTime correction
+
+Server → client messages:
+  {"type": "meta", "metadata": {...}, "total": N, "first_time": ..., "last_time": ...}
+  {"type": "window", "seq": k, "start": a, "end": b, "frames": [...], "events": [...]}
+  {"type": "end"}                     everything up to the last frame has been sent
+
+``seq`` increases on every seek; windows from before a seek are stale.  Each
+event is sent once per seek, in the first window it overlaps.  Payloads are
+re-encoded without whitespace.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from physics_visualizer.frame_index import ArrayIndex
+
+DEFAULT_LOOKAHEAD = 2.0     # seconds of frames kept ahead of the playhead
+DEFAULT_CHUNK = 0.5         # seconds per pushed window
+MAX_RATE = 16.0
+
+
+def _compact(body: bytes) -> Any:
+    return json.loads(b"[" + body + b"]")
+
+
+class PlaybackCursor:
+    """Media-time cursor: position advances at ``rate`` while playing."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._position = 0.0
+        self._anchor = clock()
+        self.rate = 1.0
+        self.playing = False
+
+    def time(self) -> float:
+        if not self.playing:
+            return self._position
+        return self._position + (self._clock() - self._anchor) * self.rate
+
+    def _rebase(self, position: float) -> None:
+        self._position = max(position, 0.0)
+        self._anchor = self._clock()
+
+    def seek(self, t: float) -> None:
+        self._rebase(t)
+
+    def set_rate(self, rate: float) -> None:
+        self._rebase(self.time())
+        self.rate = min(max(rate, 0.0), MAX_RATE)
+
+    def play(self) -> None:
+        self._rebase(self.time())
+        self.playing = True
+
+    def pause(self) -> None:
+        self._rebase(self.time())
+        self.playing = False
+
+
+class FrameStreamer:
+    """Turns cursor movement into window messages read from the frame index."""
+
+    def __init__(
+        self,
+        frames: ArrayIndex,
+        events: Optional[ArrayIndex] = None,
+        lookahead: float = DEFAULT_LOOKAHEAD,
+        chunk: float = DEFAULT_CHUNK,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.frames = frames
+        self.events = events
+        self.lookahead = lookahead
+        self.chunk = chunk
+        self.cursor = PlaybackCursor(clock)
+        self.seq = 0
+        self._first, self._last = frames.span
+        self._sent_until = self._first or 0.0
+        self._sent_events: Set[int] = set()
+        self._ended = False
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "type": "meta",
+            "metadata": json.loads(self.frames.metadata),
+            "total": len(self.frames),
+            "first_time": self._first,
+            "last_time": self._last,
+        }
+
+    def handle(self, message: Dict[str, Any]) -> None:
+        """Apply one client message."""
+        kind = message.get("type")
+        if kind == "seek":
+            self._restart(float(message.get("time", 0.0)))
+        elif kind == "rate":
+            self.cursor.set_rate(float(message.get("rate", 1.0)))
+        elif kind == "play":
+            self.cursor.play()
+        elif kind == "pause":
+            self.cursor.pause()
+        elif kind == "sync":
+            t = float(message.get("time", 0.0))
+            # Small drift: re-anchor the clock; a jump past the buffer is a seek
+            if self.cursor.time() - self.chunk <= t <= self._sent_until:
+                self.cursor.seek(t)
+            else:
+                self._restart(t)
+
+    def _restart(self, t: float) -> None:
+        self.cursor.seek(t)
+        self.seq += 1
+        self._sent_until = max(t, 0.0)
+        self._sent_events = set()
+        self._ended = False
+
+    @property
+    def horizon(self) -> float:
+        """Media time the stream should have covered by now."""
+        return self.cursor.time() + self.lookahead * max(self.cursor.rate, 1.0)
+
+    def next_message(self) -> Optional[Dict[str, Any]]:
+        """The next window (or ``end``) if the cursor needs one, else None."""
+        if self._ended:
+            return None
+        if self._last is None or self._sent_until > self._last:
+            self._ended = True
+            return {"type": "end"}
+        if self._sent_until >= self.horizon:
+            return None
+
+        start = self._sent_until
+        end = start + self.chunk
+        self._sent_until = end
+
+        message = {
+            "type": "window",
+            "seq": self.seq,
+            "start": start,
+            "end": end,
+            "frames": _compact(self.frames.read(self.frames.select(start, end))),
+            "events": [],
+        }
+        if self.events is not None:
+            fresh = [i for i in self.events.select(start, end).tolist()
+                     if i not in self._sent_events]
+            self._sent_events.update(fresh)
+            message["events"] = _compact(self.events.read(fresh))
+        return message
+
+    def encode(self, message: Dict[str, Any]) -> str:
+        return json.dumps(message, separators=(",", ":"))
@@ -0,0 +1,85 @@
+"""
+Per-analysis zone occupancy indexes for the heatmap endpoint.
+
+``/api/heatmap/{name}?start=&end=&role=`` answers from an
+``inference.occupancy.OccupancyIndex`` built once per analysis file, so
+scrubbing a range on the timeline never re-walks the frames.  The Stage 2
+events file is preferred (its frames carry roles); without one the physics
+file (or the still-growing NDJSON stream) is used and role filters match
+nothing.
+
+Entries are keyed by path and (mtime, size), like the window indexes: a
+rewritten file is re-indexed on its next request.  The cache is bounded by
+the indexes' total bytes, like ``PayloadCache`` — a long match's track cube
+alone is over 100 MB.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from inference.occupancy import OccupancyIndex, build_occupancy
+from observation import read_ndjson_physics
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def source_file(results_dir: Path, analysis_name: str) -> Optional[Path]:
+    """The file to index for an analysis: events, else physics, else the NDJSON stream."""
+    for suffix in ("_events.json", "_physics.json", "_physics.ndjson"):
+        path = Path(results_dir) / f"{analysis_name}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def load_frames(path: Path) -> list:
+    if path.suffix == ".ndjson":
+        return read_ndjson_physics(path).get("frames", [])
+    with open(path) as f:
+        return json.load(f).get("frames", [])
+
+
+class OccupancyCache:
+    """LRU of ``OccupancyIndex`` per file bounded by total bytes, rebuilt when the
+    file's signature changes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, Tuple[Tuple[int, int], OccupancyIndex]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, path: Path) -> OccupancyIndex:
+        path = Path(path)
+        st = path.stat()
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._items.get(str(path))
+            if entry is not None and entry[0] == signature:
+                self._items.move_to_end(str(path))
+                return entry[1]
+
+        index = build_occupancy(load_frames(path))
+        with self._lock:
+            self.builds += 1
+            old = self._items.pop(str(path), None)
+            if old is not None:
+                self._bytes -= old[1].nbytes
+            if index.nbytes <= self.max_bytes:
+                self._items[str(path)] = (signature, index)
+                self._bytes += index.nbytes
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._items.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return index
@@ -0,0 +1,63 @@
+"""
+Lazy Stage 2 artifacts per analysis for ``/api/match/{name}/...``.
+
+Each analysis' physics file gets one ``physics_to_events.Match``; a request
+for the roster or the zone warnings derives only that (and what it depends
+on), never the full events JSON.  A ``Match`` re-reads its file when the
+(mtime, size) changes, so this cache only bounds how many are kept.
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from physics_to_events import Match
+
+DEFAULT_MAX_ENTRIES = 16
+ARTIFACTS = ("classification", "roster", "zone_warnings", "possession_timeline")
+
+
+def physics_file(results_dir: Path, analysis_name: str) -> Optional[Path]:
+    """The analysis' physics file (the NDJSON stream while Stage 1 is still running)."""
+    for suffix in ("_physics.json", "_physics.ndjson"):
+        path = Path(results_dir) / f"{analysis_name}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def artifact_json(match: Match, artifact: str):
+    """JSON-ready value of one ``ARTIFACTS`` entry."""
+    if artifact == "classification":
+        return match.classification_meta
+    if artifact == "roster":
+        return match.roster
+    if artifact == "zone_warnings":
+        return [w.to_dict() for w in match.zone_warnings]
+    if artifact == "possession_timeline":
+        return [p.to_dict() for p in match.possession_timeline]
+    raise ValueError(f"Unknown artifact {artifact!r} (expected one of {', '.join(ARTIFACTS)})")
+
+
+class MatchCache:
+    """LRU of ``Match`` objects per physics file."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[str, Match]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, path: Path) -> Match:
+        key = str(path)
+        with self._lock:
+            match = self._items.get(key)
+            if match is None:
+                match = self._items[key] = Match(Path(path))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return match
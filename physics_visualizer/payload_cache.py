@@ -0,0 +1,204 @@
+"""
+Byte-level delivery of stored physics/events JSON.
+
+The analysis files are served exactly as stored — never parsed and
+re-serialized — either raw or from a pre-compressed sidecar written next to
+them (``clip_physics.json.gz``, plus ``.br`` when the optional ``brotli``
+package is installed).  Each response carries a weak ETag and Last-Modified
+derived from the file's (mtime, size), so a browser reopening an analysis gets
+a ``304 Not Modified`` with no body.
+
+Hot payloads are kept in an in-process LRU bounded by total bytes; an entry is
+keyed by path and file signature, so a rewritten file is never served stale.
+"""
+
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Below this size compression is not worth a sidecar
+MIN_COMPRESS_BYTES = 1024
+
+SIDECAR_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+@dataclass
+class Payload:
+    """One file's bytes in every available encoding, plus validators."""
+
+    encodings: Dict[str, bytes]     # "identity" / "gzip" / "br" → body
+    etag: str
+    last_modified: float
+    signature: Tuple[int, int]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(b) for b in self.encodings.values())
+
+
+def file_etag(mtime_ns: int, size: int) -> str:
+    # Weak: the same validator covers every content-encoding of the file
+    return f'W/"{mtime_ns:x}-{size:x}"'
+
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def read_sidecar(path: Path, encoding: str, source_mtime_ns: int, data: bytes) -> bytes:
+    """Compressed bytes from a fresh sidecar, (re)writing it when stale or missing."""
+    sidecar = path.with_name(path.name + SIDECAR_SUFFIXES[encoding])
+    try:
+        if sidecar.stat().st_mtime_ns >= source_mtime_ns:
+            return sidecar.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    body = _compress(encoding, data)
+    tmp = sidecar.with_name(f".{sidecar.name}.tmp{os.getpid()}")
+    try:
+        tmp.write_bytes(body)
+        os.replace(tmp, sidecar)
+    except OSError:  # read-only results dir: keep the in-memory copy only
+        if tmp.exists():
+            tmp.unlink()
+    return body
+
+
+def load_payload(path: Path) -> Payload:
+    st = path.stat()
+    data = path.read_bytes()
+    encodings = {"identity": data}
+    if len(data) >= MIN_COMPRESS_BYTES:
+        encodings["gzip"] = read_sidecar(path, "gzip", st.st_mtime_ns, data)
+        if brotli is not None:
+            encodings["br"] = read_sidecar(path, "br", st.st_mtime_ns, data)
+    return Payload(
+        encodings=encodings,
+        etag=file_etag(st.st_mtime_ns, st.st_size),
+        last_modified=st.st_mtime,
+        signature=(st.st_mtime_ns, st.st_size),
+    )
+
+
+def choose_encoding(accept_encoding: Optional[str], available) -> str:
+    """Best encoding the client accepts: br, then gzip, then identity."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.add(name.lower())
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match header value."""
+    tags = [t.strip() for t in if_none_match.split(",")]
+    if "*" in tags:
+        return True
+    ours = etag[2:] if etag.startswith("W/") else etag
+    return any((t[2:] if t.startswith("W/") else t) == ours for t in tags)
+
+
+def is_not_modified(payload: Payload, if_none_match: Optional[str],
+                    if_modified_since: Optional[str]) -> bool:
+    """RFC 9110 conditional GET: If-None-Match (weak compare) wins over If-Modified-Since."""
+    if if_none_match:
+        return etag_matches(payload.etag, if_none_match)
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(payload.last_modified) <= since
+    return False
+
+
+class PayloadCache:
+    """LRU of loaded payloads bounded by total bytes across all encodings."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, Payload]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, path: Path) -> Payload:
+        """Payload for ``path``, reloading it if the file changed since it was cached."""
+        path = Path(path)
+        st = path.stat()
+        key = str(path)
+        with self._lock:
+            payload = self._items.get(key)
+            if payload is not None and payload.signature == (st.st_mtime_ns, st.st_size):
+                self._items.move_to_end(key)
+                self.hits += 1
+                return payload
+
+        payload = load_payload(path)
+        with self._lock:
+            self.misses += 1
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            if payload.nbytes <= self.max_bytes:
+                self._items[key] = payload
+                self._bytes += payload.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._items.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return payload
+
+    def respond(
+        self,
+        path: Path,
+        if_none_match: Optional[str] = None,
+        if_modified_since: Optional[str] = None,
+        accept_encoding: Optional[str] = None,
+    ) -> Tuple[int, bytes, Dict[str, str]]:
+        """(status, body, headers) for a conditional GET of a stored JSON file."""
+        payload = self.get(path)
+        headers = {
+            "ETag": payload.etag,
+            "Last-Modified": formatdate(payload.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if is_not_modified(payload, if_none_match, if_modified_since):
+            return 304, b"", headers
+        encoding = choose_encoding(accept_encoding, payload.encodings)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return 200, payload.encodings[encoding], headers
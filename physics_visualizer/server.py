@@ -4,10 +4,20 @@ Physics Visualization Server
 
 Streams videos from S3 and displays synchronized physics analysis
 with interactive handball court visualization.
+
+Handlers are async: file reads, JSON parsing and S3 presigning run on a
+dedicated I/O thread pool (VISUALIZER_IO_THREADS) so the event loop never
+blocks.  Run several processes with VISUALIZER_WORKERS; they share the
+analysis index sidecar and the memory-mapped frame window indexes under
+``data/analyses``.
 """
 
+import asyncio
+import functools
 import json
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 VIDEO_DIR = Path(__file__).parent.parent / "data" / "videos"
 from typing import Optional
@@ -15,14 +25,30 @@ from datetime import timedelta
 
 import boto3
 from botocore.exceptions import ClientError
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:  # optional: stdlib json encoder
+    FastJSONResponse = JSONResponse
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.timeline import DEFAULT_FPS, resample_physics  # noqa: E402
+from observation import read_ndjson_physics  # noqa: E402
+from physics_visualizer.analysis_index import AnalysisIndex  # noqa: E402
+from physics_visualizer.frame_index import IndexCache  # noqa: E402
+from physics_visualizer.frame_stream import FrameStreamer  # noqa: E402
+from physics_visualizer.heatmap import OccupancyCache, source_file  # noqa: E402
+from physics_visualizer.matches import MatchCache, artifact_json, physics_file  # noqa: E402
+from physics_visualizer.payload_cache import PayloadCache, etag_matches  # noqa: E402
+
 
-app = FastAPI(title="Handball Physics Visualizer")
+app = FastAPI(title="Handball Physics Visualizer", default_response_class=FastJSONResponse)
 
 # Add CORS middleware to allow browser access
 app.add_middleware(
@@ -35,6 +61,17 @@ app.add_middleware(
 
 BASE_DIR = Path(__file__).parent
 RESULTS_DIR = Path(__file__).parent.parent / "data" / "analyses"  # Look in data/analyses directory
+INDEX_REFRESH_SECONDS = float(os.environ.get("ANALYSIS_INDEX_REFRESH_SECONDS", "10"))
+analysis_index = AnalysisIndex(RESULTS_DIR)
+PAYLOAD_CACHE_MB = int(os.environ.get("PAYLOAD_CACHE_MB", "256"))
+payload_cache = PayloadCache(max_bytes=PAYLOAD_CACHE_MB * 1024 * 1024)
+window_indexes = IndexCache(store_dir=RESULTS_DIR / ".window_index")
+OCCUPANCY_CACHE_MB = int(os.environ.get("OCCUPANCY_CACHE_MB", "512"))
+occupancy_indexes = OccupancyCache(max_bytes=OCCUPANCY_CACHE_MB * 1024 * 1024)
+matches = MatchCache()
+STREAM_TICK_SECONDS = 0.1
+IO_THREADS = int(os.environ.get("VISUALIZER_IO_THREADS", "32"))
+io_pool = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="visualizer-io")
 
 # Mount static files
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
@@ -68,92 +105,199 @@ except Exception as e:
     s3_client = None
 
 
+async def off_loop(fn, *args, **kwargs):
+    """Run blocking file/S3 work on the I/O pool, keeping the event loop free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_pool, functools.partial(fn, *args, **kwargs))
+
+
 @app.get("/")
-def read_root():
+async def read_root():
     """Serve the main visualization page"""
     return FileResponse(BASE_DIR / "static" / "index.html")
 
 
-@app.get("/api/analyses")
-def list_analyses():
-    """List all available physics analyses"""
-    print(f"DEBUG: Looking for analyses in {RESULTS_DIR}")
-    print(f"DEBUG: RESULTS_DIR exists: {RESULTS_DIR.exists()}")
-    
-    if not RESULTS_DIR.exists():
-        print("DEBUG: RESULTS_DIR does not exist!")
-        return {"analyses": []}
-
-    analyses = []
-
-    # Find all physics JSON files
-    physics_files = list(RESULTS_DIR.glob("*_physics.json"))
-    print(f"DEBUG: Found {len(physics_files)} physics files")
-    
-    for physics_file in physics_files:
-        try:
-            print(f"DEBUG: Loading {physics_file.name}")
-            with open(physics_file) as f:
-                data = json.load(f)
+@app.on_event("startup")
+def start_analysis_index():
+    analysis_index.start(interval=INDEX_REFRESH_SECONDS)
 
-            # Look for corresponding events file
-            events_file = physics_file.parent / physics_file.name.replace(
-                "_physics.json", "_events.json"
-            )
 
-            # Extract metadata
-            metadata = data.get("metadata", {})
-            frames = data.get("frames", [])
-
-            # Calculate unique players
-            unique_players = set()
-            for frame in frames:
-                for player in frame.get("players", []):
-                    if player.get("track_id"):
-                        unique_players.add(player["track_id"])
-
-            analysis_dict = {
-                "name": physics_file.stem.replace("_physics", ""),
-                "physics_file": str(physics_file),
-                "events_file": str(events_file) if events_file.exists() else None,
-                "s3_uri": data.get("metadata", {}).get("video") or data.get("video", ""),
-                "total_frames": metadata.get("total_frames", len(frames)),
-                "duration": metadata.get("duration_seconds", len(frames) * 0.0625),
-                "unique_players": len(unique_players),
-            }
-            analyses.append(analysis_dict)
-            print(f"DEBUG: Added {analysis_dict['name']}")
-
-        except Exception as e:
-            print(f"Error loading {physics_file}: {e}")
-            import traceback
-            traceback.print_exc()
-            continue
-
-    print(f"DEBUG: Returning {len(analyses)} analyses")
-    return {"analyses": sorted(analyses, key=lambda x: x["name"])}
+@app.on_event("shutdown")
+def stop_background_work():
+    analysis_index.stop()
+    io_pool.shutdown(wait=False)
+
+
+@app.get("/api/analyses")
+async def list_analyses(
+    offset: int = 0,
+    limit: Optional[int] = None,
+    q: Optional[str] = None,
+    has_events: Optional[bool] = None,
+    min_frames: int = 0,
+    refresh: bool = False,
+):
+    """List available physics analyses from the metadata index.
+
+    Paginate with ``offset``/``limit``; filter by name substring ``q``,
+    ``has_events`` and ``min_frames``.  ``refresh=true`` re-scans synchronously.
+    """
+    if refresh:
+        await off_loop(analysis_index.refresh)
+    return await off_loop(
+        analysis_index.query,
+        offset=offset, limit=limit, q=q, has_events=has_events, min_frames=min_frames,
+    )
+
+
+async def stored_json_response(request: Request, path: Path) -> Response:
+    """Serve a stored JSON file's bytes (or its compressed sidecar) with 304 support."""
+    status, body, headers = await off_loop(
+        payload_cache.respond,
+        path,
+        if_none_match=request.headers.get("if-none-match"),
+        if_modified_since=request.headers.get("if-modified-since"),
+        accept_encoding=request.headers.get("accept-encoding"),
+    )
+    return Response(content=body, status_code=status, media_type="application/json",
+                    headers=headers)
+
+
+def load_physics(physics_file: Path, streamed_file: Path, resample: bool, fps: float):
+    if not physics_file.exists():
+        # Stage 1 still streaming — serve the frames written so far
+        data = read_ndjson_physics(streamed_file)
+    else:
+        with open(physics_file) as f:
+            data = json.load(f)
+
+    if resample and data.get("frames"):
+        data = resample_physics(data, fps=fps)
+    return data
 
 
 @app.get("/api/physics/{analysis_name}")
-def get_physics_data(analysis_name: str):
-    """Get physics data for a specific analysis"""
+async def get_physics_data(request: Request, analysis_name: str, resample: bool = False,
+                           fps: float = Query(DEFAULT_FPS, gt=0)):
+    """Get physics data for a specific analysis
+
+    With ``?resample=true`` frames are snapped to a uniform ``fps`` grid, so the
+    client finds the frame at time t as ``floor(t * fps) - timeline.start_slot``.
+    """
     physics_file = RESULTS_DIR / f"{analysis_name}_physics.json"
+    streamed_file = RESULTS_DIR / f"{analysis_name}_physics.ndjson"
 
-    if not physics_file.exists():
+    if not physics_file.exists() and not streamed_file.exists():
         raise HTTPException(status_code=404, detail="Analysis not found")
 
     try:
-        with open(physics_file) as f:
-            data = json.load(f)
+        if physics_file.exists() and not resample:
+            return await stored_json_response(request, physics_file)
 
-        return JSONResponse(content=data)
+        data = await off_loop(load_physics, physics_file, streamed_file, resample, fps)
+        return FastJSONResponse(content=data)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def window_response(request: Request, path: Path, key: str, start: float,
+                          end: Optional[float], start_field: str = "timestamp",
+                          end_field: Optional[str] = None) -> Response:
+    """Serve the ``key`` elements overlapping ``[start, end)`` from the file's window index."""
+    index = await off_loop(window_indexes.get, path, key=key, start_field=start_field,
+                           end_field=end_field)
+    headers = {"ETag": index.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(index.etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+    body = await off_loop(index.window, key, start, end)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/physics/{analysis_name}/frames")
+async def get_physics_window(request: Request, analysis_name: str, start: float = 0.0,
+                             end: Optional[float] = None):
+    """Physics frames with ``start <= timestamp < end`` (``end`` omitted: to the end).
+
+    Only the window's bytes are read, so the player can load the frames around
+    the playhead and prefetch ahead instead of fetching the whole match.
+    """
+    physics_file = RESULTS_DIR / f"{analysis_name}_physics.json"
+    streamed_file = RESULTS_DIR / f"{analysis_name}_physics.ndjson"
+    path = physics_file if physics_file.exists() else streamed_file
+
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    try:
+        return await window_response(request, path, "frames", start, end)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/events/{analysis_name}/window")
+async def get_events_window(request: Request, analysis_name: str, start: float = 0.0,
+                            end: Optional[float] = None):
+    """Events overlapping ``[start, end)``: ``start_time < end`` and ``end_time >= start``."""
+    events_file = RESULTS_DIR / f"{analysis_name}_events.json"
+
+    if not events_file.exists():
+        raise HTTPException(status_code=404, detail="Events file not found")
+
+    try:
+        return await window_response(request, events_file, "events", start, end,
+                               start_field="start_time", end_field="end_time")
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.websocket("/ws/physics/{analysis_name}")
+async def stream_physics(websocket: WebSocket, analysis_name: str):
+    """Push frames and active events ahead of the client's playback cursor.
+
+    See ``physics_visualizer/frame_stream.py`` for the message protocol.
+    """
+    physics_file = RESULTS_DIR / f"{analysis_name}_physics.json"
+    streamed_file = RESULTS_DIR / f"{analysis_name}_physics.ndjson"
+    events_file = RESULTS_DIR / f"{analysis_name}_events.json"
+    path = physics_file if physics_file.exists() else streamed_file
+
+    await websocket.accept()
+    if not path.exists():
+        await websocket.close(code=4404, reason="Analysis not found")
+        return
+
+    frames = await off_loop(window_indexes.get, path)
+    events = None
+    if events_file.exists():
+        events = await off_loop(
+            window_indexes.get, events_file, "events", "start_time", "end_time",
+        )
+    streamer = FrameStreamer(frames, events)
+    await websocket.send_text(streamer.encode(streamer.meta()))
+
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive_json(),
+                                                 timeout=STREAM_TICK_SECONDS)
+                streamer.handle(message)
+            except asyncio.TimeoutError:
+                pass
+            while True:
+                out = await off_loop(streamer.next_message)
+                if out is None:
+                    break
+                await websocket.send_text(streamer.encode(out))
+    except WebSocketDisconnect:
+        pass
+
+
 @app.get("/api/events/{analysis_name}")
-def get_events_data(analysis_name: str):
+async def get_events_data(request: Request, analysis_name: str):
     """Get events data for a specific analysis"""
     events_file = RESULTS_DIR / f"{analysis_name}_events.json"
 
@@ -161,17 +305,81 @@ def get_events_data(analysis_name: str):
         raise HTTPException(status_code=404, detail="Events file not found")
 
     try:
-        with open(events_file) as f:
-            data = json.load(f)
+        return await stored_json_response(request, events_file)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/heatmap/{analysis_name}")
+async def get_heatmap(analysis_name: str, start: Optional[float] = None,
+                      end: Optional[float] = None, role: Optional[str] = None,
+                      team: Optional[str] = None, track_id: Optional[str] = None):
+    """Zone occupancy over ``[start, end)`` for all players or one role/team/track.
+
+    Answered by prefix-sum subtraction on the analysis' occupancy index, so any
+    range costs the same; the index is built on the first request.
+    """
+    path = source_file(RESULTS_DIR, analysis_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    try:
+        index = await off_loop(occupancy_indexes.get, path)
+        return index.heatmap(start, end, track_id=track_id, role=role, team=team)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/match/{analysis_name}/frames/{index}")
+async def get_match_frame(analysis_name: str, index: int):
+    """One frame with roles and active events, without deriving the whole events file."""
+    path = physics_file(RESULTS_DIR, analysis_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    try:
+        match = matches.get(path)
+        return await off_loop(match.enriched_frame, index)
+
+    except IndexError:
+        raise HTTPException(status_code=404, detail="Frame not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/match/{analysis_name}/{artifact}")
+async def get_match_artifact(analysis_name: str, artifact: str):
+    """A single Stage 2 artifact (classification, roster, zone_warnings,
+    possession_timeline), derived lazily from the physics file and memoised."""
+    path = physics_file(RESULTS_DIR, analysis_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
 
-        return JSONResponse(content=data)
+    try:
+        match = matches.get(path)
+        return await off_loop(artifact_json, match, artifact)
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def video_source(analysis_name: str) -> str:
+    """Source video recorded in the analysis (from the index, not a full physics load)."""
+    entry = analysis_index.get(analysis_name)
+    if entry is None:
+        analysis_index.refresh()
+        entry = analysis_index.get(analysis_name)
+    return entry["s3_uri"] if entry else ""
+
+
 @app.get("/api/video-url/{analysis_name}")
-def get_video_url(analysis_name: str, expires_in: int = 3600):
+async def get_video_url(analysis_name: str, expires_in: int = 3600):
     """Generate video URL - tries local files first, then S3"""
     physics_file = RESULTS_DIR / f"{analysis_name}_physics.json"
 
@@ -179,73 +387,75 @@ def get_video_url(analysis_name: str, expires_in: int = 3600):
         raise HTTPException(status_code=404, detail="Analysis not found")
 
     try:
-        with open(physics_file) as f:
-            data = json.load(f)
+        return await off_loop(resolve_video_url, analysis_name, expires_in)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def resolve_video_url(analysis_name: str, expires_in: int):
+    """Local video file, else a presigned S3 URL (blocking: runs on the I/O pool)."""
+    s3_uri = video_source(analysis_name)
 
-        s3_uri = data.get("metadata", {}).get("video") or data.get("video", "")
-
-        # --- Try local file first (before requiring S3) ---
-        # Extract just the filename from s3_uri or path
-        if s3_uri.startswith("s3://"):
-            video_filename = s3_uri.split("/")[-1]
-        else:
-            video_filename = Path(s3_uri).name if s3_uri else ""
-
-        # Check local videos directory
-        if video_filename and (VIDEO_DIR / video_filename).exists():
-            print(f"DEBUG: Serving local video: {video_filename}")
-            return {"url": f"/videos/{video_filename}", "expires_in": expires_in}
-
-        # Also check by analysis name patterns
-        for ext in [".mp4", ".webm", ".mov"]:
-            candidate = VIDEO_DIR / f"{analysis_name}{ext}"
-            if candidate.exists():
-                print(f"DEBUG: Serving local video by name: {candidate.name}")
-                return {"url": f"/videos/{candidate.name}", "expires_in": expires_in}
-
-        # --- Try S3 ---
-        if s3_uri.startswith("s3://") and s3_client:
-            parts = s3_uri[5:].split("/", 1)
-            bucket = parts[0]
-            key = parts[1] if len(parts) > 1 else ""
+    # --- Try local file first (before requiring S3) ---
+    # Extract just the filename from s3_uri or path
+    if s3_uri.startswith("s3://"):
+        video_filename = s3_uri.split("/")[-1]
+    else:
+        video_filename = Path(s3_uri).name if s3_uri else ""
 
+    # Check local videos directory
+    if video_filename and (VIDEO_DIR / video_filename).exists():
+        print(f"DEBUG: Serving local video: {video_filename}")
+        return {"url": f"/videos/{video_filename}", "expires_in": expires_in}
+
+    # Also check by analysis name patterns
+    for ext in [".mp4", ".webm", ".mov"]:
+        candidate = VIDEO_DIR / f"{analysis_name}{ext}"
+        if candidate.exists():
+            print(f"DEBUG: Serving local video by name: {candidate.name}")
+            return {"url": f"/videos/{candidate.name}", "expires_in": expires_in}
+
+    # --- Try S3 ---
+    if s3_uri.startswith("s3://") and s3_client:
+        parts = s3_uri[5:].split("/", 1)
+        bucket = parts[0]
+        key = parts[1] if len(parts) > 1 else ""
+
+        try:
+            presigned_url = s3_client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": bucket, "Key": key},
+                ExpiresIn=expires_in,
+            )
+            return {"url": presigned_url, "expires_in": expires_in}
+
+        except ClientError as e:
+            print(f"WARNING: S3 presigned URL failed: {e}")
+
+    # --- Try S3_BUCKET env fallback ---
+    if not s3_uri.startswith("s3://"):
+        fallback_bucket = os.environ.get("S3_BUCKET")
+        if fallback_bucket and s3_client:
             try:
                 presigned_url = s3_client.generate_presigned_url(
                     "get_object",
-                    Params={"Bucket": bucket, "Key": key},
+                    Params={"Bucket": fallback_bucket, "Key": s3_uri},
                     ExpiresIn=expires_in,
                 )
                 return {"url": presigned_url, "expires_in": expires_in}
+            except ClientError:
+                pass
 
-            except ClientError as e:
-                print(f"WARNING: S3 presigned URL failed: {e}")
-
-        # --- Try S3_BUCKET env fallback ---
-        if not s3_uri.startswith("s3://"):
-            fallback_bucket = os.environ.get("S3_BUCKET")
-            if fallback_bucket and s3_client:
-                try:
-                    presigned_url = s3_client.generate_presigned_url(
-                        "get_object",
-                        Params={"Bucket": fallback_bucket, "Key": s3_uri},
-                        ExpiresIn=expires_in,
-                    )
-                    return {"url": presigned_url, "expires_in": expires_in}
-                except ClientError:
-                    pass
-
-        # No video source found - return empty URL (not an error)
-        print(f"WARNING: No video found for {analysis_name} (source: {s3_uri})")
-        return {"url": "", "message": "No video available"}
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # No video source found - return empty URL (not an error)
+    print(f"WARNING: No video found for {analysis_name} (source: {s3_uri})")
+    return {"url": "", "message": "No video available"}
 
 
 @app.get("/api/health")
-def health_check():
+async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
@@ -263,8 +473,14 @@ if __name__ == "__main__":
     print("=" * 60)
     print(f"Results directory: {RESULTS_DIR.absolute()}")
     print(f"S3 client available: {s3_client is not None}")
+    host = os.environ.get("HOST", "127.0.0.1")
+    port = int(os.environ.get("PORT", "8001"))
+    workers = int(os.environ.get("VISUALIZER_WORKERS", "1"))
+    print(f"Workers: {workers} (I/O threads per worker: {IO_THREADS})")
     print()
-    print("Starting server at http://127.0.0.1:8001")
+    print(f"Starting server at http://{host}:{port}")
     print("=" * 60)
 
-    uvicorn.run(app, host="127.0.0.1", port=8001, log_level="info")
+    # An import string lets uvicorn spawn worker processes
+    uvicorn.run(f"{Path(__file__).stem}:app", app_dir=str(BASE_DIR), host=host, port=port,
+                workers=workers, log_level="info")
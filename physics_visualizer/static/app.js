@@ -11,6 +11,16 @@ let videoSyncEnabled = true;
 let zoneTestMode = false;
 let timelineFilter = 'all'; // 'all', 'changes', 'events'
 
+// Long analyses stream frames over /ws/physics/{name} in step with playback
+// instead of fetching every frame up front (add ?stream to the URL to force it)
+const STREAM_MIN_FRAMES = 4800; // 5 min at 16 FPS
+const STREAM_FRAME_SECONDS = 0.0625;
+let frameStream = null;
+let streamFrame = null;
+let streamCursor = 0;
+let streamDuration = 0;
+let streamEventIds = new Set();
+
 // DOM Elements
 const analysisSelect = document.getElementById('analysis-select');
 const videoPlayer = document.getElementById('video-player');
@@ -127,6 +137,7 @@ async function loadAnalyses() {
             const option = document.createElement('option');
             option.value = analysis.name;
             option.textContent = `${analysis.name} (${analysis.total_frames} frames, ${analysis.duration.toFixed(1)}s)`;
+            option.dataset.totalFrames = analysis.total_frames;
             analysisSelect.appendChild(option);
             addedCount++;
         });
@@ -144,7 +155,7 @@ async function loadTestFiles() {
     if (!testSelect) return;
 
     try {
-        const response = await fetch('/api/analyses');
+        const response = await fetch('/api/analyses?q=TEST-');
         const data = await response.json();
 
         testSelect.innerHTML = '<option value="">Load Test File...</option>';
@@ -171,6 +182,14 @@ async function loadTestFiles() {
  */
 async function loadAnalysis(analysisName) {
     if (!analysisName) return;
+    closeFrameStream();
+
+    const option = analysisSelect.selectedOptions[0];
+    const totalFrames = option ? parseInt(option.dataset.totalFrames || '0') : 0;
+    if (totalFrames >= STREAM_MIN_FRAMES || new URLSearchParams(location.search).has('stream')) {
+        await loadStreamedAnalysis(analysisName);
+        return;
+    }
 
     try {
         // Show loading state
@@ -208,43 +227,7 @@ async function loadAnalysis(analysisName) {
         }
 
         // Get video URL (non-blocking: analysis loads even if video unavailable)
-        try {
-            const videoUrlResponse = await fetch(`/api/video-url/${analysisName}`);
-            const videoUrlData = await videoUrlResponse.json();
-
-            if (videoUrlData.url) {
-                logSystemMessage(`Loading video: ${videoUrlData.url.substring(0, 60)}...`, 'system');
-                videoPlayer.src = videoUrlData.url;
-                videoPlayer.onerror = (e) => {
-                    const err = videoPlayer.error;
-                    let msg = 'Unknown Media Error';
-                    if (err) {
-                        switch (err.code) {
-                            case 1: msg = 'MEDIA_ERR_ABORTED'; break;
-                            case 2: msg = 'MEDIA_ERR_NETWORK'; break;
-                            case 3: msg = 'MEDIA_ERR_DECODE'; break;
-                            case 4: msg = 'MEDIA_ERR_SRC_NOT_SUPPORTED'; break;
-                        }
-                        msg += ` (${err.message})`;
-                    }
-                    console.error('Video Error:', msg, e);
-                    logSystemMessage(`Video Error: ${msg}`, 'error');
-                    videoError.classList.remove('hidden');
-                    videoError.querySelector('p').textContent = '⚠️ Video unavailable';
-                };
-                videoPlayer.load();
-            } else {
-                console.warn('No video URL returned');
-                logSystemMessage(`No video available for '${analysisName}'`, 'warn');
-                videoError.classList.remove('hidden');
-                videoError.querySelector('p').textContent = '⚠️ No video available';
-            }
-        } catch (videoErr) {
-            console.warn('Video URL fetch failed:', videoErr);
-            logSystemMessage(`Video unavailable: ${videoErr.message}`, 'warn');
-            videoError.classList.remove('hidden');
-            videoError.querySelector('p').textContent = '⚠️ Video unavailable';
-        }
+        await loadVideo(analysisName);
 
         // Update UI
         if (typeof updateAnalysisInfo === 'function') updateAnalysisInfo();
@@ -280,6 +263,143 @@ async function loadAnalysis(analysisName) {
     }
 }
 
+/**
+ * Point the video player at the analysis' source video (presigned URL)
+ */
+async function loadVideo(analysisName) {
+    try {
+        const videoUrlResponse = await fetch(`/api/video-url/${analysisName}`);
+        const videoUrlData = await videoUrlResponse.json();
+
+        if (videoUrlData.url) {
+            logSystemMessage(`Loading video: ${videoUrlData.url.substring(0, 60)}...`, 'system');
+            videoPlayer.src = videoUrlData.url;
+            videoPlayer.onerror = (e) => {
+                const err = videoPlayer.error;
+                let msg = 'Unknown Media Error';
+                if (err) {
+                    switch (err.code) {
+                        case 1: msg = 'MEDIA_ERR_ABORTED'; break;
+                        case 2: msg = 'MEDIA_ERR_NETWORK'; break;
+                        case 3: msg = 'MEDIA_ERR_DECODE'; break;
+                        case 4: msg = 'MEDIA_ERR_SRC_NOT_SUPPORTED'; break;
+                    }
+                    msg += ` (${err.message})`;
+                }
+                console.error('Video Error:', msg, e);
+                logSystemMessage(`Video Error: ${msg}`, 'error');
+                videoError.classList.remove('hidden');
+                videoError.querySelector('p').textContent = '⚠️ Video unavailable';
+            };
+            videoPlayer.load();
+        } else {
+            console.warn('No video URL returned');
+            logSystemMessage(`No video available for '${analysisName}'`, 'warn');
+            videoError.classList.remove('hidden');
+            videoError.querySelector('p').textContent = '⚠️ No video available';
+        }
+    } catch (videoErr) {
+        console.warn('Video URL fetch failed:', videoErr);
+        logSystemMessage(`Video unavailable: ${videoErr.message}`, 'warn');
+        videoError.classList.remove('hidden');
+        videoError.querySelector('p').textContent = '⚠️ Video unavailable';
+    }
+}
+
+/**
+ * Load a long analysis as a playback-synchronized frame stream
+ *
+ * Frames and events arrive over the WebSocket around the playhead; the
+ * roster comes from the lazily derived /api/match endpoint.
+ */
+async function loadStreamedAnalysis(analysisName) {
+    videoLoading.style.display = 'flex';
+    videoError.classList.add('hidden');
+
+    physicsData = null;
+    eventsData = { events: [] };
+    streamEventIds = new Set();
+    streamCursor = 0;
+    displayEvents();
+
+    frameStream = new FrameStream(analysisName, {
+        onMeta: (meta) => {
+            streamDuration = meta.last_time || 0;
+            if (infoFrames) infoFrames.textContent = `${meta.total} frames (streamed)`;
+            if (infoDuration) infoDuration.textContent = `${streamDuration.toFixed(1)}s`;
+            if (infoPlayers) infoPlayers.textContent = '';
+            if (analysisInfo) analysisInfo.classList.remove('hidden');
+            timelineScrubber.max = Math.round(streamDuration / STREAM_FRAME_SECONDS);
+            timelineScrubber.value = 0;
+            frameStream.seek(streamTime());
+        },
+        onEvents: (events) => {
+            const fresh = events.filter(e => !streamEventIds.has(e.event_id));
+            if (fresh.length === 0) return;
+            fresh.forEach(e => streamEventIds.add(e.event_id));
+            eventsData.events.push(...fresh);
+            displayEvents();
+        },
+        onFrames: () => renderStreamFrame(streamTime()),
+    });
+    frameStream.attach(videoPlayer);
+    logSystemMessage(`Streaming frames for '${analysisName}' with playback`, 'system');
+
+    try {
+        const rosterResponse = await fetch(`/api/match/${analysisName}/roster`);
+        if (rosterResponse.ok) eventsData.roster = await rosterResponse.json();
+    } catch (e) {
+        console.warn('No roster available');
+    }
+    displayPlayers();
+
+    await loadVideo(analysisName);
+
+    playPauseBtn.disabled = false;
+    prevFrameBtn.disabled = false;
+    nextFrameBtn.disabled = false;
+    timelineScrubber.disabled = false;
+    videoLoading.style.display = 'none';
+}
+
+function closeFrameStream() {
+    if (!frameStream) return;
+    frameStream.close();
+    frameStream = null;
+    streamFrame = null;
+}
+
+/**
+ * Playhead for the stream: the video's time, or the scrubber's without a video
+ */
+function streamTime() {
+    return videoPlayer.readyState > 0 ? videoPlayer.currentTime : streamCursor;
+}
+
+function seekStream(time) {
+    streamCursor = Math.max(0, Math.min(time, streamDuration || time));
+    streamFrame = null;
+    if (videoPlayer.readyState > 0) {
+        videoPlayer.currentTime = streamCursor; // 'seeked' restarts the stream
+    } else {
+        frameStream.seek(streamCursor);
+    }
+}
+
+/**
+ * Render the buffered frame at `time` (no-op until it has arrived)
+ */
+function renderStreamFrame(time) {
+    const frame = frameStream && frameStream.frameAt(time);
+    if (!frame || frame === streamFrame) return;
+    streamFrame = frame;
+
+    const timestamp = parseFloat(frame.timestamp || 0);
+    const total = frameStream.meta ? frameStream.meta.total : '?';
+    showFrame(frame, `${Math.round(timestamp / STREAM_FRAME_SECONDS) + 1} / ${total}`);
+    if (timelineScrubber) timelineScrubber.value = Math.round(timestamp / STREAM_FRAME_SECONDS);
+}
+
 /**
  * Update analysis info panel
  */
@@ -320,17 +440,7 @@ function renderCurrentFrame() {
     if (currentFrameIndex < 0 || currentFrameIndex >= frames.length) return;
 
     const frame = frames[currentFrameIndex];
-
-    // Render court with frame data
-    courtRenderer.renderFrame(frame);
-
-    // Update info displays
-    if (currentTimeDisplay) currentTimeDisplay.textContent = `${parseFloat(frame.timestamp || 0).toFixed(3)}s`;
-    if (currentFrameDisplay) currentFrameDisplay.textContent = `${currentFrameIndex + 1} / ${frames.length}`;
-
-    const ball = frame.ball || {};
-    const holder = ball.holder_track_id ? `Held by ${ball.holder_track_id}` : 'Loose';
-    if (ballInfoDisplay) ballInfoDisplay.textContent = `${ball.state || 'Unknown'} - ${holder} (${ball.zone || 'Unknown'})`;
+    showFrame(frame, `${currentFrameIndex + 1} / ${frames.length}`);
 
     // Update timeline
     if (timelineScrubber) timelineScrubber.value = currentFrameIndex;
@@ -342,6 +452,22 @@ function renderCurrentFrame() {
             videoPlayer.currentTime = timestamp;
         }
     }
+}
+
+/**
+ * Draw one frame on the court and update the info displays / highlights
+ */
+function showFrame(frame, frameLabel) {
+    // Render court with frame data
+    courtRenderer.renderFrame(frame);
+
+    // Update info displays
+    if (currentTimeDisplay) currentTimeDisplay.textContent = `${parseFloat(frame.timestamp || 0).toFixed(3)}s`;
+    if (currentFrameDisplay) currentFrameDisplay.textContent = frameLabel;
+
+    const ball = frame.ball || {};
+    const holder = ball.holder_track_id ? `Held by ${ball.holder_track_id}` : 'Loose';
+    if (ballInfoDisplay) ballInfoDisplay.textContent = `${ball.state || 'Unknown'} - ${holder} (${ball.zone || 'Unknown'})`;
 
     // Update active event highlighting
     updateActiveEvent(frame.timestamp);
@@ -742,6 +868,7 @@ function renderPlayerCard(player) {
  * Get total analysis duration in seconds
  */
 function getAnalysisDuration() {
+    if (frameStream) return streamDuration;
     const frames = (physicsData && physicsData.frames) || [];
     if (frames.length === 0) return 0;
     return parseFloat(frames[frames.length - 1].timestamp || 0);
@@ -819,6 +946,10 @@ function updateActiveIntervals(timestamp) {
  * Seek video + court to a specific timestamp (seconds)
  */
 function seekToTime(targetTime) {
+    if (frameStream) {
+        seekStream(targetTime);
+        return;
+    }
     if (!physicsData) return;
     const frames = physicsData.frames || [];
 
@@ -846,7 +977,7 @@ function seekToTime(targetTime) {
  * Seek to event using action_time (midpoint) for accurate sync
  */
 function seekToEvent(event) {
-    if (!physicsData) return;
+    if (!physicsData && !frameStream) return;
 
     const actionTime = event.actionTime != null
         ? parseFloat(event.actionTime)
@@ -881,7 +1012,9 @@ function setupEventListeners() {
     const syncLoop = () => {
         if (videoPlayer.paused || videoPlayer.ended) return;
 
-        if (physicsData && videoSyncEnabled) {
+        if (frameStream) {
+            renderStreamFrame(videoPlayer.currentTime);
+        } else if (physicsData && videoSyncEnabled) {
             const currentTime = videoPlayer.currentTime;
             const frames = physicsData.frames || [];
 
@@ -933,6 +1066,10 @@ function setupEventListeners() {
 
     // Frame navigation
     prevFrameBtn.addEventListener('click', () => {
+        if (frameStream) {
+            seekStream(streamTime() - STREAM_FRAME_SECONDS);
+            return;
+        }
         if (currentFrameIndex > 0) {
             currentFrameIndex--;
             renderCurrentFrame();
@@ -940,6 +1077,10 @@ function setupEventListeners() {
     });
 
     nextFrameBtn.addEventListener('click', () => {
+        if (frameStream) {
+            seekStream(streamTime() + STREAM_FRAME_SECONDS);
+            return;
+        }
         const frames = physicsData?.frames || [];
         if (currentFrameIndex < frames.length - 1) {
             currentFrameIndex++;
@@ -949,6 +1090,10 @@ function setupEventListeners() {
 
     // Timeline scrubber
     timelineScrubber.addEventListener('input', (e) => {
+        if (frameStream) {
+            seekStream(parseInt(e.target.value) * STREAM_FRAME_SECONDS);
+            return;
+        }
         currentFrameIndex = parseInt(e.target.value);
         renderCurrentFrame();
     });
@@ -1009,6 +1154,7 @@ function setupEventListeners() {
  * Load a test analysis (no video, just physics data on court)
  */
 async function loadTestAnalysis(testName) {
+    closeFrameStream();
     try {
         const response = await fetch(`/api/physics/${testName}`);
         if (!response.ok) {
@@ -191,6 +191,8 @@ class HandballCourtRenderer {
      *   Wing splits: x=3.5, x=16.5 (wing-back vs center-back)
      *   y=3: where 9m line meets sidelines (wing corner cutoff)
      *   y=10: back court / deep court boundary
+     *
+     * Mirrored in Python by inference/court_geometry.py — keep them in sync.
      */
     _buildZonePolygons() {
         // Pre-compute intersection y-values
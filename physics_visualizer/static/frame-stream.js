@@ -0,0 +1,126 @@
+/**
+ * Playback-synchronized frame stream (client side of /ws/physics/{name})
+ *
+ * Keeps only the frames around the playhead: windows pushed by the server
+ * are appended to a time-sorted buffer and frames further than `keepBehind`
+ * seconds behind the cursor are dropped.
+ *
+ * Usage:
+ *   const stream = new FrameStream('clip', { onMeta, onEvents, onFrames });
+ *   stream.attach(videoPlayer);          // play/pause/seek/rate follow the video
+ *   const frame = stream.frameAt(videoPlayer.currentTime);
+ *   stream.close();                      // also detaches from the video
+ */
+
+class FrameStream {
+    constructor(analysisName, { keepBehind = 5, onMeta = null, onEvents = null, onFrames = null,
+                                onEnd = null } = {}) {
+        this.keepBehind = keepBehind;
+        this.onMeta = onMeta;
+        this.onEvents = onEvents;
+        this.onFrames = onFrames;
+        this.onEnd = onEnd;
+        this._video = null;
+        this._listeners = [];
+        this.meta = null;
+        this.frames = [];   // [{time, frame}] sorted by time
+        this.seq = 0;
+        this.cursor = 0;
+
+        const scheme = location.protocol === 'https:' ? 'wss' : 'ws';
+        this.socket = new WebSocket(`${scheme}://${location.host}/ws/physics/${encodeURIComponent(analysisName)}`);
+        this.socket.onmessage = (msg) => this._receive(JSON.parse(msg.data));
+    }
+
+    _send(message) {
+        if (this.socket.readyState === WebSocket.OPEN) {
+            this.socket.send(JSON.stringify(message));
+        }
+    }
+
+    _receive(message) {
+        if (message.type === 'meta') {
+            this.meta = message;
+            if (this.onMeta) this.onMeta(message);
+        } else if (message.type === 'window') {
+            if (message.seq !== this.seq) return; // from before the latest seek
+            message.frames.forEach(frame => {
+                this.frames.push({ time: parseFloat(frame.timestamp || 0), frame });
+            });
+            if (this.onEvents && message.events.length) this.onEvents(message.events);
+            this._evict();
+            if (this.onFrames && message.frames.length) this.onFrames();
+        } else if (message.type === 'end') {
+            if (this.onEnd) this.onEnd();
+        }
+    }
+
+    _evict() {
+        const cutoff = this.cursor - this.keepBehind;
+        let drop = 0;
+        while (drop < this.frames.length - 1 && this.frames[drop + 1].time <= cutoff) drop++;
+        if (drop) this.frames.splice(0, drop);
+    }
+
+    play() { this._send({ type: 'play' }); }
+    pause() { this._send({ type: 'pause' }); }
+    setRate(rate) { this._send({ type: 'rate', rate }); }
+
+    seek(time) {
+        this.seq++;
+        this.cursor = time;
+        this.frames = [];
+        this._send({ type: 'seek', time });
+    }
+
+    sync(time) {
+        this.cursor = time;
+        this._send({ type: 'sync', time });
+        this._evict();
+    }
+
+    /**
+     * Latest buffered frame at or before `time` (binary search), or null
+     */
+    frameAt(time) {
+        let lo = 0;
+        let hi = this.frames.length - 1;
+        let best = null;
+        while (lo <= hi) {
+            const mid = (lo + hi) >> 1;
+            if (this.frames[mid].time <= time) {
+                best = this.frames[mid].frame;
+                lo = mid + 1;
+            } else {
+                hi = mid - 1;
+            }
+        }
+        return best;
+    }
+
+    /**
+     * Follow a <video> element: play/pause/rate/seek, plus a 1 Hz drift sync
+     */
+    attach(video) {
+        this._video = video;
+        this._listeners = [
+            ['play', () => this.play()],
+            ['pause', () => this.pause()],
+            ['ratechange', () => this.setRate(video.playbackRate)],
+            ['seeked', () => this.seek(video.currentTime)],
+        ];
+        this._listeners.forEach(([type, handler]) => video.addEventListener(type, handler));
+        this._syncTimer = setInterval(() => {
+            if (!video.paused) this.sync(video.currentTime);
+        }, 1000);
+    }
+
+    close() {
+        clearInterval(this._syncTimer);
+        if (this._video) {
+            this._listeners.forEach(([type, handler]) => this._video.removeEventListener(type, handler));
+            this._video = null;
+        }
+        this.socket.close();
+    }
+}
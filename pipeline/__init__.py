@@ -0,0 +1,13 @@
+"""Pipeline plumbing around Stage 1/Stage 2: S3 ingest, batch runs and job workers.
+
+Modules that need boto3 import it lazily, so the package stays importable
+without AWS dependencies.
+"""
+
+from .s3_ingest import ContentCache, parse_s3_uri, plan_ranges
+
+__all__ = [
+    "ContentCache",
+    "parse_s3_uri",
+    "plan_ranges",
+]
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Batch driver: every video under an S3 prefix through download → Stage 1 → Stage 2 → upload.
+
+Each stage has its own bounded worker pool, so downloads for the next scenes
+overlap with Gemini calls for the current ones and Stage 2 never waits behind
+a slow upload.  An item moves to the next pool as soon as its current stage
+finishes.
+
+Per-video state is kept in a JSON manifest (``<output>/batch_manifest.json``),
+rewritten atomically after every transition.  A rerun skips finished videos
+and resumes unfinished ones from their last completed stage; a video whose
+ETag changed since it was processed starts over.
+
+Usage:
+    python -m pipeline.batch s3://my-bucket/handball/ --output data/analyses \\
+        --download-workers 4 --stage1-workers 4 --stage2-workers 2 \\
+        --upload-to s3://my-bucket/handball-results/
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import click
+
+from pipeline.s3_ingest import ContentCache, S3Downloader, make_s3_client, parse_s3_uri
+
+VIDEO_SUFFIXES = (".mp4", ".mov", ".mkv", ".avi")
+
+# Item states, in pipeline order.  "failed" records the stage it failed in.
+PENDING = "pending"
+DOWNLOADED = "downloaded"
+OBSERVED = "observed"     # Stage 1 physics written
+DERIVED = "derived"       # Stage 2 events written
+DONE = "done"             # results uploaded (or no upload configured)
+FAILED = "failed"
+
+
+def parse_s3_prefix(uri: str):
+    """``s3://bucket/some/prefix/`` → (bucket, "some/prefix/"); the prefix may be empty."""
+    if not uri.startswith("s3://") or not uri[5:].split("/", 1)[0]:
+        raise ValueError(f"Invalid S3 prefix: {uri}")
+    bucket, _, prefix = uri[5:].partition("/")
+    return bucket, prefix
+
+
+def list_videos(client: Any, bucket: str, prefix: str,
+                suffixes=VIDEO_SUFFIXES) -> List[Dict[str, Any]]:
+    """All video objects under ``prefix``, following ``list_objects_v2`` pagination."""
+    videos = []
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if obj["Key"].lower().endswith(suffixes):
+                videos.append({
+                    "uri": f"s3://{bucket}/{obj['Key']}",
+                    "key": obj["Key"],
+                    "etag": obj.get("ETag", "").strip('"'),
+                    "size": obj.get("Size", 0),
+                })
+    return videos
+
+
+class Manifest:
+    """Per-video batch state persisted as one JSON document."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.items: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                self.items = json.load(f).get("items", {})
+
+    def get(self, uri: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.items.get(uri, {}))
+
+    def update(self, uri: str, **fields) -> Dict[str, Any]:
+        with self._lock:
+            item = self.items.setdefault(uri, {"uri": uri, "attempts": 0})
+            item.update(fields)
+            item["updated_at"] = datetime.now().isoformat()
+            self._save()
+            return dict(item)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            out: Dict[str, int] = {}
+            for item in self.items.values():
+                out[item.get("state", PENDING)] = out.get(item.get("state", PENDING), 0) + 1
+            return out
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "w") as f:
+            json.dump({"items": self.items}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def output_paths(output_dir: Path, stem: str):
+    """(physics, events, report) paths Stage 1/2 write for a video stem."""
+    output_dir = Path(output_dir)
+    return (
+        output_dir / f"{stem}_physics.json",
+        output_dir / f"{stem}_events.json",
+        output_dir / f"{stem}_report.md",
+    )
+
+
+def run_stage1(analyzer: Any, video_path: Path, output_dir: Path) -> Path:
+    """Stage 1 on one video; returns the physics path or raises if none was written."""
+    physics, _, _ = output_paths(output_dir, Path(video_path).stem)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    started = time.time()
+    analyzer.analyze_video(Path(video_path), Path(output_dir))
+    # analyze_video reports errors by printing; only a fresh physics file counts
+    if not physics.exists() or physics.stat().st_mtime < started - 1:
+        raise RuntimeError("Stage 1 produced no physics JSON")
+    return physics
+
+
+def upload_results(client: Any, paths: List[Path], upload_to: str) -> List[str]:
+    """Upload existing result files under an ``s3://bucket/prefix/``; returns their URIs."""
+    bucket, prefix = parse_s3_prefix(upload_to)
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+    uploaded = []
+    for path in paths:
+        if path.exists():
+            key = f"{prefix}{path.name}"
+            client.upload_file(str(path), bucket, key)
+            uploaded.append(f"s3://{bucket}/{key}")
+    return uploaded
+
+
+def run_stage2(physics_path: Path, events_path: Path) -> Path:
+    """Stage 2 on one physics file (same as ``physics_to_events.py``)."""
+    from physics_to_events import parse_physics_json, prepare_physics, transform_physics_to_events
+
+    physics = prepare_physics(parse_physics_json(physics_path))
+    events = transform_physics_to_events(physics, physics_path)
+    with open(events_path, "w") as f:
+        json.dump(events, f, indent=2)
+    return events_path
+
+
+class BatchRunner:
+    """Schedule videos through per-stage worker pools, recording progress in a manifest."""
+
+    def __init__(
+        self,
+        downloader: S3Downloader,
+        analyzer: Any,
+        output_dir: Path,
+        manifest: Manifest,
+        upload_to: Optional[str] = None,
+        download_workers: int = 4,
+        stage1_workers: int = 2,
+        stage2_workers: int = 2,
+        upload_workers: int = 4,
+        max_attempts: int = 3,
+        verbose: bool = False,
+    ):
+        self.downloader = downloader
+        self.analyzer = analyzer
+        self.output_dir = Path(output_dir)
+        self.manifest = manifest
+        self.upload_to = upload_to
+        self.max_attempts = max_attempts
+        self.verbose = verbose
+        self._workers = {
+            "download": download_workers,
+            "stage1": stage1_workers,
+            "stage2": stage2_workers,
+            "upload": upload_workers,
+        }
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def plan(self, videos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Register videos in the manifest; return those that still need work."""
+        todo = []
+        seen_stems: Dict[str, str] = {}
+        for video in videos:
+            uri = video["uri"]
+            stem = Path(video["key"]).stem
+            if stem in seen_stems:
+                print(f"    ⚠️ Skipping {uri}: output name '{stem}' already used by "
+                      f"{seen_stems[stem]}")
+                continue
+            seen_stems[stem] = uri
+
+            item = self.manifest.get(uri)
+            if item and item.get("etag") != video["etag"]:
+                item = self.manifest.update(uri, state=PENDING, etag=video["etag"],
+                                            attempts=0, error=None, failed_stage=None)
+            elif not item:
+                item = self.manifest.update(uri, state=PENDING, etag=video["etag"],
+                                            stem=stem, size=video["size"])
+            if item.get("state") == DONE:
+                continue
+            if item.get("state") == FAILED and item.get("attempts", 0) >= self.max_attempts:
+                continue
+            todo.append(video)
+        return todo
+
+    def resume_stage(self, uri: str) -> str:
+        """First stage an item still needs, trusting only outputs that exist on disk."""
+        item = self.manifest.get(uri)
+        stem = item.get("stem") or Path(parse_s3_uri(uri)[1]).stem
+        physics = self.output_dir / f"{stem}_physics.json"
+        events = self.output_dir / f"{stem}_events.json"
+        state = item.get("state", PENDING)
+        if state == FAILED:
+            state = item.get("last_state", PENDING)
+        if state == DERIVED and events.exists():
+            return "upload"
+        if state in (OBSERVED, DERIVED) and physics.exists():
+            return "stage2"
+        return "download"
+
+    def run(self, videos: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Process videos until every one is done or failed; returns state counts."""
+        todo = self.plan(videos)
+        self._pools = {
+            stage: ThreadPoolExecutor(max_workers=n, thread_name_prefix=stage)
+            for stage, n in self._workers.items()
+        }
+        try:
+            for video in todo:
+                self._submit(self.resume_stage(video["uri"]), video["uri"], {})
+            with self._idle:
+                self._idle.wait_for(lambda: self._pending == 0)
+        finally:
+            for pool in self._pools.values():
+                pool.shutdown(wait=True)
+        return self.manifest.counts()
+
+    def _submit(self, stage: str, uri: str, ctx: Dict[str, Any]) -> None:
+        with self._idle:
+            self._pending += 1
+        self._pools[stage].submit(self._run_stage, stage, uri, ctx)
+
+    def _run_stage(self, stage: str, uri: str, ctx: Dict[str, Any]) -> None:
+        try:
+            next_stage = getattr(self, f"_do_{stage}")(uri, ctx)
+            if next_stage:
+                self._submit(next_stage, uri, ctx)
+        except Exception as e:
+            item = self.manifest.get(uri)
+            last_state = item.get("state", PENDING)
+            if last_state == FAILED:
+                last_state = item.get("last_state", PENDING)
+            self.manifest.update(
+                uri,
+                state=FAILED,
+                last_state=last_state,
+                failed_stage=stage,
+                attempts=item.get("attempts", 0) + 1,
+                error=f"{type(e).__name__}: {e}",
+            )
+            print(f"  ❌ {uri} failed in {stage}: {e}")
+            if self.verbose:
+                traceback.print_exc()
+        finally:
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    # ------------------------------------------------------------------
+    # Stages — each returns the next stage name, or None when finished
+    # ------------------------------------------------------------------
+
+    def _paths(self, uri: str):
+        stem = self.manifest.get(uri).get("stem") or Path(parse_s3_uri(uri)[1]).stem
+        return output_paths(self.output_dir, stem)
+
+    def _do_download(self, uri: str, ctx: Dict[str, Any]) -> str:
+        result = self.downloader.download(uri)
+        ctx["video"] = result.path
+        self.manifest.update(uri, state=DOWNLOADED, local_video=str(result.path),
+                             cache_hit=result.cache_hit, verified=result.verified)
+        return "stage1"
+
+    def _do_stage1(self, uri: str, ctx: Dict[str, Any]) -> str:
+        physics = run_stage1(self.analyzer, Path(ctx["video"]), self.output_dir)
+        self.manifest.update(uri, state=OBSERVED, physics=str(physics))
+        return "stage2"
+
+    def _do_stage2(self, uri: str, ctx: Dict[str, Any]) -> str:
+        physics, events, _ = self._paths(uri)
+        run_stage2(physics, events)
+        self.manifest.update(uri, state=DERIVED, events=str(events))
+        return "upload"
+
+    def _do_upload(self, uri: str, ctx: Dict[str, Any]) -> None:
+        if self.upload_to:
+            uploaded = upload_results(
+                self.downloader.client, list(self._paths(uri)), self.upload_to
+            )
+            self.manifest.update(uri, state=DONE, uploaded=uploaded, error=None)
+        else:
+            self.manifest.update(uri, state=DONE, error=None)
+        if self.verbose:
+            print(f"  ✅ {uri}")
+        return None
+
+
+@click.command()
+@click.argument("s3_prefix")
+@click.option("--output", "-o", default="data/analyses", help="Local output directory")
+@click.option("--manifest", "manifest_path", default=None,
+              help="Batch manifest (default: <output>/batch_manifest.json)")
+@click.option("--upload-to", default=None, help="S3 prefix for physics/events/report results")
+@click.option("--download-workers", default=4, help="Concurrent video downloads")
+@click.option("--stage1-workers", default=2, help="Concurrent Gemini analyses")
+@click.option("--stage2-workers", default=2, help="Concurrent event derivations")
+@click.option("--upload-workers", default=4, help="Concurrent result uploads")
+@click.option("--max-attempts", default=3, help="Give up on a video after this many failures")
+@click.option("--limit", default=None, type=int, help="Only the first N videos (sorted by key)")
+@click.option("--model", "-m", default="gemini-3-pro-preview", help="Stage 1 model")
+@click.option("--stream", is_flag=True, help="Stage 1: stream the JSON step")
+@click.option("--adaptive-fps", is_flag=True, help="Stage 1: motion-planned FPS")
+@click.option("--cache-dir", default=None, help="S3 content cache directory")
+@click.option("--endpoint-url", default=None, help="S3-compatible endpoint (MinIO, moto)")
+@click.option("--profile", default=None, help="AWS profile")
+@click.option("--api-key", envvar="GEMINI_API_KEY")
+@click.option("--verbose", "-v", is_flag=True)
+def main(s3_prefix, output, manifest_path, upload_to, download_workers, stage1_workers,
+         stage2_workers, upload_workers, max_attempts, limit, model, stream, adaptive_fps,
+         cache_dir, endpoint_url, profile, api_key, verbose):
+    """Process every video under an S3 prefix; rerun to resume."""
+    if not api_key:
+        raise click.ClickException("Set GEMINI_API_KEY env var.")
+    from gemini_cache_analyzer_v2 import GeminiCacheAnalyzer
+
+    try:
+        bucket, prefix = parse_s3_prefix(s3_prefix)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    output = Path(output)
+    client = make_s3_client(profile, endpoint_url,
+                            max_pool_connections=max(download_workers * 8, upload_workers, 10))
+    videos = sorted(list_videos(client, bucket, prefix), key=lambda v: v["key"])
+    if limit:
+        videos = videos[:limit]
+    click.echo(f"📦 {len(videos)} videos under {s3_prefix}")
+
+    runner = BatchRunner(
+        downloader=S3Downloader(
+            client=client,
+            cache=ContentCache(Path(cache_dir)) if cache_dir else None,
+            verbose=verbose,
+        ),
+        analyzer=GeminiCacheAnalyzer(api_key, model=model, verbose=verbose, stream=stream,
+                                     adaptive_fps=adaptive_fps,
+                                     ledger_path=output / "stage1_ledger.jsonl"),
+        output_dir=output,
+        manifest=Manifest(Path(manifest_path) if manifest_path
+                          else output / "batch_manifest.json"),
+        upload_to=upload_to,
+        download_workers=download_workers,
+        stage1_workers=stage1_workers,
+        stage2_workers=stage2_workers,
+        upload_workers=upload_workers,
+        max_attempts=max_attempts,
+        verbose=verbose,
+    )
+    counts = runner.run(videos)
+    summary = ", ".join(f"{n} {state}" for state, n in sorted(counts.items()))
+    click.echo(f"🏁 Batch finished: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Lease-based job queue for spreading Stage 1 + Stage 2 across machines.
+
+Jobs live in one SQLite file that every worker opens (a shared volume with
+working POSIX locks — the file uses the default rollback journal, since WAL
+needs shared memory and does not work across hosts).  A worker *claims* a job
+inside a ``BEGIN IMMEDIATE`` transaction, which gives it an exclusive lease
+until ``lease_expires``.  While processing it heartbeats to extend the lease;
+if the worker dies the lease runs out and another worker reclaims the job.
+Failures go back to the queue with exponential backoff until ``max_attempts``,
+after which the job is marked ``dead``.
+
+A job is only completed by the worker holding its lease, so a worker whose
+lease was lost (e.g. a long network partition) cannot overwrite the result of
+the worker that took over.
+
+Usage:
+    python -m pipeline.jobqueue enqueue jobs.db data/videos/*.mp4
+    python -m pipeline.jobqueue enqueue jobs.db --s3-prefix s3://my-bucket/handball/
+    python -m pipeline.jobqueue worker jobs.db --output data/analyses --lease 900
+    python -m pipeline.jobqueue stats jobs.db
+"""
+
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import click
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+DEFAULT_LEASE_SECONDS = 900.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    video         TEXT NOT NULL UNIQUE,
+    payload       TEXT NOT NULL DEFAULT '{}',
+    state         TEXT NOT NULL DEFAULT 'queued',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL DEFAULT 3,
+    available_at  REAL NOT NULL,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    last_error    TEXT,
+    result        TEXT,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, available_at);
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    video: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    lease_owner: Optional[str]
+    lease_expires: Optional[float]
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"],
+            video=row["video"],
+            payload=json.loads(row["payload"] or "{}"),
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            lease_owner=row["lease_owner"],
+            lease_expires=row["lease_expires"],
+        )
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def backoff_seconds(attempts: int, base: float = 30.0, cap: float = 1800.0) -> float:
+    """Exponential backoff with ±25% jitter after the ``attempts``-th failure."""
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.75, 1.25)
+
+
+class JobQueue:
+    """SQLite-backed queue: enqueue, claim with lease, heartbeat, complete, fail/retry."""
+
+    def __init__(self, path: Path, clock=time.time):
+        self.path = Path(path)
+        self.clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation: safe across threads and processes
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def enqueue(self, video: str, payload: Optional[Dict[str, Any]] = None,
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS, delay: float = 0.0) -> bool:
+        """Add a job for ``video``; returns False if it is already queued or processed."""
+        now = self.clock()
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO jobs "
+                "(video, payload, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (video, json.dumps(payload or {}), max_attempts, now + delay, now, now),
+            )
+            return cur.rowcount == 1
+
+    def retry_dead(self) -> int:
+        """Put every dead job back in the queue with a fresh attempt budget."""
+        now = self.clock()
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET state = ?, attempts = 0, available_at = ?, updated_at = ? "
+                "WHERE state = ?",
+                (QUEUED, now, now, DEAD),
+            ).rowcount
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def claim(self, worker_id: str,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Job]:
+        """Lease the next ready job (queued and due, or leased with an expired lease).
+
+        The lease owner is the worker id plus a per-claim token, so a stale
+        handle from an earlier claim of the same job can never complete it.
+        """
+        now = self.clock()
+        owner = f"{worker_id}/{uuid.uuid4().hex[:8]}"
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM jobs "
+                    "WHERE (state = ? AND available_at <= ?) "
+                    "OR (state = ? AND lease_expires < ?) "
+                    "ORDER BY available_at, id LIMIT 1",
+                    (QUEUED, now, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["state"] == LEASED and row["attempts"] >= row["max_attempts"]:
+                    # Worker died on its last attempt
+                    conn.execute(
+                        "UPDATE jobs SET state = ?, lease_owner = NULL, last_error = ?, "
+                        "updated_at = ? WHERE id = ?",
+                        (DEAD, f"lease expired (owner {row['lease_owner']})", now, row["id"]),
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET state = ?, lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (LEASED, owner, now + lease_seconds, now, row["id"]),
+                )
+                job = Job.from_row(row)
+                job.attempts += 1
+                job.lease_owner = owner
+                job.lease_expires = now + lease_seconds
+                return job
+
+    def heartbeat(self, job: Job, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend the lease; False means it was lost and the job belongs to someone else."""
+        now = self.clock()
+        with self._transaction() as conn:
+            ok = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                (now + lease_seconds, now, job.id, LEASED, job.lease_owner),
+            ).rowcount == 1
+        if ok:
+            job.lease_expires = now + lease_seconds
+        return ok
+
+    def complete(self, job: Job, result: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark the job done if this worker still holds its lease."""
+        now = self.clock()
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET state = ?, result = ?, lease_owner = NULL, "
+                "lease_expires = NULL, last_error = NULL, updated_at = ? "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                (DONE, json.dumps(result or {}), now, job.id, LEASED, job.lease_owner),
+            ).rowcount == 1
+
+    def fail(self, job: Job, error: str, backoff: Optional[float] = None) -> str:
+        """Release a failed job for a later retry, or mark it dead; returns the new state."""
+        now = self.clock()
+        dead = job.attempts >= job.max_attempts
+        state = DEAD if dead else QUEUED
+        delay = 0.0 if dead else (backoff if backoff is not None
+                                  else backoff_seconds(job.attempts))
+        with self._transaction() as conn:
+            changed = conn.execute(
+                "UPDATE jobs SET state = ?, available_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL, last_error = ?, updated_at = ? "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                (state, now + delay, error, now, job.id, LEASED, job.lease_owner),
+            ).rowcount
+        return state if changed else "lost"
+
+    # ------------------------------------------------------------------
+    # Inspection
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state")
+            return {row["state"]: row["n"] for row in rows}
+
+    def get(self, video: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE video = ?", (video,)).fetchone()
+            return dict(row) if row else None
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+class _Heartbeat:
+    """Background thread extending a job's lease every ``lease / 3`` seconds."""
+
+    def __init__(self, queue: JobQueue, job: Job, lease_seconds: float):
+        self.queue = queue
+        self.job = job
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.job, self.lease_seconds):
+                    self.lost = True
+                    return
+            except sqlite3.Error:
+                continue  # transient lock contention; retry next beat
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def process_job(job: Job, analyzer: Any, output_dir: Path, downloader: Any = None,
+                upload_to: Optional[str] = None) -> Dict[str, Any]:
+    """Stage 1 + Stage 2 for one job's video (local path or s3:// URI)."""
+    from pipeline.batch import output_paths, run_stage1, run_stage2, upload_results
+
+    video = job.video
+    if downloader is None and (video.startswith("s3://") or upload_to):
+        from pipeline.s3_ingest import S3Downloader
+        downloader = S3Downloader()
+    if video.startswith("s3://"):
+        video_path = downloader.download(video).path
+    else:
+        video_path = Path(video)
+
+    physics = run_stage1(analyzer, video_path, output_dir)
+    _, events, report = output_paths(output_dir, video_path.stem)
+    run_stage2(physics, events)
+
+    result = {"physics": str(physics), "events": str(events)}
+    if upload_to:
+        result["uploaded"] = upload_results(downloader.client, [physics, events, report],
+                                            upload_to)
+    return result
+
+
+def run_worker(
+    queue: JobQueue,
+    analyzer: Any,
+    output_dir: Path,
+    worker_id: Optional[str] = None,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    poll_seconds: float = 10.0,
+    max_jobs: Optional[int] = None,
+    exit_when_empty: bool = False,
+    downloader: Any = None,
+    upload_to: Optional[str] = None,
+) -> Dict[str, int]:
+    """Claim and process jobs until the queue is drained (or forever)."""
+    worker_id = worker_id or default_worker_id()
+    counts = {"done": 0, "retry": 0, "dead": 0, "lost": 0}
+    processed = 0
+
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker_id, lease_seconds)
+        if job is None:
+            if exit_when_empty:
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        processed += 1
+        print(f"🎬 [{worker_id}] job {job.id} attempt {job.attempts}/{job.max_attempts}: "
+              f"{job.video}")
+        with _Heartbeat(queue, job, lease_seconds) as beat:
+            try:
+                result = process_job(job, analyzer, output_dir, downloader, upload_to)
+                error = None
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+
+        if beat.lost:
+            counts["lost"] += 1
+            print(f"  ⚠️ Lease on job {job.id} was lost; result discarded")
+            continue
+        if error is None:
+            if queue.complete(job, result):
+                counts["done"] += 1
+                print(f"  ✅ job {job.id} done")
+            else:
+                counts["lost"] += 1
+        else:
+            state = queue.fail(job, error)
+            counts["retry" if state == QUEUED else "dead" if state == DEAD else "lost"] += 1
+            print(f"  ❌ job {job.id} failed ({state}): {error}")
+    return counts
+
+
+@click.group()
+def main():
+    """Distributed Stage 1 + Stage 2 job queue (shared SQLite file)."""
+
+
+@main.command()
+@click.argument("db", type=click.Path())
+@click.argument("videos", nargs=-1)
+@click.option("--s3-prefix", default=None, help="Enqueue every video under this S3 prefix")
+@click.option("--max-attempts", default=DEFAULT_MAX_ATTEMPTS, help="Attempts before 'dead'")
+@click.option("--retry-dead", is_flag=True, help="Re-queue jobs that ran out of attempts")
+@click.option("--endpoint-url", default=None, help="S3-compatible endpoint (MinIO, moto)")
+def enqueue(db, videos, s3_prefix, max_attempts, retry_dead, endpoint_url):
+    """Add videos (local paths or s3:// URIs) to the queue."""
+    queue = JobQueue(Path(db))
+    targets: List[str] = [str(Path(v).resolve()) if not v.startswith("s3://") else v
+                          for v in videos]
+    if s3_prefix:
+        from pipeline.batch import list_videos, parse_s3_prefix
+        from pipeline.s3_ingest import make_s3_client
+
+        bucket, prefix = parse_s3_prefix(s3_prefix)
+        client = make_s3_client(endpoint_url=endpoint_url)
+        targets += [v["uri"] for v in list_videos(client, bucket, prefix)]
+    added = sum(queue.enqueue(t, max_attempts=max_attempts) for t in targets)
+    click.echo(f"📥 {added} new jobs ({len(targets) - added} already known)")
+    if retry_dead:
+        click.echo(f"🔁 {queue.retry_dead()} dead jobs re-queued")
+
+
+@main.command()
+@click.argument("db", type=click.Path(exists=True))
+@click.option("--output", "-o", default="data/analyses", help="Output directory")
+@click.option("--lease", "lease_seconds", default=DEFAULT_LEASE_SECONDS,
+              help="Lease (visibility timeout) in seconds; heartbeats every lease/3")
+@click.option("--poll", "poll_seconds", default=10.0, help="Idle poll interval")
+@click.option("--max-jobs", default=None, type=int, help="Exit after this many jobs")
+@click.option("--exit-when-empty", is_flag=True, help="Exit once no job is ready")
+@click.option("--upload-to", default=None, help="S3 prefix for results")
+@click.option("--model", "-m", default="gemini-3-pro-preview", help="Stage 1 model")
+@click.option("--stream", is_flag=True, help="Stage 1: stream the JSON step")
+@click.option("--api-key", envvar="GEMINI_API_KEY")
+@click.option("--verbose", "-v", is_flag=True)
+def worker(db, output, lease_seconds, poll_seconds, max_jobs, exit_when_empty, upload_to,
+           model, stream, api_key, verbose):
+    """Claim jobs and run Stage 1 + Stage 2 on them."""
+    if not api_key:
+        raise click.ClickException("Set GEMINI_API_KEY env var.")
+    from gemini_cache_analyzer_v2 import GeminiCacheAnalyzer
+
+    output = Path(output)
+    analyzer = GeminiCacheAnalyzer(api_key, model=model, verbose=verbose, stream=stream,
+                                   ledger_path=output / "stage1_ledger.jsonl")
+    downloader = None
+    if upload_to:
+        from pipeline.s3_ingest import S3Downloader
+        downloader = S3Downloader(verbose=verbose)
+    counts = run_worker(
+        JobQueue(Path(db)), analyzer, output,
+        lease_seconds=lease_seconds, poll_seconds=poll_seconds, max_jobs=max_jobs,
+        exit_when_empty=exit_when_empty, downloader=downloader, upload_to=upload_to,
+    )
+    click.echo(f"🏁 Worker finished: {counts}")
+
+
+@main.command()
+@click.argument("db", type=click.Path(exists=True))
+def stats(db):
+    """Show job counts by state."""
+    counts = JobQueue(Path(db)).stats()
+    click.echo("  ".join(f"{state}={n}" for state, n in sorted(counts.items())) or "empty")
+
+
+if __name__ == "__main__":
+    main()
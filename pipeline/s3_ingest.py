@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+S3 video ingest: parallel ranged download, checksum verification, local LRU cache.
+
+Replaces ``aws s3 cp`` into a temp dir.  An object is fetched as concurrent
+``Range`` GETs written in place into a pre-sized part file, verified, then
+atomically moved into a content cache keyed by bucket/key/ETag.  Stage 1 is
+handed the cached path directly, so repeated runs on the same key never
+re-download and nothing has to be cleaned up afterwards.
+
+Verification, strongest available first:
+  1. full-object ``ChecksumSHA256`` (when the object was uploaded with one)
+  2. single-part ETag (MD5 of the content)
+  3. multipart ETag (MD5 of part MD5s) for common upload part sizes
+A definitive mismatch raises ``ChecksumMismatch``; a multipart ETag that no
+candidate part size reproduces is reported as unverified.
+
+Cache layout (``DEFAULT_CACHE_DIR``):
+  <cache_dir>/<sha256(bucket/key@etag)[:24]>/<original file name>
+Entry directory mtimes are the LRU clock; eviction runs after each insert.
+
+Works against any S3-compatible endpoint (MinIO, moto server) via
+``--endpoint-url`` or ``AWS_ENDPOINT_URL``.
+
+Usage:
+    python -m pipeline.s3_ingest s3://bucket/clips/clip.mp4          # prints local path
+    python -m pipeline.s3_ingest s3://bucket/clip.mp4 --max-cache-gb 20 --workers 16
+"""
+
+import base64
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import click
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "videos" / ".s3cache"
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_MAX_CACHE_BYTES = 20 * 1024 ** 3
+MIB = 1024 * 1024
+
+# Part sizes tried when reproducing a multipart ETag (aws cli, boto3, consoles)
+MULTIPART_CANDIDATE_SIZES = (8 * MIB, 16 * MIB, 5 * MIB, 64 * MIB, 100 * MIB)
+
+
+class ChecksumMismatch(Exception):
+    """Downloaded bytes do not match the object's checksum."""
+
+
+def parse_s3_uri(uri: str) -> Tuple[str, str]:
+    """``s3://bucket/key`` → (bucket, key)."""
+    if not uri.startswith("s3://"):
+        raise ValueError(f"Invalid S3 URI: {uri}")
+    bucket, _, key = uri[5:].partition("/")
+    if not bucket or not key:
+        raise ValueError(f"Invalid S3 URI: {uri}")
+    return bucket, key
+
+
+def plan_ranges(size: int, part_size: int = DEFAULT_PART_SIZE) -> List[Tuple[int, int]]:
+    """Inclusive byte ranges covering ``size`` bytes in ``part_size`` pieces."""
+    if size <= 0:
+        return []
+    return [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+
+def make_s3_client(profile: Optional[str] = None, endpoint_url: Optional[str] = None,
+                   max_pool_connections: int = 32):
+    """boto3 S3 client sized for concurrent ranged GETs."""
+    import boto3
+    from botocore.config import Config
+
+    session = boto3.Session(profile_name=profile) if profile else boto3.Session()
+    return session.client(
+        "s3",
+        endpoint_url=endpoint_url or os.environ.get("AWS_ENDPOINT_URL"),
+        config=Config(max_pool_connections=max_pool_connections,
+                      retries={"max_attempts": 5, "mode": "adaptive"}),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Checksums
+# ---------------------------------------------------------------------------
+
+def _file_hash(path: Path, algorithm: str, start: int = 0, length: Optional[int] = None,
+               chunk_size: int = MIB) -> Any:
+    h = hashlib.new(algorithm)
+    remaining = length
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining is None or remaining > 0:
+            n = chunk_size if remaining is None else min(chunk_size, remaining)
+            block = f.read(n)
+            if not block:
+                break
+            h.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return h
+
+
+def multipart_etag(path: Path, part_size: int) -> str:
+    """ETag S3 assigns to a multipart upload of this file with ``part_size`` parts."""
+    size = path.stat().st_size
+    digests = b"".join(
+        _file_hash(path, "md5", start, end - start + 1).digest()
+        for start, end in plan_ranges(size, part_size)
+    )
+    return f"{hashlib.md5(digests).hexdigest()}-{len(plan_ranges(size, part_size))}"
+
+
+def verify_download(path: Path, etag: str, checksum_sha256: Optional[str] = None) -> bool:
+    """Check a download against the object's checksum.
+
+    Returns True if verified, False if the checksum could not be reproduced
+    (multipart ETag with an unknown part size).  Raises ``ChecksumMismatch``
+    on a definitive mismatch.
+    """
+    if checksum_sha256 and "-" not in checksum_sha256:
+        actual = base64.b64encode(_file_hash(path, "sha256").digest()).decode("ascii")
+        if actual != checksum_sha256:
+            raise ChecksumMismatch(f"SHA-256 mismatch for {path.name}")
+        return True
+
+    etag = (etag or "").strip('"')
+    if not etag:
+        return False
+    if "-" not in etag:
+        if _file_hash(path, "md5").hexdigest() != etag:
+            raise ChecksumMismatch(f"MD5/ETag mismatch for {path.name}")
+        return True
+
+    n_parts = int(etag.rsplit("-", 1)[1])
+    size = path.stat().st_size
+    guess = -(-size // n_parts)
+    candidates = [s for s in MULTIPART_CANDIDATE_SIZES if -(-size // s) == n_parts]
+    candidates.append(-(-guess // MIB) * MIB)  # even MiB split into n_parts
+    for part_size in dict.fromkeys(candidates):
+        if multipart_etag(path, part_size) == etag:
+            return True
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Local content cache
+# ---------------------------------------------------------------------------
+
+class ContentCache:
+    """Directory of downloaded objects with size-bounded LRU eviction.
+
+    Safe across processes: entries appear by atomic rename and the LRU clock
+    is each entry directory's mtime, touched on every hit.
+    """
+
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(bucket: str, key: str, etag: str) -> str:
+        ident = f"{bucket}/{key}@{(etag or '').strip(chr(34))}"
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest()[:24]
+
+    def _entry(self, cache_key: str) -> Path:
+        return self.root / cache_key
+
+    def get(self, cache_key: str, filename: str) -> Optional[Path]:
+        path = self._entry(cache_key) / filename
+        if not path.exists():
+            return None
+        now = time.time()
+        try:
+            os.utime(path.parent, (now, now))
+        except FileNotFoundError:  # evicted by another process in between
+            return None
+        return path
+
+    def staging_path(self, filename: str) -> Path:
+        """Unique temp file inside the cache root (same filesystem for the rename)."""
+        staging = self.root / ".staging"
+        staging.mkdir(parents=True, exist_ok=True)
+        return staging / f"{uuid.uuid4().hex}-{filename}"
+
+    def put(self, cache_key: str, filename: str, src: Path) -> Path:
+        """Move a finished download into the cache and evict down to ``max_bytes``."""
+        entry = self._entry(cache_key)
+        entry.mkdir(parents=True, exist_ok=True)
+        path = entry / filename
+        os.replace(src, path)
+        now = time.time()
+        os.utime(entry, (now, now))
+        self.evict(keep=cache_key)
+        return path
+
+    def entries(self) -> List[Tuple[float, int, Path]]:
+        """(last_used, size_bytes, entry_dir) for every cache entry."""
+        out = []
+        if not self.root.exists():
+            return out
+        for entry in self.root.iterdir():
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+                out.append((entry.stat().st_mtime, size, entry))
+            except FileNotFoundError:
+                continue
+        return out
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep: Optional[str] = None) -> List[Path]:
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        removed = []
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                if entry.name == keep:
+                    continue
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+                removed.append(entry)
+        return removed
+
+
+# ---------------------------------------------------------------------------
+# Downloader
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ObjectInfo:
+    bucket: str
+    key: str
+    size: int
+    etag: str
+    checksum_sha256: Optional[str] = None
+
+    @property
+    def filename(self) -> str:
+        return Path(self.key).name
+
+
+@dataclass
+class DownloadResult:
+    path: Path
+    info: ObjectInfo
+    cache_hit: bool
+    verified: bool
+    seconds: float = 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.info.size / 1e6 / self.seconds if self.seconds > 0 else 0.0
+
+
+class S3Downloader:
+    """Fetch S3 objects into a ``ContentCache`` with concurrent ranged GETs."""
+
+    def __init__(
+        self,
+        client: Any = None,
+        cache: Optional[ContentCache] = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_workers: int = 8,
+        max_retries: int = 3,
+        verbose: bool = False,
+    ):
+        self.client = client if client is not None else make_s3_client(
+            max_pool_connections=max(max_workers, 10)
+        )
+        self.cache = cache or ContentCache()
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.verbose = verbose
+
+    def head(self, bucket: str, key: str) -> ObjectInfo:
+        resp = self.client.head_object(Bucket=bucket, Key=key, ChecksumMode="ENABLED")
+        return ObjectInfo(
+            bucket=bucket,
+            key=key,
+            size=int(resp["ContentLength"]),
+            etag=resp.get("ETag", "").strip('"'),
+            checksum_sha256=resp.get("ChecksumSHA256"),
+        )
+
+    def download(self, uri: str) -> DownloadResult:
+        """Return a local, verified copy of ``uri``, downloading only on a cache miss."""
+        start = time.perf_counter()
+        bucket, key = parse_s3_uri(uri)
+        info = self.head(bucket, key)
+        cache_key = ContentCache.key_for(bucket, key, info.etag)
+
+        cached = self.cache.get(cache_key, info.filename)
+        if cached is not None:
+            if self.verbose:
+                click.echo(f"  S3 cache hit: {uri}", err=True)
+            return DownloadResult(cached, info, cache_hit=True, verified=True,
+                                  seconds=time.perf_counter() - start)
+
+        tmp = self.cache.staging_path(info.filename)
+        try:
+            self._fetch_ranges(info, tmp)
+            verified = verify_download(tmp, info.etag, info.checksum_sha256)
+            if not verified:
+                click.echo(f"    ⚠️ Could not reproduce multipart ETag for {uri}; "
+                           "size checked only", err=True)
+            path = self.cache.put(cache_key, info.filename, tmp)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+        result = DownloadResult(path, info, cache_hit=False, verified=verified,
+                                seconds=time.perf_counter() - start)
+        if self.verbose:
+            click.echo(f"  Downloaded {uri}: {info.size / 1e6:.1f} MB in {result.seconds:.1f}s "
+                       f"({result.mb_per_second:.1f} MB/s)", err=True)
+        return result
+
+    def _fetch_ranges(self, info: ObjectInfo, dest: Path) -> None:
+        with open(dest, "wb") as f:
+            f.truncate(info.size)
+        ranges = plan_ranges(info.size, self.part_size)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # list() re-raises the first failed range
+            list(pool.map(lambda r: self._fetch_range(info, dest, *r), ranges))
+
+    def _fetch_range(self, info: ObjectInfo, dest: Path, first: int, last: int) -> None:
+        expected = last - first + 1
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = self.client.get_object(
+                    Bucket=info.bucket,
+                    Key=info.key,
+                    Range=f"bytes={first}-{last}",
+                    IfMatch=f'"{info.etag}"',  # object replaced mid-download → 412
+                )
+                written = 0
+                with open(dest, "r+b") as f:
+                    f.seek(first)
+                    for block in resp["Body"].iter_chunks(chunk_size=MIB):
+                        f.write(block)
+                        written += len(block)
+                if written != expected:
+                    raise IOError(f"short range read {first}-{last}: {written}/{expected} bytes")
+                return
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(min(0.5 * 2 ** attempt, 8.0))
+
+
+@click.command()
+@click.argument("uris", nargs=-1, required=True)
+@click.option("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Local content cache")
+@click.option("--max-cache-gb", default=DEFAULT_MAX_CACHE_BYTES / 1024 ** 3,
+              help="Evict least recently used videos beyond this size")
+@click.option("--workers", "-w", default=8, help="Concurrent ranged GETs per object")
+@click.option("--part-size-mb", default=DEFAULT_PART_SIZE // MIB, help="Range size in MiB")
+@click.option("--endpoint-url", default=None, help="S3-compatible endpoint (MinIO, moto)")
+@click.option("--profile", default=None, help="AWS profile")
+@click.option("--verbose", "-v", is_flag=True)
+def main(uris, cache_dir, max_cache_gb, workers, part_size_mb, endpoint_url, profile, verbose):
+    """Download S3 videos into the local cache and print their local paths.
+
+    Only the paths go to stdout (scripts capture it); progress and warnings go to stderr.
+    """
+    downloader = S3Downloader(
+        client=make_s3_client(profile, endpoint_url, max_pool_connections=max(workers, 10)),
+        cache=ContentCache(Path(cache_dir), int(max_cache_gb * 1024 ** 3)),
+        part_size=part_size_mb * MIB,
+        max_workers=workers,
+        verbose=verbose,
+    )
+    for uri in uris:
+        click.echo(str(downloader.download(uri).path))
+
+
+if __name__ == "__main__":
+    main()
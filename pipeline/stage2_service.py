@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Long-running Stage 2 service: physics → events without per-file process startup.
+
+``python physics_to_events.py clip_physics.json`` pays for interpreter start,
+click, NumPy and the inference package on every clip — for short scene clips
+that is most of the run.  The service keeps them loaded: a pool of worker
+processes imports ``physics_to_events`` once, and requests arrive over local
+HTTP (TCP or a Unix socket).
+
+    POST /transform   {"path": "/abs/clip_physics.json", "write": true}
+                      {"path": ..., "output": "/abs/out_events.json"}
+                      {"physics": {...}, "source": "clip_physics.json"}
+                      optional "options": {"resample_fps": 16, "stitch_tracks": true,
+                                           "repair_teleports": true, "move_intervals": true,
+                                           "keep_moves": false}
+    GET  /health
+
+With ``write``/``output`` the worker writes the events file (as the CLI
+does) and answers with a summary; otherwise the events JSON is the response
+body.  Paths are read by the service, so send absolute paths.  It is meant
+for the local machine only: bind to 127.0.0.1 or a Unix socket.
+
+Because a browser page can reach 127.0.0.1 too, ``/transform`` only accepts
+``Content-Type: application/json`` (which a cross-site page cannot send
+without a CORS preflight this server never approves) and refuses requests
+carrying an ``Origin`` header.  Events are only written next to the input
+(``clip_events.json`` for ``clip_physics.json``) or, if the service was
+started with ``--output-dir``, anywhere inside that directory.
+
+Usage:
+    python -m pipeline.stage2_service serve --socket /tmp/stage2.sock --workers 4
+    python -m pipeline.stage2_service run data/analyses/*_physics.json --socket /tmp/stage2.sock
+    python -m pipeline.stage2_service serve --output-dir data/events   # allow -o into data/events
+"""
+
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import click
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_TIMEOUT = 300.0
+OPTIONS = ("resample_fps", "stitch_tracks", "repair_teleports", "move_intervals", "keep_moves")
+
+
+class RequestError(ValueError):
+    """A malformed or refused request (answered with 400, or 403/404/415)."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------------------------------------------------------------------
+# Work (runs in the pool's processes)
+# ---------------------------------------------------------------------------
+
+
+def _init_worker() -> None:
+    # Pay the import and table-building cost once per worker, not per request
+    import physics_to_events  # noqa: F401
+    from inference.plausibility import zone_matrices
+    from inference.teleport_repair import route_table
+
+    zone_matrices()
+    route_table()
+
+
+def derive(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Run Stage 2 for one validated request."""
+    from physics_to_events import (
+        default_events_path,
+        parse_physics_json,
+        prepare_physics,
+        transform_physics_to_events,
+    )
+
+    started = time.perf_counter()
+    options = request.get("options", {})
+    if request.get("path"):
+        source = Path(request["path"])
+        physics = parse_physics_json(source)
+    else:
+        source = Path(request.get("source") or "request_physics.json")
+        physics = request["physics"]
+
+    physics = prepare_physics(
+        physics,
+        resample_fps=options.get("resample_fps"),
+        stitch_tracks=bool(options.get("stitch_tracks")),
+        repair_teleports=bool(options.get("repair_teleports")),
+    )
+    events = transform_physics_to_events(
+        physics, source,
+        move_intervals=bool(options.get("move_intervals")),
+        keep_moves=bool(options.get("keep_moves")),
+    )
+
+    output = request.get("output")
+    if not output and request.get("write"):
+        output = default_events_path(source)
+    if not output:
+        return {"events": events}
+
+    with open(output, "w") as f:
+        json.dump(events, f, indent=2)
+    return {
+        "output": str(output),
+        "frames": len(events["frames"]),
+        "events": len(events["events"]),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def validate(request: Any, output_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Check a /transform body; raises RequestError.
+
+    An ``output`` must be the input's default events path or lie inside
+    ``output_dir``; nothing else is writable through the service.
+    """
+    from physics_to_events import default_events_path
+
+    if not isinstance(request, dict):
+        raise RequestError("Request body must be a JSON object")
+    if bool(request.get("path")) == ("physics" in request):
+        raise RequestError("Send exactly one of 'path' or 'physics'")
+    if "physics" in request and not isinstance(request["physics"], dict):
+        raise RequestError("'physics' must be a physics JSON object")
+    if request.get("path"):
+        path = Path(request["path"])
+        if not path.is_absolute():
+            raise RequestError("'path' must be absolute (the service has its own cwd)")
+        if not path.exists():
+            raise RequestError(f"Physics file not found: {path}", status=404)
+    if request.get("write") and not request.get("path") and not request.get("output"):
+        raise RequestError("'write' needs a 'path' (or give an explicit 'output')")
+    if request.get("path") and (request.get("write") or request.get("output")):
+        if default_events_path(Path(request["path"])) == Path(request["path"]):
+            raise RequestError("'path' must be a *_physics.json or *_physics.ndjson file")
+    if request.get("output"):
+        output = Path(request["output"])
+        if not output.is_absolute():
+            raise RequestError("'output' must be absolute (the service has its own cwd)")
+        output = Path(os.path.realpath(output))
+        allowed = (request.get("path")
+                   and output == Path(os.path.realpath(default_events_path(Path(request["path"])))))
+        if not allowed and output_dir is not None:
+            allowed = Path(os.path.realpath(output_dir)) in output.parents
+        if not allowed:
+            raise RequestError(f"Refusing to write {output}: outside the allowed outputs",
+                               status=403)
+    unknown = set(request.get("options", {})) - set(OPTIONS)
+    if unknown:
+        raise RequestError(f"Unknown options: {sorted(unknown)}")
+    return request
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+
+class Stage2Service:
+    """Dispatch validated requests to a process pool (``workers=0``: run inline).
+
+    ``output_dir`` is the one directory explicit ``output`` paths may point into.
+    """
+
+    def __init__(self, workers: int = 0, output_dir: Optional[Path] = None):
+        self.workers = workers
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.pool = (ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+                     if workers > 0 else None)
+        if self.pool is None:
+            _init_worker()
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+
+    def transform(self, request: Any) -> Dict[str, Any]:
+        request = validate(request, self.output_dir)
+        try:
+            if self.pool is None:
+                result = derive(request)
+            else:
+                result = self.pool.submit(derive, request).result()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.processed += 1
+        return result
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "workers": self.workers, "processed": self.processed,
+                "failed": self.failed}
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+def make_handler(service: Stage2Service, verbose: bool = False):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def address_string(self) -> str:
+            # Unix socket peers have no (host, port)
+            return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            if verbose:
+                super().log_message(format, *args)
+
+        def _send(self, status: int, body: Any) -> None:
+            data = json.dumps(body, separators=(",", ":")).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                self._send(200, service.health())
+            else:
+                self._send(404, {"error": "Not found"})
+
+        def do_POST(self) -> None:
+            if self.path != "/transform":
+                self._send(404, {"error": "Not found"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length)
+            # Browser pages can reach the loopback port: refuse anything that is
+            # not a same-machine JSON client
+            if self.headers.get("Origin") is not None:
+                self._send(403, {"error": "Cross-origin requests are not accepted"})
+                return
+            content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+            if content_type.lower() != "application/json":
+                self._send(415, {"error": "Content-Type must be application/json"})
+                return
+            try:
+                request = json.loads(body or b"null")
+            except json.JSONDecodeError as e:
+                self._send(400, {"error": f"Invalid JSON: {e}"})
+                return
+            try:
+                self._send(200, service.transform(request))
+            except RequestError as e:
+                self._send(e.status, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    return Handler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service: Stage2Service, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                socket_path: Optional[str] = None, verbose: bool = False):
+    """HTTP server for the service on ``socket_path`` if given, else ``host:port``."""
+    handler = make_handler(service, verbose=verbose)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # stale socket from a previous run
+        return ThreadingUnixHTTPServer(socket_path, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class Stage2Client:
+    """Thin client for a running service (TCP ``host:port`` or ``socket_path``)."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 socket_path: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT):
+        self.host, self.port = host, port
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.socket_path:
+            return UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, body: Any = None) -> Dict[str, Any]:
+        conn = self._connection()
+        try:
+            data = json.dumps(body).encode() if body is not None else None
+            headers = {"Content-Type": "application/json"} if data is not None else {}
+            conn.request(method, path, body=data, headers=headers)
+            response = conn.getresponse()
+            payload = json.loads(response.read() or b"{}")
+        finally:
+            conn.close()
+        if response.status != 200:
+            raise RuntimeError(f"Stage 2 service error {response.status}: "
+                               f"{payload.get('error', payload)}")
+        return payload
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("GET", "/health")
+
+    def transform(self, path: Optional[Path] = None, physics: Optional[Dict] = None,
+                  output: Optional[Path] = None, write: bool = False,
+                  source: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        """Events for a physics file (``path``) or payload (``physics``).
+
+        With ``write``/``output`` the service writes the file and returns a
+        summary; otherwise the response is ``{"events": <events JSON>}``.
+        """
+        request: Dict[str, Any] = {"options": {k: v for k, v in options.items() if v}}
+        if path is not None:
+            request["path"] = str(Path(path).resolve())
+        if physics is not None:
+            request["physics"] = physics
+            request["source"] = source
+        if output is not None:
+            request["output"] = str(Path(output).resolve())
+        request["write"] = write
+        return self._request("POST", "/transform", request)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+@click.group()
+def main():
+    """Stage 2 as a long-running local service, plus a thin client."""
+
+
+@main.command()
+@click.option("--host", default=DEFAULT_HOST, help="TCP bind address (local only)")
+@click.option("--port", default=DEFAULT_PORT, help="TCP port")
+@click.option("--socket", "socket_path", default=None, help="Listen on this Unix socket instead")
+@click.option("--workers", default=os.cpu_count() or 1,
+              help="Worker processes (0: run requests in the server process)")
+@click.option("--output-dir", type=click.Path(file_okay=False), default=None,
+              help="Directory clients may send explicit output paths into")
+@click.option("--verbose", "-v", is_flag=True, help="Log every request")
+def serve(host, port, socket_path, workers, output_dir, verbose):
+    """Keep the inference modules loaded and serve Stage 2 requests."""
+    service = Stage2Service(workers=workers, output_dir=output_dir)
+    server = make_server(service, host, port, socket_path, verbose=verbose)
+    where = socket_path or f"http://{host}:{port}"
+    click.echo(f"🚀 Stage 2 service on {where} ({workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        click.echo(f"🏁 Served {service.processed} requests ({service.failed} failed)")
+
+
+@main.command()
+@click.argument("physics_paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--host", default=DEFAULT_HOST)
+@click.option("--port", default=DEFAULT_PORT)
+@click.option("--socket", "socket_path", default=None, help="Service Unix socket")
+@click.option("-o", "--output", default=None,
+              help="Events file (single input only; inside the service's --output-dir)")
+@click.option("--resample-fps", type=float, default=None)
+@click.option("--stitch-tracks", is_flag=True)
+@click.option("--repair-teleports", is_flag=True)
+@click.option("--move-intervals", is_flag=True)
+@click.option("--keep-moves", is_flag=True)
+@click.option("--jobs", "-j", default=os.cpu_count() or 1,
+              help="Requests in flight at once")
+def run(physics_paths, host, port, socket_path, output, jobs, **options):
+    """Send physics files to a running service; it writes the events files."""
+    if output and len(physics_paths) > 1:
+        raise click.ClickException("-o/--output needs a single input file")
+    client = Stage2Client(host, port, socket_path=socket_path)
+
+    def send(path: str) -> Dict[str, Any]:
+        return client.transform(path=Path(path), output=output, write=True, **options)
+
+    failures: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(send, path): path for path in physics_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except (OSError, RuntimeError) as e:
+                failures.append(path)
+                click.echo(f"❌ {path}: {e}")
+                continue
+            click.echo(f"✅ {result['output']} ({result['events']} events, "
+                       f"{result['elapsed_ms']:.0f} ms)")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
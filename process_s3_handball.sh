@@ -6,7 +6,7 @@ set -e
 
 S3_PREFIX=$1
 OUTPUT_DIR=${2:-data/analyses}
-TEMP_VIDEO_DIR="data/videos/temp"
+S3_CACHE_DIR=${S3_CACHE_DIR:-data/videos/.s3cache}
 
 # Colors for output
 RED='\033[0;31m'
@@ -21,6 +21,9 @@ if [ -z "$S3_PREFIX" ]; then
     echo "  # Single video"
     echo "  $0 s3://my-bucket/video.mp4"
     echo
+    echo "  # Every video under a prefix (parallel stages, resumable)"
+    echo "  $0 s3://my-bucket/prefix/"
+    echo
     exit 1
 fi
 
@@ -38,15 +41,20 @@ if [ -z "$GEMINI_API_KEY" ]; then
 fi
 
 mkdir -p "$OUTPUT_DIR"
-mkdir -p "$TEMP_VIDEO_DIR"
 
-# Download Logic
+# Prefix: hand over to the Python batch driver (manifest in $OUTPUT_DIR/batch_manifest.json)
+if [[ "$S3_PREFIX" == s3://*/ ]]; then
+    exec python -m pipeline.batch "$S3_PREFIX" --output "$OUTPUT_DIR" --verbose
+fi
+
+# Download Logic: parallel ranged GETs into a checksummed LRU cache (no re-download
+# of a key already fetched, nothing to clean up afterwards)
 VIDEO_FILENAME=$(basename "$S3_PREFIX")
-LOCAL_VIDEO="$TEMP_VIDEO_DIR/$VIDEO_FILENAME"
 
 if [[ "$S3_PREFIX" == s3://* ]]; then
     echo -e "${BLUE}[Download] Fetching from S3...${NC}"
-    aws s3 cp "$S3_PREFIX" "$LOCAL_VIDEO" || { echo -e "${RED}Failed to download${NC}"; exit 1; }
+    LOCAL_VIDEO=$(python -m pipeline.s3_ingest "$S3_PREFIX" --cache-dir "$S3_CACHE_DIR") \
+        || { echo -e "${RED}Failed to download${NC}"; exit 1; }
 else
     # Assume local path provided
     LOCAL_VIDEO="$S3_PREFIX"
@@ -68,11 +76,5 @@ else
     exit 1
 fi
 
-# Cleanup
-if [[ "$S3_PREFIX" == s3://* ]]; then
-    echo -e "${BLUE}[Cleanup] Removing temp video...${NC}"
-    rm "$LOCAL_VIDEO"
-fi
-
 echo -e "${GREEN}✅ Pipeline Complete! Results in $OUTPUT_DIR${NC}"
 
@@ -0,0 +1,120 @@
+"""Tests for physics_visualizer/analysis_index.py — persistent /api/analyses index."""
+
+import json
+import os
+
+import pytest
+
+from physics_visualizer.analysis_index import AnalysisIndex, summarize_physics
+
+
+def _physics(n_frames, track_ids=("t1", "t2")):
+    return {
+        "metadata": {"video": "s3://b/clip.mp4", "total_frames": n_frames,
+                     "duration_seconds": n_frames / 16},
+        "frames": [
+            {"timestamp": str(i / 16), "players": [{"track_id": t} for t in track_ids]}
+            for i in range(n_frames)
+        ],
+    }
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data))
+    return path
+
+
+@pytest.fixture
+def results(tmp_path):
+    _write(tmp_path / "alpha_physics.json", _physics(32))
+    _write(tmp_path / "beta_physics.json", _physics(8, ("t1",)))
+    _write(tmp_path / "beta_events.json", {"events": []})
+    return tmp_path
+
+
+class TestSummary:
+
+    def test_summarize(self, results):
+        s = summarize_physics(results / "alpha_physics.json")
+        assert s["total_frames"] == 32
+        assert s["duration"] == 2.0
+        assert s["unique_players"] == 2
+
+    def test_streaming_ndjson(self, tmp_path):
+        path = tmp_path / "live_physics.ndjson"
+        path.write_text('{"metadata": {"video": "v.mp4"}}\n{"timestamp": "0.0", "players": []}\n')
+        index = AnalysisIndex(tmp_path)
+        [entry] = index.query()["analyses"]
+        assert entry["name"] == "live"
+        assert entry["total_frames"] == 1
+
+
+class TestRefresh:
+
+    def test_first_query_builds_and_persists(self, results):
+        page = AnalysisIndex(results).query()
+        assert [a["name"] for a in page["analyses"]] == ["alpha", "beta"]
+        assert page["analyses"][1]["events_file"].endswith("beta_events.json")
+        assert "physics_sig" not in page["analyses"][0]
+        assert (results / ".analysis_index.json").exists()
+
+    def test_reload_does_not_reread_unchanged(self, results, monkeypatch):
+        AnalysisIndex(results).refresh()
+        monkeypatch.setattr(
+            "physics_visualizer.analysis_index.summarize_physics",
+            lambda p: pytest.fail(f"re-read {p.name}"),
+        )
+        stats = AnalysisIndex(results).refresh()
+        assert stats["unchanged"] == 2
+
+    def test_changed_file_reindexed(self, results):
+        index = AnalysisIndex(results)
+        index.refresh()
+        path = _write(results / "alpha_physics.json", _physics(48, ("t1", "t2", "t3")))
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        stats = index.refresh()
+        assert stats["updated"] == 1
+        alpha = index.query(q="alpha")["analyses"][0]
+        assert alpha["total_frames"] == 48
+        assert alpha["unique_players"] == 3
+
+    def test_removed_and_events_presence(self, results):
+        index = AnalysisIndex(results)
+        index.refresh()
+        (results / "beta_physics.json").unlink()
+        _write(results / "alpha_events.json", {"events": []})
+        assert index.refresh()["removed"] == 1
+        [alpha] = index.query()["analyses"]
+        assert alpha["events_file"] is not None
+
+    def test_unreadable_file_skipped(self, results):
+        (results / "broken_physics.json").write_text("{not json")
+        stats = AnalysisIndex(results).refresh()
+        assert stats["errors"] == 1
+
+    def test_missing_results_dir(self, tmp_path):
+        assert AnalysisIndex(tmp_path / "nope").query()["total"] == 0
+
+
+class TestQuery:
+
+    def test_pagination(self, results):
+        for i in range(5):
+            _write(results / f"scene-{i}_physics.json", _physics(4))
+        index = AnalysisIndex(results)
+        page = index.query(offset=2, limit=3)
+        assert page["total"] == 7
+        assert [a["name"] for a in page["analyses"]] == ["scene-0", "scene-1", "scene-2"]
+
+    def test_filters(self, results):
+        index = AnalysisIndex(results)
+        assert [a["name"] for a in index.query(has_events=True)["analyses"]] == ["beta"]
+        assert [a["name"] for a in index.query(has_events=False)["analyses"]] == ["alpha"]
+        assert [a["name"] for a in index.query(min_frames=10)["analyses"]] == ["alpha"]
+        assert index.query(q="BET")["total"] == 1
+
+    def test_get_single_entry(self, results):
+        index = AnalysisIndex(results)
+        assert index.get("alpha")["s3_uri"] == "s3://b/clip.mp4"
+        assert index.get("missing") is None
@@ -0,0 +1,169 @@
+"""Tests for observation/backends.py — record/replay Gemini client layer."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from observation.backends import (
+    FakeAPIError,
+    FakeBehaviour,
+    RecordingClient,
+    ReplayClient,
+    prompt_key,
+)
+
+
+# ---------------------------------------------------------------------------
+# A stand-in for genai.Client with the surface Stage 1 uses
+# ---------------------------------------------------------------------------
+
+FRAMES_TEXT = json.dumps([{"timestamp": "0.0", "ball": {}, "players": []}])
+
+
+def _usage(prompt, output):
+    return SimpleNamespace(
+        prompt_token_count=prompt,
+        cached_content_token_count=prompt - 10,
+        candidates_token_count=output,
+        thoughts_token_count=None,
+        total_token_count=prompt + output,
+    )
+
+
+class _LiveChat:
+    def send_message(self, message, config=None):
+        return SimpleNamespace(text=f"answer to {message}", usage_metadata=_usage(100, 5))
+
+    def send_message_stream(self, message, config=None):
+        yield SimpleNamespace(text=FRAMES_TEXT[:10], usage_metadata=None)
+        yield SimpleNamespace(text=FRAMES_TEXT[10:], usage_metadata=_usage(100, 50))
+
+
+class _LiveClient:
+    def __init__(self):
+        self.files = SimpleNamespace(upload=self._upload, get=self._get)
+        self.caches = SimpleNamespace(create=self._create_cache)
+        self.chats = SimpleNamespace(create=lambda model, config=None: _LiveChat())
+
+    def _file(self, state):
+        return SimpleNamespace(
+            name="files/abc", uri="https://live/files/abc", mime_type="video/mp4",
+            state=SimpleNamespace(name=state),
+        )
+
+    def _upload(self, file):
+        return self._file("PROCESSING")
+
+    def _get(self, name):
+        return self._file("ACTIVE")
+
+    def _create_cache(self, model, config):
+        return SimpleNamespace(
+            name="cachedContents/live-1",
+            usage_metadata=SimpleNamespace(total_token_count=5000),
+        )
+
+
+def _cache_config(uri):
+    part = SimpleNamespace(file_data=SimpleNamespace(file_uri=uri))
+    return SimpleNamespace(contents=[SimpleNamespace(parts=[part])])
+
+
+def _run_stage1(client, video="data/videos/clip.mp4"):
+    """Drive the client the same way GeminiCacheAnalyzer does."""
+    f = client.files.upload(file=video)
+    while f.state.name == "PROCESSING":
+        f = client.files.get(name=f.name)
+    cache = client.caches.create(model="m", config=_cache_config(f.uri))
+    chat = client.chats.create(model="m", config=SimpleNamespace(cached_content=cache.name))
+    verify = chat.send_message("  TASK: verify\n  config ")
+    chunks = list(chat.send_message_stream("TASK: json"))
+    return cache, verify, chunks
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    _run_stage1(RecordingClient(_LiveClient(), tmp_path))
+    return tmp_path
+
+
+# ===========================================================================
+# Recording
+# ===========================================================================
+
+class TestRecordingClient:
+
+    def test_fixture_written_per_video(self, recorded):
+        data = json.loads((recorded / "clip.json").read_text())
+        assert data["video"] == "clip.mp4"
+        assert data["model"] == "m"
+        assert data["file"]["state"] == "ACTIVE"
+        assert data["cache"]["usage"]["total_token_count"] == 5000
+        assert len(data["responses"]) == 2
+
+    def test_stream_chunks_recorded(self, recorded):
+        data = json.loads((recorded / "clip.json").read_text())
+        entry = data["responses"][prompt_key("TASK: json")]
+        assert entry["text"] == FRAMES_TEXT
+        assert len(entry["chunks"]) == 2
+        assert entry["usage"]["candidates_token_count"] == 50
+
+    def test_prompt_key_ignores_whitespace(self):
+        assert prompt_key("  TASK: verify\n  config ") == prompt_key("TASK: verify config")
+
+
+# ===========================================================================
+# Replay
+# ===========================================================================
+
+class TestReplayClient:
+
+    def test_replays_recorded_path(self, recorded):
+        client = ReplayClient(recorded)
+        cache, verify, chunks = _run_stage1(client, video="elsewhere/clip.mp4")
+        assert cache.usage_metadata.total_token_count == 5000
+        assert verify.text == "answer to   TASK: verify\n  config "
+        assert verify.usage_metadata.prompt_token_count == 100
+        assert "".join(c.text for c in chunks) == FRAMES_TEXT
+        assert chunks[-1].usage_metadata.candidates_token_count == 50
+        assert chunks[0].usage_metadata is None
+
+    def test_missing_fixture(self, recorded):
+        with pytest.raises(FileNotFoundError):
+            ReplayClient(recorded).files.upload(file="other.mp4")
+
+    def test_unrecorded_prompt(self, recorded):
+        client = ReplayClient(recorded)
+        f = client.files.upload(file="clip.mp4")
+        cache = client.caches.create(model="m", config=_cache_config(f.uri))
+        chat = client.chats.create(model="m", config=SimpleNamespace(cached_content=cache.name))
+        with pytest.raises(KeyError):
+            chat.send_message("a prompt that was never recorded")
+
+    def test_text_only_fixture_is_chunked(self, recorded):
+        path = recorded / "clip.json"
+        data = json.loads(path.read_text())
+        data["responses"][prompt_key("TASK: json")]["chunks"] = None
+        path.write_text(json.dumps(data))
+        client = ReplayClient(recorded, FakeBehaviour(stream_chunk_chars=7))
+        _, _, chunks = _run_stage1(client)
+        assert len(chunks) == -(-len(FRAMES_TEXT) // 7)
+        assert "".join(c.text for c in chunks) == FRAMES_TEXT
+
+    def test_injected_failures(self, recorded):
+        client = ReplayClient(recorded, FakeBehaviour(failure_rate=1.0, seed=1))
+        with pytest.raises(FakeAPIError):
+            client.files.upload(file="clip.mp4")
+        assert client.failures == 1
+
+    def test_simulated_latency(self, recorded, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr("observation.backends.time.sleep", sleeps.append)
+        client = ReplayClient(recorded, FakeBehaviour(
+            upload_latency=1.0, cache_latency=2.0, step_latency=4.0,
+        ))
+        _run_stage1(client)
+        # upload, cache, one send_message, stream spread over 2 chunks
+        assert sleeps == [1.0, 2.0, 4.0, 2.0, 2.0]
+        assert client.calls == 4
@@ -0,0 +1,181 @@
+"""Tests for pipeline/batch.py — S3 prefix batch driver with a resumable manifest."""
+
+import json
+import threading
+
+import pytest
+
+from pipeline.batch import (
+    DONE,
+    FAILED,
+    BatchRunner,
+    Manifest,
+    list_videos,
+    parse_s3_prefix,
+    run_stage2,
+)
+from pipeline.s3_ingest import ContentCache, S3Downloader
+
+
+class _FakeAnalyzer:
+    """Stands in for GeminiCacheAnalyzer: writes a small physics file per video."""
+
+    def __init__(self, physics, fail=()):
+        self.physics = physics
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def analyze_video(self, video_path, output_dir):
+        with self._lock:
+            self.calls.append(video_path.name)
+        if video_path.stem in self.fail:
+            print("❌ Cache Creation Error: boom")
+            return
+        with open(output_dir / f"{video_path.stem}_physics.json", "w") as f:
+            json.dump(self.physics, f)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    pytest.importorskip("moto")
+    boto3 = pytest.importorskip("boto3")
+    from moto import mock_aws
+
+    for var in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(var, "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="clips")
+        for i in range(3):
+            client.put_object(Bucket="clips", Key=f"night/scene-{i}.mp4", Body=b"v" * (100 + i))
+        client.put_object(Bucket="clips", Key="night/notes.txt", Body=b"x")
+        yield client
+
+
+@pytest.fixture
+def physics(build_physics_json):
+    players = [("t1", 7, "white"), ("t2", 8, "white")]
+    return build_physics_json(frames=[
+        (0.0, "t1", 7, "Holding", players),
+        (0.5, None, 7, "In-Air", players),
+        (1.0, "t2", 8, "Holding", players),
+    ])
+
+
+def _runner(s3, tmp_path, analyzer, **kwargs):
+    return BatchRunner(
+        downloader=S3Downloader(client=s3, cache=ContentCache(tmp_path / "cache")),
+        analyzer=analyzer,
+        output_dir=tmp_path / "out",
+        manifest=Manifest(tmp_path / "out" / "batch_manifest.json"),
+        **kwargs,
+    )
+
+
+# ===========================================================================
+# Listing
+# ===========================================================================
+
+class TestListing:
+
+    def test_parse_prefix(self):
+        assert parse_s3_prefix("s3://clips/night/") == ("clips", "night/")
+        assert parse_s3_prefix("s3://clips") == ("clips", "")
+        with pytest.raises(ValueError):
+            parse_s3_prefix("clips/night")
+
+    def test_paginates_and_filters(self, s3):
+        for i in range(1005):
+            s3.put_object(Bucket="clips", Key=f"many/{i:04d}.mp4", Body=b"")
+        assert len(list_videos(s3, "clips", "many/")) == 1005
+        keys = [v["key"] for v in list_videos(s3, "clips", "night/")]
+        assert keys == [f"night/scene-{i}.mp4" for i in range(3)]
+
+
+# ===========================================================================
+# Runs
+# ===========================================================================
+
+class TestBatchRunner:
+
+    def test_full_run_uploads_results(self, s3, tmp_path, physics):
+        analyzer = _FakeAnalyzer(physics)
+        runner = _runner(s3, tmp_path, analyzer, upload_to="s3://clips/results")
+        counts = runner.run(list_videos(s3, "clips", "night/"))
+
+        assert counts == {DONE: 3}
+        keys = {o["Key"] for o in s3.list_objects_v2(Bucket="clips", Prefix="results/")["Contents"]}
+        assert "results/scene-0_events.json" in keys
+        assert "results/scene-2_physics.json" in keys
+        events = json.loads((tmp_path / "out" / "scene-1_events.json").read_text())
+        assert events["roster"]["attack"]
+
+    def test_rerun_skips_finished(self, s3, tmp_path, physics):
+        videos = list_videos(s3, "clips", "night/")
+        _runner(s3, tmp_path, _FakeAnalyzer(physics)).run(videos)
+        analyzer = _FakeAnalyzer(physics)
+        assert _runner(s3, tmp_path, analyzer).run(videos) == {DONE: 3}
+        assert analyzer.calls == []
+
+    def test_failure_recorded_and_retried(self, s3, tmp_path, physics):
+        videos = list_videos(s3, "clips", "night/")
+        counts = _runner(s3, tmp_path, _FakeAnalyzer(physics, fail={"scene-1"})).run(videos)
+        assert counts == {DONE: 2, FAILED: 1}
+        manifest = Manifest(tmp_path / "out" / "batch_manifest.json")
+        item = manifest.get("s3://clips/night/scene-1.mp4")
+        assert item["failed_stage"] == "stage1"
+        assert item["attempts"] == 1
+
+        analyzer = _FakeAnalyzer(physics)
+        assert _runner(s3, tmp_path, analyzer).run(videos) == {DONE: 3}
+        assert analyzer.calls == ["scene-1.mp4"]
+
+    def test_gives_up_after_max_attempts(self, s3, tmp_path, physics):
+        videos = list_videos(s3, "clips", "night/")
+        analyzer = _FakeAnalyzer(physics, fail={"scene-0"})
+        for _ in range(3):
+            _runner(s3, tmp_path, analyzer, max_attempts=2).run(videos)
+        assert analyzer.calls.count("scene-0.mp4") == 2
+
+    def test_resumes_after_stage1(self, s3, tmp_path, physics):
+        videos = list_videos(s3, "clips", "night/")[:1]
+        runner = _runner(s3, tmp_path, _FakeAnalyzer(physics))
+        runner.plan(videos)
+        (tmp_path / "out").mkdir(exist_ok=True)
+        (tmp_path / "out" / "scene-0_physics.json").write_text(json.dumps(physics))
+        runner.manifest.update(videos[0]["uri"], state="observed")
+
+        analyzer = _FakeAnalyzer(physics)
+        assert _runner(s3, tmp_path, analyzer).run(videos) == {DONE: 1}
+        assert analyzer.calls == []
+        assert (tmp_path / "out" / "scene-0_events.json").exists()
+
+    def test_changed_object_is_reprocessed(self, s3, tmp_path, physics):
+        _runner(s3, tmp_path, _FakeAnalyzer(physics)).run(list_videos(s3, "clips", "night/"))
+        s3.put_object(Bucket="clips", Key="night/scene-2.mp4", Body=b"re-encoded")
+        analyzer = _FakeAnalyzer(physics)
+        _runner(s3, tmp_path, analyzer).run(list_videos(s3, "clips", "night/"))
+        assert analyzer.calls == ["scene-2.mp4"]
+
+
+# ===========================================================================
+# Stage 2
+# ===========================================================================
+
+class TestRunStage2:
+
+    def test_zones_from_coordinates(self, physics, tmp_path):
+        # Same pre-passes as the CLI: metre positions without a zone get one
+        from inference.court_geometry import ZONE_CENTROIDS
+
+        for frame in physics["frames"]:
+            for p in frame["players"]:
+                p["x"], p["y"] = ZONE_CENTROIDS[int(p.pop("zone")[1:])]
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps(physics))
+
+        events = json.loads(run_stage2(path, tmp_path / "clip_events.json").read_text())
+        zones = {p["track_id"]: p["zone"] for p in events["frames"][0]["players"]}
+        assert zones == {"t1": "z7", "t2": "z8"}
@@ -0,0 +1,128 @@
+"""Tests for inference/court_geometry.py — metre coordinate → zone lookup."""
+
+import numpy as np
+import pytest
+
+from inference.court_geometry import (
+    ZONE_CENTROIDS,
+    assign_zones_from_coordinates,
+    build_zone_grid,
+    build_zone_polygons,
+    points_in_polygon,
+    zone_physics,
+    zones_for_points,
+)
+from inference.zone_validator import ZONE_ADJACENCY
+
+
+def _exact_zone(x, y):
+    """Zone from the D-line definitions directly (no polygon sampling)."""
+    # Distance to the D: straight between the posts, arcs around each post
+    d = y if 8.5 <= x <= 11.5 else min(np.hypot(x - 8.5, y), np.hypot(x - 11.5, y))
+    if d < 6:
+        return 0
+    if y < 3:
+        return 5 if x < 10 else 1
+    if y < 10 and d < 8:
+        return 4 if x < 7 else (3 if x < 13 else 2)
+    if y < 10:
+        return [6, 7, 8, 9, 10][np.searchsorted([3.5, 7, 13, 16.5], x, side="right")]
+    return 13 if x < 7 else (12 if x < 13 else 11)
+
+
+# ---------------------------------------------------------------------------
+# Polygons and grid
+# ---------------------------------------------------------------------------
+
+class TestGeometry:
+
+    def test_fourteen_polygons(self):
+        polygons = build_zone_polygons()
+        assert len(polygons) == 14
+        assert all(p.shape[1] == 2 and len(p) >= 3 for p in polygons)
+
+    def test_point_in_polygon(self):
+        square = np.array([(0, 0), (2, 0), (2, 2), (0, 2)], dtype=float)
+        inside = points_in_polygon(np.array([1.0, 3.0, 1.9]), np.array([1.0, 1.0, 0.1]), square)
+        assert inside.tolist() == [True, False, True]
+
+    def test_grid_covers_court(self):
+        grid = build_zone_grid()
+        assert grid.labels.shape == (400, 400)
+        assert grid.labels.min() == 0 and grid.labels.max() == 13
+
+    def test_centroids_fall_in_their_zone(self):
+        for zone, (x, y) in ZONE_CENTROIDS.items():
+            assert zones_for_points(x, y) == zone
+
+    def test_matches_exact_geometry_away_from_boundaries(self):
+        rng = np.random.default_rng(0)
+        xs, ys = rng.uniform(0, 20, 20000), rng.uniform(0, 20, 20000)
+        zones = zones_for_points(xs, ys)
+        shifted = [zones_for_points(xs + dx, ys + dy)
+                   for dx, dy in ((0.15, 0), (-0.15, 0), (0, 0.15), (0, -0.15))]
+        # Only check samples whose whole 15 cm neighbourhood is one zone
+        stable = np.all([s == zones for s in shifted], axis=0)
+        assert stable.mean() > 0.9
+        exact = np.array([_exact_zone(x, y) for x, y in zip(xs[stable], ys[stable])])
+        assert (zones[stable] == exact).all()
+
+    def test_neighbouring_cells_are_adjacent_zones(self):
+        labels = build_zone_grid(0.1).labels
+        pairs = set(zip(labels[:, :-1].ravel(), labels[:, 1:].ravel()))
+        pairs |= set(zip(labels[:-1, :].ravel(), labels[1:, :].ravel()))
+        for a, b in pairs:
+            if a != b:
+                assert b in ZONE_ADJACENCY[a] or a in ZONE_ADJACENCY[b], (a, b)
+
+    def test_off_court_clamps(self):
+        assert zones_for_points([-1.0, 25.0, 10.0], [-1.0, -1.0, 40.0]).tolist() == [5, 1, 12]
+
+
+# ---------------------------------------------------------------------------
+# Frame enrichment
+# ---------------------------------------------------------------------------
+
+class TestAssignZones:
+
+    def test_fills_missing_zones_only(self):
+        frames = [{
+            "timestamp": "0.0",
+            "ball": {"x": 10.0, "y": 9.0, "state": "Holding"},
+            "players": [
+                {"track_id": "t1", "x": 15.0, "y": 5.0},
+                {"track_id": "t2", "x": 1.0, "y": 1.0, "zone": "z6"},
+                {"track_id": "t3", "zone": "z3"},
+            ],
+        }]
+        assert assign_zones_from_coordinates(frames) == 2
+        players = frames[0]["players"]
+        assert [p.get("zone") for p in players] == ["z2", "z6", "z3"]
+        assert frames[0]["ball"]["zone"] == "z8"
+
+        assert assign_zones_from_coordinates(frames, overwrite=True) == 3
+        assert players[1]["zone"] == "z5"
+
+    def test_no_coordinates_is_noop(self):
+        frames = [{"players": [{"track_id": "t1", "zone": "z3"}], "ball": None}]
+        assert assign_zones_from_coordinates(frames) == 0
+        assert frames[0]["players"][0]["zone"] == "z3"
+
+    def test_zone_physics_copies_and_is_idempotent(self):
+        data = {"metadata": {}, "frames": [
+            {"players": [{"track_id": "t1", "x": 15.0, "y": 5.0}], "ball": None},
+            {"players": [{"track_id": "t1", "zone": "z2"}], "ball": None},
+        ]}
+        zoned = zone_physics(data)
+        assert zoned["frames"][0]["players"][0]["zone"] == "z2"
+        assert zoned["metadata"]["zones_from_coordinates"] == 1
+        assert "zone" not in data["frames"][0]["players"][0]
+        assert zoned["frames"][1] is data["frames"][1]
+        assert zone_physics(zoned) is zoned
+
+
+@pytest.mark.parametrize("resolution", [0.05, 0.25])
+def test_resolution(resolution):
+    grid = build_zone_grid(resolution)
+    assert grid.labels.shape == (round(20 / resolution),) * 2
+    assert grid.zone_at(10.0, 15.0) == 12
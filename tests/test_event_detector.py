@@ -389,3 +389,14 @@ class TestMoveDetection:
         events = detector.detect_all_events(frame0, frame1)
         moves = _events_of_type(events, EventType.MOVE)
         assert len(moves) == 3
+
+    def test_moves_can_be_disabled(self):
+        """Interval mode: zone changes produce no MOVE events."""
+        players_f0 = [{"track_id": "t1", "zone": "z7", "jersey_number": None, "team": "white"}]
+        players_f1 = [{"track_id": "t1", "zone": "z8", "jersey_number": None, "team": "white"}]
+        frame0 = {"timestamp": "0.0", "ball": {"holder_track_id": "t1", "zone": "z7", "state": "Holding"}, "players": players_f0}
+        frame1 = {"timestamp": "0.5", "ball": {"holder_track_id": "t1", "zone": "z8", "state": "Holding"}, "players": players_f1}
+
+        detector = EventDetector({}, include_moves=False)
+        events = detector.detect_all_events(frame0, frame1)
+        assert _events_of_type(events, EventType.MOVE) == []
@@ -0,0 +1,103 @@
+"""Tests for inference/formations.py — occupancy-key formation recognition."""
+
+import numpy as np
+import pytest
+
+from inference.formations import (
+    classify_key,
+    formation_segments,
+    frame_formations,
+    occupancy_mask,
+    pack_counts,
+    unpack_key,
+)
+
+
+def _key(*zones):
+    counts = np.zeros(14, dtype=int)
+    for z in zones:
+        counts[z] += 1
+    return int(pack_counts(counts))
+
+
+def _frame(ts, defence_zones, attack_zones=(6, 7, 8, 9, 10, 3)):
+    players = [{"track_id": "gk", "zone": "z0", "team": "green"}]
+    players += [{"track_id": f"b{i}", "zone": f"z{z}", "team": "blue"}
+                for i, z in enumerate(defence_zones)]
+    players += [{"track_id": f"w{i}", "zone": f"z{z}", "team": "white"}
+                for i, z in enumerate(attack_zones)]
+    return {"timestamp": str(ts), "players": players}
+
+
+SIX_ZERO = (1, 2, 3, 3, 4, 5)
+FIVE_ONE = (1, 2, 3, 4, 5, 8)
+THREE_TWO_ONE = (2, 3, 4, 7, 9, 12)
+
+
+# ---------------------------------------------------------------------------
+# Keys and classification
+# ---------------------------------------------------------------------------
+
+class TestOccupancyKeys:
+
+    def test_pack_round_trip_and_mask(self):
+        key = _key(3, 3, 8)
+        assert unpack_key(key)[3] == 2 and unpack_key(key)[8] == 1
+        assert occupancy_mask(key) == (1 << 3) | (1 << 8)
+
+    def test_counts_cap_at_three(self):
+        assert unpack_key(_key(*[5] * 6))[5] == 3
+
+    def test_batch_packing_matches_single(self):
+        counts = np.zeros((2, 14), dtype=int)
+        counts[0, [1, 2]] = 1
+        counts[1, 12] = 2
+        assert pack_counts(counts).tolist() == [_key(1, 2), _key(12, 12)]
+
+    @pytest.mark.parametrize("zones, formation", [
+        (SIX_ZERO, "6-0"),
+        ((0, 1, 2, 3, 4, 5), "6-0"),                   # GK zone ignored
+        (FIVE_ONE, "5-1"),
+        ((1, 2, 4, 5, 7, 9), "4-2"),
+        (THREE_TWO_ONE, "3-2-1"),
+        ((2, 3, 4, 7, 8, 9), "3-3"),
+        ((2, 3, 7, 9, 11, 13), "man-marking"),
+        ((3, 7, 8, 9, 12), "man-marking"),
+        ((3, 4, 8), "unknown"),
+    ])
+    def test_formations(self, zones, formation):
+        assert classify_key(_key(*zones)) == formation
+
+
+# ---------------------------------------------------------------------------
+# Frames and segments
+# ---------------------------------------------------------------------------
+
+class TestSegments:
+
+    def test_frame_formations_for_defending_team_only(self):
+        frames = [_frame(0.0, SIX_ZERO), _frame(0.0625, FIVE_ONE)]
+        assert frame_formations(frames, "blue") == ["6-0", "5-1"]
+        assert frame_formations(frames, "red") == ["unknown", "unknown"]
+
+    def test_run_length_segments(self):
+        frames = ([_frame(i / 16, SIX_ZERO) for i in range(10)]
+                  + [_frame((10 + i) / 16, (3, 4)) for i in range(3)]
+                  + [_frame((13 + i) / 16, THREE_TWO_ONE) for i in range(5)])
+        segments = formation_segments(frames, "blue")
+        assert [(s.formation, s.start_frame, s.end_frame) for s in segments] == [
+            ("6-0", 0, 10), ("3-2-1", 13, 18),
+        ]
+        assert segments[1].start_time == pytest.approx(13 / 16)
+        assert segments[1].end_time == pytest.approx(17 / 16)
+        with_unknown = formation_segments(frames, "blue", include_unknown=True)
+        assert [s.formation for s in with_unknown] == ["6-0", "unknown", "3-2-1"]
+
+    def test_per_frame_defending_team(self):
+        frames = [_frame(0.0, SIX_ZERO), _frame(0.0625, SIX_ZERO, attack_zones=SIX_ZERO)]
+        segments = formation_segments(frames, ["blue", "white"])
+        assert [(s.team, s.formation) for s in segments] == [("blue", "6-0"), ("white", "6-0")]
+        assert segments[0].to_dict()["end_frame"] == 1
+
+    def test_empty(self):
+        assert formation_segments([], "blue") == []
@@ -0,0 +1,183 @@
+"""Tests for physics_visualizer/frame_index.py — time-range windows over stored JSON."""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from physics_visualizer.frame_index import (
+    IndexCache,
+    build_json_index,
+    build_ndjson_index,
+    scan_array,
+)
+PLAYERS = [("t1", 7, "white"), ("t2", 8, "white"), ("t8", 1, "blue")]
+
+
+def _physics(build_physics_json, n=40):
+    return build_physics_json(frames=[
+        (i / 16, "t1", 7, "Holding", PLAYERS) for i in range(n)
+    ])
+
+
+def _window(index, key, start, end=None):
+    return json.loads(index.window(key, start, end))
+
+
+# ---------------------------------------------------------------------------
+# Scanning
+# ---------------------------------------------------------------------------
+
+class TestScanArray:
+
+    def test_spans_round_trip(self):
+        text = '{"metadata": {"a": [1, 2]}, "frames": [ {"x": "]"} ,\n {"y": 2}], "z": 1}'
+        spans, values, metadata = scan_array(text, "frames")
+        assert [json.loads(text[s:e]) for s, e in spans] == values == [{"x": "]"}, {"y": 2}]
+        assert json.loads(metadata) == {"a": [1, 2]}
+
+    def test_missing_and_empty(self):
+        assert scan_array('{"metadata": {}}', "frames")[0] == []
+        assert scan_array('{"frames": []}', "frames")[0] == []
+        assert scan_array("{}", "frames")[0] == []
+        with pytest.raises(ValueError):
+            scan_array("[1, 2]", "frames")
+
+
+# ---------------------------------------------------------------------------
+# Windows
+# ---------------------------------------------------------------------------
+
+class TestFrameWindows:
+
+    def test_window_matches_full_load(self, tmp_path, build_physics_json):
+        data = _physics(build_physics_json)
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps(data, indent=2))
+        index = build_json_index(path)
+
+        doc = _window(index, "frames", 0.5, 1.0)
+        expected = [f for f in data["frames"] if 0.5 <= float(f["timestamp"]) < 1.0]
+        assert doc["frames"] == expected
+        assert doc["count"] == 8
+        assert doc["total"] == 40
+        assert doc["metadata"] == data["metadata"]
+        assert doc["last_time"] == pytest.approx(39 / 16)
+
+        assert _window(index, "frames", 0.0)["frames"] == data["frames"]
+        assert _window(index, "frames", 10.0)["frames"] == []
+
+    def test_non_ascii_offsets(self, tmp_path, build_physics_json):
+        data = _physics(build_physics_json, n=4)
+        data["metadata"]["video"] = "Håndbold–Øst.mp4"
+        data["frames"][1]["players"][0]["name"] = "Jørgensen"
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+        doc = _window(build_json_index(path), "frames", 0.0)
+        assert doc["frames"] == data["frames"]
+        assert doc["metadata"]["video"] == "Håndbold–Øst.mp4"
+
+    def test_unsorted_and_untimed_frames(self, tmp_path):
+        frames = [{"timestamp": "1.0"}, {"timestamp": "0.5"}, {"timestamp": None},
+                  {"timestamp": "0.75"}]
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps({"frames": frames}))
+        index = build_json_index(path)
+
+        assert _window(index, "frames", 0.0, 0.9)["frames"] == [frames[1], frames[3]]
+        assert len(index.select(0.0)) == 3
+
+    def test_event_overlap(self, tmp_path):
+        events = [
+            {"type": "PASS", "start_time": "0.0", "end_time": "3.0"},
+            {"type": "SHOT", "start_time": "1.0", "end_time": "1.5"},
+            {"type": "TURNOVER", "start_time": 4.0, "end_time": 4.25},
+        ]
+        path = tmp_path / "clip_events.json"
+        path.write_text(json.dumps({"metadata": {}, "events": events}))
+        index = build_json_index(path, "events", "start_time", "end_time")
+
+        types = lambda s, e: [ev["type"] for ev in _window(index, "events", s, e)["events"]]
+        assert types(2.0, 4.0) == ["PASS"]
+        assert types(1.2, 2.0) == ["PASS", "SHOT"]
+        assert types(3.5, None) == ["TURNOVER"]
+        assert types(5.0, None) == []
+
+
+class TestNDJSON:
+
+    def test_lines_and_partial_tail(self, tmp_path):
+        path = tmp_path / "clip_physics.ndjson"
+        lines = [{"metadata": {"video": "v.mp4"}}] + [{"timestamp": str(i / 4)} for i in range(6)]
+        path.write_text("".join(json.dumps(o) + "\n" for o in lines) + '{"timestamp": "1.')
+        index = build_ndjson_index(path)
+
+        assert len(index) == 6
+        doc = _window(index, "frames", 0.5, 1.0)
+        assert doc["frames"] == lines[3:5]
+        assert doc["metadata"] == {"video": "v.mp4"}
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class TestIndexCache:
+
+    def test_reuses_until_file_changes(self, tmp_path):
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps({"frames": [{"timestamp": "0.0"}]}))
+        cache = IndexCache()
+        first = cache.get(path)
+        assert cache.get(path) is first
+
+        path.write_text(json.dumps({"frames": [{"timestamp": "0.0"}, {"timestamp": "0.5"}]}))
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        second = cache.get(path)
+        assert second is not first
+        assert len(second) == 2
+        assert second.etag != first.etag
+        assert cache.builds == 2
+
+    def test_bounded_entries(self, tmp_path):
+        cache = IndexCache(max_entries=2)
+        for i in range(3):
+            path = tmp_path / f"c{i}_physics.json"
+            path.write_text(json.dumps({"frames": []}))
+            assert len(cache.get(path).select(0.0)) == 0
+        assert len(cache) == 2
+        assert np.asarray(cache.get(tmp_path / "c2_physics.json").starts).size == 0
+
+    def test_shared_store_is_memory_mapped(self, tmp_path):
+        path = tmp_path / "clip_physics.json"
+        frames = [{"timestamp": str(i / 16)} for i in range(32)]
+        path.write_text(json.dumps({"metadata": {"video": "v.mp4"}, "frames": frames}))
+        store = tmp_path / ".window_index"
+
+        writer = IndexCache(store_dir=store)
+        built = writer.get(path)
+        assert writer.builds == 1
+        assert len(list(store.glob("*.npy"))) == 1
+
+        # A second process (worker) maps the stored table instead of rescanning
+        reader = IndexCache(store_dir=store)
+        shared = reader.get(path)
+        assert (reader.builds, reader.loads) == (0, 1)
+        assert isinstance(shared.starts, np.memmap)
+        assert shared.window("frames", 0.5, 1.0) == built.window("frames", 0.5, 1.0)
+
+    def test_shared_store_replaced_on_change(self, tmp_path):
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps({"frames": [{"timestamp": "0.0"}]}))
+        store = tmp_path / ".window_index"
+        IndexCache(store_dir=store).get(path)
+
+        path.write_text(json.dumps({"frames": [{"timestamp": "0.0"}, {"timestamp": "1.0"}]}))
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert len(IndexCache(store_dir=store).get(path)) == 2
+        assert len(list(store.glob("*.npy"))) == 1
+        assert len(list(store.glob("*.meta"))) == 1
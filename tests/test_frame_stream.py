@@ -0,0 +1,120 @@
+"""Tests for physics_visualizer/frame_stream.py — playback-synchronized streaming."""
+
+import json
+
+import pytest
+
+from physics_visualizer.frame_index import build_json_index
+from physics_visualizer.frame_stream import FrameStreamer, PlaybackCursor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _drain(streamer):
+    out = []
+    while (message := streamer.next_message()) is not None:
+        out.append(message)
+    return out
+
+
+@pytest.fixture
+def streamer(tmp_path):
+    frames = [{"timestamp": str(i / 4), "ball": {"zone": "z1"}} for i in range(40)]  # 0–9.75s
+    events = [
+        {"type": "PASS", "start_time": "0.5", "end_time": "1.5"},
+        {"type": "SHOT", "start_time": "6.0", "end_time": "6.5"},
+    ]
+    physics = tmp_path / "clip_physics.json"
+    physics.write_text(json.dumps({"metadata": {"video": "v.mp4"}, "frames": frames}, indent=2))
+    events_path = tmp_path / "clip_events.json"
+    events_path.write_text(json.dumps({"events": events}))
+    clock = FakeClock()
+    s = FrameStreamer(
+        build_json_index(physics),
+        build_json_index(events_path, "events", "start_time", "end_time"),
+        lookahead=2.0, chunk=0.5, clock=clock,
+    )
+    s.clock = clock
+    return s
+
+
+# ---------------------------------------------------------------------------
+# Cursor
+# ---------------------------------------------------------------------------
+
+class TestPlaybackCursor:
+
+    def test_advances_only_while_playing(self):
+        clock = FakeClock()
+        cursor = PlaybackCursor(clock)
+        clock.now += 5
+        assert cursor.time() == 0.0
+        cursor.play()
+        clock.now += 2
+        assert cursor.time() == pytest.approx(2.0)
+        cursor.set_rate(2.0)
+        clock.now += 1
+        assert cursor.time() == pytest.approx(4.0)
+        cursor.pause()
+        clock.now += 10
+        assert cursor.time() == pytest.approx(4.0)
+
+
+# ---------------------------------------------------------------------------
+# Streamer
+# ---------------------------------------------------------------------------
+
+class TestFrameStreamer:
+
+    def test_meta(self, streamer):
+        meta = streamer.meta()
+        assert meta["metadata"] == {"video": "v.mp4"}
+        assert meta["total"] == 40
+        assert meta["last_time"] == 9.75
+
+    def test_fills_lookahead_then_waits(self, streamer):
+        windows = _drain(streamer)
+        assert [w["start"] for w in windows] == [0.0, 0.5, 1.0, 1.5]
+        assert [f["timestamp"] for f in windows[0]["frames"]] == ["0.0", "0.25"]
+        assert [e["type"] for w in windows for e in w["events"]] == ["PASS"]  # sent once
+
+        streamer.handle({"type": "play"})
+        streamer.clock.now += 1.0
+        assert [w["start"] for w in _drain(streamer)] == [2.0, 2.5]
+
+    def test_rate_widens_lookahead(self, streamer):
+        streamer.handle({"type": "rate", "rate": 2.0})
+        assert _drain(streamer)[-1]["end"] == 4.0
+
+    def test_seek_restarts_with_new_seq(self, streamer):
+        _drain(streamer)
+        streamer.handle({"type": "seek", "time": 5.75})
+        windows = _drain(streamer)
+        assert {w["seq"] for w in windows} == {1}
+        assert windows[0]["frames"][0]["timestamp"] == "5.75"
+        assert [e["type"] for w in windows for e in w["events"]] == ["SHOT"]
+
+    def test_sync_small_drift_keeps_stream(self, streamer):
+        _drain(streamer)
+        streamer.handle({"type": "sync", "time": 0.3})
+        assert streamer.seq == 0
+        streamer.handle({"type": "sync", "time": 8.0})
+        assert streamer.seq == 1
+
+    def test_end_after_last_frame(self, streamer):
+        streamer.handle({"type": "seek", "time": 9.0})
+        messages = _drain(streamer)
+        assert messages[-1] == {"type": "end"}
+        assert [f["timestamp"] for m in messages[:-1] for f in m["frames"]] == ["9.0", "9.25",
+                                                                                  "9.5", "9.75"]
+        assert _drain(streamer) == []
+
+    def test_compact_encoding(self, streamer):
+        text = streamer.encode(streamer.next_message())
+        assert " " not in text and "\n" not in text
@@ -0,0 +1,168 @@
+"""Tests for pipeline/jobqueue.py — SQLite lease queue and Stage 1+2 worker."""
+
+import json
+import threading
+
+import pytest
+
+from pipeline.jobqueue import (
+    DEAD,
+    DONE,
+    LEASED,
+    QUEUED,
+    JobQueue,
+    backoff_seconds,
+    run_worker,
+)
+
+
+class _Clock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return JobQueue(tmp_path / "jobs.db", clock=clock)
+
+
+# ===========================================================================
+# Queue semantics
+# ===========================================================================
+
+class TestLeases:
+
+    def test_enqueue_dedupes(self, queue):
+        assert queue.enqueue("a.mp4")
+        assert not queue.enqueue("a.mp4")
+        assert queue.stats() == {QUEUED: 1}
+
+    def test_claim_is_exclusive_until_expiry(self, queue, clock):
+        queue.enqueue("a.mp4")
+        job = queue.claim("w1", lease_seconds=60)
+        assert job.video == "a.mp4" and job.attempts == 1
+        assert queue.claim("w2", lease_seconds=60) is None
+
+        clock.t += 61
+        stolen = queue.claim("w2", lease_seconds=60)
+        assert stolen.id == job.id and stolen.attempts == 2
+        # The original owner can no longer complete or heartbeat
+        assert not queue.heartbeat(job)
+        assert not queue.complete(job, {"x": 1})
+        assert queue.complete(stolen, {"x": 2})
+        assert json.loads(queue.get("a.mp4")["result"]) == {"x": 2}
+
+    def test_heartbeat_extends_lease(self, queue, clock):
+        queue.enqueue("a.mp4")
+        job = queue.claim("w1", lease_seconds=60)
+        clock.t += 50
+        assert queue.heartbeat(job, lease_seconds=60)
+        clock.t += 50
+        assert queue.claim("w2", lease_seconds=60) is None
+
+    def test_fail_backs_off_then_dies(self, queue, clock):
+        queue.enqueue("a.mp4", max_attempts=2)
+        job = queue.claim("w1")
+        assert queue.fail(job, "boom", backoff=100) == QUEUED
+        assert queue.claim("w1") is None
+        clock.t += 101
+        job = queue.claim("w1")
+        assert job.attempts == 2
+        assert queue.fail(job, "boom again") == DEAD
+        assert queue.get("a.mp4")["last_error"] == "boom again"
+        assert queue.retry_dead() == 1
+        assert queue.claim("w1").attempts == 1
+
+    def test_expired_last_attempt_goes_dead(self, queue, clock):
+        queue.enqueue("a.mp4", max_attempts=1)
+        queue.enqueue("b.mp4", max_attempts=1)
+        queue.claim("w1", lease_seconds=10)
+        clock.t += 11
+        job = queue.claim("w2", lease_seconds=10)
+        assert job.video == "b.mp4"
+        assert queue.get("a.mp4")["state"] == DEAD
+
+    def test_backoff_grows(self):
+        assert backoff_seconds(1, base=10) <= 12.5
+        assert backoff_seconds(4, base=10) >= 60
+        assert backoff_seconds(50, base=10, cap=100) <= 125
+
+    def test_concurrent_claims_never_double(self, tmp_path):
+        queue = JobQueue(tmp_path / "jobs.db")
+        for i in range(40):
+            queue.enqueue(f"v{i}.mp4")
+        claimed = []
+        lock = threading.Lock()
+
+        def worker(name):
+            q = JobQueue(tmp_path / "jobs.db")
+            while True:
+                job = q.claim(name)
+                if job is None:
+                    return
+                with lock:
+                    claimed.append(job.video)
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(claimed) == sorted(f"v{i}.mp4" for i in range(40))
+        assert queue.stats() == {LEASED: 40}
+
+
+# ===========================================================================
+# Worker
+# ===========================================================================
+
+class _FakeAnalyzer:
+    def __init__(self, physics, fail=()):
+        self.physics = physics
+        self.fail = set(fail)
+
+    def analyze_video(self, video_path, output_dir):
+        if video_path.stem in self.fail:
+            return
+        (output_dir / f"{video_path.stem}_physics.json").write_text(json.dumps(self.physics))
+
+
+class TestWorker:
+
+    @pytest.fixture
+    def physics(self, build_physics_json):
+        players = [("t1", 7, "white"), ("t2", 8, "white")]
+        return build_physics_json(frames=[
+            (0.0, "t1", 7, "Holding", players),
+            (0.5, "t2", 8, "Holding", players),
+        ])
+
+    def test_runs_stage1_and_stage2(self, tmp_path, physics):
+        queue = JobQueue(tmp_path / "jobs.db")
+        for name in ("a", "b"):
+            queue.enqueue(str(tmp_path / f"{name}.mp4"))
+        counts = run_worker(queue, _FakeAnalyzer(physics), tmp_path / "out",
+                            exit_when_empty=True)
+        assert counts["done"] == 2
+        assert queue.stats() == {DONE: 2}
+        assert (tmp_path / "out" / "b_events.json").exists()
+        result = json.loads(queue.get(str(tmp_path / "a.mp4"))["result"])
+        assert result["events"].endswith("a_events.json")
+
+    def test_failure_is_retried_later(self, tmp_path, physics):
+        queue = JobQueue(tmp_path / "jobs.db")
+        queue.enqueue(str(tmp_path / "a.mp4"))
+        counts = run_worker(queue, _FakeAnalyzer(physics, fail={"a"}), tmp_path / "out",
+                            exit_when_empty=True)
+        assert counts["retry"] == 1
+        job = queue.get(str(tmp_path / "a.mp4"))
+        assert job["state"] == QUEUED
+        assert "no physics" in job["last_error"]
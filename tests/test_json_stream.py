@@ -0,0 +1,132 @@
+"""Tests for observation/json_stream.py — incremental frame parsing and NDJSON output."""
+
+import json
+import pytest
+
+from observation.json_stream import (
+    FrameStreamParser,
+    NDJSONFrameWriter,
+    read_ndjson_physics,
+)
+from physics_to_events import parse_physics_json
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _frame(ts, holder="t1", zone=8):
+    return {
+        "timestamp": str(ts),
+        "ball": {"holder_track_id": holder, "zone": f"z{zone}", "state": "Holding"},
+        "players": [
+            {"track_id": "t1", "zone": f"z{zone}", "jersey_number": "25", "team": "white"},
+            {"track_id": "t2", "zone": "z3", "jersey_number": None, "team": "blue"},
+        ],
+    }
+
+
+def _feed_in_chunks(parser, text, size):
+    frames = []
+    for i in range(0, len(text), size):
+        frames.extend(parser.feed(text[i:i + size]))
+    frames.extend(parser.close())
+    return frames
+
+
+FRAMES = [_frame(0.0), _frame(0.0625, None, 7), _frame(0.125, "t2", 3)]
+
+
+# ===========================================================================
+# FrameStreamParser
+# ===========================================================================
+
+class TestFrameStreamParser:
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+    def test_plain_array_any_chunking(self, chunk_size):
+        """Frames are recovered identically regardless of chunk boundaries."""
+        parser = FrameStreamParser()
+        frames = _feed_in_chunks(parser, json.dumps(FRAMES, indent=2), chunk_size)
+        assert frames == FRAMES
+        assert not parser.truncated
+
+    def test_frames_emitted_before_array_closes(self):
+        """A frame is returned as soon as its closing brace arrives."""
+        parser = FrameStreamParser()
+        text = json.dumps(FRAMES)
+        first_end = text.index("}]}") + 3  # end of the first frame object
+        assert parser.feed(text[:first_end]) == [FRAMES[0]]
+        assert parser.frames_emitted == 1
+
+    def test_markdown_fences_skipped(self):
+        parser = FrameStreamParser()
+        text = "```json\n" + json.dumps(FRAMES) + "\n```"
+        assert _feed_in_chunks(parser, text, 5) == FRAMES
+
+    def test_wrapped_frames_key(self):
+        parser = FrameStreamParser()
+        text = json.dumps({"metadata": {"notes": ["a", "b"]}, "frames": FRAMES})
+        assert _feed_in_chunks(parser, text, 11) == FRAMES
+
+    def test_wrapped_analysis_key(self):
+        parser = FrameStreamParser()
+        text = json.dumps({"analysis": FRAMES})
+        assert _feed_in_chunks(parser, text, 3) == FRAMES
+
+    def test_single_frame_object(self):
+        """A bare frame object is returned on close(), not its players."""
+        parser = FrameStreamParser()
+        assert _feed_in_chunks(parser, json.dumps(FRAMES[0]), 4) == [FRAMES[0]]
+
+    def test_braces_inside_strings_ignored(self):
+        frame = dict(_frame(0.0), note='odd "quoted" text with } and ] inside')
+        parser = FrameStreamParser()
+        assert _feed_in_chunks(parser, json.dumps([frame, FRAMES[1]]), 2) == [frame, FRAMES[1]]
+
+    def test_truncated_stream_keeps_complete_frames(self):
+        parser = FrameStreamParser()
+        text = json.dumps(FRAMES)
+        cut = text.rindex('{"timestamp"') + 20  # mid-way through the last frame
+        frames = _feed_in_chunks(parser, text[:cut], 16)
+        assert frames == FRAMES[:2]
+        assert parser.truncated
+
+    def test_trailing_text_after_array_ignored(self):
+        parser = FrameStreamParser()
+        frames = _feed_in_chunks(parser, json.dumps(FRAMES) + "\nDone. [1, 2]", 9)
+        assert frames == FRAMES
+
+
+# ===========================================================================
+# NDJSON round trip
+# ===========================================================================
+
+class TestNDJSON:
+
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "clip_physics.ndjson"
+        with NDJSONFrameWriter(path, {"video": "clip.mp4", "fps": 16.0}) as writer:
+            for f in FRAMES:
+                writer.write_frame(f)
+        data = read_ndjson_physics(path)
+        assert data["frames"] == FRAMES
+        assert data["metadata"]["video"] == "clip.mp4"
+        assert data["metadata"]["total_frames"] == 3
+
+    def test_partial_last_line_ignored(self, tmp_path):
+        """A file still being written can be read up to its last full line."""
+        path = tmp_path / "clip_physics.ndjson"
+        with NDJSONFrameWriter(path, {"video": "clip.mp4"}) as writer:
+            writer.write_frame(FRAMES[0])
+        with open(path, "a") as f:
+            f.write('{"timestamp": "0.06')
+        assert read_ndjson_physics(path)["frames"] == [FRAMES[0]]
+
+    def test_stage2_reads_ndjson(self, tmp_path):
+        path = tmp_path / "clip_physics.ndjson"
+        with NDJSONFrameWriter(path, {"video": "clip.mp4"}) as writer:
+            for f in FRAMES:
+                writer.write_frame(f)
+        data = parse_physics_json(path)
+        assert len(data["frames"]) == 3
@@ -0,0 +1,120 @@
+"""Tests for observation/ledger.py — per-call usage capture, run ledger and report."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from click.testing import CliRunner
+
+from observation.ledger import (
+    RunLedger,
+    StepUsage,
+    aggregate,
+    estimate_cost,
+    length_bucket,
+    main,
+    summarize_usage,
+)
+
+
+def _usage(prompt=0, cached=0, output=0, thinking=0, total=None):
+    return SimpleNamespace(
+        prompt_token_count=prompt,
+        cached_content_token_count=cached,
+        candidates_token_count=output,
+        thoughts_token_count=thinking,
+        total_token_count=total if total is not None else prompt + output + thinking,
+    )
+
+
+class TestStepUsage:
+
+    def test_from_usage_metadata(self):
+        u = StepUsage.from_usage_metadata(
+            "5_json", "gemini-3-pro-preview", _usage(100_000, 90_000, 20_000, 5_000), 12.3456
+        )
+        assert u.prompt_tokens == 100_000
+        assert u.cached_tokens == 90_000
+        assert u.output_tokens == 20_000
+        assert u.thinking_tokens == 5_000
+        assert u.latency_seconds == 12.346
+
+    def test_missing_counts_are_zero(self):
+        usage = SimpleNamespace(prompt_token_count=None, total_token_count=None)
+        u = StepUsage.from_usage_metadata("0_verify", "m", usage, 1.0)
+        assert u.cached_tokens == 0 and u.output_tokens == 0
+        assert StepUsage.from_usage_metadata("x", "m", None, 1.0).total_tokens == 0
+
+    def test_cache_total_counted_as_prompt(self):
+        cache_usage = SimpleNamespace(total_token_count=50_000)
+        u = StepUsage.from_usage_metadata("cache", "gemini-3-pro-preview", cache_usage, 3.0)
+        assert u.prompt_tokens == 50_000
+        assert u.cost_usd == pytest.approx(0.1)
+
+    def test_cost_uses_cached_discount(self):
+        u = StepUsage("s", "gemini-3-pro-preview", prompt_tokens=1_000_000,
+                      cached_tokens=1_000_000, output_tokens=0)
+        assert estimate_cost(u) == pytest.approx(0.20)
+        u.output_tokens, u.thinking_tokens = 500_000, 500_000
+        assert estimate_cost(u) == pytest.approx(12.20)
+
+    def test_unknown_model_costs_zero(self):
+        assert estimate_cost(StepUsage("s", "local-model", prompt_tokens=10**6)) == 0.0
+
+    def test_summarize_usage_totals(self):
+        steps = [
+            StepUsage("a", "m", prompt_tokens=10, output_tokens=1, latency_seconds=1.0),
+            StepUsage("b", "m", prompt_tokens=20, output_tokens=2, latency_seconds=2.5),
+        ]
+        totals = summarize_usage(steps)["totals"]
+        assert totals["prompt_tokens"] == 30
+        assert totals["output_tokens"] == 3
+        assert totals["latency_seconds"] == 3.5
+
+
+class TestLedger:
+
+    def _ledger(self, tmp_path):
+        ledger = RunLedger(tmp_path / "ledger.jsonl")
+        for run, duration, latencies in [("r1", 8.0, [1.0, 10.0]), ("r2", 45.0, [3.0, 30.0])]:
+            steps = [
+                StepUsage("0_verify", "gemini-3-pro-preview", prompt_tokens=100,
+                          latency_seconds=latencies[0]),
+                StepUsage("5_json", "gemini-3-pro-preview", prompt_tokens=100,
+                          output_tokens=50, latency_seconds=latencies[1]),
+            ]
+            ledger.append(steps, video=f"{run}.mp4", video_duration=duration, run_id=run)
+        return ledger
+
+    def test_append_only(self, tmp_path):
+        ledger = self._ledger(tmp_path)
+        records = ledger.read()
+        assert len(records) == 4
+        assert records[0]["run_id"] == "r1"
+        assert records[-1]["video"] == "r2.mp4"
+
+    def test_aggregate_by_step(self, tmp_path):
+        rows = aggregate(self._ledger(tmp_path).read(), ["step"])
+        json_row = next(r for r in rows if r["step"] == "5_json")
+        assert json_row["calls"] == 2
+        assert json_row["runs"] == 2
+        assert json_row["output_tokens"] == 100
+        assert json_row["p50_latency"] == pytest.approx(20.0)
+        assert json_row["p95_latency"] == pytest.approx(29.0)
+
+    def test_aggregate_by_length(self, tmp_path):
+        rows = aggregate(self._ledger(tmp_path).read(), ["length"])
+        assert {r["length"] for r in rows} == {"<10s", "30s-2m"}
+
+    def test_length_bucket(self):
+        assert length_bucket(None) == "unknown"
+        assert length_bucket(5) == "<10s"
+        assert length_bucket(600) == "2m+"
+
+    def test_cli_report(self, tmp_path):
+        ledger = self._ledger(tmp_path)
+        result = CliRunner().invoke(main, [str(ledger.path), "--by", "model", "--json"])
+        assert result.exit_code == 0
+        rows = json.loads(result.output)
+        assert rows[0]["model"] == "gemini-3-pro-preview"
+        assert rows[0]["calls"] == 4
@@ -0,0 +1,64 @@
+"""Tests for observation/motion.py — activity-adaptive FPS planning."""
+
+import numpy as np
+import pytest
+
+from observation.motion import FpsSegment, estimate_frames, plan_fps_segments
+
+
+def _series(pattern, dt=0.25):
+    """Build (times, activity) from a list of activity values sampled every dt."""
+    activity = np.asarray(pattern, dtype=float)
+    times = np.arange(activity.size) * dt
+    return times, activity, activity.size * dt
+
+
+class TestPlanFpsSegments:
+
+    def test_quiet_clip_is_single_low_segment(self):
+        times, act, dur = _series([0.001] * 40)
+        plan = plan_fps_segments(times, act, dur)
+        assert len(plan) == 1
+        assert plan[0].fps == 4.0
+        assert plan[0].start == 0.0 and plan[0].end == dur
+
+    def test_burst_is_sampled_densely(self):
+        """A fast pass in the middle of a quiet clip gets a 16 fps window."""
+        pattern = [0.001] * 20 + [0.2] * 4 + [0.001] * 20
+        times, act, dur = _series(pattern)
+        plan = plan_fps_segments(times, act, dur)
+        assert [s.fps for s in plan] == [4.0, 16.0, 4.0]
+        burst = plan[1]
+        # Padding (0.5 s) extends the window around samples 20-23 (5.0-5.75 s)
+        assert burst.start <= 4.5
+        assert burst.end >= 6.25
+
+    def test_segments_cover_clip_contiguously(self):
+        rng = np.random.default_rng(0)
+        times, act, dur = _series(rng.random(200) * 0.05)
+        plan = plan_fps_segments(times, act, dur)
+        assert plan[0].start == 0.0
+        assert plan[-1].end == dur
+        for a, b in zip(plan, plan[1:]):
+            assert a.end == b.start
+            assert a.fps != b.fps
+
+    def test_short_quiet_gap_absorbed(self):
+        """A 0.75 s lull between two bursts stays at the high rate."""
+        pattern = [0.001] * 12 + [0.2] * 4 + [0.001] * 3 + [0.2] * 4 + [0.001] * 12
+        times, act, dur = _series(pattern)
+        plan = plan_fps_segments(times, act, dur, pad_seconds=0.0)
+        assert [s.fps for s in plan] == [4.0, 16.0, 4.0]
+
+    def test_explicit_threshold(self):
+        times, act, dur = _series([0.05] * 10)
+        assert plan_fps_segments(times, act, dur, threshold=0.01)[0].fps == 16.0
+        assert plan_fps_segments(times, act, dur, threshold=0.10)[0].fps == 4.0
+
+    def test_empty_series_falls_back_to_high(self):
+        plan = plan_fps_segments(np.array([]), np.array([]), 3.0)
+        assert plan == [FpsSegment(0.0, 3.0, 16.0, 0.0)]
+
+    def test_estimate_frames(self):
+        plan = [FpsSegment(0.0, 2.0, 4.0), FpsSegment(2.0, 3.0, 16.0)]
+        assert estimate_frames(plan) == pytest.approx(24.0)
@@ -0,0 +1,139 @@
+"""Tests for inference/occupancy.py and the visualizer's occupancy cache."""
+
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+from inference.occupancy import build_occupancy
+from physics_visualizer.heatmap import OccupancyCache, source_file
+
+
+def _frame(ts, players):
+    return {
+        "timestamp": str(ts),
+        "ball": {"zone": "z8", "state": "Holding"},
+        "players": [
+            {"track_id": tid, "zone": f"z{zone}", "team": team, "role": role}
+            for tid, zone, team, role in players
+        ],
+    }
+
+
+def _random_match(n=200, seed=3):
+    rng = random.Random(seed)
+    roster = [("t1", "white", "LB"), ("t2", "white", "CB"), ("t8", "blue", "D1")]
+    return [
+        _frame(i / 16, [(tid, rng.randrange(14), team, role) for tid, team, role in roster
+                        if rng.random() > 0.2])
+        for i in range(n)
+    ]
+
+
+def _brute_force(frames, lo, hi, key=None, value=None):
+    counts = np.zeros(14, dtype=int)
+    for f in frames[lo:hi]:
+        for p in f["players"]:
+            if key is None or p.get(key) == value:
+                counts[int(p["zone"][1:])] += 1
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Occupancy index
+# ---------------------------------------------------------------------------
+
+class TestOccupancyIndex:
+
+    def test_ranges_match_rescanning(self):
+        frames = _random_match()
+        index = build_occupancy(frames)
+        rng = random.Random(11)
+        for _ in range(30):
+            lo = rng.randrange(len(frames))
+            hi = rng.randrange(lo, len(frames) + 1)
+            assert (index.counts(lo, hi) == _brute_force(frames, lo, hi)).all()
+            assert (index.counts(lo, hi, "role", "LB")
+                    == _brute_force(frames, lo, hi, "role", "LB")).all()
+            assert (index.counts(lo, hi, "team", "white")
+                    == _brute_force(frames, lo, hi, "team", "white")).all()
+            assert (index.counts(lo, hi, "track", "t8")
+                    == _brute_force(frames, lo, hi, "track_id", "t8")).all()
+
+    def test_heatmap_time_range(self):
+        frames = [_frame(i / 16, [("t1", 7 if i < 16 else 8, "white", "LB")]) for i in range(32)]
+        index = build_occupancy(frames)
+        heat = index.heatmap(start=0.5, end=1.5, role="LB")
+        assert heat["frames"] == 16
+        assert heat["counts"][7] == 8 and heat["counts"][8] == 8
+        assert heat["share"][7] == pytest.approx(0.5)
+        assert heat["filter"] == {"role": "LB"}
+
+    def test_whole_match_and_unknown_label(self):
+        frames = _random_match(n=50)
+        index = build_occupancy(frames)
+        assert index.heatmap()["total"] == sum(len(f["players"]) for f in frames)
+        empty = index.heatmap(role="GK")
+        assert empty["total"] == 0 and empty["share"] == [0.0] * 14
+
+    def test_one_filter_at_most(self):
+        index = build_occupancy(_random_match(n=10))
+        with pytest.raises(ValueError):
+            index.heatmap(role="LB", team="white")
+
+    def test_cubes_are_int32(self):
+        index = build_occupancy(_random_match(n=20))
+        assert all(cube.dtype == np.int32 for cube in index.cubes.values())
+        assert index.total.dtype == np.int32
+        assert index.nbytes >= sum(cube.nbytes for cube in index.cubes.values())
+
+    def test_role_can_change_over_time(self):
+        frames = [_frame(0.0, [("t1", 7, "white", "LB")]),
+                  _frame(0.0625, [("t1", 3, "white", "P")])]
+        index = build_occupancy(frames)
+        assert index.heatmap(role="P")["counts"][3] == 1
+        assert index.heatmap(role="LB")["counts"][3] == 0
+
+
+# ---------------------------------------------------------------------------
+# Visualizer cache
+# ---------------------------------------------------------------------------
+
+class TestOccupancyCache:
+
+    def test_prefers_events_file_and_rebuilds_on_change(self, tmp_path):
+        physics = tmp_path / "clip_physics.json"
+        physics.write_text(json.dumps({"frames": [_frame(0.0, [("t1", 7, "white", None)])]}))
+        assert source_file(tmp_path, "clip") == physics
+        assert source_file(tmp_path, "missing") is None
+
+        events = tmp_path / "clip_events.json"
+        events.write_text(json.dumps({"frames": [_frame(0.0, [("t1", 7, "white", "LB")])]}))
+        assert source_file(tmp_path, "clip") == events
+
+        cache = OccupancyCache()
+        assert cache.get(events).heatmap(role="LB")["total"] == 1
+        cache.get(events)
+        assert cache.builds == 1
+
+        events.write_text(json.dumps({"frames": [_frame(0.0, [("t1", 3, "white", "LB")])] * 2}))
+        st = events.stat()
+        os.utime(events, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert cache.get(events).heatmap(role="LB")["counts"][3] == 2
+        assert cache.builds == 2
+
+    def test_bounded_by_bytes(self, tmp_path):
+        paths = []
+        for name in ("a", "b", "c"):
+            path = tmp_path / f"{name}_physics.json"
+            path.write_text(json.dumps({"frames": _random_match(n=40)}))
+            paths.append(path)
+        one = build_occupancy(_random_match(n=40)).nbytes
+        cache = OccupancyCache(max_bytes=int(one * 2.5))
+        for path in paths:
+            cache.get(path)
+        assert len(cache) == 2 and cache.nbytes <= cache.max_bytes
+        cache.get(paths[0])                       # evicted first, rebuilt
+        assert cache.builds == 4
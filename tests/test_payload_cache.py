@@ -0,0 +1,121 @@
+"""Tests for physics_visualizer/payload_cache.py — stored-bytes JSON delivery."""
+
+import gzip
+import json
+import os
+from email.utils import formatdate
+
+from physics_visualizer.payload_cache import (
+    PayloadCache,
+    choose_encoding,
+    load_payload,
+)
+
+
+def _write(path, n_frames=200):
+    data = {"frames": [{"timestamp": str(i / 16), "players": []} for i in range(n_frames)]}
+    path.write_text(json.dumps(data, indent=2))
+    return path
+
+
+def _bump_mtime(path, seconds=5):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10**9))
+
+
+# ---------------------------------------------------------------------------
+# Payloads and sidecars
+# ---------------------------------------------------------------------------
+
+class TestPayload:
+
+    def test_serves_stored_bytes(self, tmp_path):
+        path = _write(tmp_path / "clip_physics.json")
+        payload = load_payload(path)
+        assert payload.encodings["identity"] == path.read_bytes()
+        assert gzip.decompress(payload.encodings["gzip"]) == path.read_bytes()
+        assert payload.etag.startswith('W/"')
+
+    def test_sidecar_written_and_reused(self, tmp_path):
+        path = _write(tmp_path / "clip_physics.json")
+        load_payload(path)
+        sidecar = tmp_path / "clip_physics.json.gz"
+        assert sidecar.exists()
+        sidecar.write_bytes(gzip.compress(b"from sidecar"))
+        assert gzip.decompress(load_payload(path).encodings["gzip"]) == b"from sidecar"
+
+    def test_stale_sidecar_regenerated(self, tmp_path):
+        path = _write(tmp_path / "clip_physics.json")
+        load_payload(path)
+        _write(path, n_frames=300)
+        _bump_mtime(path)
+        assert gzip.decompress(load_payload(path).encodings["gzip"]) == path.read_bytes()
+
+    def test_small_files_not_compressed(self, tmp_path):
+        path = tmp_path / "tiny_events.json"
+        path.write_text("{}")
+        assert set(load_payload(path).encodings) == {"identity"}
+
+
+class TestEncoding:
+
+    def test_prefers_gzip_when_accepted(self):
+        available = {"identity": b"", "gzip": b""}
+        assert choose_encoding("gzip, deflate, br", available) == "gzip"
+        assert choose_encoding("br;q=1.0, gzip;q=0.8", {**available, "br": b""}) == "br"
+        assert choose_encoding("gzip;q=0", available) == "identity"
+        assert choose_encoding(None, available) == "identity"
+
+
+# ---------------------------------------------------------------------------
+# Conditional GET and LRU
+# ---------------------------------------------------------------------------
+
+class TestRespond:
+
+    def test_etag_304(self, tmp_path):
+        path = _write(tmp_path / "clip_physics.json")
+        cache = PayloadCache()
+        status, body, headers = cache.respond(path, accept_encoding="gzip")
+        assert status == 200
+        assert headers["Content-Encoding"] == "gzip"
+        assert headers["Vary"] == "Accept-Encoding"
+        assert gzip.decompress(body) == path.read_bytes()
+
+        status, body, _ = cache.respond(path, if_none_match=headers["ETag"])
+        assert (status, body) == (304, b"")
+        # Strong form of the same tag and lists also match
+        strong = headers["ETag"][2:]
+        assert cache.respond(path, if_none_match=f'"x", {strong}')[0] == 304
+
+    def test_changed_file_not_304(self, tmp_path):
+        path = _write(tmp_path / "clip_physics.json")
+        cache = PayloadCache()
+        etag = cache.respond(path)[2]["ETag"]
+        _write(path, n_frames=10)
+        _bump_mtime(path)
+        status, body, headers = cache.respond(path, if_none_match=etag)
+        assert status == 200
+        assert body == path.read_bytes()
+        assert headers["ETag"] != etag
+
+    def test_if_modified_since(self, tmp_path):
+        path = _write(tmp_path / "clip_physics.json")
+        cache = PayloadCache()
+        mtime = path.stat().st_mtime
+        assert cache.respond(path, if_modified_since=formatdate(mtime + 60, usegmt=True))[0] == 304
+        assert cache.respond(path, if_modified_since=formatdate(mtime - 60, usegmt=True))[0] == 200
+        assert cache.respond(path, if_modified_since="garbage")[0] == 200
+
+    def test_lru_bounded_by_bytes(self, tmp_path):
+        paths = [_write(tmp_path / f"c{i}_physics.json") for i in range(3)]
+        one = load_payload(paths[0]).nbytes
+        cache = PayloadCache(max_bytes=int(one * 2.5))
+        for p in paths:
+            cache.get(p)
+        assert len(cache) == 2
+        assert cache.nbytes <= cache.max_bytes
+        cache.get(paths[2])
+        assert cache.hits == 1
+        cache.get(paths[0])           # evicted earlier → reloaded
+        assert cache.misses == 4
@@ -4,7 +4,12 @@ import json
 import pytest
 from pathlib import Path
 
-from physics_to_events import transform_physics_to_events, parse_physics_json
+from physics_to_events import (
+    Match,
+    parse_physics_json,
+    prepare_physics,
+    transform_physics_to_events,
+)
 
 
 # ===========================================================================
@@ -128,6 +133,46 @@ class TestEdgeCases:
         total_roster = len(result["roster"]["attack"]) + len(result["roster"]["defense"])
         assert total_roster > 0
 
+    def test_defensive_formation_segments(self, build_physics_json):
+        """Defenders lined up on 6m → one 6-0 segment for the defending team."""
+        players = [("t1", 7, "white"), ("t2", 8, "white"), ("t3", 9, "white")]
+        players += [(f"b{z}", z, "blue") for z in (1, 2, 3, 4, 5)]
+        data = build_physics_json(frames=[
+            (i / 16, "t1", 7, "Holding", players) for i in range(8)
+        ])
+        result = transform_physics_to_events(data, Path("test.json"))
+        assert [(s["formation"], s["team"]) for s in result["formations"]] == [("6-0", "blue")]
+        assert result["formations"][0]["end_frame"] == 8
+
+
+class TestMoveIntervals:
+    """Zone history as intervals instead of per-change MOVE events."""
+
+    def _data(self, build_physics_json):
+        return build_physics_json(frames=[
+            (i / 16, "t1", 7, "Holding",
+             [("t1", 7 if i < 4 else 8, "white"), ("t8", 1 if i % 2 else 2, "blue")])
+            for i in range(8)
+        ])
+
+    def test_moves_replaced_by_intervals(self, build_physics_json):
+        data = self._data(build_physics_json)
+        default = transform_physics_to_events(data, Path("test.json"))
+        assert "zone_intervals" not in default
+        n_moves = sum(e["type"] == "MOVE" for e in default["events"])
+        assert n_moves == 8
+
+        result = transform_physics_to_events(data, Path("test.json"), move_intervals=True)
+        assert not any(e["type"] == "MOVE" for e in result["events"])
+        table = result["zone_intervals"]
+        assert len(table["zone"]) - len(table["track_ids"]) == n_moves
+
+    def test_keep_moves(self, build_physics_json):
+        result = transform_physics_to_events(self._data(build_physics_json), Path("test.json"),
+                                             move_intervals=True, keep_moves=True)
+        assert any(e["type"] == "MOVE" for e in result["events"])
+        assert "zone_intervals" in result
+
 
 class TestEventTimestamps:
     """Verify event timestamps are correct strings/floats."""
@@ -146,3 +191,96 @@ class TestEventTimestamps:
         # end_time = when t2 catches (1.5)
         assert float(passes[0]["start_time"]) == pytest.approx(0.5, abs=0.01)
         assert float(passes[0]["end_time"]) == pytest.approx(1.5, abs=0.01)
+
+
+class TestMatch:
+    """Lazy, memoised artifacts; invalidated when the physics file changes."""
+
+    FRAMES = [
+        (0.0, "t1", 7, "Holding", [("t1", 7, "white"), ("t2", 8, "white"), ("d1", 3, "blue")]),
+        (0.5, None, 7, "In-Air", [("t1", 7, "white"), ("t2", 8, "white"), ("d1", 3, "blue")]),
+        (1.0, "t2", 8, "Holding", [("t1", 7, "white"), ("t2", 8, "white"), ("d1", 4, "blue")]),
+    ]
+
+    @pytest.fixture
+    def physics_file(self, tmp_path, build_physics_json):
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps(build_physics_json(frames=self.FRAMES)))
+        return path
+
+    def test_roster_does_not_detect_events(self, physics_file):
+        match = Match(physics_file)
+        assert {p["track_id"] for p in match.roster["defense"]} == {"d1"}
+        assert "events" not in match._cache
+        assert match.classification.defending_team == "blue"
+
+    def test_memoised(self, physics_file):
+        match = Match(physics_file)
+        assert match.events is match.events
+        assert match.enriched_frame(1) is match.enriched_frame(1)
+
+    def test_matches_transform(self, physics_file):
+        match = Match(physics_file)
+        frame = match.enriched_frame(2)
+        full = transform_physics_to_events(parse_physics_json(physics_file), physics_file)
+        assert frame == full["frames"][2]
+        assert match.events == full["events"]
+        assert match.to_events()["roster"] == full["roster"]
+
+    def test_source_change_invalidates(self, physics_file, build_physics_json):
+        match = Match(physics_file)
+        assert len(match.possession_timeline) >= 1
+        events_before = match.events
+        frames = self.FRAMES + [
+            (1.5, "t2", 1, "Holding", [("t1", 7, "white"), ("t2", 1, "white"),
+                                        ("d1", 4, "blue")]),
+        ]
+        physics_file.write_text(json.dumps(build_physics_json(frames=frames)))
+        assert len(match.frames) == 4
+        assert match.events is not events_before
+        assert match.zone_warnings  # z8 -> z1 is not adjacent
+
+    def test_from_physics_is_fixed(self, build_physics_json):
+        data = build_physics_json(frames=self.FRAMES)
+        match = Match.from_physics(data, Path("test.json"))
+        roster = match.roster
+        assert match.roster is roster
+        match.invalidate()
+        assert match.roster is not roster
+        assert len(match.frames) == 3
+
+
+class TestCoordinateZoning:
+    """Metre positions get zones on every entry point, without touching the input."""
+
+    @pytest.fixture
+    def located(self, build_physics_json):
+        from inference.court_geometry import ZONE_CENTROIDS
+
+        data = build_physics_json(frames=TestMatch.FRAMES)
+        for frame in data["frames"]:
+            for p in frame["players"]:
+                p["x"], p["y"] = ZONE_CENTROIDS[int(p.pop("zone")[1:])]
+        return data
+
+    def test_transform_zones_raw_dict(self, located, build_physics_json):
+        expected = transform_physics_to_events(build_physics_json(frames=TestMatch.FRAMES),
+                                               Path("test.json"))
+        result = transform_physics_to_events(located, Path("test.json"))
+        assert result["events"] == expected["events"]
+        assert ([(p["zone"], p["role"]) for p in result["frames"][2]["players"]]
+                == [(p["zone"], p["role"]) for p in expected["frames"][2]["players"]])
+
+    def test_from_physics_matches_prepare(self, located):
+        direct = Match.from_physics(located, Path("test.json"))
+        prepared = Match.from_physics(prepare_physics(located), Path("test.json"))
+        assert direct.frames == prepared.frames
+        assert direct.physics["metadata"]["zones_from_coordinates"] == 9
+
+    def test_input_not_mutated(self, located):
+        import copy
+
+        before = copy.deepcopy(located)
+        prepare_physics(located)
+        Match.from_physics(located, Path("test.json")).roster
+        assert located == before
@@ -0,0 +1,116 @@
+"""Tests for inference/plausibility.py — implied speeds from zone geometry."""
+
+import numpy as np
+import pytest
+
+from inference.plausibility import (
+    MIN_DT,
+    ZONE_SEPARATION,
+    check_plausibility,
+    compute_separation,
+    player_transitions,
+    zone_matrices,
+)
+from inference.zone_validator import ZONE_ADJACENCY
+
+
+def _frame(ts, zones, ball_zone="z8"):
+    return {
+        "timestamp": str(ts),
+        "ball": {"zone": ball_zone, "state": "Holding"},
+        "players": [{"track_id": tid, "zone": z} for tid, z in zones.items()],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Zone matrices
+# ---------------------------------------------------------------------------
+
+class TestZoneMatrices:
+
+    def test_symmetric_with_zero_diagonal(self):
+        m = zone_matrices()
+        for mat in (m.centroid_distance, m.separation, m.path_distance, m.hops):
+            assert np.allclose(mat, mat.T)
+            assert np.allclose(np.diag(mat), 0)
+
+    def test_separation_is_a_lower_bound(self):
+        m = zone_matrices()
+        assert (m.separation <= m.centroid_distance + 1e-9).all()
+        assert (m.centroid_distance <= m.path_distance + 1e-9).all()
+
+    def test_touching_and_distant_zones(self):
+        sep = zone_matrices().separation
+        assert sep[3, 8] == 0.0          # 6-8m centre touches back centre
+        assert sep[0, 12] == pytest.approx(4.0, abs=0.1)  # 6m line to y=10
+        assert sep[5, 1] > 10.0          # opposite wing corners
+
+    def test_precomputed_separation_matches_geometry(self):
+        # ZONE_SEPARATION must be regenerated if the court polygons change
+        assert np.allclose(ZONE_SEPARATION, compute_separation(), atol=0.005)
+
+    def test_hops_and_routes_follow_adjacency(self):
+        m = zone_matrices()
+        for a, neighbours in ZONE_ADJACENCY.items():
+            for b in neighbours:
+                assert m.hops[a, b] == 1
+        route = m.route(5, 11)
+        assert route[0] == 5 and route[-1] == 11
+        assert len(route) == m.hops[5, 11] + 1
+        assert all(b in ZONE_ADJACENCY[a] for a, b in zip(route, route[1:]))
+
+
+# ---------------------------------------------------------------------------
+# Transitions and flags
+# ---------------------------------------------------------------------------
+
+class TestTransitions:
+
+    def test_gaps_and_missing_zones(self):
+        frames = [
+            _frame(0.0, {"t1": "z8", "t2": "z3"}),
+            _frame(0.5, {"t2": "z3"}),
+            _frame(1.0, {"t1": "z12", "t2": None}),
+        ]
+        tr = player_transitions(frames)
+        assert tr.track_ids == ["t1", "t2"]
+        assert tr.dt.tolist() == [1.0, 0.5]          # t1 spans its gap
+        assert tr.zone_from.tolist() == [8, 3]
+
+    def test_duplicate_timestamps_use_min_dt(self):
+        tr = player_transitions([_frame(1.0, {"t1": "z8"}), _frame(1.0, {"t1": "z9"})])
+        assert tr.dt.tolist() == [MIN_DT]
+
+
+class TestCheckPlausibility:
+
+    def test_same_move_fast_vs_slow(self):
+        fast = [_frame(0.0, {"t1": "z5"}), _frame(0.0625, {"t1": "z4"}),
+                _frame(0.125, {"t1": "z1"})]
+        flags = check_plausibility(fast)
+        assert [(f.track_id, f.zone_from, f.zone_to) for f in flags] == [("t1", 4, 1)]
+        assert flags[0].severity > 10
+        assert flags[0].to_dict()["type"] == "implausible_speed"
+
+        slow = [_frame(0.0, {"t1": "z4"}), _frame(3.0, {"t1": "z1"})]
+        assert check_plausibility(slow) == []
+
+    def test_adjacent_but_distant_zones_flagged(self):
+        # z1 and z9 are listed as adjacent but are ~3 m apart
+        frames = [_frame(0.0, {"t1": "z1"}), _frame(0.0625, {"t1": "z9"})]
+        assert len(check_plausibility(frames)) == 1
+
+    def test_ball_uses_its_own_limit(self):
+        frames = [_frame(0.0, {}, ball_zone="z5"), _frame(0.25, {}, ball_zone="z9")]
+        flags = check_plausibility(frames)
+        assert [f.kind for f in flags] == ["ball"]
+        assert check_plausibility(frames, ball_max_speed=None) == []
+        slower = [_frame(0.0, {}, ball_zone="z5"), _frame(1.0, {}, ball_zone="z9")]
+        assert check_plausibility(slower) == []
+
+    def test_flags_in_time_order(self):
+        frames = [_frame(0.0, {"a": "z5", "b": "z8"}), _frame(0.0625, {"a": "z5", "b": "z8"}),
+                  _frame(0.125, {"a": "z1", "b": "z8"}), _frame(0.1875, {"a": "z1", "b": "z0"})]
+        frames[1]["players"][1]["zone"] = "z13"
+        flags = check_plausibility(frames)
+        assert [f.timestamp_from for f in flags] == sorted(f.timestamp_from for f in flags)
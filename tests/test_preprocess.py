@@ -0,0 +1,102 @@
+"""Tests for observation/preprocess.py — court crop, downscale and re-encode planning."""
+
+import numpy as np
+import pytest
+
+from observation.preprocess import (
+    PreprocessOptions,
+    build_ffmpeg_command,
+    clamp_roi,
+    file_digest,
+    parse_roi,
+    preprocess_video,
+    roi_from_motion_energy,
+)
+
+
+class TestRoi:
+
+    def test_parse_pixels(self):
+        assert parse_roi("100,50,1200,700", 1920, 1080) == (100, 50, 1200, 700)
+
+    def test_parse_fractions(self):
+        assert parse_roi("0.25,0,0.5,1", 1920, 1080) == (480, 0, 960, 1080)
+
+    def test_parse_invalid(self):
+        with pytest.raises(ValueError):
+            parse_roi("1,2,3", 1920, 1080)
+        with pytest.raises(ValueError):
+            parse_roi("a,b,c,d", 1920, 1080)
+
+    def test_clamp_to_frame_and_even(self):
+        assert clamp_roi((-10, 5, 3000, 701), 1920, 1080) == (0, 5, 1920, 700)
+
+    def test_motion_energy_box(self):
+        """Motion confined to the court rectangle → ROI around it, overlay ignored."""
+        energy = np.zeros((180, 320))
+        energy[40:160, 60:260] = 1.0       # players moving on court
+        energy[5:15, 5:40] = 0.0            # static scoreboard: no energy
+        x, y, w, h = roi_from_motion_energy(energy, coverage=1.0, margin=0.0)
+        assert (x, y) == (60, 40)
+        assert (w, h) == (200, 120)
+
+    def test_motion_energy_trims_sparse_crowd(self):
+        energy = np.zeros((180, 320))
+        energy[40:160, 60:260] = 1.0
+        energy[0:10, :] = 0.01              # faint crowd motion along the top
+        x, y, w, h = roi_from_motion_energy(energy, coverage=0.96, margin=0.0)
+        assert y >= 30
+
+    def test_no_motion_is_full_frame(self):
+        assert roi_from_motion_energy(np.zeros((181, 321))) == (0, 0, 320, 180)
+
+
+class TestFfmpegCommand:
+
+    def test_crop_scale_no_audio(self, tmp_path):
+        cmd = build_ffmpeg_command(
+            tmp_path / "in.mp4", tmp_path / "out.mp4", (10, 20, 1280, 720), 480, "1M", True
+        )
+        assert cmd[cmd.index("-vf") + 1] == "crop=1280:720:10:20,scale=-2:480"
+        assert "-an" in cmd
+        assert cmd[cmd.index("-b:v") + 1] == "1M"
+        assert cmd[-1] == str(tmp_path / "out.mp4")
+
+    def test_no_filters_keeps_audio(self, tmp_path):
+        cmd = build_ffmpeg_command(tmp_path / "a.mp4", tmp_path / "b.mp4", None, None, "2M", False)
+        assert "-vf" not in cmd
+        assert "-an" not in cmd
+
+
+class TestCache:
+
+    def test_options_key_changes_with_settings(self):
+        assert PreprocessOptions().key() == PreprocessOptions().key()
+        assert PreprocessOptions(crop="auto").key() != PreprocessOptions().key()
+
+    def test_file_digest(self, tmp_path):
+        a = tmp_path / "a.mp4"
+        b = tmp_path / "b.mp4"
+        a.write_bytes(b"x" * 3_000_000)
+        b.write_bytes(b"x" * 3_000_000)
+        assert file_digest(a) == file_digest(b)
+        b.write_bytes(b"y")
+        assert file_digest(a) != file_digest(b)
+
+    def test_cache_hit_skips_encoding(self, tmp_path, monkeypatch):
+        video = tmp_path / "clip.mp4"
+        video.write_bytes(b"video bytes")
+        options = PreprocessOptions(crop="auto")
+        key = f"{file_digest(video)[:16]}-{options.key()}"
+        cached = tmp_path / "cache" / key / "clip.mp4"
+        cached.parent.mkdir(parents=True)
+        cached.write_bytes(b"small")
+
+        monkeypatch.setattr("observation.preprocess.shutil.which", lambda _: "/usr/bin/ffmpeg")
+        monkeypatch.setattr(
+            "observation.preprocess.subprocess.run",
+            lambda *a, **k: pytest.fail("should not re-encode on cache hit"),
+        )
+        out = preprocess_video(video, options, cache_dir=tmp_path / "cache")
+        assert out == cached
+        assert out.stem == video.stem
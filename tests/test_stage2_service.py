@@ -0,0 +1,243 @@
+"""Tests for pipeline/stage2_service.py (long-running Stage 2 service + client)."""
+
+import http.client
+import json
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+from pipeline import stage2_service
+from pipeline.stage2_service import (
+    RequestError,
+    Stage2Client,
+    Stage2Service,
+    make_server,
+    validate,
+)
+
+FRAMES = [
+    (0.0, "t1", 7, "Holding", [("t1", 7, "white"), ("t2", 8, "white"), ("d1", 3, "blue")]),
+    (0.5, None, 7, "In-Air", [("t1", 7, "white"), ("t2", 8, "white"), ("d1", 3, "blue")]),
+    (1.0, "t2", 8, "Holding", [("t1", 6, "white"), ("t2", 8, "white"), ("d1", 4, "blue")]),
+]
+
+
+def _start(service, **kwargs):
+    server = make_server(service, port=0, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def physics(build_physics_json):
+    return build_physics_json(FRAMES)
+
+
+@pytest.fixture
+def tcp():
+    service = Stage2Service(workers=0)
+    server = _start(service)
+    yield Stage2Client(port=server.server_address[1])
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+# ---------------------------------------------------------------------------
+# Request validation
+# ---------------------------------------------------------------------------
+
+
+class TestValidate:
+    def test_needs_exactly_one_source(self, physics):
+        with pytest.raises(RequestError):
+            validate({})
+        with pytest.raises(RequestError):
+            validate({"path": "/x_physics.json", "physics": physics})
+
+    def test_relative_path_rejected(self):
+        with pytest.raises(RequestError, match="absolute"):
+            validate({"path": "clip_physics.json"})
+
+    def test_missing_file_is_404(self, tmp_path):
+        with pytest.raises(RequestError) as exc:
+            validate({"path": str(tmp_path / "gone_physics.json")})
+        assert exc.value.status == 404
+
+    def test_unknown_option(self, physics):
+        with pytest.raises(RequestError, match="Unknown options"):
+            validate({"physics": physics, "options": {"fast": True}})
+
+    def test_write_payload_needs_output(self, physics):
+        with pytest.raises(RequestError):
+            validate({"physics": physics, "write": True})
+
+    def test_output_outside_allowed_paths_refused(self, physics, tmp_path):
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps(physics))
+        for request in ({"path": str(path), "output": str(tmp_path / "other.json")},
+                        {"physics": physics, "output": str(tmp_path / "x_events.json")},
+                        {"path": str(path), "output": str(tmp_path / "sub" / ".." / ".bashrc")}):
+            with pytest.raises(RequestError) as exc:
+                validate(request)
+            assert exc.value.status == 403
+
+    def test_output_allowed_next_to_input_or_in_output_dir(self, physics, tmp_path):
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps(physics))
+        validate({"path": str(path), "output": str(tmp_path / "clip_events.json")})
+        out_dir = tmp_path / "events"
+        validate({"physics": physics, "output": str(out_dir / "x_events.json")},
+                 output_dir=out_dir)
+        with pytest.raises(RequestError):
+            validate({"physics": physics, "output": str(out_dir / ".." / "x_events.json")},
+                     output_dir=out_dir)
+
+    def test_write_needs_physics_named_input(self, tmp_path):
+        path = tmp_path / "notes.json"
+        path.write_text("{}")
+        with pytest.raises(RequestError, match="_physics"):
+            validate({"path": str(path), "write": True})
+
+
+# ---------------------------------------------------------------------------
+# HTTP round trips
+# ---------------------------------------------------------------------------
+
+
+class TestTransform:
+    def test_health(self, tcp):
+        assert tcp.health()["status"] == "ok"
+
+    def test_payload_returns_events(self, tcp, physics):
+        result = tcp.transform(physics=physics, source="clip_physics.json")
+        events = result["events"]
+        assert {"metadata", "roster", "events", "frames"} <= set(events)
+        assert len(events["frames"]) == len(FRAMES)
+        assert tcp.health()["processed"] == 1
+
+    def test_matches_direct_transform(self, tcp, physics, tmp_path):
+        from physics_to_events import prepare_physics, transform_physics_to_events
+
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps(physics))
+        served = tcp.transform(path=path)["events"]
+        direct = transform_physics_to_events(prepare_physics(physics), path)
+        assert served["events"] == json.loads(json.dumps(direct["events"]))
+        assert served["roster"] == json.loads(json.dumps(direct["roster"]))
+
+    def test_path_written_next_to_input(self, tcp, physics, tmp_path):
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps(physics))
+        result = tcp.transform(path=path, write=True)
+        out = tmp_path / "clip_events.json"
+        assert result["output"] == str(out)
+        assert len(json.loads(out.read_text())["events"]) == result["events"]
+
+    def test_options_forwarded(self, tcp, physics):
+        result = tcp.transform(physics=physics, move_intervals=True)
+        assert "zone_intervals" in result["events"]
+
+    def test_errors_surface_in_client(self, tcp, tmp_path):
+        with pytest.raises(RuntimeError, match="404"):
+            tcp.transform(path=tmp_path / "missing_physics.json")
+        bad = tmp_path / "bad_physics.json"
+        bad.write_text("{not json")
+        with pytest.raises(RuntimeError, match="500"):
+            tcp.transform(path=bad)
+        assert tcp.health()["failed"] == 1
+
+
+class TestBrowserRequests:
+    def _post(self, client, body, headers):
+        conn = http.client.HTTPConnection(client.host, client.port, timeout=10)
+        try:
+            conn.request("POST", "/transform", body=json.dumps(body).encode(), headers=headers)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    def test_simple_text_plain_post_refused(self, tcp, physics, tmp_path):
+        target = tmp_path / "victim.txt"
+        status, _ = self._post(tcp, {"physics": physics, "output": str(target)},
+                               {"Content-Type": "text/plain"})
+        assert status == 415
+        assert not target.exists()
+
+    def test_origin_header_refused(self, tcp, physics):
+        status, _ = self._post(tcp, {"physics": physics},
+                               {"Content-Type": "application/json",
+                                "Origin": "https://example.com"})
+        assert status == 403
+        assert tcp.health()["processed"] == 0
+
+    def test_arbitrary_output_refused(self, tcp, physics, tmp_path):
+        target = tmp_path / "victim.txt"
+        with pytest.raises(RuntimeError, match="403"):
+            tcp.transform(physics=physics, output=target, write=True)
+        assert not target.exists()
+
+
+class TestUnixSocket:
+    def test_round_trip(self, physics, tmp_path):
+        socket_path = str(tmp_path / "s2.sock")
+        service = Stage2Service(workers=0)
+        server = _start(service, socket_path=socket_path)
+        try:
+            client = Stage2Client(socket_path=socket_path)
+            assert client.health()["status"] == "ok"
+            assert len(client.transform(physics=physics)["events"]["frames"]) == len(FRAMES)
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+
+
+class TestWorkerPool:
+    def test_pool_transform(self, physics):
+        service = Stage2Service(workers=1)
+        try:
+            result = service.transform({"physics": physics, "source": "clip_physics.json"})
+            assert len(result["events"]["frames"]) == len(FRAMES)
+            assert service.health()["workers"] == 1
+        finally:
+            service.close()
+
+
+# ---------------------------------------------------------------------------
+# Client CLI
+# ---------------------------------------------------------------------------
+
+
+class TestRunCommand:
+    def test_sends_files_concurrently(self, physics, tmp_path, monkeypatch):
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"clip{i}_physics.json"
+            path.write_text(json.dumps(physics))
+            paths.append(str(path))
+        barrier = threading.Barrier(len(paths), timeout=5)
+
+        def transform(self, path, **kwargs):
+            barrier.wait()          # only passes once all requests are in flight
+            return {"output": str(path), "events": 1, "elapsed_ms": 1.0}
+
+        monkeypatch.setattr(stage2_service.Stage2Client, "transform", transform)
+        result = CliRunner().invoke(stage2_service.main, ["run", *paths, "-j", "3"])
+        assert result.exit_code == 0, result.output
+        assert result.output.count("✅") == len(paths)
+
+    def test_failures_exit_nonzero(self, physics, tmp_path, monkeypatch):
+        path = tmp_path / "clip_physics.json"
+        path.write_text(json.dumps(physics))
+
+        def transform(self, path, **kwargs):
+            raise RuntimeError("Stage 2 service error 500: boom")
+
+        monkeypatch.setattr(stage2_service.Stage2Client, "transform", transform)
+        result = CliRunner().invoke(stage2_service.main, ["run", str(path)])
+        assert result.exit_code == 1
+        assert "❌" in result.output and "boom" in result.output
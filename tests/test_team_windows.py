@@ -0,0 +1,108 @@
+"""Tests for inference/team_windows.py — prefix-sum windowed team classification."""
+
+import random
+
+import pytest
+
+from inference.team_classifier import determine_attacking_team
+from inference.team_windows import TeamWindowClassifier, classify_possession_phases
+
+
+def _player(track_id, zone, team):
+    return {"track_id": track_id, "zone": f"z{zone}", "jersey_number": None, "team": team}
+
+
+def _frame(ts, holder, players):
+    return {
+        "timestamp": str(ts),
+        "ball": {"holder_track_id": holder, "zone": "z8", "state": "Holding"},
+        "players": players,
+    }
+
+
+def _possession(ts, attack, defense, holder):
+    """One frame with ``attack`` spread in the back court and ``defense`` on the 6m line."""
+    players = [_player("gk", 0, "green")]
+    players += [_player(f"{attack}{i}", z, attack) for i, z in enumerate((6, 7, 8, 9, 10))]
+    players += [_player(f"{defense}{i}", z, defense) for i, z in enumerate((1, 2, 3, 4, 5))]
+    return _frame(ts, f"{attack}{holder}", players)
+
+
+def _match(phases, frames_per_phase=20, fps=16):
+    """Alternating possessions: ``phases`` is a list of attacking team colours."""
+    frames = []
+    for attack in phases:
+        defense = "red" if attack == "white" else "white"
+        for _ in range(frames_per_phase):
+            frames.append(_possession(len(frames) / fps, attack, defense, len(frames) % 5))
+    return frames
+
+
+# ---------------------------------------------------------------------------
+# Agreement with the clip classifier
+# ---------------------------------------------------------------------------
+
+class TestWindowAgreesWithClip:
+
+    def test_full_range_matches_determine_attacking_team(self):
+        frames = _match(["white", "red", "white"])
+        clip = determine_attacking_team(frames)
+        window = TeamWindowClassifier(frames).classify(0, len(frames))
+        assert window.attacking_team == clip.attacking_team
+        assert window.confidence == pytest.approx(clip.confidence)
+        assert window.signals["scores"] == pytest.approx(clip.signals["scores"])
+
+    def test_random_ranges_match_rescanning(self):
+        rng = random.Random(7)
+        frames = _match(["white", "red", "white", "red"], frames_per_phase=12)
+        clf = TeamWindowClassifier(frames)
+        for _ in range(25):
+            lo = rng.randrange(len(frames) - 1)
+            hi = rng.randrange(lo + 1, len(frames) + 1)
+            clip = determine_attacking_team(frames[lo:hi])
+            window = clf.classify(lo, hi)
+            assert window.signals["scores"] == pytest.approx(clip.signals["scores"])
+            assert window.confidence == pytest.approx(clip.confidence)
+
+    def test_explicit_labels(self):
+        frames = [_frame(0.0, "a1", [_player("a1", 8, "attack"), _player("d1", 3, "defense")])]
+        result = TeamWindowClassifier(frames).classify(0, 1)
+        assert (result.attacking_team, result.confidence) == ("attack", 1.0)
+
+    def test_empty_range(self):
+        clf = TeamWindowClassifier(_match(["white"]))
+        assert clf.classify(5, 5).attacking_team == "unknown"
+
+
+# ---------------------------------------------------------------------------
+# Windows and possession phases
+# ---------------------------------------------------------------------------
+
+class TestWindowsAndPhases:
+
+    def test_time_windows_follow_possession(self):
+        frames = _match(["white", "red"], frames_per_phase=32)   # 2 s each at 16 FPS
+        windows = TeamWindowClassifier(frames).windows(seconds=2.0)
+        assert [w.classification.attacking_team for w in windows] == ["white", "red"]
+        assert windows[0].start_frame == 0 and windows[1].start_frame == 32
+
+    def test_possession_phases(self):
+        frames = _match(["white", "red", "white"])
+        phases = classify_possession_phases(frames)
+        assert [(p.start_frame, p.end_frame) for p in phases] == [(0, 20), (20, 40), (40, 60)]
+        assert [p.classification.attacking_team for p in phases] == ["white", "red", "white"]
+        assert phases[1].to_dict()["defending_team"] == "white"
+
+    def test_short_runs_merge_into_previous_phase(self):
+        frames = _match(["white"], frames_per_phase=20)
+        frames[10]["ball"]["holder_track_id"] = "red0"       # one-frame misread
+        assert len(classify_possession_phases(frames, min_frames=1)) == 3
+        phases = classify_possession_phases(frames, min_frames=4)
+        assert [(p.start_frame, p.end_frame) for p in phases] == [(0, 20)]
+
+    def test_frames_without_holder_join_last_possession(self):
+        frames = _match(["white", "red"])
+        for f in frames[15:25]:
+            f["ball"]["holder_track_id"] = None
+        phases = classify_possession_phases(frames)
+        assert [(p.start_frame, p.end_frame) for p in phases] == [(0, 25), (25, 40)]
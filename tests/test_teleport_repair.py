@@ -0,0 +1,119 @@
+"""Tests for inference/teleport_repair.py — shortest-path fills for zone jumps."""
+
+import copy
+
+from inference.plausibility import zone_matrices
+from inference.teleport_repair import repair_physics, repair_teleports, route_table
+from inference.timeline import resample_physics
+
+
+def _frame(ts, zones):
+    return {
+        "timestamp": str(ts),
+        "ball": {"zone": "z8", "state": "Holding"},
+        "players": [{"track_id": tid, "zone": z, "team": "white"} for tid, z in zones.items()],
+    }
+
+
+def _zones(frames, track_id):
+    return [
+        next((p["zone"] for p in f["players"] if p["track_id"] == track_id), None)
+        for f in frames
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Route table
+# ---------------------------------------------------------------------------
+
+class TestRouteTable:
+
+    def test_rows_match_routes_padded_with_destination(self):
+        table = route_table()
+        m = zone_matrices()
+        route = m.route(5, 11)
+        assert table[5, 11, :len(route)].tolist() == route
+        assert (table[5, 11, len(route):] == 11).all()
+
+
+# ---------------------------------------------------------------------------
+# Repairs
+# ---------------------------------------------------------------------------
+
+class TestRepairTeleports:
+
+    def test_sparse_gap_gets_synthesized_entries(self):
+        frames = [
+            _frame(0.0, {"t1": "z10", "t2": "z8"}),
+            _frame(0.25, {"t2": "z8"}),
+            _frame(0.5, {"t2": "z8"}),
+            _frame(0.75, {"t2": "z8"}),
+            _frame(1.0, {"t1": "z5", "t2": "z8"}),
+        ]
+        out, repairs = repair_teleports(frames)
+        assert _zones(out, "t1") == ["z10", "z2", "z0", "z0", "z5"]
+        assert len(repairs) == 1
+        r = repairs[0]
+        assert (r.track_id, r.zone_from, r.zone_to, r.route) == ("t1", 10, 5, [10, 2, 0, 5])
+        assert r.filled_frames == 3 and r.complete
+        added = next(p for p in out[2]["players"] if p["track_id"] == "t1")
+        assert added["repaired"] and added["team"] == "white"
+
+    def test_resampled_copies_are_overwritten(self):
+        data = resample_physics({"metadata": {}, "frames": [
+            _frame(0.0, {"t1": "z5"}),
+            _frame(0.5, {"t1": "z1"}),
+        ]})
+        out, repairs = repair_teleports(data["frames"])
+        zones = _zones(out, "t1")
+        assert zones[0] == "z5" and zones[-1] == "z1"
+        assert "z0" in zones                       # z5 → z0 → z1
+        assert repairs[0].complete
+
+    def test_no_room_is_incomplete(self):
+        frames = [_frame(0.0, {"t1": "z12"}), _frame(0.0625, {"t1": "z3"})]
+        out, repairs = repair_teleports(frames)
+        assert _zones(out, "t1") == ["z12", "z3"]
+        assert len(repairs) == 1 and not repairs[0].complete
+
+    def test_adjacent_moves_untouched(self):
+        frames = [_frame(0.0, {"t1": "z8"}), _frame(0.5, {}), _frame(1.0, {"t1": "z3"})]
+        out, repairs = repair_teleports(frames)
+        assert repairs == []
+        assert _zones(out, "t1") == ["z8", None, "z3"]
+
+    def test_plausible_non_adjacent_move_untouched(self):
+        # z12 → z3 is 2.1 m apart at least: walkable in a second
+        frames = [_frame(0.0, {"t1": "z12"}), _frame(0.5, {}), _frame(1.0, {"t1": "z3"})]
+        out, repairs = repair_teleports(frames)
+        assert repairs == []
+        assert _zones(out, "t1") == ["z12", None, "z3"]
+
+    def test_long_absence_not_filled(self):
+        # Seen in z12, then 20 s later in z3: off camera, not a teleport
+        data = resample_physics({"metadata": {}, "frames": [
+            _frame(0.0, {"t1": "z12", "t2": "z8"}),
+            *[_frame(t, {"t2": "z8"}) for t in (5.0, 10.0, 15.0)],
+            _frame(20.0, {"t1": "z3", "t2": "z8"}),
+        ]})
+        out, repairs = repair_teleports(data["frames"])
+        assert repairs == []
+        assert out == data["frames"]
+        assert not any(p.get("repaired") for f in out for p in f["players"])
+
+    def test_input_not_mutated(self):
+        frames = [_frame(0.0, {"t1": "z10"}), _frame(0.5, {}), _frame(1.0, {"t1": "z5"})]
+        before = copy.deepcopy(frames)
+        _, repairs = repair_teleports(frames)
+        assert len(repairs) == 1
+        assert frames == before
+
+    def test_repair_physics_records_metadata(self):
+        data = {"metadata": {"fps": 16}, "frames": [
+            _frame(0.0, {"t1": "z12"}), _frame(0.0625, {"t1": "z3"}),
+        ]}
+        out = repair_physics(data)
+        assert out["metadata"]["fps"] == 16
+        assert out["metadata"]["teleport_repairs"]["incomplete"] == 1
+        assert out["metadata"]["teleport_repairs"]["repairs"][0]["route"] == [12, 8, 3]
+        assert "teleport_repairs" not in data["metadata"]
@@ -0,0 +1,116 @@
+"""Tests for inference/timeline.py — uniform 16 fps resampling of sparse frames."""
+
+import numpy as np
+import pytest
+
+from inference.timeline import (
+    BALL_STATES,
+    NO_ZONE,
+    build_timeline,
+    format_timestamp,
+    resample_physics,
+)
+
+
+def _frame(ts, zones, holder=None, state="Holding", ball_zone="z8"):
+    return {
+        "timestamp": ts,
+        "ball": {"holder_track_id": holder, "zone": ball_zone, "state": state},
+        "players": [{"track_id": tid, "zone": z, "team": "white"} for tid, z in zones.items()],
+    }
+
+
+SPARSE = [
+    _frame("0.0", {"t1": "z8", "t2": "z2"}, holder="t1"),
+    _frame("0.25", {"t1": "z9", "t2": "z2"}, holder="t1"),
+    _frame("0.5", {"t1": "z9"}, holder=None, state="In-Air", ball_zone="z3"),
+]
+
+
+# ---------------------------------------------------------------------------
+# Grid construction
+# ---------------------------------------------------------------------------
+
+class TestBuildTimeline:
+
+    def test_grid_length_and_flags(self):
+        tl = build_timeline(SPARSE, fps=16)
+        assert len(tl) == 9                       # 0.0 … 0.5 at 1/16 s
+        assert tl.observed.tolist() == [True, False, False, False, True,
+                                        False, False, False, True]
+        assert (tl.interpolated == ~tl.observed).all()
+
+    def test_forward_fill_columns(self):
+        tl = build_timeline(SPARSE, fps=16)
+        t1 = tl.track_ids.index("t1")
+        t2 = tl.track_ids.index("t2")
+        assert tl.player_zones[:, t1].tolist() == [8] * 4 + [9] * 5
+        assert tl.player_zones[:, t2].tolist() == [2] * 8 + [NO_ZONE]
+        assert tl.ball_holder[3] == t1
+        assert tl.ball_holder[8] == -1
+        assert BALL_STATES[tl.ball_state[8]] == "In-Air"
+        assert tl.ball_zone[8] == 3
+
+    def test_unsorted_and_duplicate_frames(self):
+        frames = [SPARSE[2], SPARSE[0], _frame("0.26", {"t1": "z10"}), SPARSE[1]]
+        tl = build_timeline(frames, fps=16)
+        # 0.25 and 0.26 both snap to slot 4; the later timestamp wins
+        assert tl.frame(4)["players"][0]["zone"] == "z10"
+
+    def test_start_offset_and_end(self):
+        tl = build_timeline([_frame("1.0", {"t1": "z8"})], fps=4, end=2.0)
+        assert tl.start_slot == 4
+        assert len(tl) == 5
+        np.testing.assert_allclose(tl.times, [1.0, 1.25, 1.5, 1.75, 2.0])
+
+    def test_invalid_timestamps_dropped(self):
+        tl = build_timeline([{"timestamp": "?"}, _frame("0.0", {})])
+        assert len(tl.source_frames) == 1
+        with pytest.raises(ValueError):
+            build_timeline([{"timestamp": None}])
+
+    @pytest.mark.parametrize("fps", [0, -16])
+    def test_non_positive_fps_rejected(self, fps):
+        with pytest.raises(ValueError, match="fps"):
+            build_timeline(SPARSE, fps=fps)
+
+
+# ---------------------------------------------------------------------------
+# O(1) lookup and frame reconstruction
+# ---------------------------------------------------------------------------
+
+class TestLookup:
+
+    def test_index_at(self):
+        tl = build_timeline(SPARSE, fps=16)
+        assert tl.index_at(0.0) == 0
+        assert tl.index_at(0.0625) == 1
+        assert tl.index_at(0.1) == 1
+        assert tl.index_at(-3) == 0
+        assert tl.index_at(99) == len(tl) - 1
+
+    def test_interpolated_frame(self):
+        frame = build_timeline(SPARSE, fps=16).frame_at(0.32)
+        assert frame["timestamp"] == "0.3125"
+        assert frame["interpolated"] is True
+        assert frame["source_timestamp"] == "0.25"
+        assert frame["players"][0]["zone"] == "z9"
+
+    def test_observed_frame(self):
+        frame = build_timeline(SPARSE, fps=16).frame(4)
+        assert frame["observed"] is True
+        assert "source_timestamp" not in frame
+
+    def test_format_timestamp(self):
+        assert format_timestamp(0.0) == "0.0"
+        assert format_timestamp(100.0625) == "100.0625"
+
+
+class TestResamplePhysics:
+
+    def test_wraps_metadata(self):
+        data = resample_physics({"metadata": {"video": "clip.mp4"}, "frames": SPARSE})
+        assert len(data["frames"]) == 9
+        assert data["metadata"]["video"] == "clip.mp4"
+        assert data["metadata"]["timeline"]["observed_frames"] == 3
+        assert data["metadata"]["timeline"]["interpolated_frames"] == 6
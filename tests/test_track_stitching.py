@@ -0,0 +1,126 @@
+"""Tests for inference/track_stitching.py — union-find merging of split track IDs."""
+
+import copy
+
+from inference.track_stitching import (
+    UnionFind,
+    stitch_physics,
+    stitch_tracks,
+    track_lifetimes,
+)
+
+
+def _frame(ts, players, holder=None):
+    return {
+        "timestamp": str(ts),
+        "ball": {"holder_track_id": holder, "zone": "z8", "state": "Holding"},
+        "players": [
+            {"track_id": tid, "zone": f"z{zone}", "team": team, "jersey_number": jersey}
+            for tid, zone, team, jersey in players
+        ],
+    }
+
+
+def _ids(frame):
+    return sorted(p["track_id"] for p in frame["players"])
+
+
+# ---------------------------------------------------------------------------
+# Union-find and lifetimes
+# ---------------------------------------------------------------------------
+
+class TestUnionFind:
+
+    def test_union_and_find(self):
+        uf = UnionFind(5)
+        uf.union(0, 1)
+        uf.union(3, 4)
+        uf.union(1, 4)
+        assert len({uf.find(i) for i in range(5)}) == 2
+        assert uf.find(0) == uf.find(3)
+        assert uf.find(2) == 2
+
+
+class TestLifetimes:
+
+    def test_first_last_and_labels(self):
+        frames = [
+            _frame(0.0, [("t1", 7, "white", None)]),
+            _frame(0.5, [("t1", 8, "white", "9")]),
+            _frame(1.0, [("t1", 3, "white", "9")]),
+        ]
+        (lt,) = track_lifetimes(frames)
+        assert (lt.start_time, lt.end_time, lt.start_zone, lt.end_zone) == (0.0, 1.0, 7, 3)
+        assert (lt.team, lt.jersey_number, lt.observations) == ("white", "9", 3)
+
+
+# ---------------------------------------------------------------------------
+# Stitching
+# ---------------------------------------------------------------------------
+
+class TestStitch:
+
+    def test_occluded_track_is_renamed(self):
+        frames = [
+            _frame(0.0, [("t1", 7, "white", "9"), ("t2", 3, "blue", None)]),
+            _frame(0.5, [("t2", 3, "blue", None)]),
+            _frame(1.0, [("t7", 8, "white", "9"), ("t2", 3, "blue", None)], holder="t7"),
+        ]
+        out, merges = stitch_tracks(frames)
+        assert [(m.kept, m.merged, m.previous) for m in merges] == [("t1", "t7", "t1")]
+        assert _ids(out[2]) == ["t1", "t2"]
+        renamed = next(p for p in out[2]["players"] if p["track_id"] == "t1")
+        assert renamed["stitched_from"] == "t7"
+        assert out[2]["ball"]["holder_track_id"] == "t1"
+
+    def test_chains_through_several_fragments(self):
+        frames = [
+            _frame(0.0, [("a", 7, "white", None)]),
+            _frame(0.5, [("b", 7, "white", None)]),
+            _frame(1.0, [("c", 8, "white", None)]),
+        ]
+        out, merges = stitch_tracks(frames)
+        assert len(merges) == 2
+        assert all(_ids(f) == ["a"] for f in out)
+
+    def test_conflicts_block_merges(self):
+        frames = [
+            _frame(0.0, [("t1", 7, "white", "9"), ("t3", 1, "white", None)]),
+            _frame(0.5, [("t2", 7, "white", "4"),     # different jersey
+                         ("t4", 7, "blue", None),     # different team
+                         ("t5", 11, "white", None)]), # too far for the gap
+        ]
+        out, merges = stitch_tracks(frames)
+        assert merges == []
+        assert out == frames
+
+    def test_tracks_seen_together_never_merge(self):
+        frames = [
+            _frame(0.0, [("t1", 7, "white", None), ("t2", 7, "white", None)]),
+            _frame(0.5, [("t1", 7, "white", None), ("t2", 8, "white", None)]),
+        ]
+        assert stitch_tracks(frames)[1] == []
+
+    def test_gap_limit(self):
+        frames = [_frame(0.0, [("t1", 7, "white", None)]), _frame(3.0, [("t2", 7, "white", None)])]
+        assert stitch_tracks(frames)[1] == []
+        assert len(stitch_tracks(frames, max_gap=5.0)[1]) == 1
+
+    def test_closest_successor_wins(self):
+        frames = [
+            _frame(0.0, [("t1", 7, "white", None)]),
+            _frame(0.5, [("near", 7, "white", None)]),
+            _frame(1.5, [("far", 7, "white", None)]),
+        ]
+        _, merges = stitch_tracks(frames)
+        assert (merges[0].previous, merges[0].merged) == ("t1", "near")
+
+    def test_input_not_mutated_and_metadata(self):
+        frames = [_frame(0.0, [("t1", 7, "white", None)]), _frame(0.5, [("t2", 8, "white", None)])]
+        before = copy.deepcopy(frames)
+        data = stitch_physics({"metadata": {"fps": 16}, "frames": frames})
+        assert frames == before
+        meta = data["metadata"]["track_stitching"]
+        assert (meta["tracks_before"], meta["tracks_after"]) == (2, 1)
+        assert meta["merges"][0]["merged"] == "t2"
+        assert data["metadata"]["fps"] == 16
@@ -0,0 +1,72 @@
+"""Tests for inference/zone_intervals.py — run-length zone history per track."""
+
+import random
+
+from inference.zone_intervals import ZoneIntervals, build_zone_intervals
+
+
+def _frame(ts, zones):
+    return {
+        "timestamp": str(ts),
+        "players": [{"track_id": tid, "zone": z} for tid, z in zones.items()],
+    }
+
+
+FRAMES = [
+    _frame(0.0, {"t1": "z7", "t2": "z3"}),
+    _frame(0.5, {"t1": "z7", "t2": "z3"}),
+    _frame(1.0, {"t1": "z8"}),
+    _frame(1.5, {"t1": "z8", "t2": "z4"}),
+    _frame(2.0, {"t1": "z7"}),
+]
+
+
+class TestBuild:
+
+    def test_runs_per_track(self):
+        iv = build_zone_intervals(FRAMES)
+        rows = iv.rows("t1")
+        assert iv.zone[rows].tolist() == [7, 8, 7]
+        assert iv.start_time[rows].tolist() == [0.0, 1.0, 2.0]
+        assert iv.end_time[rows].tolist() == [0.5, 1.5, 2.0]
+        assert iv.frames[rows].tolist() == [2, 2, 1]
+        assert iv.zone[iv.rows("t2")].tolist() == [3, 4]
+        assert iv.move_count() == 3
+
+    def test_unordered_frames(self):
+        shuffled = FRAMES[::-1]
+        assert build_zone_intervals(shuffled).to_dict() == build_zone_intervals(FRAMES).to_dict()
+
+    def test_empty(self):
+        iv = build_zone_intervals([])
+        assert len(iv) == 0 and iv.zone_at("t1", 0.0) is None
+
+
+class TestLookup:
+
+    def test_zone_at_is_last_known_zone(self):
+        iv = build_zone_intervals(FRAMES)
+        assert iv.zone_at("t1", 0.75) == 7
+        assert iv.zone_at("t1", 1.0) == 8
+        assert iv.zone_at("t2", 1.2) == 3      # unseen at 1.0 s: still z3
+        assert iv.zone_at("t2", 1.6) is None   # after its last observation
+        assert iv.zone_at("t1", -1.0) is None
+        assert iv.zone_at("t9", 1.0) is None
+
+    def test_zones_at(self):
+        assert build_zone_intervals(FRAMES).zones_at(1.5) == {"t1": 8, "t2": 4}
+
+    def test_matches_frame_scan(self):
+        rng = random.Random(5)
+        frames = [_frame(i / 16, {f"t{k}": f"z{rng.choice([7, 8, 9])}" for k in range(4)})
+                  for i in range(100)]
+        iv = build_zone_intervals(frames)
+        for i in rng.sample(range(100), 20):
+            for p in frames[i]["players"]:
+                assert iv.zone_at(p["track_id"], i / 16) == int(p["zone"][1:])
+
+    def test_round_trip(self):
+        iv = build_zone_intervals(FRAMES)
+        again = ZoneIntervals.from_dict(iv.to_dict())
+        assert again.to_dict() == iv.to_dict()
+        assert again.zone_at("t1", 1.2) == 8